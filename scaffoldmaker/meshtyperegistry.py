@@ -0,0 +1,212 @@
+'''
+Registry of mesh types which describes each by name, default options and
+ordered option names without importing its generator module until used.
+'''
+
+import ast
+import copy
+import importlib
+import io
+
+ENTRY_POINT_GROUP = 'scaffoldmaker.meshtypes'
+
+_metadataMethodNames = [ 'getName', 'getDefaultOptions', 'getOrderedOptionNames' ]
+
+_parsedModules = {}
+
+def _parseModuleSource(moduleName):
+    '''
+    Parse source of module without importing it, caching result.
+    :return: ast.Module or None if source not available.
+    '''
+    if moduleName not in _parsedModules:
+        tree = None
+        try:
+            import importlib.util
+            spec = importlib.util.find_spec(moduleName)
+            if spec and spec.origin and spec.origin.endswith('.py'):
+                with io.open(spec.origin, encoding='utf-8') as stream:
+                    tree = ast.parse(stream.read(), spec.origin)
+        except (ImportError, AttributeError, ValueError, IOError, SyntaxError):
+            pass
+        _parsedModules[moduleName] = tree
+    return _parsedModules[moduleName]
+
+def _readStaticMetadataMethods(moduleName, className, methodNames):
+    '''
+    Get the return values of static methods of className in module moduleName
+    from the module source without importing it. Only methods whose body is a
+    single return of a Python literal, after any docstring, are read, with
+    ast.literal_eval; nothing from the module is executed.
+    :param moduleName: Full dotted name of module containing class.
+    :param className: Name of mesh type class.
+    :param methodNames: List of method names to read.
+    :return: dict methodName -> value for methods which could be read.
+    '''
+    values = {}
+    tree = _parseModuleSource(moduleName)
+    if tree is None:
+        return values
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and (node.name == className):
+            for method in node.body:
+                if isinstance(method, ast.FunctionDef) and (method.name in methodNames) and (not method.args.args):
+                    statements = method.body
+                    if ast.get_docstring(method) is not None:
+                        statements = statements[1:]
+                    if (len(statements) == 1) and isinstance(statements[0], ast.Return) and (statements[0].value is not None):
+                        try:
+                            values[method.name] = ast.literal_eval(statements[0].value)
+                        except (ValueError, TypeError, SyntaxError):
+                            # derived metadata needs the real class
+                            pass
+            break
+    return values
+
+
+class MeshTypeInfo(object):
+    '''
+    Lightweight description of a mesh type. Name, default options and ordered
+    option names are read from the generator module source where the class
+    declares them as literals; the generator module is only imported when the
+    mesh type class or derived metadata is needed.
+    '''
+
+    def __init__(self, moduleName, className, name=None):
+        '''
+        :param moduleName: Full dotted name of module containing the mesh type class.
+        :param className: Name of mesh type class in module.
+        :param name: Optional mesh type name, otherwise read from class getName().
+        '''
+        self._moduleName = moduleName
+        self._className = className
+        self._meshType = None
+        self._metadata = None
+        if name is not None:
+            self._metadata = { 'getName' : name }
+
+    def _getMetadata(self, methodName):
+        if (self._metadata is None) or (methodName not in self._metadata):
+            if self._meshType is None:
+                metadata = _readStaticMetadataMethods(self._moduleName, self._className, _metadataMethodNames)
+                if self._metadata:
+                    metadata.update(self._metadata)
+                self._metadata = metadata
+            if methodName not in self._metadata:
+                # not readable from source: must ask the class itself
+                self._metadata[methodName] = getattr(self.getMeshType(), methodName)()
+        return self._metadata[methodName]
+
+    def getModuleName(self):
+        return self._moduleName
+
+    def getClassName(self):
+        return self._className
+
+    def getName(self):
+        return self._getMetadata('getName')
+
+    def getDefaultOptions(self):
+        '''
+        :return: New dict of default options, safe for caller to modify.
+        '''
+        return copy.deepcopy(self._getMetadata('getDefaultOptions'))
+
+    def getOrderedOptionNames(self):
+        '''
+        :return: New list of option names in display order, safe for caller to modify.
+        '''
+        return list(self._getMetadata('getOrderedOptionNames'))
+
+    def isLoaded(self):
+        '''
+        :return: True if generator module has been imported.
+        '''
+        return self._meshType is not None
+
+    def getMeshType(self):
+        '''
+        Import generator module on first use.
+        :return: Mesh type class.
+        '''
+        if self._meshType is None:
+            module = importlib.import_module(self._moduleName)
+            self._meshType = getattr(module, self._className)
+        return self._meshType
+
+
+class MeshTypeRegistry(object):
+    '''
+    Ordered collection of MeshTypeInfo. External packages register mesh types
+    with entry points in group 'scaffoldmaker.meshtypes' with value
+    'module.name:ClassName'; these are added after the built-in mesh types.
+    '''
+
+    def __init__(self, loadEntryPoints=True):
+        self._meshTypeInfos = []
+        self._entryPointsLoaded = not loadEntryPoints
+
+    def registerMeshType(self, moduleName, className, name=None):
+        '''
+        Register mesh type class by module and class name. Module is not imported.
+        Re-registering the same class is ignored.
+        :param name: Optional name, saves reading it from module source.
+        :return: MeshTypeInfo for mesh type.
+        '''
+        for meshTypeInfo in self._meshTypeInfos:
+            if (meshTypeInfo.getModuleName() == moduleName) and (meshTypeInfo.getClassName() == className):
+                return meshTypeInfo
+        meshTypeInfo = MeshTypeInfo(moduleName, className, name)
+        self._meshTypeInfos.append(meshTypeInfo)
+        return meshTypeInfo
+
+    def _loadEntryPoints(self):
+        self._entryPointsLoaded = True
+        for moduleName, className in _iterEntryPointTargets(ENTRY_POINT_GROUP):
+            self.registerMeshType(moduleName, className)
+
+    def getMeshTypeInfos(self):
+        '''
+        :return: List of MeshTypeInfo in registration order.
+        '''
+        if not self._entryPointsLoaded:
+            self._loadEntryPoints()
+        return list(self._meshTypeInfos)
+
+    def getMeshTypeNames(self):
+        return [ meshTypeInfo.getName() for meshTypeInfo in self.getMeshTypeInfos() ]
+
+    def findMeshTypeInfoByName(self, name):
+        '''
+        :return: MeshTypeInfo with name, or None if not found.
+        '''
+        for meshTypeInfo in self.getMeshTypeInfos():
+            if meshTypeInfo.getName() == name:
+                return meshTypeInfo
+        return None
+
+
+def _iterEntryPointTargets(group):
+    '''
+    Yield (moduleName, className) for each entry point in group without loading them.
+    '''
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        entry_points = None
+    if entry_points is not None:
+        eps = entry_points()
+        if hasattr(eps, 'select'):
+            eps = eps.select(group=group)
+        else:
+            eps = eps.get(group, [])
+        for ep in eps:
+            moduleName, _, attr = ep.value.partition(':')
+            yield moduleName.strip(), attr.strip()
+        return
+    try:
+        import pkg_resources
+    except ImportError:
+        return
+    for ep in pkg_resources.iter_entry_points(group):
+        yield ep.module_name, '.'.join(ep.attrs)
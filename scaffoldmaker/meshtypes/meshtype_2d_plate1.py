@@ -3,10 +3,9 @@ Generates a 2-D unit plate mesh with variable numbers of elements in 2 direction
 """
 
 from __future__ import division
-import math
-from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
+import numpy
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshgrid import getGridElementNodeIdentifiers
 
 class MeshType_2d_plate1(object):
     '''
@@ -46,79 +45,46 @@ class MeshType_2d_plate1(object):
             options['Number of elements 2'] = 1
 
     @staticmethod
-    def generateMesh(region, options):
+    def generateMeshData(options):
         """
-        :param region: Zinc region to define model in. Must be empty.
+        Generate the bicubic Hermite mesh without Zinc.
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         coordinateDimensions = options['Coordinate dimensions']
         elementsCount1 = options['Number of elements 1']
         elementsCount2 = options['Number of elements 2']
         useCrossDerivatives = options['Use cross derivatives']
 
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        coordinates = fm.createFieldFiniteElement(coordinateDimensions)
-        coordinates.setName('coordinates')
-        coordinates.setManaged(True)
-        coordinates.setTypeCoordinate(True)
-        coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-        coordinates.setComponentName(1, 'x')
-        coordinates.setComponentName(2, 'y')
-        if coordinateDimensions == 3:
-            coordinates.setComponentName(3, 'z')
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplate = nodes.createNodetemplate()
-        nodetemplate.defineField(coordinates)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
+        meshData = MeshData(2, coordinateDimensions)
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1) ]
         if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
+            valueLabelVersions.append((VALUE_LABEL_D2_DS1DS2, 1))
 
-        mesh = fm.findMeshByDimension(2)
-        bicubicHermiteBasis = fm.createElementbasis(2, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
-        eft = mesh.createElementfieldtemplate(bicubicHermiteBasis)
-        if not useCrossDerivatives:
-            for n in range(4):
-                eft.setFunctionNumberOfTerms(n*4 + 4, 0)
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_SQUARE)
-        result = elementtemplate.defineField(coordinates, -1, eft)
-
-        cache = fm.createFieldcache()
+        eft = EftDescriptor.createBicubicHermite(useCrossDerivatives)
 
         # create nodes
-        nodeIdentifier = 1
-        x = [ 0.0, 0.0, 0.0 ]
-        dx_ds1 = [ 1.0 / elementsCount1, 0.0, 0.0 ]
-        dx_ds2 = [ 0.0, 1.0 / elementsCount2, 0.0 ]
-        zero = [ 0.0, 0.0, 0.0 ]
-        for n2 in range(elementsCount2 + 1):
-            x[1] = n2 / elementsCount2
-            for n1 in range(elementsCount1 + 1):
-                x[0] = n1 / elementsCount1
-                node = nodes.createNode(nodeIdentifier, nodetemplate)
-                cache.setNode(node)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                if useCrossDerivatives:
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                nodeIdentifier = nodeIdentifier + 1
+        nodesCount = (elementsCount1 + 1)*(elementsCount2 + 1)
+        x2, x1 = numpy.meshgrid(
+            numpy.arange(elementsCount2 + 1) / elementsCount2,
+            numpy.arange(elementsCount1 + 1) / elementsCount1, indexing='ij')
+        parameters = numpy.zeros((nodesCount, len(valueLabelVersions), coordinateDimensions))
+        parameters[:, 0, 0] = x1.ravel()
+        parameters[:, 0, 1] = x2.ravel()
+        parameters[:, 1, 0] = 1.0 / elementsCount1
+        parameters[:, 2, 1] = 1.0 / elementsCount2
+        meshData.addNodes(numpy.arange(1, nodesCount + 1), valueLabelVersions, parameters)
 
         # create elements
-        elementIdentifier = 1
-        no2 = (elementsCount1 + 1)
-        for e2 in range(elementsCount2):
-            for e1 in range(elementsCount1):
-                element = mesh.createElement(elementIdentifier, elementtemplate)
-                bni = e2*no2 + e1 + 1
-                nodeIdentifiers = [ bni, bni + 1, bni + no2, bni + no2 + 1 ]
-                result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                elementIdentifier = elementIdentifier + 1
-
-        fm.endChange()
+        nodeIdentifiers = getGridElementNodeIdentifiers([ elementsCount1, elementsCount2 ])
+        meshData.addElements(eft, numpy.arange(1, len(nodeIdentifiers) + 1), nodeIdentifiers)
+        return meshData
 
+    @staticmethod
+    def generateMesh(region, options):
+        """
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        MeshType_2d_plate1.generateMeshData(options).createInRegion(region)
@@ -4,9 +4,9 @@ Generates a 2-D unit tube mesh with variable numbers of elements around, along.
 
 from __future__ import division
 import math
-from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
+import numpy
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshgrid import getGridElementNodeIdentifiers
 
 class MeshType_2d_tube1(object):
     '''
@@ -40,85 +40,51 @@ class MeshType_2d_tube1(object):
             options['Number of elements around'] = 2
 
     @staticmethod
-    def generateMesh(region, options):
+    def generateMeshData(options):
         """
-        :param region: Zinc region to define model in. Must be empty.
+        Generate the bicubic Hermite mesh without Zinc.
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         elementsCountAlong = options['Number of elements along']
         elementsCountAround = options['Number of elements around']
         useCrossDerivatives = options['Use cross derivatives']
 
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        coordinates = fm.createFieldFiniteElement(3)
-        coordinates.setName('coordinates')
-        coordinates.setManaged(True)
-        coordinates.setTypeCoordinate(True)
-        coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-        coordinates.setComponentName(1, 'x')
-        coordinates.setComponentName(2, 'y')
-        coordinates.setComponentName(3, 'z')
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplate = nodes.createNodetemplate()
-        nodetemplate.defineField(coordinates)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
+        meshData = MeshData(2)
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1) ]
         if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
+            valueLabelVersions.append((VALUE_LABEL_D2_DS1DS2, 1))
 
-        mesh = fm.findMeshByDimension(2)
-        bicubicHermiteBasis = fm.createElementbasis(2, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
-        eft = mesh.createElementfieldtemplate(bicubicHermiteBasis)
-        if not useCrossDerivatives:
-            for n in range(4):
-                eft.setFunctionNumberOfTerms(n*4 + 4, 0)
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_SQUARE)
-        result = elementtemplate.defineField(coordinates, -1, eft)
-
-        cache = fm.createFieldcache()
+        eft = EftDescriptor.createBicubicHermite(useCrossDerivatives)
 
         # create nodes
-        nodeIdentifier = 1
+        nodesCount = elementsCountAround*(elementsCountAlong + 1)
         radiansPerElementAround = 2.0*math.pi/elementsCountAround
-        x = [ 0.0, 0.0, 0.0 ]
-        dx_ds1 = [ 0.0, 0.0, 0.0 ]
-        dx_ds2 = [ 0.0, 0.0, 1.0 / elementsCountAlong ]
-        zero = [ 0.0, 0.0, 0.0 ]
         radius = 0.5
-        for n2 in range(elementsCountAlong + 1):
-            x[2] = n2 / elementsCountAlong
-            for n1 in range(elementsCountAround):
-                radiansAround = n1*radiansPerElementAround
-                cosRadiansAround = math.cos(radiansAround)
-                sinRadiansAround = math.sin(radiansAround)
-                x[0] = radius*cosRadiansAround
-                x[1] = radius*sinRadiansAround
-                dx_ds1[0] = radiansPerElementAround*radius*-sinRadiansAround
-                dx_ds1[1] = radiansPerElementAround*radius*cosRadiansAround
-                node = nodes.createNode(nodeIdentifier, nodetemplate)
-                cache.setNode(node)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                if useCrossDerivatives:
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                nodeIdentifier = nodeIdentifier + 1
+        z, radiansAround = numpy.meshgrid(
+            numpy.arange(elementsCountAlong + 1) / elementsCountAlong,
+            numpy.arange(elementsCountAround)*radiansPerElementAround, indexing='ij')
+        cosRadiansAround = numpy.cos(radiansAround.ravel())
+        sinRadiansAround = numpy.sin(radiansAround.ravel())
+        parameters = numpy.zeros((nodesCount, len(valueLabelVersions), 3))
+        parameters[:, 0, 0] = radius*cosRadiansAround
+        parameters[:, 0, 1] = radius*sinRadiansAround
+        parameters[:, 0, 2] = z.ravel()
+        parameters[:, 1, 0] = radiansPerElementAround*radius*-sinRadiansAround
+        parameters[:, 1, 1] = radiansPerElementAround*radius*cosRadiansAround
+        parameters[:, 2, 2] = 1.0 / elementsCountAlong
+        meshData.addNodes(numpy.arange(1, nodesCount + 1), valueLabelVersions, parameters)
 
         # create elements
-        elementIdentifier = 1
-        for e2 in range(elementsCountAlong):
-            for e1 in range(elementsCountAround):
-                element = mesh.createElement(elementIdentifier, elementtemplate)
-                bni1 = e2*elementsCountAround + e1 + 1
-                bni2 = e2*elementsCountAround + (e1 + 1)%elementsCountAround + 1
-                nodeIdentifiers = [ bni1, bni2, bni1 + elementsCountAround, bni2 + elementsCountAround ]
-                result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                elementIdentifier = elementIdentifier + 1
-
-        fm.endChange()
+        nodeIdentifiers = getGridElementNodeIdentifiers([ elementsCountAround, elementsCountAlong ], loop1=True)
+        meshData.addElements(eft, numpy.arange(1, len(nodeIdentifiers) + 1), nodeIdentifiers)
+        return meshData
 
+    @staticmethod
+    def generateMesh(region, options):
+        """
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        MeshType_2d_tube1.generateMeshData(options).createInRegion(region)
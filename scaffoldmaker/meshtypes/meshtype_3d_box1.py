@@ -3,12 +3,10 @@ Generates a 3-D unit box mesh with variable numbers of elements in 3 directions.
 """
 
 from __future__ import division
-import math
-from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
+import numpy
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshgrid import getGridElementNodeIdentifiers
 from scaffoldmaker.utils.meshrefinement import MeshRefinement
-from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
 
 class MeshType_3d_box1(object):
     '''
@@ -57,94 +55,55 @@ class MeshType_3d_box1(object):
                 options[key] = 1
 
     @staticmethod
-    def generateBaseMesh(region, options):
+    def generateBaseMeshData(options):
         """
-        Generate the base tricubic Hermite mesh. See also generateMesh().
-        :param region: Zinc region to define model in. Must be empty.
+        Generate the base tricubic Hermite mesh without Zinc, e.g. for writing
+        with scaffoldmaker.utils.exformat.writeExFile().
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         elementsCount1 = options['Number of elements 1']
         elementsCount2 = options['Number of elements 2']
         elementsCount3 = options['Number of elements 3']
         useCrossDerivatives = options['Use cross derivatives']
 
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        coordinates = fm.createFieldFiniteElement(3)
-        coordinates.setName('coordinates')
-        coordinates.setManaged(True)
-        coordinates.setTypeCoordinate(True)
-        coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-        coordinates.setComponentName(1, 'x')
-        coordinates.setComponentName(2, 'y')
-        coordinates.setComponentName(3, 'z')
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplate = nodes.createNodetemplate()
-        nodetemplate.defineField(coordinates)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-        if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
+        meshData = MeshData(3)
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ]
         if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS2DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1)
+            valueLabelVersions += [ (VALUE_LABEL_D2_DS1DS2, 1), (VALUE_LABEL_D2_DS1DS3, 1), (VALUE_LABEL_D2_DS2DS3, 1), (VALUE_LABEL_D3_DS1DS2DS3, 1) ]
 
-        mesh = fm.findMeshByDimension(3)
-
-        tricubichermite = eftfactory_tricubichermite(mesh, useCrossDerivatives)
-        eft = tricubichermite.createEftBasic()
-
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplate.defineField(coordinates, -1, eft)
-
-        cache = fm.createFieldcache()
+        eft = EftDescriptor.createTricubicHermite(useCrossDerivatives)
 
         # create nodes
-        nodeIdentifier = 1
-        x = [ 0.0, 0.0, 0.0 ]
-        dx_ds1 = [ 1.0 / elementsCount1, 0.0, 0.0 ]
-        dx_ds2 = [ 0.0, 1.0 / elementsCount2, 0.0 ]
-        dx_ds3 = [ 0.0, 0.0, 1.0 / elementsCount3 ]
-        zero = [ 0.0, 0.0, 0.0 ]
-        for n3 in range(elementsCount3 + 1):
-            x[2] = n3 / elementsCount3
-            for n2 in range(elementsCount2 + 1):
-                x[1] = n2 / elementsCount2
-                for n1 in range(elementsCount1 + 1):
-                    x[0] = n1 / elementsCount1
-                    node = nodes.createNode(nodeIdentifier, nodetemplate)
-                    cache.setNode(node)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-                    if useCrossDerivatives:
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS3, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS2DS3, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1, zero)
-                    nodeIdentifier = nodeIdentifier + 1
+        nodesCount = (elementsCount1 + 1)*(elementsCount2 + 1)*(elementsCount3 + 1)
+        x3, x2, x1 = numpy.meshgrid(
+            numpy.arange(elementsCount3 + 1) / elementsCount3,
+            numpy.arange(elementsCount2 + 1) / elementsCount2,
+            numpy.arange(elementsCount1 + 1) / elementsCount1, indexing='ij')
+        parameters = numpy.zeros((nodesCount, len(valueLabelVersions), 3))
+        parameters[:, 0, 0] = x1.ravel()
+        parameters[:, 0, 1] = x2.ravel()
+        parameters[:, 0, 2] = x3.ravel()
+        parameters[:, 1, 0] = 1.0 / elementsCount1
+        parameters[:, 2, 1] = 1.0 / elementsCount2
+        parameters[:, 3, 2] = 1.0 / elementsCount3
+        meshData.addNodes(numpy.arange(1, nodesCount + 1), valueLabelVersions, parameters)
 
         # create elements
-        elementIdentifier = 1
-        no2 = (elementsCount1 + 1)
-        no3 = (elementsCount2 + 1)*no2
-        for e3 in range(elementsCount3):
-            for e2 in range(elementsCount2):
-                for e1 in range(elementsCount1):
-                    element = mesh.createElement(elementIdentifier, elementtemplate)
-                    bni = e3*no3 + e2*no2 + e1 + 1
-                    nodeIdentifiers = [ bni, bni + 1, bni + no2, bni + no2 + 1, bni + no3, bni + no3 + 1, bni + no2 + no3, bni + no2 + no3 + 1 ]
-                    result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                    elementIdentifier = elementIdentifier + 1
-
-        fm.endChange()
+        nodeIdentifiers = getGridElementNodeIdentifiers([ elementsCount1, elementsCount2, elementsCount3 ])
+        meshData.addElements(eft, numpy.arange(1, len(nodeIdentifiers) + 1), nodeIdentifiers)
+
+        return meshData
+
+    @staticmethod
+    def generateBaseMesh(region, options):
+        """
+        Generate the base tricubic Hermite mesh. See also generateMesh().
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        MeshType_3d_box1.generateBaseMeshData(options).createInRegion(region)
 
     @staticmethod
     def generateMesh(region, options):
@@ -5,12 +5,13 @@ Generates a 3-D heart atria model, suitable for attachment to the
 
 from __future__ import division
 import math
+import numpy
 from scaffoldmaker.utils.eft_utils import *
 from scaffoldmaker.utils.interpolation import *
+from scaffoldmaker.utils.meshdata import *
 from scaffoldmaker.utils.zinc_utils import *
 from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
 from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
 from opencmiss.zinc.node import Node
 
 class MeshType_3d_heartatria1(object):
@@ -101,6 +102,52 @@ class MeshType_3d_heartatria1(object):
                 if options[key] < 1.0E-6:
                     options[key] = 1.0E-6
 
+    @staticmethod
+    def getAtriumRegularNodesLayout(centre, majorAxes, minorAxes, scalesZ, aRadians, aDeltaRadians,
+            upRadians, deltaUpRadians, baseToEquatorRatio, elementsCountUp):
+        """
+        Compute coordinates and derivatives of all regular nodes on the inner and
+        outer walls of one atrium at once. Nodes lie on ellipses scaled by the sine
+        of radians up, with x, y from centre + cos(around)*major + sin(around)*minor.
+        :param centre: Centre [x, y] of atrium base.
+        :param majorAxes, minorAxes: Inner and outer base [x, y] ellipse half-axes.
+        :param scalesZ: Inner and outer z scale.
+        :param aRadians, aDeltaRadians: Lists of radians and element radians around.
+        :param upRadians, deltaUpRadians: Inner and outer lists of radians and element radians up.
+        :param baseToEquatorRatio: Ratio of equator to base ellipse size.
+        :param elementsCountUp: Number of rows of regular nodes, excluding apex.
+        :return: x, dx_ds1, dx_ds2, dx_ds3 arrays (2, elementsCountUp, elementsCountAround, 3),
+        with first index 0 for inner and 1 for outer wall nodes.
+        """
+        centre = numpy.array(centre)
+        # arrays are indexed by wall/n3, n2, n1, component; wall = n3 for node values
+        majorAxes = numpy.array(majorAxes)[:, numpy.newaxis, numpy.newaxis, :]
+        minorAxes = numpy.array(minorAxes)[:, numpy.newaxis, numpy.newaxis, :]
+        scalesZ = numpy.array(scalesZ)[:, numpy.newaxis, numpy.newaxis]
+        radiansAround = numpy.array(aRadians)
+        cosRadiansAround = numpy.cos(radiansAround)[:, numpy.newaxis]
+        sinRadiansAround = numpy.sin(radiansAround)[:, numpy.newaxis]
+        deltaRadiansAround = numpy.array(aDeltaRadians)[:, numpy.newaxis]
+        radiansUp = numpy.array([ upRadians[n3][:elementsCountUp] for n3 in range(2) ])[:, :, numpy.newaxis]
+        cosRadiansUp = numpy.cos(radiansUp)
+        sinRadiansUp = numpy.sin(radiansUp)
+        deltaRadiansUp = numpy.array([ deltaUpRadians[n3][:elementsCountUp] for n3 in range(2) ])[:, :, numpy.newaxis]
+        scalingUp = (baseToEquatorRatio*sinRadiansUp)[..., numpy.newaxis]
+        axisAround = cosRadiansAround*majorAxes + sinRadiansAround*minorAxes
+        # positions on inner and outer walls at radians up of inner and outer nodes
+        xWall = numpy.empty((2, 2, elementsCountUp, len(aRadians), 3))
+        xWall[..., :2] = centre + scalingUp*axisAround[:, numpy.newaxis]
+        xWall[..., 2] = -scalesZ[:, numpy.newaxis]*cosRadiansUp
+        n3 = numpy.arange(2)
+        x = xWall[n3, n3]
+        dx_ds1 = numpy.zeros(x.shape)
+        dx_ds1[..., :2] = (scalingUp*deltaRadiansAround)*(-sinRadiansAround*majorAxes + cosRadiansAround*minorAxes)
+        dx_ds2 = numpy.empty(x.shape)
+        dx_ds2[..., :2] = (deltaRadiansUp*cosRadiansUp)[..., numpy.newaxis]*axisAround
+        dx_ds2[..., 2] = deltaRadiansUp*sinRadiansUp*scalesZ
+        dx_ds3 = xWall[1] - xWall[0]
+        return x, dx_ds1, dx_ds2, dx_ds3
+
     @staticmethod
     def generateMesh(region, options):
         """
@@ -133,34 +180,15 @@ class MeshType_3d_heartatria1(object):
         fm.beginChange()
         coordinates = getOrCreateCoordinateField(fm)
 
-        cache = fm.createFieldcache()
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplateApex = nodes.createNodetemplate()
-        nodetemplateApex.defineField(coordinates)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
-        if useCrossDerivatives:
-            nodetemplate = nodes.createNodetemplate()
-            nodetemplate.defineField(coordinates)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS2DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1)
-        else:
-            nodetemplate = nodetemplateApex
-
         ##############
         # Create nodes
         ##############
 
+        # nodes are added to lists of identifiers and [ x, dx_ds1, dx_ds2, dx_ds3 ],
+        # then created in the region together from a MeshData
         nodeIdentifier = 1
+        nodeIdentifiers = []
+        nodeParameters = []
 
         outerMajorMag = innerMajorMag + freeWallThickness
         outerMinorMag = innerMinorMag + freeWallThickness
@@ -239,83 +267,35 @@ class MeshType_3d_heartatria1(object):
         laApexNodeId = [ -1 ]*2
         raApexNodeId = [ -1 ]*2
 
+        # regular nodes up atria
+        laLayout = MeshType_3d_heartatria1.getAtriumRegularNodesLayout([ laCentreX, laCentreY ],
+            [ [ laInnerMajorX, laInnerMajorY ], [ laOuterMajorX, laOuterMajorY ] ],
+            [ [ laInnerMinorX, laInnerMinorY ], [ laOuterMinorX, laOuterMinorY ] ],
+            [ innerScaleZ, outerScaleZ ], laRadians, laDeltaRadians, upRadians, deltaUpRadians, baseToEquatorRatio, elementsCountUp)
+        raLayout = MeshType_3d_heartatria1.getAtriumRegularNodesLayout([ raCentreX, raCentreY ],
+            [ [ raInnerMajorX, raInnerMajorY ], [ raOuterMajorX, raOuterMajorY ] ],
+            [ [ raInnerMinorX, raInnerMinorY ], [ raOuterMinorX, raOuterMinorY ] ],
+            [ innerScaleZ, outerScaleZ ], raRadians, raDeltaRadians, upRadians, deltaUpRadians, baseToEquatorRatio, elementsCountUp)
+        laLayout = [ array.tolist() for array in laLayout ]
+        raLayout = [ array.tolist() for array in raLayout ]
+
         for n3 in range(2):
             for n2 in range(elementsCountUp):
 
-                # GRC support separate inner and outer radians up
-                radiansUp = upRadians[n3][n2]
-                scalingUp = baseToEquatorRatio*math.sin(radiansUp)
-                innerZ = -innerScaleZ*math.cos(radiansUp)
-                outerZ = -outerScaleZ*math.cos(radiansUp)
-
                 laLayerNodeId = [-1]*elementsCountAround
                 laNodeId[n3].append(laLayerNodeId)
                 raLayerNodeId = [-1]*elementsCountAround
                 raNodeId[n3].append(raLayerNodeId)
 
-                # regular nodes up atria
                 for i in range(2):
-                    if i == 0:
-                        # left
-                        centreX, centreY = laCentreX, laCentreY
-                        aRadians = laRadians
-                        aDeltaRadians = laDeltaRadians
-                        layerNodeId = laLayerNodeId
-                        innerMajorX, innerMajorY = laInnerMajorX, laInnerMajorY
-                        innerMinorX, innerMinorY = laInnerMinorX, laInnerMinorY
-                        outerMajorX, outerMajorY = laOuterMajorX, laOuterMajorY
-                        outerMinorX, outerMinorY = laOuterMinorX, laOuterMinorY
-                    else:
-                        # right
-                        centreX, centreY = raCentreX, raCentreY
-                        aRadians = raRadians
-                        aDeltaRadians = raDeltaRadians
-                        layerNodeId = raLayerNodeId
-                        innerMajorX, innerMajorY = raInnerMajorX, raInnerMajorY
-                        innerMinorX, innerMinorY = raInnerMinorX, raInnerMinorY
-                        outerMajorX, outerMajorY = raOuterMajorX, raOuterMajorY
-                        outerMinorX, outerMinorY = raOuterMinorX, raOuterMinorY
-
+                    layerNodeId = laLayerNodeId if (i == 0) else raLayerNodeId
+                    x, dx_ds1, dx_ds2, dx_ds3 = [ array[n3][n2] for array in (laLayout if (i == 0) else raLayout) ]
                     for n1 in range(elementsCountAround):
-                        radiansAround = aRadians[n1]
-                        cosRadiansAround = math.cos(radiansAround)
-                        sinRadiansAround = math.sin(radiansAround)
-                        inner = [
-                            centreX + scalingUp*(cosRadiansAround*innerMajorX + sinRadiansAround*innerMinorX),
-                            centreY + scalingUp*(cosRadiansAround*innerMajorY + sinRadiansAround*innerMinorY),
-                            innerZ ]
-                        outer = [
-                            centreX + scalingUp*(cosRadiansAround*outerMajorX + sinRadiansAround*outerMinorX),
-                            centreY + scalingUp*(cosRadiansAround*outerMajorY + sinRadiansAround*outerMinorY),
-                            outerZ ]
                         if (n3 == 1) and (n2 <= elementsCountUpSeptum) and (n1 == 0):
                             continue  # right septum node created in next loop
-                        node = nodes.createNode(nodeIdentifier, nodetemplate)
                         layerNodeId[n1] = nodeIdentifier
-                        cache.setNode(node)
-                        result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, inner if (n3 == 0) else outer)
-                        if n3 == 0:
-                            dx_ds1 = [
-                                scalingUp*aDeltaRadians[n1]*(-sinRadiansAround*innerMajorX + cosRadiansAround*innerMinorX),
-                                scalingUp*aDeltaRadians[n1]*(-sinRadiansAround*innerMajorY + cosRadiansAround*innerMinorY),
-                                0.0 ]
-                            dx_ds2 = [
-                                deltaUpRadians[n3][n2]*math.cos(radiansUp)*(cosRadiansAround*innerMajorX + sinRadiansAround*innerMinorX),
-                                deltaUpRadians[n3][n2]*math.cos(radiansUp)*(cosRadiansAround*innerMajorY + sinRadiansAround*innerMinorY),
-                                deltaUpRadians[n3][n2]*math.sin(radiansUp)*innerScaleZ ]
-                        else:
-                            dx_ds1 = [
-                                scalingUp*aDeltaRadians[n1]*(-sinRadiansAround*outerMajorX + cosRadiansAround*outerMinorX),
-                                scalingUp*aDeltaRadians[n1]*(-sinRadiansAround*outerMajorY + cosRadiansAround*outerMinorY),
-                                0.0 ]
-                            dx_ds2 = [
-                                deltaUpRadians[n3][n2]*math.cos(radiansUp)*(cosRadiansAround*outerMajorX + sinRadiansAround*outerMinorX),
-                                deltaUpRadians[n3][n2]*math.cos(radiansUp)*(cosRadiansAround*outerMajorY + sinRadiansAround*outerMinorY),
-                                deltaUpRadians[n3][n2]*math.sin(radiansUp)*outerScaleZ ]
-                        dx_ds3 = [ outer[0] - inner[0], outer[1] - inner[1], outer[2] - inner[2] ]
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
+                        nodeIdentifiers.append(nodeIdentifier)
+                        nodeParameters.append([ x[n1], dx_ds1[n1], dx_ds2[n1], dx_ds3[n1] ])
                         nodeIdentifier += 1
 
             # apexes
@@ -358,53 +338,34 @@ class MeshType_3d_heartatria1(object):
                         baseToEquatorRatio*deltaUpRadians[n3][-1]*outerMinorY,
                         0.0 ]
                 dx_ds3 = [ 0.0, 0.0, freeWallThickness ]
-                node = nodes.createNode(nodeIdentifier, nodetemplate)
                 apexNodeId[n3] = nodeIdentifier
-                cache.setNode(node)
-                result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
+                nodeIdentifiers.append(nodeIdentifier)
+                nodeParameters.append([ x, dx_ds1, dx_ds2, dx_ds3 ])
                 nodeIdentifier += 1
 
         # transfer inner septum nodes to outer on opposite side, set derivative 3 to be node difference
+        # node identifiers are consecutive from 1, so parameters of node are at identifier - 1
         for n2 in range(elementsCountUpSeptum + 1):
             laNodeId[1][n2][0] = raNodeId[0][n2][0]
             raNodeId[1][n2][0] = laNodeId[0][n2][0]
-            node2 = nodes.findNodeByIdentifier(laNodeId[1][n2][0])
-            cache.setNode(node2)
-            result, x_o = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-            node1 = nodes.findNodeByIdentifier(laNodeId[0][n2][0])
-            cache.setNode(node1)
-            result, x_i = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
+            x_o = nodeParameters[laNodeId[1][n2][0] - 1][0]
+            x_i = nodeParameters[laNodeId[0][n2][0] - 1][0]
             dx_ds3 = [ (x_o[i] - x_i[i]) for i in range(3) ]
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-            dx_ds3 = [ -v for v in dx_ds3 ]
-            cache.setNode(node2)
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
+            nodeParameters[laNodeId[0][n2][0] - 1][3] = dx_ds3
+            nodeParameters[laNodeId[1][n2][0] - 1][3] = [ -v for v in dx_ds3 ]
 
         # create extra node(s) at top of septum
         n2 = elementsCountUpSeptum + 1
-        node1 = nodes.findNodeByIdentifier(laNodeId[1][n2][0])
-        cache.setNode(node1)
-        result, v1 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-        result, d1 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, 3)
+        v1, d1 = [ nodeParameters[laNodeId[1][n2][0] - 1][i] for i in (0, 2) ]
         d1 = [ -d for d in d1 ]
-        node2 = nodes.findNodeByIdentifier(raNodeId[1][n2][0])
-        cache.setNode(node2)
-        result, v2 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-        result, d2 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, 3)
+        v2, d2 = [ nodeParameters[raNodeId[1][n2][0] - 1][i] for i in (0, 2) ]
         xi = 0.5
         vc = interpolateCubicHermite(v1, d1, v2, d2, xi )
         dc = interpolateCubicHermiteDerivative(v1, d1, v2, d2, xi )
         x = [ vc[0], vc[1], vc[2] ]
         # get magnitude of dx_ds1 from arc around apex to next node
-        node = nodes.findNodeByIdentifier(apexNodeId[0])
-        cache.setNode(node)
-        result, ac = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-        node = nodes.findNodeByIdentifier(laNodeId[1][n2 - 1][1])
-        cache.setNode(node)
-        result, vb = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
+        ac = nodeParameters[apexNodeId[0] - 1][0]
+        vb = nodeParameters[laNodeId[1][n2 - 1][1] - 1][0]
         a = [ (vc[i] - ac[i]) for i in range(3) ]
         b = [ (vb[i] - ac[i]) for i in range(3) ]
         mag_a = math.sqrt(a[0]*a[0] + a[1]*a[1] + a[1]*a[1])
@@ -414,35 +375,34 @@ class MeshType_3d_heartatria1(object):
         dx_ds1 = [ mag, 0.0, 0.0 ]
         dx_ds2 = [ 0.5*d for d in dc ]
         dx_ds3 = [ 0.0, 0.0, vc[2] + innerScaleZ*math.cos(math.pi - totalArcUpRadians + septumArcUpRadians) ]
-        node = nodes.createNode(nodeIdentifier, nodetemplate)
         septumNodeId = nodeIdentifier
-        cache.setNode(node)
-        result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-        #print('septum', node.isValid(), result, ' nodes', laNodeId[1][n2][0], raNodeId[1][n2][0])
-        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
+        nodeIdentifiers.append(nodeIdentifier)
+        nodeParameters.append([ x, dx_ds1, dx_ds2, dx_ds3 ])
         nodeIdentifier += 1
 
         if False:
             # show centre/axes of atria
-            node = nodes.createNode(nodeIdentifier, nodetemplate)
-            cache.setNode(node)
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, [ laCentreX, laCentreY, innerScaleZ*math.cos(totalArcUpRadians) ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, [ laInnerMajorX, laInnerMajorY, 0.0 ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, [ laInnerMinorX, laInnerMinorY, 0.0 ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, [ 0.0, 0.0, lengthRatio - freeWallThickness ])
+            nodeIdentifiers.append(nodeIdentifier)
+            nodeParameters.append([ [ laCentreX, laCentreY, innerScaleZ*math.cos(totalArcUpRadians) ],
+                [ laInnerMajorX, laInnerMajorY, 0.0 ], [ laInnerMinorX, laInnerMinorY, 0.0 ], [ 0.0, 0.0, lengthRatio - freeWallThickness ] ])
             nodeIdentifier += 1
 
             # show axes of right atrium
-            node = nodes.createNode(nodeIdentifier, nodetemplate)
-            cache.setNode(node)
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, [ raCentreX, raCentreY, innerScaleZ*math.cos(totalArcUpRadians) ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, [ raInnerMajorX, raInnerMajorY, 0.0 ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, [ raInnerMinorX, raInnerMinorY, 0.0 ])
-            result = coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, [ 0.0, 0.0, lengthRatio - freeWallThickness ])
+            nodeIdentifiers.append(nodeIdentifier)
+            nodeParameters.append([ [ raCentreX, raCentreY, innerScaleZ*math.cos(totalArcUpRadians) ],
+                [ raInnerMajorX, raInnerMajorY, 0.0 ], [ raInnerMinorX, raInnerMinorY, 0.0 ], [ 0.0, 0.0, lengthRatio - freeWallThickness ] ])
             nodeIdentifier += 1
 
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ]
+        nodeParameters = numpy.array(nodeParameters, dtype=numpy.float64)
+        if useCrossDerivatives:
+            # cross derivatives are zero
+            valueLabelVersions += [ (VALUE_LABEL_D2_DS1DS2, 1), (VALUE_LABEL_D2_DS1DS3, 1), (VALUE_LABEL_D2_DS2DS3, 1), (VALUE_LABEL_D3_DS1DS2DS3, 1) ]
+            nodeParameters = numpy.concatenate([ nodeParameters, numpy.zeros(nodeParameters.shape) ], axis=1)
+        meshData = MeshData(3)
+        meshData.addNodes(nodeIdentifiers, valueLabelVersions, nodeParameters)
+        meshData.createInRegion(region)
+
         #################
         # Create elements
         #################
@@ -679,25 +639,20 @@ class MeshType_3d_heartatria1(object):
                 result = element.setScaleFactors(eft1, scalefactors)
                 elementIdentifier = elementIdentifier + 1
 
-        # add right atria inlets (venae cavae)
+        # add right atria inlets (venae cavae) and left atria inlets (pulmonary veins)
 
+        vcLength = vcInnerDiameter*0.5
+        pvLength = pvInnerDiameter*0.5
+        inlets = []
         for elementId in [ ivcElementId, svcElementId ]:
-            element = mesh.findElementByIdentifier(elementId)
-            vcLength = vcInnerDiameter*0.5
-            tricubichermite.replaceElementWithInlet4(element, elementIdentifier, nodetemplate, nodeIdentifier, vcLength, vcInnerDiameter, vcWallThickness)
-            elementIdentifier += 4
-            nodeIdentifier += 8
-            mesh.destroyElement(element)
-
-        # add left atria inlets (pulmonary veins)
-
+            inlets.append((mesh.findElementByIdentifier(elementId), vcLength, vcInnerDiameter, vcWallThickness))
         for elementId in [ lapvElementId, lppvElementId, rapvElementId, rppvElementId ]:
-            element = mesh.findElementByIdentifier(elementId)
-            pvLength = pvInnerDiameter*0.5
-            tricubichermite.replaceElementWithInlet4(element, elementIdentifier, nodetemplate, nodeIdentifier, pvLength, pvInnerDiameter, pvWallThickness)
-            elementIdentifier += 4
-            nodeIdentifier += 8
-            mesh.destroyElement(element)
+            inlets.append((mesh.findElementByIdentifier(elementId), pvLength, pvInnerDiameter, pvWallThickness))
+        tricubichermite.replaceElementsWithInlet4(inlets, elementIdentifier, nodeIdentifier)
+        elementIdentifier += 4*len(inlets)
+        nodeIdentifier += 8*len(inlets)
+        for inlet in inlets:
+            mesh.destroyElement(inlet[0])
 
         fm.endChange()
 
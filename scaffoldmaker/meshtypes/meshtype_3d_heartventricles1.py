@@ -4,14 +4,14 @@ Generates 3-D Left and Right ventricles mesh starting from modified sphere shell
 
 from __future__ import division
 import math
+import numpy
 from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.coordinatetransforms import *
+from scaffoldmaker.utils.meshdata import VALUE_LABEL_VALUE
 from scaffoldmaker.utils.eft_utils import *
 from scaffoldmaker.utils.zinc_utils import *
 from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
 from scaffoldmaker.utils.meshrefinement import MeshRefinement
-from opencmiss.zinc.element import Element, Elementbasis, Elementfieldtemplate
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
 
 class MeshType_3d_heartventricles1:
     '''
@@ -114,6 +114,171 @@ class MeshType_3d_heartventricles1:
         elif options['Septum arc angle degrees'] > 270.0:
             options['Septum arc angle degrees'] = 270.0
 
+    @staticmethod
+    def _getApexScale(options):
+        """
+        :return: Scale factors for x, y, z making LV inner apex spherical.
+        """
+        return numpy.array([ 1.0, 1.0, options['Length ratio']/2.0 - options['LV wall thickness']*options['LV wall thickness ratio apex'] ])
+
+    @staticmethod
+    def _getRadiansPerElementAround(options):
+        """
+        :return: radiansPerElementOrig, radiansPerElementSeptum, radiansPerElementLVFreeWall, radiansPerElementTransition
+        """
+        elementsCountAround = options['Number of elements around']
+        elementsCountAcrossSeptum = options['Number of elements across septum']
+        septumArcAngleRadians = options['Septum arc angle degrees']*math.pi/180.0
+        radiansPerElementOrig = 2.0*math.pi/elementsCountAround
+        radiansPerElementSeptum = septumArcAngleRadians/elementsCountAcrossSeptum
+        # want LV-RV 'transition' elements to be mean size of Septum and LV FreeWall elements
+        radiansRemaining = 2.0*math.pi - septumArcAngleRadians
+        elementsCountAroundLVFreeWall = elementsCountAround - elementsCountAcrossSeptum - 2
+        radiansPerElementLVFreeWall = (radiansRemaining - radiansPerElementSeptum) / (elementsCountAroundLVFreeWall + 1)
+        radiansPerElementTransition = 0.5*(radiansPerElementSeptum + radiansPerElementLVFreeWall)
+        return radiansPerElementOrig, radiansPerElementSeptum, radiansPerElementLVFreeWall, radiansPerElementTransition
+
+    @staticmethod
+    def septumThetaTransform(x, options):
+        """
+        Resize elements around LV to get desired septum arc angle, by remapping
+        spherical polar theta of coordinates scaled to make the apex spherical.
+        Not defined on the apex axis.
+        :param x: Coordinates array (n, 3).
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: New coordinates array (n, 3), Jacobian d(new x)/dx array (n, 3, 3).
+        """
+        elementsCountAcrossSeptum = options['Number of elements across septum']
+        septumArcAngleRadians = options['Septum arc angle degrees']*math.pi/180.0
+        radiansPerElementOrig, radiansPerElementSeptum, radiansPerElementLVFreeWall, radiansPerElementTransition = \
+            MeshType_3d_heartventricles1._getRadiansPerElementAround(options)
+        xyzScale = MeshType_3d_heartventricles1._getApexScale(options)
+        sp, dsp_dx = rectangularCartesianToSphericalPolar(x*xyzScale)
+        theta = sp[:, 1]
+        thetaContinuous = numpy.where(theta < 0.5*radiansPerElementOrig, theta + 2.0*math.pi, theta)
+        thetaOffset = thetaContinuous - radiansPerElementOrig
+        inSeptum = (thetaOffset > -0.5*radiansPerElementOrig) & (thetaOffset < (elementsCountAcrossSeptum + 0.5)*radiansPerElementOrig)
+        septumScale = radiansPerElementSeptum/radiansPerElementOrig
+        lvFreeWallScale = radiansPerElementLVFreeWall/radiansPerElementOrig
+        thetaNewSeptumStart = radiansPerElementOrig + (radiansPerElementOrig - radiansPerElementSeptum)*elementsCountAcrossSeptum/2.0
+        thetaNewSeptum = thetaOffset*septumScale + thetaNewSeptumStart
+        thetaNewLVFreeWall = (thetaOffset - radiansPerElementOrig*(elementsCountAcrossSeptum + 1.0))*lvFreeWallScale + \
+            (thetaNewSeptumStart + septumArcAngleRadians + radiansPerElementTransition)
+        sp[:, 1] = numpy.where(inSeptum, thetaNewSeptum, thetaNewLVFreeWall)
+        dsp_dx[:, 1, :] *= numpy.where(inSeptum, septumScale, lvFreeWallScale)[:, numpy.newaxis]
+        xNewScale, dxNewScale_dsp = sphericalPolarToRectangularCartesian(sp)
+        J = numpy.matmul(dxNewScale_dsp, dsp_dx)*xyzScale[numpy.newaxis, :]/xyzScale[:, numpy.newaxis]
+        return xNewScale/xyzScale, J
+
+    @staticmethod
+    def baseThinningTransform(x, innerRadius, LVWallThicknessRatioBase):
+        """
+        Make LV walls thinner at base by scaling cylindrical polar radius beyond innerRadius.
+        :param x: Coordinates array (n, 3).
+        :param innerRadius: Radius from z axis of inside of LV at mid RV.
+        :param LVWallThicknessRatioBase: Scale applied to radius outside innerRadius.
+        :return: New coordinates array (n, 3), Jacobian d(new x)/dx array (n, 3, 3).
+        """
+        ir = innerRadius*0.9999
+        cp, dcp_dx = rectangularCartesianToCylindricalPolar(x)
+        cp[:, 0] = ir + (cp[:, 0] - ir)*LVWallThicknessRatioBase
+        dcp_dx[:, 0, :] *= LVWallThicknessRatioBase
+        xNew, dxNew_dcp = cylindricalPolarToRectangularCartesian(cp)
+        return xNew, numpy.matmul(dxNew_dcp, dcp_dx)
+
+    @staticmethod
+    def baseFlattenTransform(x, zZeroDist, options):
+        """
+        Flatten LV normal to mid-RV-aorta-mitral axis plus additional flatten angle,
+        by an amount decreasing quadratically to zero at z = zZeroDist.
+        :param x: Coordinates array (n, 3).
+        :param zZeroDist: z coordinate at which there is no flattening.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: New coordinates array (n, 3), Jacobian d(new x)/dx array (n, 3, 3).
+        """
+        elementsCountAcrossSeptum = options['Number of elements across septum']
+        LVWallThickness = options['LV wall thickness']
+        LVBaseFlattenRatio = options['LV base flatten ratio']
+        LVBaseFlattenAngleRadians = options['LV base flatten angle degrees']*math.pi/180.0
+        radiansPerElementOrig = MeshType_3d_heartventricles1._getRadiansPerElementAround(options)[0]
+        septumCentreRadians = (1.0 + elementsCountAcrossSeptum/2.0)*radiansPerElementOrig
+        psi = septumCentreRadians + LVBaseFlattenAngleRadians - 0.5*math.pi
+        ri = 0.5 - LVWallThickness
+        xyzScale = MeshType_3d_heartventricles1._getApexScale(options)
+        sp, dsp_dx = rectangularCartesianToSphericalPolar(x*xyzScale)
+        dsp_dx *= xyzScale
+        r, phi = sp[:, 0], sp[:, 2]
+        dr, dphi = dsp_dx[:, 0], dsp_dx[:, 2]
+        # theta around z is the same for scaled and unscaled coordinates
+        theta = sp[:, 1]
+        dtheta = dsp_dx[:, 1]
+        z = x[:, 2]
+        # flatten ratio = new inner radius / original inner radius
+        zfact = (1.0/(zZeroDist*zZeroDist))*(z*z) + (-2.0/zZeroDist)*z + 1.0
+        beta = zfact*(1.0 - LVBaseFlattenRatio)  # 1 - squash factor
+        alpha = 1.0 - beta  # z-dependent squash factor
+        dbeta = numpy.zeros((len(x), 3))
+        dbeta[:, 2] = (2.0*z/(zZeroDist*zZeroDist) - 2.0/zZeroDist)*(1.0 - LVBaseFlattenRatio)
+        thetaMinusPsi = theta - psi
+        cosThetaMinusPsi = numpy.cos(thetaMinusPsi)[:, numpy.newaxis]
+        sinThetaMinusPsi = numpy.sin(thetaMinusPsi)[:, numpy.newaxis]
+        rf = alpha*r + beta*(r - ri)
+        drf = (alpha + beta)[:, numpy.newaxis]*dr - ri*dbeta
+        xNew = rf*cosThetaMinusPsi[:, 0]
+        yNew = r*sinThetaMinusPsi[:, 0]
+        dxNew = drf*cosThetaMinusPsi - rf[:, numpy.newaxis]*sinThetaMinusPsi*dtheta
+        dyNew = dr*sinThetaMinusPsi + r[:, numpy.newaxis]*cosThetaMinusPsi*dtheta
+        rNew = numpy.sqrt(xNew*xNew + yNew*yNew)
+        drNew = (xNew[:, numpy.newaxis]*dxNew + yNew[:, numpy.newaxis]*dyNew)/rNew[:, numpy.newaxis]
+        thetaMinusPsiRaw = numpy.arctan2(yNew, xNew)
+        dthetaMinusPsiRaw = (xNew[:, numpy.newaxis]*dyNew - yNew[:, numpy.newaxis]*dxNew)/(rNew*rNew)[:, numpy.newaxis]
+        thetaWrap = (thetaMinusPsi < -1.0) & (thetaMinusPsiRaw > 1.0)
+        thetaMinusPsiFix = numpy.where(thetaWrap, thetaMinusPsi + 2.0*math.pi, thetaMinusPsi)
+        # above theta is too great; average with thetaMinusPsiRaw
+        spNew = numpy.stack([ rNew, 0.5*(thetaMinusPsiFix + thetaMinusPsiRaw) + psi, phi ], axis=1)
+        dspNew_dx = numpy.stack([ drNew, 0.5*(dtheta + dthetaMinusPsiRaw), dphi ], axis=1)
+        xNewScale, dxNewScale_dsp = sphericalPolarToRectangularCartesian(spNew)
+        J = numpy.matmul(dxNewScale_dsp, dspNew_dx)/xyzScale[:, numpy.newaxis]
+        return xNewScale/xyzScale, J
+
+    @staticmethod
+    def transformBaseMeshData(meshData, options):
+        """
+        Transform half sphere shell LV nodes for septum arc angle, base wall
+        thinning and base flattening, with derivatives, all in numpy.
+        :param meshData: MeshData from MeshType_3d_sphereshell1.generateBaseMeshData
+        with the top half excluded, as in generateBaseMesh(). Modified in place.
+        :param options: Dict containing options. See getDefaultOptions().
+        """
+        elementsCountAround = options['Number of elements around']
+        elementsCountUp = options['Number of elements up']
+        elementsCountThroughLVWall = options['Number of elements through LV wall']
+        elementsCountAcrossSeptum = options['Number of elements across septum']
+        LVWallThicknessRatioBase = options['LV wall thickness ratio base']
+        LVBaseFlattenRatio = options['LV base flatten ratio']
+        nor = elementsCountAround
+        now = 1 + elementsCountUp*nor
+        nodeIdentifiers = meshData.getNodeIdentifiers()
+        def getNodeValue(nodeIdentifier):
+            return meshData.getNodeParameters(VALUE_LABEL_VALUE)[numpy.where(nodeIdentifiers == nodeIdentifier)[0][0]]
+
+        # apex nodes are on the theta singularity and are not remapped
+        nonApex = ((nodeIdentifiers - 1) % now) != 0
+        transformMeshDataNodes(meshData, lambda x: MeshType_3d_heartventricles1.septumThetaTransform(x, options), nonApex)
+
+        isBase = meshData.getNodeParameters(VALUE_LABEL_VALUE)[:, 2] > -0.0001
+
+        if LVWallThicknessRatioBase != 1.0:
+            # get inside node at middle of RV
+            midRVnid = now - elementsCountAround + 2 + (elementsCountAcrossSeptum // 2)
+            x = getNodeValue(midRVnid)
+            innerRadius = math.sqrt(x[0]*x[0] + x[1]*x[1])
+            transformMeshDataNodes(meshData, lambda x: MeshType_3d_heartventricles1.baseThinningTransform(x, innerRadius, LVWallThicknessRatioBase), isBase)
+
+        if LVBaseFlattenRatio != 1.0:
+            zZeroDist = getNodeValue(now - nor)[2]
+            transformMeshDataNodes(meshData, lambda x: MeshType_3d_heartventricles1.baseFlattenTransform(x, zZeroDist, options), isBase)
+
     @staticmethod
     def generateBaseMesh(region, options):
         """
@@ -122,6 +287,9 @@ class MeshType_3d_heartventricles1:
         :param options: Dict containing options. See getDefaultOptions().
         :return: None
         """
+        from opencmiss.zinc.element import Element, Elementbasis, Elementfieldtemplate
+        from opencmiss.zinc.field import Field
+        from opencmiss.zinc.node import Node
         elementsCountAround = options['Number of elements around']
         elementsCountUp = options['Number of elements up']
         elementsCountThroughLVWall = options['Number of elements through LV wall']
@@ -149,7 +317,9 @@ class MeshType_3d_heartventricles1:
         sphereShellOptions['Wall thickness ratio apex'] = LVWallThicknessRatioApex
         sphereShellOptions['Length ratio'] = lengthRatio
         sphereShellOptions['Element length ratio equator/apex'] = options['Element length ratio equator/apex']
-        MeshType_3d_sphereshell1.generateBaseMesh(region, sphereShellOptions)
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(sphereShellOptions)
+        MeshType_3d_heartventricles1.transformBaseMeshData(meshData, options)
+        meshData.createInRegion(region)
 
         fm = region.getFieldmodule()
         fm.beginChange()
@@ -170,159 +340,6 @@ class MeshType_3d_heartventricles1:
         nor = elementsCountAround
         now = 1 + elementsCountUp*nor
 
-        # Resize elements around LV to get desired septum arc angle
-        radiansPerElementOrig = 2.0*math.pi/elementsCountAround
-        radiansPerElementSeptum = septumArcAngleRadians/elementsCountAcrossSeptum
-        # want LV-RV 'transition' elements to be mean size of Septum and LV FreeWall elements
-        radiansRemaining = 2.0*math.pi - septumArcAngleRadians
-        elementsCountAroundLVFreeWall = elementsCountAround - elementsCountAcrossSeptum - 2
-        radiansPerElementLVFreeWall = (radiansRemaining - radiansPerElementSeptum) / (elementsCountAroundLVFreeWall + 1)
-        radiansPerElementTransition = 0.5*(radiansPerElementSeptum + radiansPerElementLVFreeWall)
-        #print('Element size ratio LVFreeWall / Septum', radiansPerElementLVFreeWall/radiansPerElementSeptum)
-        xyz_scale = fm.createFieldConstant([1.0, 1.0, lengthRatio/2.0 - LVWallThickness*LVWallThicknessRatioApex])
-        coordinates_scale = fm.createFieldMultiply(coordinates, xyz_scale)
-        sp = fm.createFieldCoordinateTransformation(coordinates_scale)
-        sp.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_SPHERICAL_POLAR)
-        r = fm.createFieldComponent(sp, 1)
-        theta = fm.createFieldComponent(sp, 2)
-        phi = fm.createFieldComponent(sp, 3)
-        zero = fm.createFieldConstant([0.0])
-        one = fm.createFieldConstant([1.0])  # also used as 'true'
-        two_pi = fm.createFieldConstant([2.0*math.pi])
-        radians_per_element_orig = fm.createFieldConstant([radiansPerElementOrig])
-        half_radians_per_element_orig = fm.createFieldConstant([0.5*radiansPerElementOrig])
-        radians_per_element_transition = fm.createFieldConstant([radiansPerElementTransition])
-
-        theta_continuous = fm.createFieldIf(fm.createFieldLessThan(theta, half_radians_per_element_orig), fm.createFieldAdd(theta, two_pi), theta)
-        theta_offset = fm.createFieldSubtract(theta_continuous, radians_per_element_orig)
-        theta_offset_septum_start = fm.createFieldConstant([-0.5*radiansPerElementOrig])
-        theta_offset_septum_end = fm.createFieldConstant([(elementsCountAcrossSeptum + 0.5)*radiansPerElementOrig])
-        in_septum = fm.createFieldAnd(fm.createFieldGreaterThan(theta_offset, theta_offset_septum_start), fm.createFieldLessThan(theta_offset, theta_offset_septum_end))
-        septum_scale = fm.createFieldConstant([radiansPerElementSeptum/radiansPerElementOrig])
-        thetaNewSeptumStart = radiansPerElementOrig + (radiansPerElementOrig - radiansPerElementSeptum)*elementsCountAcrossSeptum/2.0
-        theta_new_septum_start = fm.createFieldConstant([thetaNewSeptumStart])
-        theta_new_septum = fm.createFieldAdd(fm.createFieldMultiply(theta_offset, septum_scale), theta_new_septum_start)
-        lvfreewall_scale = fm.createFieldConstant([radiansPerElementLVFreeWall/radiansPerElementOrig])
-        theta_offset_lvfreewall_start = fm.createFieldConstant([radiansPerElementOrig*(elementsCountAcrossSeptum + 1.0)])
-        theta_new_lvfreewall_start = fm.createFieldConstant([thetaNewSeptumStart + septumArcAngleRadians + radiansPerElementTransition])
-        theta_new_lvfreewall = fm.createFieldAdd(
-            fm.createFieldMultiply(fm.createFieldSubtract(theta_offset, theta_offset_lvfreewall_start), lvfreewall_scale),
-            theta_new_lvfreewall_start)
-        theta_new = fm.createFieldIf(in_septum, theta_new_septum, theta_new_lvfreewall)
-
-        sp_new = fm.createFieldConcatenate([r, theta_new, phi])
-        sp_new.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_SPHERICAL_POLAR)
-        coordinates_new_scale = fm.createFieldCoordinateTransformation(sp_new)
-        coordinates_new_scale.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-        coordinates_new = fm.createFieldDivide(coordinates_new_scale, xyz_scale)
-        nonApexNodesetGroupField = fm.createFieldNodeGroup(nodes)
-        nonApexNodesetGroup = nonApexNodesetGroupField.getNodesetGroup()
-        nonApexNodesetGroup.addNodesConditional(one)  # add all
-        # remove apex nodes:
-        for i in range(elementsCountThroughLVWall + 1):
-            node = nodes.findNodeByIdentifier(i*now + 1)
-            nonApexNodesetGroup.removeNode(node)
-        fieldassignment = coordinates.createFieldassignment(coordinates_new)
-        fieldassignment.setNodeset(nonApexNodesetGroup)
-        fieldassignment.assign()
-
-        baseNodesetGroup = None
-        baseNodeGroupField = fm.createFieldNodeGroup(nodes)
-        z = fm.createFieldComponent(coordinates, 3)
-        is_base = fm.createFieldGreaterThan(z, fm.createFieldConstant([-0.0001]))
-        baseNodesetGroup = baseNodeGroupField.getNodesetGroup()
-        baseNodesetGroup.addNodesConditional(is_base)
-        #print('baseNodesetGroup.getSize()', baseNodesetGroup.getSize())
-
-        if LVWallThicknessRatioBase != 1.0:
-            # make LV walls thinner at base
-            # get inside node at middle of RV
-            now = 1 + elementsCountUp*elementsCountAround
-            midRVnid = now - elementsCountAround + 2 + (elementsCountAcrossSeptum // 2)
-            #print('midRVnid', midRVnid)
-            midRVnode = nodes.findNodeByIdentifier(midRVnid)
-            cp_coordinates = fm.createFieldCoordinateTransformation(coordinates)
-            cp_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_CYLINDRICAL_POLAR)
-            radius = fm.createFieldComponent(cp_coordinates, 1)
-            theta = fm.createFieldComponent(cp_coordinates, 2)
-            z = fm.createFieldComponent(cp_coordinates, 3)
-            cache.setNode(midRVnode)
-            #result, cp = cp_coordinates.evaluateReal(cache, 3)
-            #coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-            result, innerRadius = radius.evaluateReal(cache, 1)
-            #print('innerRadius', innerRadius)
-            ir = fm.createFieldConstant([innerRadius*0.9999])
-            radius_gt_ir = fm.createFieldGreaterThan(radius, ir)
-            radius_minus_ir = fm.createFieldSubtract(radius, ir)
-            thickness_scale = fm.createFieldConstant([LVWallThicknessRatioBase])
-            delta_radius = fm.createFieldMultiply(radius_minus_ir, thickness_scale)
-            new_radius = fm.createFieldAdd(ir, delta_radius)
-            new_cp_coordinates = fm.createFieldConcatenate([new_radius, theta, z])
-            new_cp_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_CYLINDRICAL_POLAR)
-            new_coordinates = fm.createFieldCoordinateTransformation(new_cp_coordinates)
-            new_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-
-            fieldassignment = coordinates.createFieldassignment(new_coordinates)
-            result = fieldassignment.setNodeset(baseNodesetGroup)
-            fieldassignment.assign()
-
-        if LVBaseFlattenRatio != 1.0:
-            # flatten LV normal to mid-RV-aorta-mitral axis plus additional flatten angle
-            septumCentreRadians = (1.0 + elementsCountAcrossSeptum/2.0)*radiansPerElementOrig
-            flattenAxisRadians = septumCentreRadians + LVBaseFlattenAngleRadians - 0.5*math.pi
-
-            half = fm.createFieldConstant([0.5])
-            minus_one = fm.createFieldConstant([-1.0])
-            minus_two = fm.createFieldConstant([-2.0])
-
-            # flatten ratio = new inner radius / original inner radius
-            beta_base = fm.createFieldConstant([1.0 - LVBaseFlattenRatio])
-            z = fm.createFieldComponent(coordinates, 3)
-            z2 = fm.createFieldMultiply(z, z)
-            zero_dist_node = nodes.findNodeByIdentifier(now - nor)
-            cache.setNode(zero_dist_node)
-            result, z_zero_dist_value = z.evaluateReal(cache, 1)
-            #print('zero dist', result, z_zero_dist_value)
-            z_zerodist = fm.createFieldConstant([z_zero_dist_value])
-            z_zerodist2 = fm.createFieldMultiply(z_zerodist, z_zerodist)
-            z_a = fm.createFieldDivide(one, z_zerodist2)
-            z_b = fm.createFieldDivide(minus_two, z_zerodist)
-            zfact = fm.createFieldAdd(fm.createFieldAdd(fm.createFieldMultiply(z_a, z2), fm.createFieldMultiply(z_b, z)), one)
-            beta = fm.createFieldMultiply(zfact, beta_base)  # 1 - squash factor
-            alpha = fm.createFieldSubtract(one, beta)  # z-dependent squash factor
-
-            psi = fm.createFieldConstant([flattenAxisRadians])
-            ri = fm.createFieldConstant([0.5 - LVWallThickness])
-            theta_minus_psi = fm.createFieldSubtract(theta, psi)
-            cos_theta_minus_psi = fm.createFieldCos(theta_minus_psi)
-            sin_theta_minus_psi = fm.createFieldSin(theta_minus_psi)
-            r_minus_ri = fm.createFieldSubtract(r, ri)
-
-            rf = fm.createFieldAdd(fm.createFieldMultiply(alpha, r), fm.createFieldMultiply(beta, r_minus_ri))
-            x_new = fm.createFieldMultiply(rf, cos_theta_minus_psi)
-            y_new = fm.createFieldMultiply(r, sin_theta_minus_psi)
-            r2_new = fm.createFieldAdd(fm.createFieldMultiply(x_new, x_new), fm.createFieldMultiply(y_new, y_new))
-            r_new = fm.createFieldSqrt(r2_new)
-            theta_minus_psi_raw = fm.createFieldAtan2(y_new, x_new)
-            theta_wrap = fm.createFieldAnd(
-                fm.createFieldLessThan(theta_minus_psi, minus_one),
-                fm.createFieldGreaterThan(theta_minus_psi_raw, one))
-            theta_minus_psi_fix = fm.createFieldIf(theta_wrap, fm.createFieldAdd(theta_minus_psi, two_pi), theta_minus_psi)
-            # above theta is too great; average with theta_minus_psi_raw
-            theta_minus_psi_new = fm.createFieldMultiply(half, fm.createFieldAdd(theta_minus_psi_fix, theta_minus_psi_raw))
-            theta_new = fm.createFieldAdd(theta_minus_psi_new, psi)
-            sp_new = fm.createFieldConcatenate([r_new, theta_new, phi])
-            sp_new.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_SPHERICAL_POLAR)
-            coordinates_new_scale = fm.createFieldCoordinateTransformation(sp_new)
-            coordinates_new_scale.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-            coordinates_new = fm.createFieldDivide(coordinates_new_scale, xyz_scale)
-
-            fieldassignment = coordinates.createFieldassignment(coordinates_new)
-            result = fieldassignment.setNodeset(baseNodesetGroup)
-            fieldassignment.assign()
-
-        baseNodesetGroup = None
-
         tricubichermite = eftfactory_tricubichermite(mesh, useCrossDerivatives)
         tricubicHermiteBasis = fm.createElementbasis(3, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
 
@@ -4,13 +4,12 @@ Generates 3-D Left and Right ventricles mesh starting from modified sphere shell
 
 from __future__ import division
 import math
+from scaffoldmaker.meshtypes.meshtype_3d_heartventricles1 import MeshType_3d_heartventricles1
 from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.coordinatetransforms import transformMeshDataNodes
 from scaffoldmaker.utils.eft_utils import *
-from scaffoldmaker.utils.zinc_utils import *
 from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
-from opencmiss.zinc.element import Element, Elementbasis, Elementfieldtemplate
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
+from scaffoldmaker.utils.meshdata import *
 
 class MeshType_3d_heartventricles2:
     '''
@@ -89,11 +88,14 @@ class MeshType_3d_heartventricles2:
             options['Element length ratio equator/apex'] = 1.0E-6
 
     @staticmethod
-    def generateMesh(region, options):
+    def generateMeshData(options):
         """
-        :param region: Zinc region to define model in. Must be empty.
+        Build the final LV and RV topology and geometry directly in a MeshData:
+        the half sphere shell LV is generated as arrays, the RV nodes are
+        computed from it and LV elements around the RV are replaced by their
+        final hanging node forms before anything is created in Zinc.
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         elementsCountUp = options['Number of elements up']
         elementsCountAround = options['Number of elements around']
@@ -117,24 +119,10 @@ class MeshType_3d_heartventricles2:
         sphereShellOptions['Wall thickness ratio apex'] = LVWallThicknessRatioApex
         sphereShellOptions['Length ratio'] = options['Length ratio']
         sphereShellOptions['Element length ratio equator/apex'] = options['Element length ratio equator/apex']
-        MeshType_3d_sphereshell1.generateMesh(region, sphereShellOptions)
-
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        # find the coordinates field created for the sphere shell
-        coordinates = fm.findFieldByName('coordinates').castFiniteElement()
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(sphereShellOptions)
 
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplate = nodes.createNodetemplate()
-        nodetemplate.defineField(coordinates)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
-
-        mesh = fm.findMeshByDimension(3)
-
-        cache = fm.createFieldcache()
+        nodeIdentifiers = meshData.getNodeIdentifiers()
+        nodeIndexes = dict(zip(nodeIdentifiers.tolist(), range(len(nodeIdentifiers))))
 
         if LVWallThicknessRatioBase != 1.0:
             # make LV walls thinner at base
@@ -142,46 +130,26 @@ class MeshType_3d_heartventricles2:
             now = 1 + elementsCountUp*elementsCountAround
             midRVnid = now - elementsCountAround + 2 + (elementsCountAcrossSeptum // 2)
             #print('midRVnid', midRVnid)
-            midRVnode = nodes.findNodeByIdentifier(midRVnid)
-            cp_coordinates = fm.createFieldCoordinateTransformation(coordinates)
-            cp_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_CYLINDRICAL_POLAR)
-            radius = fm.createFieldComponent(cp_coordinates, 1)
-            theta = fm.createFieldComponent(cp_coordinates, 2)
-            z = fm.createFieldComponent(cp_coordinates, 3)
-            cache.setNode(midRVnode)
-            #result, cp = cp_coordinates.evaluateReal(cache, 3)
-            #coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-            result, innerRadius = radius.evaluateReal(cache, 1)
+            midRV_x = meshData.getNodeParameters(VALUE_LABEL_VALUE)[nodeIndexes[midRVnid]]
+            innerRadius = math.sqrt(midRV_x[0]*midRV_x[0] + midRV_x[1]*midRV_x[1])
             #print('innerRadius', innerRadius)
-            ir = fm.createFieldConstant([innerRadius*0.9999])
-            radius_gt_ir = fm.createFieldGreaterThan(radius, ir)
-            radius_minus_ir = fm.createFieldSubtract(radius, ir)
-            thickness_scale = fm.createFieldConstant([LVWallThicknessRatioBase])
-            delta_radius = fm.createFieldMultiply(radius_minus_ir, thickness_scale)
-            new_radius = fm.createFieldAdd(ir, delta_radius)
-            new_cp_coordinates = fm.createFieldConcatenate([new_radius, theta, z])
-            new_cp_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_CYLINDRICAL_POLAR)
-            new_coordinates = fm.createFieldCoordinateTransformation(new_cp_coordinates)
-            new_coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-
-            baseNodeGroupField = fm.createFieldNodeGroup(nodes)
-            just_under_zero = fm.createFieldConstant([-0.0001])
-            isBase = fm.createFieldGreaterThan(z, just_under_zero)
-            baseNodesetGroup = baseNodeGroupField.getNodesetGroup()
-            baseNodesetGroup.addNodesConditional(isBase)
-            #print('baseNodesetGroup.getSize()', baseNodesetGroup.getSize())
-            fieldassignment = coordinates.createFieldassignment(new_coordinates)
-            result = fieldassignment.setNodeset(baseNodesetGroup)
-            #print('fieldassignment.setNodeset', result)
-            fieldassignment.assign()
-
-        tricubichermite = eftfactory_tricubichermite(mesh, useCrossDerivatives)
-        tricubicHermiteBasis = fm.createElementbasis(3, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
+            isBase = meshData.getNodeParameters(VALUE_LABEL_VALUE)[:, 2] > -0.0001
+            transformMeshDataNodes(meshData,
+                lambda x: MeshType_3d_heartventricles1.baseThinningTransform(x, innerRadius, LVWallThicknessRatioBase), isBase)
+
+        # copies of LV node parameters to read from; inside RV edge nodes are modified in these
+        node_x = meshData.getNodeParameters(VALUE_LABEL_VALUE)
+        node_dx_ds1 = meshData.getNodeParameters(VALUE_LABEL_D_DS1)
+        node_dx_ds2 = meshData.getNodeParameters(VALUE_LABEL_D_DS2)
+        node_dx_ds3 = meshData.getNodeParameters(VALUE_LABEL_D_DS3)
+        new_x = node_x.copy()
+        new_dx_ds1 = node_dx_ds1.copy()
+        new_dx_ds2 = node_dx_ds2.copy()
+        new_dx_ds3 = node_dx_ds3.copy()
+
+        tricubichermite = eftfactory_tricubichermite(None, useCrossDerivatives)
 
         eft = tricubichermite.createEftBasic()
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        elementtemplate.defineField(coordinates, -1, eft)
 
         crossAngle = math.pi/8
         sinCrossAngle = math.sin(crossAngle)
@@ -196,6 +164,7 @@ class MeshType_3d_heartventricles2:
         nodeIdentifier = 1 + 2*elementsCountThroughLVWall*now
         rv_nidsInner = []
         rv_nidsOuter = []
+        rv_newParameters = []
         baseExtraRVWidth = LVWallThickness*(1.0 - LVWallThicknessRatioBase)
         for n3 in range(1, -1, -1):  # only 1 element through RV free wall
 
@@ -226,12 +195,11 @@ class MeshType_3d_heartventricles2:
 
                     nid = 3 + elementsCountThroughLVWall*now + (elementsCountBelowSeptum + n2 - 1)*elementsCountAround + n1
 
-                    baseNode = nodes.findNodeByIdentifier(nid)
-                    cache.setNode(baseNode)
-                    result, base_x = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, 3)
-                    result, base_dx_ds1 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, 3)
-                    result, base_dx_ds2 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, 3)
-                    result, base_dx_ds3 = coordinates.getNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, 3)
+                    baseIndex = nodeIndexes[nid]
+                    base_x = node_x[baseIndex].tolist()
+                    base_dx_ds1 = node_dx_ds1[baseIndex].tolist()
+                    base_dx_ds2 = node_dx_ds2[baseIndex].tolist()
+                    base_dx_ds3 = node_dx_ds3[baseIndex].tolist()
                     #print('node ', nid, 'dx_ds3', result, base_dx_ds3)
                     mag = math.sqrt(base_dx_ds3[0]*base_dx_ds3[0] + base_dx_ds3[1]*base_dx_ds3[1] + base_dx_ds3[2]*base_dx_ds3[2])
                     unitOutward = [ base_dx_ds3[0]/mag, base_dx_ds3[1]/mag, base_dx_ds3[2]/mag ]
@@ -336,21 +304,31 @@ class MeshType_3d_heartventricles2:
                             ]
 
                     if onInside and (onBottomEdge or onSideEdge):
-                        node = baseNode
+                        # modify existing LV node
+                        nid_rv = nid
+                        new_x[baseIndex] = x
+                        new_dx_ds1[baseIndex] = dx_ds1
+                        new_dx_ds2[baseIndex] = dx_ds2
+                        new_dx_ds3[baseIndex] = dx_ds3
                     else:
-                        node = nodes.createNode(nodeIdentifier, nodetemplate)
+                        nid_rv = nodeIdentifier
                         nodeIdentifier += 1
-                        cache.setNode(node)
+                        rv_newParameters.append([ x, dx_ds1, dx_ds2, dx_ds3 ])
                     if onInside:
-                        rv_nidsInner.append(node.getIdentifier())
+                        rv_nidsInner.append(nid_rv)
                     else:
-                        rv_nidsOuter.append(node.getIdentifier())
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-
-        # create RV elements and modify adjoining LV element fields
+                        rv_nidsOuter.append(nid_rv)
+
+        meshData.setNodeParameters(VALUE_LABEL_VALUE, 1, new_x)
+        meshData.setNodeParameters(VALUE_LABEL_D_DS1, 1, new_dx_ds1)
+        meshData.setNodeParameters(VALUE_LABEL_D_DS2, 1, new_dx_ds2)
+        meshData.setNodeParameters(VALUE_LABEL_D_DS3, 1, new_dx_ds3)
+        rv_newNodeIdentifiersStart = 1 + 2*elementsCountThroughLVWall*now
+        meshData.addNodes(range(rv_newNodeIdentifiersStart, nodeIdentifier),
+            [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ], rv_newParameters)
+
+        # create RV elements and replace adjoining LV elements
+        replacedElements = []
         elementIdentifier = elementsCountThroughLVWall*elementsCountUp*elementsCountAround + 1
         scalefactors5 = [ -1.0, sinCrossAngle, cosCrossAngle, sinCrossAngle, cosCrossAngle ]
         scalefactors9 = [ -1.0, 0.5, 0.25, 0.125, 0.75, sinCrossAngle, cosCrossAngle, sinCrossAngle, cosCrossAngle ]
@@ -366,10 +344,9 @@ class MeshType_3d_heartventricles2:
                     continue
 
                 existingElementIdentifier = RVSeptumElementIdBase + n2*elementsCountAround + n1
-                element = mesh.findElementByIdentifier(existingElementIdentifier)
-                eftInner = element.getElementfieldtemplate(coordinates, -1)
-                eftOuter = element.getElementfieldtemplate(coordinates, -1)
-                nodeIdentifiersInner = getElementNodeIdentifiers(element, eftInner)
+                eftExisting, nodeIdentifiersInner, _, _ = meshData.getElement(existingElementIdentifier)
+                eftInner = eftExisting.copy()
+                eftOuter = eftExisting.copy()
                 nodeIdentifiersOuter = nodeIdentifiersInner[:]
                 # general scale factors 1 -> 1, 102 -> 1/2, 104 -> 1/4, 108 -> 1/8, 304 -> 3/4
                 sfLimiter = 0
@@ -401,14 +378,14 @@ class MeshType_3d_heartventricles2:
 
                 if n2 == -1:  # bottom
                     if (n1 > 0) and (n1 < elementsCountAcrossSeptum):
-                        mapEftFunction1Node2Terms(eftInner, 6*8 + 5, 7, Node.VALUE_LABEL_D_DS2, 1, [6], Node.VALUE_LABEL_D_DS3, 1, [7])
-                        mapEftFunction1Node2Terms(eftOuter, 2*8 + 5, 3, Node.VALUE_LABEL_D_DS2, 1, [1, 6], Node.VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftInner, 6*8 + 5, 7, VALUE_LABEL_D_DS2, 1, [6], VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftOuter, 2*8 + 5, 3, VALUE_LABEL_D_DS2, 1, [1, 6], VALUE_LABEL_D_DS3, 1, [7])
                     if n1 >= 0:
                         nodeIdentifiersOuter[2] = nodeIdentifiersInner[6]
                         nodeIdentifiersOuter[6] = rv_nidsOuter[n1]
                     if (n1 >= 0) and (n1 < (elementsCountAcrossSeptum - 1)):
-                        mapEftFunction1Node2Terms(eftInner, 7*8 + 5, 8, Node.VALUE_LABEL_D_DS2, 1, [8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
-                        mapEftFunction1Node2Terms(eftOuter, 3*8 + 5, 4, Node.VALUE_LABEL_D_DS2, 1, [1, 8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftInner, 7*8 + 5, 8, VALUE_LABEL_D_DS2, 1, [8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftOuter, 3*8 + 5, 4, VALUE_LABEL_D_DS2, 1, [1, 8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
                     if n1 < elementsCountAcrossSeptum:
                         nodeIdentifiersOuter[3] = nodeIdentifiersInner[7]
                         nodeIdentifiersOuter[7] = rv_nidsOuter[n1 + 1]
@@ -417,11 +394,11 @@ class MeshType_3d_heartventricles2:
                     nodeIdentifiersOuter[3] = nodeIdentifiersInner[7]
                     nodeIdentifiersOuter[7] = rv_nidsOuter[(n2 + 1)*(elementsCountAcrossSeptum + 1)]
                     if n2 > 0:
-                        mapEftFunction1Node2Terms(eftInner, 5*8 + 5, 6, Node.VALUE_LABEL_D_DS1, 1, [6], Node.VALUE_LABEL_D_DS3, 1, [7])
-                        mapEftFunction1Node2Terms(eftOuter, 1*8 + 5, 2, Node.VALUE_LABEL_D_DS1, 1, [1, 6], Node.VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftInner, 5*8 + 5, 6, VALUE_LABEL_D_DS1, 1, [6], VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftOuter, 1*8 + 5, 2, VALUE_LABEL_D_DS1, 1, [1, 6], VALUE_LABEL_D_DS3, 1, [7])
                     if n2 >= 0:
-                        mapEftFunction1Node2Terms(eftInner, 7*8 + 5, 8, Node.VALUE_LABEL_D_DS1, 1, [8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
-                        mapEftFunction1Node2Terms(eftOuter, 3*8 + 5, 4, Node.VALUE_LABEL_D_DS1, 1, [1, 8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftInner, 7*8 + 5, 8, VALUE_LABEL_D_DS1, 1, [8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftOuter, 3*8 + 5, 4, VALUE_LABEL_D_DS1, 1, [1, 8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
                         nodeIdentifiersOuter[1] = nodeIdentifiersInner[5]
                         nodeIdentifiersOuter[5] = rv_nidsOuter[n2*(elementsCountAcrossSeptum + 1)]
 
@@ -429,29 +406,16 @@ class MeshType_3d_heartventricles2:
                     nodeIdentifiersOuter[2] = nodeIdentifiersInner[6]
                     nodeIdentifiersOuter[6] = rv_nidsOuter[(n2 + 1)*(elementsCountAcrossSeptum + 1) + n1]
                     if n2 > 0:
-                        mapEftFunction1Node2Terms(eftInner, 4*8 + 5, 5, Node.VALUE_LABEL_D_DS1, 1, [1, 6], Node.VALUE_LABEL_D_DS3, 1, [7])
-                        mapEftFunction1Node2Terms(eftOuter, 0*8 + 5, 1, Node.VALUE_LABEL_D_DS1, 1, [6], Node.VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftInner, 4*8 + 5, 5, VALUE_LABEL_D_DS1, 1, [1, 6], VALUE_LABEL_D_DS3, 1, [7])
+                        mapEftFunction1Node2Terms(eftOuter, 0*8 + 5, 1, VALUE_LABEL_D_DS1, 1, [6], VALUE_LABEL_D_DS3, 1, [7])
                     if n2 >= 0:
-                        mapEftFunction1Node2Terms(eftInner, 6*8 + 5, 7, Node.VALUE_LABEL_D_DS1, 1, [1, 8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
-                        mapEftFunction1Node2Terms(eftOuter, 2*8 + 5, 3, Node.VALUE_LABEL_D_DS1, 1, [8 + sfLimiter], Node.VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftInner, 6*8 + 5, 7, VALUE_LABEL_D_DS1, 1, [1, 8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
+                        mapEftFunction1Node2Terms(eftOuter, 2*8 + 5, 3, VALUE_LABEL_D_DS1, 1, [8 + sfLimiter], VALUE_LABEL_D_DS3, 1, [9 + sfLimiter])
                         nodeIdentifiersOuter[0] = nodeIdentifiersInner[4]
                         nodeIdentifiersOuter[4] = rv_nidsOuter[n2*(elementsCountAcrossSeptum + 1) + n1]
 
-                elementtemplateInner = mesh.createElementtemplate()
-                elementtemplateInner.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                result = elementtemplateInner.defineField(coordinates, -1, eftInner)
-                result1 = element.merge(elementtemplateInner)
-                result2 = element.setNodesByIdentifier(eftInner, nodeIdentifiersInner)
-                result3 = element.setScaleFactors(eftInner, scaleFactorsSlice)
-                #print('merge inner hanging element', existingElementIdentifier, result1, result2, result3, nodeIdentifiersInner, scaleFactorsSlice)
-
-                elementtemplateOuter = mesh.createElementtemplate()
-                elementtemplateOuter.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                result = elementtemplateOuter.defineField(coordinates, -1, eftOuter)
-                element = mesh.createElement(elementIdentifier, elementtemplateOuter)
-                result2 = element.setNodesByIdentifier(eftOuter, nodeIdentifiersOuter)
-                result3 = element.setScaleFactors(eftOuter, scaleFactorsSlice)
-                #print('create outer hanging element', elementIdentifier, result2, result3, nodeIdentifiersOuter, scaleFactorsSlice)
+                replacedElements.append((existingElementIdentifier, eftInner, nodeIdentifiersInner, scaleFactorsSlice))
+                meshData.addElement(eftOuter, elementIdentifier, nodeIdentifiersOuter, scaleFactorsSlice)
                 elementIdentifier += 1
 
         # Tweak RV septal wall
@@ -463,11 +427,8 @@ class MeshType_3d_heartventricles2:
             n = 4 + s
             ln = n + 1
             # d/dxi2 = -d/ds3, d/dxi3 = sa.d/ds2 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVSeptalWallInnerBottom, n*8 + 3, ln, Node.VALUE_LABEL_D_DS3, 1, [1])
-            mapEftFunction1Node2Terms(eftRVSeptalWallInnerBottom, n*8 + 5, ln, Node.VALUE_LABEL_D_DS2, 1, [s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVSeptalWallInnerBottom = mesh.createElementtemplate()
-        elementtemplateRVSeptalWallInnerBottom.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVSeptalWallInnerBottom.defineField(coordinates, -1, eftRVSeptalWallInnerBottom)
+            mapEftFunction1Node1Term(eftRVSeptalWallInnerBottom, n*8 + 3, ln, VALUE_LABEL_D_DS3, 1, [1])
+            mapEftFunction1Node2Terms(eftRVSeptalWallInnerBottom, n*8 + 5, ln, VALUE_LABEL_D_DS2, 1, [s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVSeptalWallInnerBottom', result)
 
         # RV septal wall inner side 1 elements
@@ -477,11 +438,8 @@ class MeshType_3d_heartventricles2:
             n = 4 + s*2
             ln = n + 1
             # d/dxi1 = -d/ds3, d/dxi3 = sa.d/ds1 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVSeptalWallInnerSide1, n*8 + 2, ln, Node.VALUE_LABEL_D_DS3, 1, [1])
-            mapEftFunction1Node2Terms(eftRVSeptalWallInnerSide1, n*8 + 5, ln, Node.VALUE_LABEL_D_DS1, 1, [s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVSeptalWallInnerSide1 = mesh.createElementtemplate()
-        elementtemplateRVSeptalWallInnerSide1.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVSeptalWallInnerSide1.defineField(coordinates, -1, eftRVSeptalWallInnerSide1)
+            mapEftFunction1Node1Term(eftRVSeptalWallInnerSide1, n*8 + 2, ln, VALUE_LABEL_D_DS3, 1, [1])
+            mapEftFunction1Node2Terms(eftRVSeptalWallInnerSide1, n*8 + 5, ln, VALUE_LABEL_D_DS1, 1, [s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVSeptalWallInnerSide1', result)
 
         # RV septal wall inner side 2 elements
@@ -491,11 +449,8 @@ class MeshType_3d_heartventricles2:
             n = 5 + s*2
             ln = n + 1
             # d/dxi1 = d/ds3, d/dxi3 = -sa.d/ds1 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVSeptalWallInnerSide2, n*8 + 2, ln, Node.VALUE_LABEL_D_DS3, 1, [])
-            mapEftFunction1Node2Terms(eftRVSeptalWallInnerSide2, n*8 + 5, ln, Node.VALUE_LABEL_D_DS1, 1, [1, s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVSeptalWallInnerSide2 = mesh.createElementtemplate()
-        elementtemplateRVSeptalWallInnerSide2.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVSeptalWallInnerSide2.defineField(coordinates, -1, eftRVSeptalWallInnerSide2)
+            mapEftFunction1Node1Term(eftRVSeptalWallInnerSide2, n*8 + 2, ln, VALUE_LABEL_D_DS3, 1, [])
+            mapEftFunction1Node2Terms(eftRVSeptalWallInnerSide2, n*8 + 5, ln, VALUE_LABEL_D_DS1, 1, [1, s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVSeptalWallInnerSide2', result)
 
         for n2 in range(elementsCountUpRV):
@@ -503,61 +458,46 @@ class MeshType_3d_heartventricles2:
             for n1 in range(elementsCountAcrossSeptum):
                 existingElementIdentifier = RVSeptumElementIdBase + n2*elementsCountAround + n1
 
-                element = mesh.findElementByIdentifier(existingElementIdentifier)
-                eftTemp = element.getElementfieldtemplate(coordinates, -1)
-                nodeIdentifiers = getElementNodeIdentifiers(element, eftTemp)
-                #print('existing element', existingElementIdentifier, eftTemp.isValid(), nodeIdentifiers)
+                eftTemp, nodeIdentifiers, _, _ = meshData.getElement(existingElementIdentifier)
+                #print('existing element', existingElementIdentifier, nodeIdentifiers)
                 if n2 == 0:
                     if n1 == 0:
                         # RV free wall inner bottom side 1 elements: doubly curved but can't avoid a sharp corner at node 1
                         eftTemp = tricubichermite.createEftBasic()
                         setEftScaleFactorIds(eftTemp, [1], [3, 4, 3, 4])
                         # node 6 d/dxi2 = -d/ds3, d/dxi3 = sa.d/ds2 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 5*8 + 3, 6, Node.VALUE_LABEL_D_DS3, 1, [1])
-                        mapEftFunction1Node2Terms(eftTemp, 5*8 + 5, 6, Node.VALUE_LABEL_D_DS2, 1, [2], Node.VALUE_LABEL_D_DS3, 1, [3])
+                        mapEftFunction1Node1Term(eftTemp, 5*8 + 3, 6, VALUE_LABEL_D_DS3, 1, [1])
+                        mapEftFunction1Node2Terms(eftTemp, 5*8 + 5, 6, VALUE_LABEL_D_DS2, 1, [2], VALUE_LABEL_D_DS3, 1, [3])
                         # node 7 d/dxi1 = -d/ds3, d/dxi3 = sa.d/ds1 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 6*8 + 2, 7, Node.VALUE_LABEL_D_DS3, 1, [1])
-                        mapEftFunction1Node2Terms(eftTemp, 6*8 + 5, 7, Node.VALUE_LABEL_D_DS1, 1, [1, 4], Node.VALUE_LABEL_D_DS3, 1, [5])
+                        mapEftFunction1Node1Term(eftTemp, 6*8 + 2, 7, VALUE_LABEL_D_DS3, 1, [1])
+                        mapEftFunction1Node2Terms(eftTemp, 6*8 + 5, 7, VALUE_LABEL_D_DS1, 1, [1, 4], VALUE_LABEL_D_DS3, 1, [5])
                         #print('inner bottom side 1 eftTemp.isValid()',eftTemp.isValid())
-                        elementtemplateTemp = mesh.createElementtemplate()
-                        elementtemplateTemp.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                        result = elementtemplateTemp.defineField(coordinates, -1, eftTemp)
-                        result = element.merge(elementtemplateTemp)
-                        result = element.setNodesByIdentifier(eftTemp, nodeIdentifiers)
-                        result = element.setScaleFactors(eftTemp, scalefactors5)
+                        replacedElements.append((existingElementIdentifier, eftTemp, nodeIdentifiers, scalefactors5))
                     elif n1 == (elementsCountAcrossSeptum - 1):
                         # RV free wall inner bottom side 1 elements: doubly curved but can't avoid a sharp corner at node 1
                         eftTemp = tricubichermite.createEftBasic()
                         setEftScaleFactorIds(eftTemp, [1], [3, 4, 3, 4])
                         # node 5 d/dxi2 = -d/ds3, d/dxi3 = sa.d/ds2 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 4*8 + 3, 5, Node.VALUE_LABEL_D_DS3, 1, [1])
-                        mapEftFunction1Node2Terms(eftTemp, 4*8 + 5, 5, Node.VALUE_LABEL_D_DS2, 1, [2], Node.VALUE_LABEL_D_DS3, 1, [3])
+                        mapEftFunction1Node1Term(eftTemp, 4*8 + 3, 5, VALUE_LABEL_D_DS3, 1, [1])
+                        mapEftFunction1Node2Terms(eftTemp, 4*8 + 5, 5, VALUE_LABEL_D_DS2, 1, [2], VALUE_LABEL_D_DS3, 1, [3])
                         # node 8 d/dxi1 = d/ds3, d/dxi3 = s2.d/ds1 + s3.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 7*8 + 2, 8, Node.VALUE_LABEL_D_DS3, 1, [])
-                        mapEftFunction1Node2Terms(eftTemp, 7*8 + 5, 8, Node.VALUE_LABEL_D_DS1, 1, [1, 4], Node.VALUE_LABEL_D_DS3, 1, [5])
+                        mapEftFunction1Node1Term(eftTemp, 7*8 + 2, 8, VALUE_LABEL_D_DS3, 1, [])
+                        mapEftFunction1Node2Terms(eftTemp, 7*8 + 5, 8, VALUE_LABEL_D_DS1, 1, [1, 4], VALUE_LABEL_D_DS3, 1, [5])
                         #print('inner bottom side 2 eftTemp.isValid()',eftTemp.isValid())
-                        elementtemplateTemp = mesh.createElementtemplate()
-                        elementtemplateTemp.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                        result = elementtemplateTemp.defineField(coordinates, -1, eftTemp)
-                        result = element.merge(elementtemplateTemp)
-                        result = element.setNodesByIdentifier(eftTemp, nodeIdentifiers)
-                        result = element.setScaleFactors(eftTemp, scalefactors5)
+                        replacedElements.append((existingElementIdentifier, eftTemp, nodeIdentifiers, scalefactors5))
                     else:
-                        result = element.merge(elementtemplateRVSeptalWallInnerBottom)
-                        result = element.setNodesByIdentifier(eftRVSeptalWallInnerBottom, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVSeptalWallInnerBottom, scalefactors5)
+                        replacedElements.append((existingElementIdentifier, eftRVSeptalWallInnerBottom, nodeIdentifiers, scalefactors5))
                 else:
                     if n1 == 0:
-                        result = element.merge(elementtemplateRVSeptalWallInnerSide1)
-                        result = element.setNodesByIdentifier(eftRVSeptalWallInnerSide1, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVSeptalWallInnerSide1, scalefactors5)
+                        replacedElements.append((existingElementIdentifier, eftRVSeptalWallInnerSide1, nodeIdentifiers, scalefactors5))
                     elif n1 == (elementsCountAcrossSeptum - 1):
-                        result = element.merge(elementtemplateRVSeptalWallInnerSide2)
-                        result = element.setNodesByIdentifier(eftRVSeptalWallInnerSide2, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVSeptalWallInnerSide2, scalefactors5)
+                        replacedElements.append((existingElementIdentifier, eftRVSeptalWallInnerSide2, nodeIdentifiers, scalefactors5))
                     else:
                         pass
-                #print('RV septal wall element merge', existingElementIdentifier, result)
+
+        meshData.removeElements([ replacedElement[0] for replacedElement in replacedElements ])
+        for existingElementIdentifier, eftReplace, nodeIdentifiers, scaleFactors in replacedElements:
+            meshData.addElement(eftReplace, existingElementIdentifier, nodeIdentifiers, scaleFactors)
 
         # RV free wall
 
@@ -568,11 +508,8 @@ class MeshType_3d_heartventricles2:
             n = s
             ln = n + 1
             # d/dxi2 = d/ds3, d/dxi3 = -sa.d/ds2 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVFreeWallInnerBottom, n*8 + 3, ln, Node.VALUE_LABEL_D_DS3, 1, [])
-            mapEftFunction1Node2Terms(eftRVFreeWallInnerBottom, n*8 + 5, ln, Node.VALUE_LABEL_D_DS2, 1, [1, s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVFreeWallInnerBottom = mesh.createElementtemplate()
-        elementtemplateRVFreeWallInnerBottom.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVFreeWallInnerBottom.defineField(coordinates, -1, eftRVFreeWallInnerBottom)
+            mapEftFunction1Node1Term(eftRVFreeWallInnerBottom, n*8 + 3, ln, VALUE_LABEL_D_DS3, 1, [])
+            mapEftFunction1Node2Terms(eftRVFreeWallInnerBottom, n*8 + 5, ln, VALUE_LABEL_D_DS2, 1, [1, s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVFreeWallInnerBottom', result)
 
         # RV free wall inner side 1 elements
@@ -582,11 +519,8 @@ class MeshType_3d_heartventricles2:
             n = s*2
             ln = n + 1
             # d/dxi1 = d/ds3, d/dxi3 = -sa.d/ds1 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVFreeWallInnerSide1, n*8 + 2, ln, Node.VALUE_LABEL_D_DS3, 1, [])
-            mapEftFunction1Node2Terms(eftRVFreeWallInnerSide1, n*8 + 5, ln, Node.VALUE_LABEL_D_DS1, 1, [1, s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVFreeWallInnerSide1 = mesh.createElementtemplate()
-        elementtemplateRVFreeWallInnerSide1.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVFreeWallInnerSide1.defineField(coordinates, -1, eftRVFreeWallInnerSide1)
+            mapEftFunction1Node1Term(eftRVFreeWallInnerSide1, n*8 + 2, ln, VALUE_LABEL_D_DS3, 1, [])
+            mapEftFunction1Node2Terms(eftRVFreeWallInnerSide1, n*8 + 5, ln, VALUE_LABEL_D_DS1, 1, [1, s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVFreeWallInnerSide1', result)
 
         # RV free wall inner side 2 elements
@@ -596,11 +530,8 @@ class MeshType_3d_heartventricles2:
             n = s*2 + 1
             ln = n + 1
             # d/dxi1 = -d/ds3, d/dxi3 = sa.d/ds1 + sb.d/ds3
-            mapEftFunction1Node1Term(eftRVFreeWallInnerSide2, n*8 + 2, ln, Node.VALUE_LABEL_D_DS3, 1, [1])
-            mapEftFunction1Node2Terms(eftRVFreeWallInnerSide2, n*8 + 5, ln, Node.VALUE_LABEL_D_DS1, 1, [s*2 + 2], Node.VALUE_LABEL_D_DS3, 1, [s*2 + 3])
-        elementtemplateRVFreeWallInnerSide2 = mesh.createElementtemplate()
-        elementtemplateRVFreeWallInnerSide2.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplateRVFreeWallInnerSide2.defineField(coordinates, -1, eftRVFreeWallInnerSide2)
+            mapEftFunction1Node1Term(eftRVFreeWallInnerSide2, n*8 + 2, ln, VALUE_LABEL_D_DS3, 1, [1])
+            mapEftFunction1Node2Terms(eftRVFreeWallInnerSide2, n*8 + 5, ln, VALUE_LABEL_D_DS1, 1, [s*2 + 2], VALUE_LABEL_D_DS3, 1, [s*2 + 3])
         #print('eftRVFreeWallInnerSide2', result)
 
         for n2 in range(elementsCountUpRV):
@@ -618,52 +549,43 @@ class MeshType_3d_heartventricles2:
                         eftTemp = tricubichermite.createEftBasic()
                         setEftScaleFactorIds(eftTemp, [1], [3, 4, 3, 4])
                         # node 2 d/dxi2 = d/ds3, d/dxi3 = -sa.d/ds2 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 1*8 + 3, 2, Node.VALUE_LABEL_D_DS3, 1, [])
-                        mapEftFunction1Node2Terms(eftTemp, 1*8 + 5, 2, Node.VALUE_LABEL_D_DS2, 1, [1, 2], Node.VALUE_LABEL_D_DS3, 1, [3])
+                        mapEftFunction1Node1Term(eftTemp, 1*8 + 3, 2, VALUE_LABEL_D_DS3, 1, [])
+                        mapEftFunction1Node2Terms(eftTemp, 1*8 + 5, 2, VALUE_LABEL_D_DS2, 1, [1, 2], VALUE_LABEL_D_DS3, 1, [3])
                         # node 3 d/dxi1 = d/ds3, d/dxi3 = -sa.d/ds1 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 2*8 + 2, 3, Node.VALUE_LABEL_D_DS3, 1, [])
-                        mapEftFunction1Node2Terms(eftTemp, 2*8 + 5, 3, Node.VALUE_LABEL_D_DS1, 1, [1, 4], Node.VALUE_LABEL_D_DS3, 1, [5])
+                        mapEftFunction1Node1Term(eftTemp, 2*8 + 2, 3, VALUE_LABEL_D_DS3, 1, [])
+                        mapEftFunction1Node2Terms(eftTemp, 2*8 + 5, 3, VALUE_LABEL_D_DS1, 1, [1, 4], VALUE_LABEL_D_DS3, 1, [5])
                         #print('inner bottom side 1 eftTemp.isValid()',eftTemp.isValid())
-                        elementtemplateTemp = mesh.createElementtemplate()
-                        elementtemplateTemp.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                        result = elementtemplateTemp.defineField(coordinates, -1, eftTemp)
-                        element = mesh.createElement(elementIdentifier, elementtemplateTemp)
-                        result = element.setNodesByIdentifier(eftTemp, nodeIdentifiers)
-                        result = element.setScaleFactors(eftTemp, scalefactors5)
+                        meshData.addElement(eftTemp, elementIdentifier, nodeIdentifiers, scalefactors5)
                     elif n1 == (elementsCountAcrossSeptum - 1):
                         # RV free wall inner bottom side 1 elements: doubly curved but can't avoid a sharp corner at node 1
                         eftTemp = tricubichermite.createEftBasic()
                         setEftScaleFactorIds(eftTemp, [1], [3, 4, 3, 4])
                         # node 1 d/dxi2 = d/ds3, d/dxi3 = -sa.d/ds2 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 0*8 + 3, 1, Node.VALUE_LABEL_D_DS3, 1, [])
-                        mapEftFunction1Node2Terms(eftTemp, 0*8 + 5, 1, Node.VALUE_LABEL_D_DS2, 1, [1, 2], Node.VALUE_LABEL_D_DS3, 1, [3])
+                        mapEftFunction1Node1Term(eftTemp, 0*8 + 3, 1, VALUE_LABEL_D_DS3, 1, [])
+                        mapEftFunction1Node2Terms(eftTemp, 0*8 + 5, 1, VALUE_LABEL_D_DS2, 1, [1, 2], VALUE_LABEL_D_DS3, 1, [3])
                         # node 4 d/dxi1 = -d/ds3, d/dxi3 = sa.d/ds1 + sb.d/ds3
-                        mapEftFunction1Node1Term(eftTemp, 3*8 + 2, 4, Node.VALUE_LABEL_D_DS3, 1, [1])
-                        mapEftFunction1Node2Terms(eftTemp, 3*8 + 5, 4, Node.VALUE_LABEL_D_DS1, 1, [4], Node.VALUE_LABEL_D_DS3, 1, [5])
+                        mapEftFunction1Node1Term(eftTemp, 3*8 + 2, 4, VALUE_LABEL_D_DS3, 1, [1])
+                        mapEftFunction1Node2Terms(eftTemp, 3*8 + 5, 4, VALUE_LABEL_D_DS1, 1, [4], VALUE_LABEL_D_DS3, 1, [5])
                         #print('inner bottom side 2 eftTemp.isValid()',eftTemp.isValid())
-                        elementtemplateTemp = mesh.createElementtemplate()
-                        elementtemplateTemp.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                        result = elementtemplateTemp.defineField(coordinates, -1, eftTemp)
-                        element = mesh.createElement(elementIdentifier, elementtemplateTemp)
-                        result = element.setNodesByIdentifier(eftTemp, nodeIdentifiers)
-                        result = element.setScaleFactors(eftTemp, scalefactors5)
+                        meshData.addElement(eftTemp, elementIdentifier, nodeIdentifiers, scalefactors5)
                     else:
-                        element = mesh.createElement(elementIdentifier, elementtemplateRVFreeWallInnerBottom)
-                        result = element.setNodesByIdentifier(eftRVFreeWallInnerBottom, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVFreeWallInnerBottom, scalefactors5)
+                        meshData.addElement(eftRVFreeWallInnerBottom, elementIdentifier, nodeIdentifiers, scalefactors5)
                 else:
                     if n1 == 0:
-                        element = mesh.createElement(elementIdentifier, elementtemplateRVFreeWallInnerSide1)
-                        result = element.setNodesByIdentifier(eftRVFreeWallInnerSide1, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVFreeWallInnerSide1, scalefactors5)
+                        meshData.addElement(eftRVFreeWallInnerSide1, elementIdentifier, nodeIdentifiers, scalefactors5)
                     elif n1 == (elementsCountAcrossSeptum - 1):
-                        element = mesh.createElement(elementIdentifier, elementtemplateRVFreeWallInnerSide2)
-                        result = element.setNodesByIdentifier(eftRVFreeWallInnerSide2, nodeIdentifiers)
-                        result = element.setScaleFactors(eftRVFreeWallInnerSide2, scalefactors5)
+                        meshData.addElement(eftRVFreeWallInnerSide2, elementIdentifier, nodeIdentifiers, scalefactors5)
                     else:
-                        element = mesh.createElement(elementIdentifier, elementtemplate)
-                        result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                #print('RV free wall element create', elementIdentifier, result)
+                        meshData.addElement(eft, elementIdentifier, nodeIdentifiers)
                 elementIdentifier += 1
 
-        fm.endChange()
+        return meshData
+
+    @staticmethod
+    def generateMesh(region, options):
+        """
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        MeshType_3d_heartventricles2.generateMeshData(options).createInRegion(region)
@@ -5,12 +5,10 @@ around, up and through the thickness.
 
 from __future__ import division
 import math
+import numpy
 from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
-from scaffoldmaker.utils.zinc_utils import *
+from scaffoldmaker.utils.meshdata import *
 from scaffoldmaker.utils.meshrefinement import MeshRefinement
-from opencmiss.zinc.element import Element, Elementbasis, Elementfieldtemplate
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
 
 class MeshType_3d_sphereshell1:
     '''
@@ -87,12 +85,12 @@ class MeshType_3d_sphereshell1:
             options['Element length ratio equator/apex'] = 1.0E-6
 
     @staticmethod
-    def generateBaseMesh(region, options):
+    def generateBaseMeshData(options):
         """
-        Generate the base tricubic Hermite mesh. See also generateMesh().
-        :param region: Zinc region to define model in. Must be empty.
+        Generate the base tricubic Hermite mesh without Zinc, building node
+        parameters and element connectivity for all layers as arrays.
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         elementsCountAround = options['Number of elements around']
         elementsCountUp = options['Number of elements up']
@@ -105,52 +103,16 @@ class MeshType_3d_sphereshell1:
         lengthRatio = options['Length ratio']
         elementLengthRatioEquatorApex = options['Element length ratio equator/apex']
 
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        coordinates = getOrCreateCoordinateField(fm)
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplateApex = nodes.createNodetemplate()
-        nodetemplateApex.defineField(coordinates)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-        nodetemplateApex.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
+        meshData = MeshData(3)
+        valueLabelVersionsApex = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ]
+        valueLabelVersions = list(valueLabelVersionsApex)
         if useCrossDerivatives:
-            nodetemplate = nodes.createNodetemplate()
-            nodetemplate.defineField(coordinates)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS2DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1)
-        else:
-            nodetemplate = nodetemplateApex
-
-        mesh = fm.findMeshByDimension(3)
+            valueLabelVersions += [ (VALUE_LABEL_D2_DS1DS2, 1), (VALUE_LABEL_D2_DS1DS3, 1), (VALUE_LABEL_D2_DS2DS3, 1), (VALUE_LABEL_D3_DS1DS2DS3, 1) ]
 
-        tricubichermite = eftfactory_tricubichermite(mesh, useCrossDerivatives)
+        tricubichermite = eftfactory_tricubichermite(None, useCrossDerivatives)
         eft = tricubichermite.createEftBasic()
 
-        tricubicHermiteBasis = fm.createElementbasis(3, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
-
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        elementtemplate.defineField(coordinates, -1, eft)
-
-        cache = fm.createFieldcache()
-
-        # create nodes
-        nodeIdentifier = 1
         radiansPerElementAround = 2.0*math.pi/elementsCountAround
-        x = [ 0.0, 0.0, 0.0 ]
-        dx_ds1 = [ 0.0, 0.0, 0.0 ]
-        dx_ds2 = [ 0.0, 0.0, 0.0 ]
-        dx_ds3 = [ 0.0, 0.0, 0.0 ]
-        zero = [ 0.0, 0.0, 0.0 ]
 
         # pre-calculate positions and tangent/normal vectors up (elementsCountUp + 1) node layers
         outerWidth = 0.5
@@ -164,219 +126,165 @@ class MeshType_3d_sphereshell1:
         bInner = 2.0 / (1.0 + elementLengthRatioEquatorApex / lengthRatio)
         aInner = 1.0 - bInner
 
-        positionOuterArray = [(0,0)]*(elementsCountUp + 1)
-        positionInnerArray = [(0,0)]*(elementsCountUp + 1)
-        radiansUpOuterArray = [0]*(elementsCountUp + 1)
-        radiansUpInnerArray = [0]*(elementsCountUp + 1)
-        vector2OuterArray = [(0,0)]*(elementsCountUp + 1)
-        vector2InnerArray = [(0,0)]*(elementsCountUp + 1)
-        for n2 in range(elementsCountUp + 1):
-            if n2*2 <= elementsCountUp:
-                xi = n2*2 / elementsCountUp
-            else:
-                xi = 2.0 - (n2*2 / elementsCountUp)
-
-            nxiOuter = aOuter*xi*xi + bOuter*xi
-            dnxiOuter = 2.0*aOuter*xi + bOuter
-            radiansUpOuterArray[n2] = radiansUpOuter = nxiOuter*math.pi*0.5 if (n2*2 <= elementsCountUp) else (math.pi - nxiOuter*math.pi*0.5)
-            dRadiansUpOuter = dnxiOuter*math.pi/elementsCountUp
-            cosRadiansUpOuter = math.cos(radiansUpOuter);
-            sinRadiansUpOuter = math.sin(radiansUpOuter);
-            positionOuterArray[n2] = positionOuter = ( outerWidth*sinRadiansUpOuter, -outerLength*cosRadiansUpOuter )
-            vector2OuterArray[n2] = ( outerWidth*cosRadiansUpOuter*dRadiansUpOuter, outerLength*sinRadiansUpOuter*dRadiansUpOuter )
-
-            nxiInner = aInner*xi*xi + bInner*xi
-            dnxiInner = 2.0*aInner*xi + bInner
-            radiansUpInnerArray[n2] = radiansUpInner = nxiInner*math.pi*0.5 if (n2*2 <= elementsCountUp) else (math.pi - nxiInner*math.pi*0.5)
-            dRadiansUpInner = dnxiInner*math.pi/elementsCountUp
-            cosRadiansUpInner = math.cos(radiansUpInner);
-            sinRadiansUpInner = math.sin(radiansUpInner);
-            positionInnerArray[n2] = positionInner = ( innerWidth*sinRadiansUpInner, -innerLength*cosRadiansUpInner )
-            vector2InnerArray[n2] = ( innerWidth*cosRadiansUpInner*dRadiansUpInner, innerLength*sinRadiansUpInner*dRadiansUpInner )
-
-        # now create the nodes
-        for n3 in range(elementsCountThroughWall + 1):
-
-            n3_fraction = n3 / elementsCountThroughWall
-
-            for n2 in range(excludeBottomRows, elementsCountUp + 1 - excludeTopRows):
-
-                positionOuter = positionOuterArray[n2]
-                positionInner = positionInnerArray[n2]
-                position = (
-                    positionOuter[0]*n3_fraction + positionInner[0]*(1.0 - n3_fraction),
-                    positionOuter[1]*n3_fraction + positionInner[1]*(1.0 - n3_fraction)
-                )
-
-                radiansUpOuter = radiansUpOuterArray[n2]
-                sinRadiansUpOuter = math.sin(radiansUpOuter)
-                radiansUpInner = radiansUpInnerArray[n2]
-                sinRadiansUpInner = math.sin(radiansUpInner)
-
-                vector2Outer = vector2OuterArray[n2]
-                vector2Inner = vector2InnerArray[n2]
-                vector2 = (
-                    vector2Outer[0]*n3_fraction + vector2Inner[0]*(1.0 - n3_fraction),
-                    vector2Outer[1]*n3_fraction + vector2Inner[1]*(1.0 - n3_fraction)
-                )
-
-                vector3 = (
-                    (positionOuter[0] - positionInner[0])/elementsCountThroughWall,
-                    (positionOuter[1] - positionInner[1])/elementsCountThroughWall
-                )
-
-                if n2 == 0:
-                    # create bottom apex node
-                    node = nodes.createNode(nodeIdentifier, nodetemplateApex)
-                    cache.setNode(node)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, [ 0.0, 0.0, position[1] ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, [ 0.0, vector2[0], 0.0 ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, [ vector2[0], 0.0, 0.0 ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, [ 0.0, 0.0, vector3[1] ])
-                    nodeIdentifier = nodeIdentifier + 1
-
-                elif n2 < elementsCountUp:
-                    # create regular rows between apexes
-                    for n1 in range(elementsCountAround):
-                        radiansAround = n1*radiansPerElementAround
-                        cosRadiansAround = math.cos(radiansAround)
-                        sinRadiansAround = math.sin(radiansAround)
-                        x = [
-                            position[0]*cosRadiansAround,
-                            position[0]*sinRadiansAround,
-                            position[1]
-                        ]
-                        dx_ds1 = [
-                            position[0]*-sinRadiansAround*radiansPerElementAround,
-                            position[0]*cosRadiansAround*radiansPerElementAround,
-                            0.0
-                        ]
-                        dx_ds2 = [
-                            vector2[0]*cosRadiansAround,
-                            vector2[0]*sinRadiansAround,
-                            vector2[1]
-                        ]
-                        dx_ds3 = [
-                            vector3[0]*cosRadiansAround,
-                            vector3[0]*sinRadiansAround,
-                            vector3[1]
-                        ]
-                        node = nodes.createNode(nodeIdentifier, nodetemplate)
-                        cache.setNode(node)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-                        if useCrossDerivatives:
-                            coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                            coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS3, 1, zero)
-                            coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS2DS3, 1, zero)
-                            coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1, zero)
-                        nodeIdentifier = nodeIdentifier + 1
-
-                else:
-                    # create top apex node
-                    node = nodes.createNode(nodeIdentifier, nodetemplateApex)
-                    cache.setNode(node)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, [ 0.0, 0.0, position[1] ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, [ 0.0, vector2[0], 0.0 ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, [ -vector2[0], 0.0, 0.0 ])
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, [ 0.0, 0.0, vector3[1] ])
-                    nodeIdentifier = nodeIdentifier + 1
-
-        # create elements
-        elementIdentifier = 1
+        n2 = numpy.arange(elementsCountUp + 1)
+        lower = n2*2 <= elementsCountUp
+        xi = numpy.where(lower, n2*2 / elementsCountUp, 2.0 - (n2*2 / elementsCountUp))
+
+        def getLayerPositionVector2(a, b, width, length):
+            """
+            :return: position, vector2 arrays (elementsCountUp + 1, 2) for each node row on layer.
+            """
+            nxi = a*xi*xi + b*xi
+            dnxi = 2.0*a*xi + b
+            radiansUp = numpy.where(lower, nxi*math.pi*0.5, math.pi - nxi*math.pi*0.5)
+            dRadiansUp = dnxi*math.pi/elementsCountUp
+            cosRadiansUp = numpy.cos(radiansUp)
+            sinRadiansUp = numpy.sin(radiansUp)
+            position = numpy.stack([ width*sinRadiansUp, -length*cosRadiansUp ], axis=1)
+            vector2 = numpy.stack([ width*cosRadiansUp*dRadiansUp, length*sinRadiansUp*dRadiansUp ], axis=1)
+            return position, vector2
+
+        positionOuterArray, vector2OuterArray = getLayerPositionVector2(aOuter, bOuter, outerWidth, outerLength)
+        positionInnerArray, vector2InnerArray = getLayerPositionVector2(aInner, bInner, innerWidth, innerLength)
+
+        # interpolate through wall: arrays (elementsCountThroughWall + 1, elementsCountUp + 1, 2)
+        n3_fraction = (numpy.arange(elementsCountThroughWall + 1) / elementsCountThroughWall).reshape((-1, 1, 1))
+        positionArray = positionOuterArray*n3_fraction + positionInnerArray*(1.0 - n3_fraction)
+        vector2Array = vector2OuterArray*n3_fraction + vector2InnerArray*(1.0 - n3_fraction)
+        vector3Array = (positionOuterArray - positionInnerArray)/elementsCountThroughWall
+
+        # node numbering: per layer through wall, bottom apex, rows around, top apex
+        hasBottomApex = excludeBottomRows == 0
+        hasTopApex = excludeTopRows == 0
+        rows = numpy.arange(max(excludeBottomRows, 1), min(elementsCountUp - 1, elementsCountUp - excludeTopRows) + 1)
         # now (node offset through wall) varies with number of excluded rows
-        now = 0;
-        if excludeBottomRows == 0:
-            now += 1  # bottom apex node
-        if excludeTopRows == 0:
-            now += 1  # top apex node
-        fullNodeRows = elementsCountUp - 1
-        if excludeBottomRows > 1:
-            fullNodeRows -= (excludeBottomRows - 1)
-        if excludeTopRows > 1:
-            fullNodeRows -= (excludeTopRows - 1)
-        if fullNodeRows > 0:
-            now += fullNodeRows*elementsCountAround
-        row2NodeOffset = 2 if (excludeBottomRows == 0) else 1
-        for e3 in range(elementsCountThroughWall):
-            no = e3*now
+        now = len(rows)*elementsCountAround + (1 if hasBottomApex else 0) + (1 if hasTopApex else 0)
+        row2NodeOffset = 2 if hasBottomApex else 1
+        layerNodeOffsets = numpy.arange(elementsCountThroughWall + 1)*now
+
+        # create apex nodes
+        for n2, hasApex, d2Sign, nodeOffset in [ (0, hasBottomApex, 1.0, 1), (elementsCountUp, hasTopApex, -1.0, now) ]:
+            if hasApex:
+                parameters = numpy.zeros((elementsCountThroughWall + 1, 4, 3))
+                parameters[:, 0, 2] = positionArray[:, n2, 1]
+                parameters[:, 1, 1] = vector2Array[:, n2, 0]
+                parameters[:, 2, 0] = d2Sign*vector2Array[:, n2, 0]
+                parameters[:, 3, 2] = vector3Array[n2, 1]
+                meshData.addNodes(layerNodeOffsets + nodeOffset, valueLabelVersionsApex, parameters)
+
+        # create regular rows between apexes
+        if len(rows) > 0:
+            radiansAround = numpy.arange(elementsCountAround)*radiansPerElementAround
+            cosRadiansAround = numpy.cos(radiansAround)
+            sinRadiansAround = numpy.sin(radiansAround)
+            # broadcast to (layers, rows, around)
+            position0 = positionArray[:, rows, 0, numpy.newaxis]
+            position1 = positionArray[:, rows, 1, numpy.newaxis]
+            vector20 = vector2Array[:, rows, 0, numpy.newaxis]
+            vector21 = vector2Array[:, rows, 1, numpy.newaxis]
+            vector30 = vector3Array[numpy.newaxis, rows, 0, numpy.newaxis]
+            vector31 = vector3Array[numpy.newaxis, rows, 1, numpy.newaxis]
+            shape = (elementsCountThroughWall + 1, len(rows), elementsCountAround)
+            parameters = numpy.zeros(shape + (len(valueLabelVersions), 3))
+            parameters[..., 0, 0] = position0*cosRadiansAround
+            parameters[..., 0, 1] = position0*sinRadiansAround
+            parameters[..., 0, 2] = position1
+            parameters[..., 1, 0] = position0*-sinRadiansAround*radiansPerElementAround
+            parameters[..., 1, 1] = position0*cosRadiansAround*radiansPerElementAround
+            parameters[..., 2, 0] = vector20*cosRadiansAround
+            parameters[..., 2, 1] = vector20*sinRadiansAround
+            parameters[..., 2, 2] = vector21
+            parameters[..., 3, 0] = vector30*cosRadiansAround
+            parameters[..., 3, 1] = vector30*sinRadiansAround
+            parameters[..., 3, 2] = vector31
+            nodeIdentifiers = layerNodeOffsets.reshape((-1, 1, 1)) + row2NodeOffset + \
+                numpy.arange(len(rows)).reshape((1, -1, 1))*elementsCountAround + numpy.arange(elementsCountAround)
+            meshData.addNodes(nodeIdentifiers.ravel(), valueLabelVersions, parameters.reshape((-1, len(valueLabelVersions), 3)))
+
+        # create elements, numbered per layer through wall: bottom apex, rows around, top apex
+        rowLimit = max(len(rows) - 1, 0)
+        elementsCountPerLayer = elementsCountAround*(rowLimit + (1 if hasBottomApex else 0) + (1 if hasTopApex else 0))
+        e3 = numpy.arange(elementsCountThroughWall).reshape((-1, 1))
+        no = e3*now
+        layerElementOffsets = e3*elementsCountPerLayer + 1
+        e1 = numpy.arange(elementsCountAround)
+        e1Next = (e1 + 1)%elementsCountAround
+        elementOffset = 0
+
+        # apex elements use a template per sector around apex, with scale factor identifiers
+        # following convention of offsetting by 100 for each 'version'
+        # apex scale factors are the general linear map coefficients, the same in each layer
+        if hasBottomApex:
+            radiansAround = e1*radiansPerElementAround
+            radiansAroundNext = e1Next*radiansPerElementAround
+            scalefactors = numpy.empty((elementsCountAround, 13))
+            scalefactors[:, 0] = -1.0
+            for so in [ 1, 7 ]:
+                scalefactors[:, so] = numpy.sin(radiansAround)
+                scalefactors[:, so + 1] = numpy.cos(radiansAround)
+                scalefactors[:, so + 2] = radiansPerElementAround
+                scalefactors[:, so + 3] = numpy.sin(radiansAroundNext)
+                scalefactors[:, so + 4] = numpy.cos(radiansAroundNext)
+                scalefactors[:, so + 5] = radiansPerElementAround
+            bni1 = no + 1 + 0*e1
+            bni2 = no + e1 + 2
+            bni3 = no + e1Next + 2
+            nodeIdentifiers = numpy.stack([ bni1, bni2, bni3, bni1 + now, bni2 + now, bni3 + now ], axis=2)
+            elementIdentifiers = layerElementOffsets + e1
+            for e in range(elementsCountAround):
+                eft1 = tricubichermite.createEftShellApexBottom(e*100, e1Next[e]*100)
+                meshData.addElements(eft1, elementIdentifiers[:, e], nodeIdentifiers[:, e],
+                    numpy.tile(scalefactors[e], (elementsCountThroughWall, 1)))
+            elementOffset += elementsCountAround
+
+        if rowLimit > 0:
+            e2 = numpy.arange(rowLimit).reshape((-1, 1))
+            no3 = no.reshape((-1, 1, 1))
+            bni11 = no3 + e2*elementsCountAround + e1 + row2NodeOffset
+            bni12 = no3 + e2*elementsCountAround + e1Next + row2NodeOffset
+            bni21 = no3 + (e2 + 1)*elementsCountAround + e1 + row2NodeOffset
+            bni22 = no3 + (e2 + 1)*elementsCountAround + e1Next + row2NodeOffset
+            nodeIdentifiers = numpy.stack([ bni11, bni12, bni21, bni22, bni11 + now, bni12 + now, bni21 + now, bni22 + now ], axis=3)
+            elementIdentifiers = layerElementOffsets.reshape((-1, 1, 1)) + elementOffset + e2*elementsCountAround + e1
+            meshData.addElements(eft, elementIdentifiers.ravel(), nodeIdentifiers.reshape((-1, 8)))
+            elementOffset += rowLimit*elementsCountAround
+
+        if hasTopApex:
+            radiansAround = math.pi + e1*radiansPerElementAround
+            radiansAroundNext = math.pi + e1Next*radiansPerElementAround
+            scalefactors = numpy.empty((elementsCountAround, 13))
+            scalefactors[:, 0] = -1.0
+            for so in [ 1, 7 ]:
+                scalefactors[:, so] = -numpy.sin(radiansAround)
+                scalefactors[:, so + 1] = numpy.cos(radiansAround)
+                scalefactors[:, so + 2] = radiansPerElementAround
+                scalefactors[:, so + 3] = -numpy.sin(radiansAroundNext)
+                scalefactors[:, so + 4] = numpy.cos(radiansAroundNext)
+                scalefactors[:, so + 5] = radiansPerElementAround
+            bni3 = no + now + 0*e1
+            bni1 = bni3 - elementsCountAround + e1
+            bni2 = bni3 - elementsCountAround + e1Next
+            nodeIdentifiers = numpy.stack([ bni1, bni2, bni3, bni1 + now, bni2 + now, bni3 + now ], axis=2)
+            elementIdentifiers = layerElementOffsets + elementOffset + e1
+            for e in range(elementsCountAround):
+                eft1 = tricubichermite.createEftShellApexTop(e*100, e1Next[e]*100)
+                meshData.addElements(eft1, elementIdentifiers[:, e], nodeIdentifiers[:, e],
+                    numpy.tile(scalefactors[e], (elementsCountThroughWall, 1)))
+
+        return meshData
 
-            if excludeBottomRows == 0:
-                # create bottom apex elements, editing eft scale factor identifiers around apex
-                # scale factor identifiers follow convention of offsetting by 100 for each 'version'
-                elementtemplate1 = mesh.createElementtemplate()
-                elementtemplate1.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                for e1 in range(elementsCountAround):
-                    va = e1
-                    vb = (e1 + 1)%elementsCountAround
-                    eft1 = tricubichermite.createEftShellApexBottom(va*100, vb*100)
-                    elementtemplate1.defineField(coordinates, -1, eft1)
-                    element = mesh.createElement(elementIdentifier, elementtemplate1)
-                    bni1 = no + 1
-                    bni2 = no + e1 + 2
-                    bni3 = no + (e1 + 1)%elementsCountAround + 2
-                    nodeIdentifiers = [ bni1, bni2, bni3, bni1 + now, bni2 + now, bni3 + now ]
-                    element.setNodesByIdentifier(eft1, nodeIdentifiers)
-                    # set general linear map coefficients
-                    radiansAround = e1*radiansPerElementAround
-                    radiansAroundNext = ((e1 + 1)%elementsCountAround)*radiansPerElementAround
-                    scalefactors = [
-                        -1.0,
-                        math.sin(radiansAround), math.cos(radiansAround), radiansPerElementAround,
-                        math.sin(radiansAroundNext), math.cos(radiansAroundNext), radiansPerElementAround,
-                        math.sin(radiansAround), math.cos(radiansAround), radiansPerElementAround,
-                        math.sin(radiansAroundNext), math.cos(radiansAroundNext), radiansPerElementAround
-                    ]
-                    result = element.setScaleFactors(eft1, scalefactors)
-                    elementIdentifier = elementIdentifier + 1
-
-            # create regular rows between apexes
-            rowLimit = (elementsCountUp - 2)
-            if excludeBottomRows > 1:
-                rowLimit -= (excludeBottomRows - 1)
-            if excludeTopRows > 1:
-                rowLimit -= (excludeTopRows - 1)
-            for e2 in range(0, rowLimit):
-                for e1 in range(elementsCountAround):
-                    element = mesh.createElement(elementIdentifier, elementtemplate)
-                    bni11 = no + e2*elementsCountAround + e1 + row2NodeOffset
-                    bni12 = no + e2*elementsCountAround + (e1 + 1)%elementsCountAround + row2NodeOffset
-                    bni21 = no + (e2 + 1)*elementsCountAround + e1 + row2NodeOffset
-                    bni22 = no + (e2 + 1)*elementsCountAround + (e1 + 1)%elementsCountAround + row2NodeOffset
-                    nodeIdentifiers = [ bni11, bni12, bni21, bni22, bni11 + now, bni12 + now, bni21 + now, bni22 + now ]
-                    result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                    elementIdentifier = elementIdentifier + 1
-
-            if excludeTopRows == 0:
-                # create top apex elements, editing eft scale factor identifiers around apex
-                # scale factor identifiers follow convention of offsetting by 100 for each 'version'
-                elementtemplate1 = mesh.createElementtemplate()
-                elementtemplate1.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-                for e1 in range(elementsCountAround):
-                    va = e1
-                    vb = (e1 + 1)%elementsCountAround
-                    eft1 = tricubichermite.createEftShellApexTop(va*100, vb*100)
-                    elementtemplate1.defineField(coordinates, -1, eft1)
-                    element = mesh.createElement(elementIdentifier, elementtemplate1)
-                    bni3 = no + now
-                    bni1 = bni3 - elementsCountAround + e1
-                    bni2 = bni3 - elementsCountAround + (e1 + 1)%elementsCountAround
-                    nodeIdentifiers = [ bni1, bni2, bni3, bni1 + now, bni2 + now, bni3 + now ]
-                    element.setNodesByIdentifier(eft1, nodeIdentifiers)
-                    # set general linear map coefficients
-                    radiansAround = math.pi + e1*radiansPerElementAround
-                    radiansAroundNext = math.pi + ((e1 + 1)%elementsCountAround)*radiansPerElementAround
-                    scalefactors = [
-                        -1.0,
-                        -math.sin(radiansAround), math.cos(radiansAround), radiansPerElementAround,
-                        -math.sin(radiansAroundNext), math.cos(radiansAroundNext), radiansPerElementAround,
-                        -math.sin(radiansAround), math.cos(radiansAround), radiansPerElementAround,
-                        -math.sin(radiansAroundNext), math.cos(radiansAroundNext), radiansPerElementAround
-                    ]
-                    result = element.setScaleFactors(eft1, scalefactors)
-                    elementIdentifier = elementIdentifier + 1
+    @staticmethod
+    def generateBaseMesh(region, options):
+        """
+        Generate the base tricubic Hermite mesh. See also generateMesh().
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        wallThicknessRatioApex = options['Wall thickness ratio apex']
+        coordinates = MeshType_3d_sphereshell1.generateBaseMeshData(options).createInRegion(region)
+        fm = region.getFieldmodule()
+        fm.beginChange()
 
         if False:  # (wallThickness < 0.5):  # and (wallThicknessRatioApex != 1.0):
             r = fm.createFieldMagnitude(coordinates)
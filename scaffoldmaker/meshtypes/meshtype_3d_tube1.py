@@ -5,11 +5,10 @@ through wall, plus variable wall thickness for unit diameter.
 
 from __future__ import division
 import math
-from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
+import numpy
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshgrid import getGridElementNodeIdentifiers
 from scaffoldmaker.utils.meshrefinement import MeshRefinement
-from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
 
 class MeshType_3d_tube1(object):
     '''
@@ -66,12 +65,12 @@ class MeshType_3d_tube1(object):
 
 
     @staticmethod
-    def generateBaseMesh(region, options):
+    def generateBaseMeshData(options):
         """
-        Generate the base tricubic Hermite mesh. See also generateMesh().
-        :param region: Zinc region to define model in. Must be empty.
+        Generate the base tricubic Hermite mesh without Zinc, e.g. for writing
+        with scaffoldmaker.utils.exformat.writeExFile().
         :param options: Dict containing options. See getDefaultOptions().
-        :return: None
+        :return: MeshData
         """
         elementsCountAround = options['Number of elements around']
         elementsCountAlong = options['Number of elements along']
@@ -79,94 +78,50 @@ class MeshType_3d_tube1(object):
         wallThickness = options['Wall thickness']
         useCrossDerivatives = options['Use cross derivatives']
 
-        fm = region.getFieldmodule()
-        fm.beginChange()
-        coordinates = fm.createFieldFiniteElement(3)
-        coordinates.setName('coordinates')
-        coordinates.setManaged(True)
-        coordinates.setTypeCoordinate(True)
-        coordinates.setCoordinateSystemType(Field.COORDINATE_SYSTEM_TYPE_RECTANGULAR_CARTESIAN)
-        coordinates.setComponentName(1, 'x')
-        coordinates.setComponentName(2, 'y')
-        coordinates.setComponentName(3, 'z')
-
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        nodetemplate = nodes.createNodetemplate()
-        nodetemplate.defineField(coordinates)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_VALUE, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS1, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS2, 1)
-        if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS2, 1)
-        nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D_DS3, 1)
+        meshData = MeshData(3)
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ]
         if useCrossDerivatives:
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS1DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D2_DS2DS3, 1)
-            nodetemplate.setValueNumberOfVersions(coordinates, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1)
+            valueLabelVersions += [ (VALUE_LABEL_D2_DS1DS2, 1), (VALUE_LABEL_D2_DS1DS3, 1), (VALUE_LABEL_D2_DS2DS3, 1), (VALUE_LABEL_D3_DS1DS2DS3, 1) ]
 
-        mesh = fm.findMeshByDimension(3)
-
-        tricubichermite = eftfactory_tricubichermite(mesh, useCrossDerivatives)
-        eft = tricubichermite.createEftBasic()
-
-        elementtemplate = mesh.createElementtemplate()
-        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = elementtemplate.defineField(coordinates, -1, eft)
-
-        cache = fm.createFieldcache()
+        eft = EftDescriptor.createTricubicHermite(useCrossDerivatives)
 
         # create nodes
-        nodeIdentifier = 1
+        nodesCount = elementsCountAround*(elementsCountAlong + 1)*(elementsCountThroughWall + 1)
         radiansPerElementAround = 2.0*math.pi/elementsCountAround
         wallThicknessPerElement = wallThickness/elementsCountThroughWall
-        x = [ 0.0, 0.0, 0.0 ]
-        dx_ds1 = [ 0.0, 0.0, 0.0 ]
-        dx_ds2 = [ 0.0, 0.0, 1.0 / elementsCountAlong ]
-        dx_ds3 = [ 0.0, 0.0, 0.0 ]
-        zero = [ 0.0, 0.0, 0.0 ]
-        for n3 in range(elementsCountThroughWall + 1):
-            radius = 0.5 + wallThickness*(n3/elementsCountThroughWall - 1.0)
-            for n2 in range(elementsCountAlong + 1):
-                x[2] = n2 / elementsCountAlong
-                for n1 in range(elementsCountAround):
-                    radiansAround = n1*radiansPerElementAround
-                    cosRadiansAround = math.cos(radiansAround)
-                    sinRadiansAround = math.sin(radiansAround)
-                    x[0] = radius*cosRadiansAround
-                    x[1] = radius*sinRadiansAround
-                    dx_ds1[0] = radiansPerElementAround*radius*-sinRadiansAround
-                    dx_ds1[1] = radiansPerElementAround*radius*cosRadiansAround
-                    dx_ds3[0] = wallThicknessPerElement*cosRadiansAround
-                    dx_ds3[1] = wallThicknessPerElement*sinRadiansAround
-                    node = nodes.createNode(nodeIdentifier, nodetemplate)
-                    cache.setNode(node)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-                    if useCrossDerivatives:
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS3, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS2DS3, 1, zero)
-                        coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1, zero)
-                    nodeIdentifier = nodeIdentifier + 1
+        radius, z, radiansAround = numpy.meshgrid(
+            0.5 + wallThickness*(numpy.arange(elementsCountThroughWall + 1)/elementsCountThroughWall - 1.0),
+            numpy.arange(elementsCountAlong + 1) / elementsCountAlong,
+            numpy.arange(elementsCountAround)*radiansPerElementAround, indexing='ij')
+        radius = radius.ravel()
+        cosRadiansAround = numpy.cos(radiansAround.ravel())
+        sinRadiansAround = numpy.sin(radiansAround.ravel())
+        parameters = numpy.zeros((nodesCount, len(valueLabelVersions), 3))
+        parameters[:, 0, 0] = radius*cosRadiansAround
+        parameters[:, 0, 1] = radius*sinRadiansAround
+        parameters[:, 0, 2] = z.ravel()
+        parameters[:, 1, 0] = radiansPerElementAround*radius*-sinRadiansAround
+        parameters[:, 1, 1] = radiansPerElementAround*radius*cosRadiansAround
+        parameters[:, 2, 2] = 1.0 / elementsCountAlong
+        parameters[:, 3, 0] = wallThicknessPerElement*cosRadiansAround
+        parameters[:, 3, 1] = wallThicknessPerElement*sinRadiansAround
+        meshData.addNodes(numpy.arange(1, nodesCount + 1), valueLabelVersions, parameters)
 
         # create elements
-        elementIdentifier = 1
-        now = (elementsCountAlong + 1)*elementsCountAround
-        for e3 in range(elementsCountThroughWall):
-            for e2 in range(elementsCountAlong):
-                for e1 in range(elementsCountAround):
-                    element = mesh.createElement(elementIdentifier, elementtemplate)
-                    bni11 = e3*now + e2*elementsCountAround + e1 + 1
-                    bni12 = e3*now + e2*elementsCountAround + (e1 + 1)%elementsCountAround + 1
-                    bni21 = e3*now + (e2 + 1)*elementsCountAround + e1 + 1
-                    bni22 = e3*now + (e2 + 1)*elementsCountAround + (e1 + 1)%elementsCountAround + 1
-                    nodeIdentifiers = [ bni11, bni12, bni21, bni22, bni11 + now, bni12 + now, bni21 + now, bni22 + now ]
-                    result = element.setNodesByIdentifier(eft, nodeIdentifiers)
-                    elementIdentifier = elementIdentifier + 1
-
-        fm.endChange()
+        nodeIdentifiers = getGridElementNodeIdentifiers([ elementsCountAround, elementsCountAlong, elementsCountThroughWall ], loop1=True)
+        meshData.addElements(eft, numpy.arange(1, len(nodeIdentifiers) + 1), nodeIdentifiers)
+
+        return meshData
+
+    @staticmethod
+    def generateBaseMesh(region, options):
+        """
+        Generate the base tricubic Hermite mesh. See also generateMesh().
+        :param region: Zinc region to define model in. Must be empty.
+        :param options: Dict containing options. See getDefaultOptions().
+        :return: None
+        """
+        MeshType_3d_tube1.generateBaseMeshData(options).createInRegion(region)
 
     @staticmethod
     def generateMesh(region, options):
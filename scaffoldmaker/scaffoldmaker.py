@@ -1,45 +1,65 @@
 """
 Class for listing and accessing all mesh type scripts supported by scaffoldmaker.
+Mesh type modules are only imported when their class is requested; use
+getMeshTypeInfos() to list names and literal default options without
+importing them.
 """
 
-from scaffoldmaker.meshtypes.meshtype_2d_plate1 import MeshType_2d_plate1
-from scaffoldmaker.meshtypes.meshtype_2d_plate1 import MeshType_2d_plate1
-from scaffoldmaker.meshtypes.meshtype_2d_platehole1 import MeshType_2d_platehole1
-from scaffoldmaker.meshtypes.meshtype_2d_sphere1 import MeshType_2d_sphere1
-from scaffoldmaker.meshtypes.meshtype_2d_tube1 import MeshType_2d_tube1
-from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
-from scaffoldmaker.meshtypes.meshtype_3d_boxhole1 import MeshType_3d_boxhole1
-from scaffoldmaker.meshtypes.meshtype_3d_heartatria1 import MeshType_3d_heartatria1
-from scaffoldmaker.meshtypes.meshtype_3d_heartventricles1 import MeshType_3d_heartventricles1
-from scaffoldmaker.meshtypes.meshtype_3d_heartventricles2 import MeshType_3d_heartventricles2
-from scaffoldmaker.meshtypes.meshtype_3d_heartventriclesbase1 import MeshType_3d_heartventriclesbase1
-from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
-from scaffoldmaker.meshtypes.meshtype_3d_sphereshellseptum1 import MeshType_3d_sphereshellseptum1
-from scaffoldmaker.meshtypes.meshtype_3d_tube1 import MeshType_3d_tube1
-from scaffoldmaker.meshtypes.meshtype_3d_tubeseptum1 import MeshType_3d_tubeseptum1
+from scaffoldmaker.meshtyperegistry import MeshTypeRegistry
+
+def _createDefaultRegistry():
+    registry = MeshTypeRegistry()
+    for moduleName, className in [
+            ('meshtype_2d_plate1', 'MeshType_2d_plate1'),
+            ('meshtype_2d_platehole1', 'MeshType_2d_platehole1'),
+            ('meshtype_2d_sphere1', 'MeshType_2d_sphere1'),
+            ('meshtype_2d_tube1', 'MeshType_2d_tube1'),
+            ('meshtype_3d_box1', 'MeshType_3d_box1'),
+            ('meshtype_3d_boxhole1', 'MeshType_3d_boxhole1'),
+            ('meshtype_3d_heartatria1', 'MeshType_3d_heartatria1'),
+            ('meshtype_3d_heartventricles1', 'MeshType_3d_heartventricles1'),
+            ('meshtype_3d_heartventricles2', 'MeshType_3d_heartventricles2'),
+            ('meshtype_3d_heartventriclesbase1', 'MeshType_3d_heartventriclesbase1'),
+            ('meshtype_3d_sphereshell1', 'MeshType_3d_sphereshell1'),
+            ('meshtype_3d_sphereshellseptum1', 'MeshType_3d_sphereshellseptum1'),
+            ('meshtype_3d_tube1', 'MeshType_3d_tube1'),
+            ('meshtype_3d_tubeseptum1', 'MeshType_3d_tubeseptum1')
+            ]:
+        registry.registerMeshType('scaffoldmaker.meshtypes.' + moduleName, className)
+    return registry
+
+_defaultRegistry = None
+
+def getMeshTypeRegistry():
+    '''
+    :return: Shared MeshTypeRegistry of built-in and entry point mesh types.
+    '''
+    global _defaultRegistry
+    if _defaultRegistry is None:
+        _defaultRegistry = _createDefaultRegistry()
+    return _defaultRegistry
 
 class Scaffoldmaker(object):
 
     def __init__(self):
-        self._allMeshTypes = [
-            MeshType_2d_plate1,
-            MeshType_2d_platehole1,
-            MeshType_2d_sphere1,
-            MeshType_2d_tube1,
-            MeshType_3d_box1,
-            MeshType_3d_boxhole1,
-            MeshType_3d_heartatria1,
-            MeshType_3d_heartventricles1,
-            MeshType_3d_heartventricles2,
-            MeshType_3d_heartventriclesbase1,
-            MeshType_3d_sphereshell1,
-            MeshType_3d_sphereshellseptum1,
-            MeshType_3d_tube1,
-            MeshType_3d_tubeseptum1
-            ]
+        self._registry = getMeshTypeRegistry()
+
+    def getMeshTypeInfos(self):
+        '''
+        :return: List of MeshTypeInfo giving name and options of each mesh type
+        without importing its module.
+        '''
+        return self._registry.getMeshTypeInfos()
+
+    def findMeshTypeInfoByName(self, name):
+        return self._registry.findMeshTypeInfoByName(name)
 
     def getMeshTypes(self):
-        return self._allMeshTypes
+        '''
+        Note: imports all mesh type modules.
+        :return: List of mesh type classes.
+        '''
+        return [ meshTypeInfo.getMeshType() for meshTypeInfo in self._registry.getMeshTypeInfos() ]
 
     def getDefaultMeshType(self):
-        return MeshType_3d_box1
+        return self._registry.findMeshTypeInfoByName('3D Box 1').getMeshType()
@@ -0,0 +1,307 @@
+'''
+Vectorised evaluation of element basis functions and a sparse operator mapping
+global node parameters to field values at fixed element xi sample points, for
+repeated evaluation of MeshData fields without Zinc.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+import scipy.sparse
+from scaffoldmaker.utils.elementparameters import *
+from scaffoldmaker.utils.meshdata import *
+
+def _evaluateBasis1D(functionType, xi, derivativeOrder):
+    '''
+    :param functionType: BASIS_* function type.
+    :param xi: Array (pointsCount) of xi in [0, 1].
+    :param derivativeOrder: Order of derivative w.r.t. xi, 0 to 2.
+    :return: Array (pointsCount, 2 basis nodes, functions per basis node).
+    '''
+    if functionType == BASIS_LINEAR_LAGRANGE:
+        if derivativeOrder == 0:
+            return numpy.stack([ 1.0 - xi, xi ], axis=1)[:, :, numpy.newaxis]
+        one = numpy.ones(len(xi))
+        if derivativeOrder == 1:
+            return numpy.stack([ -one, one ], axis=1)[:, :, numpy.newaxis]
+        return numpy.zeros((len(xi), 2, 1))
+    xi2 = xi*xi
+    if derivativeOrder == 0:
+        xi3 = xi2*xi
+        f = [ 1.0 - 3.0*xi2 + 2.0*xi3, xi - 2.0*xi2 + xi3, 3.0*xi2 - 2.0*xi3, xi3 - xi2 ]
+    elif derivativeOrder == 1:
+        f = [ 6.0*(xi2 - xi), 1.0 - 4.0*xi + 3.0*xi2, 6.0*(xi - xi2), 3.0*xi2 - 2.0*xi ]
+    else:
+        f = [ 12.0*xi - 6.0, 6.0*xi - 4.0, 6.0 - 12.0*xi, 6.0*xi - 2.0 ]
+    return numpy.stack(f, axis=1).reshape(len(xi), 2, 2)
+
+def evaluateBasisFunctions(functionTypes, xi, derivativeOrders=None):
+    '''
+    Evaluate tensor product basis functions or their derivatives at many points.
+    Functions are in EftDescriptor order: by basis node with first xi varying
+    fastest, then value and derivatives per basis node.
+    :param functionTypes: List of BASIS_* function type for each xi direction.
+    :param xi: Array-like (pointsCount, dimension).
+    :param derivativeOrders: Optional list of derivative order w.r.t. each xi,
+    0 to 2, e.g. [ 1, 0, 0 ] for d/dxi1. Default all 0 for values.
+    :return: Array (pointsCount, functionsCount).
+    '''
+    dimension = len(functionTypes)
+    xi = numpy.asarray(xi, dtype=numpy.float64).reshape(-1, dimension)
+    if derivativeOrders is None:
+        derivativeOrders = [ 0 ]*dimension
+    # outer product of 1-D bases: node letters a.., function letters f.. reversed
+    # in output so first xi and first hermite axis vary fastest
+    basis1Ds = []
+    subscripts = []
+    for i in range(dimension):
+        basis1Ds.append(_evaluateBasis1D(functionTypes[i], xi[:, i], derivativeOrders[i]))
+        subscripts.append('z' + 'abcde'[i] + 'fghij'[i])
+    output = 'z' + 'abcde'[:dimension][::-1] + 'fghij'[:dimension][::-1]
+    return numpy.einsum(','.join(subscripts) + '->' + output, *basis1Ds).reshape(len(xi), -1)
+
+def getNodeParameterVector(meshData):
+    '''
+    Get global node parameter vector in the column order of evaluation operators.
+    :param meshData: MeshData.
+    :return: Array (nodesCount*valueLabelVersionsCount, componentsCount) with
+    nodes in order of getNodeIdentifiers() and value label/versions in order of
+    getValueLabelVersions() varying fastest.
+    '''
+    valueLabelVersions = meshData.getValueLabelVersions()
+    nodeParameters = numpy.stack([ meshData.getNodeParameters(valueLabel, version) for valueLabel, version in valueLabelVersions ], axis=1)
+    return nodeParameters.reshape(-1, meshData.getComponentsCount())
+
+def setNodeParameterVector(meshData, nodeParameterVector):
+    '''
+    Set node parameters of meshData from global node parameter vector, where defined.
+    :param nodeParameterVector: Array-like (nodesCount*valueLabelVersionsCount,
+    componentsCount) in order of getNodeParameterVector().
+    '''
+    valueLabelVersions = meshData.getValueLabelVersions()
+    nodeParameters = numpy.asarray(nodeParameterVector, dtype=numpy.float64).reshape(
+        meshData.getNodesCount(), len(valueLabelVersions), meshData.getComponentsCount())
+    for v in range(len(valueLabelVersions)):
+        valueLabel, version = valueLabelVersions[v]
+        meshData.setNodeParameters(valueLabel, version, nodeParameters[:, v, :])
+
+def createEvaluationOperator(meshData, elementIdentifiers, xi, derivativeOrders=None):
+    '''
+    Assemble sparse matrix mapping the global node parameter vector to field
+    values or xi derivatives at element xi sample points, including element
+    field template term maps and scale factors. Evaluate with:
+    operator.dot(getNodeParameterVector(meshData)) -> (pointsCount, componentsCount).
+    Rebuild if element field templates, scale factors or nodes change.
+    :param meshData: MeshData.
+    :param elementIdentifiers: Array-like (pointsCount) of element identifier at each point.
+    :param xi: Array-like (pointsCount, dimension) of element xi at each point.
+    :param derivativeOrders: Optional list of derivative order w.r.t. each xi,
+    see evaluateBasisFunctions.
+    :return: scipy.sparse.csr_matrix (pointsCount, nodesCount*valueLabelVersionsCount).
+    '''
+    elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+    pointsCount = len(elementIdentifiers)
+    xi = numpy.asarray(xi, dtype=numpy.float64).reshape(pointsCount, -1)
+    valueLabelVersions = meshData.getValueLabelVersions()
+    valueLabelVersionsCount = len(valueLabelVersions)
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    weightings = {}
+    rows = []
+    columns = []
+    values = []
+    found = numpy.zeros(pointsCount, dtype=bool)
+    for block in meshData.getElementBlocks():
+        points = numpy.where(numpy.isin(elementIdentifiers, block.elementIdentifiers))[0]
+        if len(points) == 0:
+            continue
+        found[points] = True
+        blockIndexes = getNodeIndexes(block.elementIdentifiers, elementIdentifiers[points])
+        key = block.eft.getKey()
+        weighting = weightings.get(key)
+        if weighting is None:
+            weighting = weightings[key] = EftWeighting(block.eft, valueLabelVersions)
+        phi = evaluateBasisFunctions(block.eft.getFunctionTypes(), xi[points], derivativeOrders)
+        scaleFactors = block.scaleFactors[blockIndexes] if (block.scaleFactors is not None) else None
+        termWeights = weighting.getTermWeights(scaleFactors, len(points))
+        termNodeIndexes = getNodeIndexes(nodeIdentifiers, block.nodeIdentifiers[blockIndexes][:, weighting.getTermLocalNodeIndexes()])
+        rows.append(numpy.repeat(points, weighting.getNumberOfTerms()))
+        columns.append((termNodeIndexes*valueLabelVersionsCount + weighting.getTermValueIndexes()).ravel())
+        values.append((phi[:, weighting.getTermFunctions()]*termWeights).ravel())
+    assert found.all(), 'createEvaluationOperator.  Element not found in mesh'
+    shape = (pointsCount, len(nodeIdentifiers)*valueLabelVersionsCount)
+    if not rows:
+        return scipy.sparse.csr_matrix(shape)
+    # duplicate entries for nodes mapped by several terms are summed
+    return scipy.sparse.coo_matrix((numpy.concatenate(values), (numpy.concatenate(rows), numpy.concatenate(columns))), shape=shape).tocsr()
+
+def getXiGrid(xiCounts):
+    '''
+    :param xiCounts: List of number of points in each xi direction, at least 1.
+    Points are equally spaced from xi = 0 to 1 inclusive, or at 0.5 if 1 point.
+    :return: Array (pointsCount, dimension) of xi with first direction varying fastest.
+    '''
+    xis = [ (numpy.linspace(0.0, 1.0, xiCount) if (xiCount > 1) else numpy.array([ 0.5 ])) for xiCount in xiCounts ]
+    grids = numpy.meshgrid(*xis[::-1], indexing='ij')
+    return numpy.stack([ grid.ravel() for grid in grids[::-1] ], axis=1)
+
+def getElementBlockParameters(meshData, elementIdentifiers):
+    '''
+    Get basis function parameters of elements by element block.
+    :param meshData: MeshData.
+    :param elementIdentifiers: int array of identifiers of elements in meshData,
+    which may be repeated.
+    :return: List of (indexes of elements in elementIdentifiers, functionTypes
+    tuple, parameters array (blockElementsCount, functionsCount, componentsCount)).
+    '''
+    valueLabelVersions = meshData.getValueLabelVersions()
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    nodeParameters = getNodeParameterVector(meshData).reshape(len(nodeIdentifiers), len(valueLabelVersions), -1)
+    found = numpy.zeros(len(elementIdentifiers), dtype=bool)
+    weightings = {}
+    blockParameters = []
+    for block in meshData.getElementBlocks():
+        elements = numpy.where(numpy.isin(elementIdentifiers, block.elementIdentifiers))[0]
+        if len(elements) == 0:
+            continue
+        found[elements] = True
+        blockIndexes = getNodeIndexes(block.elementIdentifiers, elementIdentifiers[elements])
+        key = block.eft.getKey()
+        weighting = weightings.get(key)
+        if weighting is None:
+            weighting = weightings[key] = EftWeighting(block.eft, valueLabelVersions)
+        scaleFactors = block.scaleFactors[blockIndexes] if (block.scaleFactors is not None) else None
+        parameters = weighting.getElementParameters(nodeParameters, getNodeIndexes(nodeIdentifiers, block.nodeIdentifiers[blockIndexes]), scaleFactors)
+        blockParameters.append((elements, tuple(block.eft.getFunctionTypes()), parameters))
+    assert found.all(), 'getElementBlockParameters.  Element not found in mesh'
+    return blockParameters
+
+def evaluateElementParameters(functionTypes, parameters, xi, derivativeOrders=None):
+    '''
+    Evaluate field at a separate xi in each of many elements with the same basis.
+    :param functionTypes: List of BASIS_* function type for each xi direction.
+    :param parameters: Array (elementsCount, functionsCount, componentsCount) of
+    basis function parameters, e.g. from getElementBlockParameters().
+    :param xi: Array-like (elementsCount, dimension) of xi in each element.
+    :param derivativeOrders: Optional list of derivative order w.r.t. each xi,
+    see evaluateBasisFunctions.
+    :return: Array (elementsCount, componentsCount).
+    '''
+    phi = evaluateBasisFunctions(functionTypes, xi, derivativeOrders)
+    return numpy.matmul(phi[:, numpy.newaxis, :], parameters)[:, 0, :]
+
+def evaluateElementParametersWithJacobians(functionTypes, parameters, xi, axes=None, hessians=False):
+    '''
+    Evaluate field and its xi derivatives at a separate xi in each of many
+    elements with the same basis, contracting parameters with 1-D bases one
+    xi direction at a time so parameters are only read once.
+    :param functionTypes: List of BASIS_* function type for each xi direction.
+    :param parameters: Array (elementsCount, functionsCount, componentsCount).
+    :param xi: Array-like (elementsCount, dimension) of xi in each element.
+    :param axes: Optional list of xi indexes to get derivatives w.r.t. Default all.
+    :param hessians: Set to True to also get second derivatives.
+    :return: x array (elementsCount, componentsCount), Jacobians array
+    (elementsCount, componentsCount, len(axes)), and if hessians, array
+    (elementsCount, componentsCount, len(axes), len(axes)).
+    '''
+    dimension = len(functionTypes)
+    xi = numpy.asarray(xi, dtype=numpy.float64).reshape(-1, dimension)
+    axes = list(range(dimension)) if (axes is None) else list(axes)
+    elementsCount, functionsCount, componentsCount = parameters.shape
+    orders = (0, 1, 2) if hessians else (0, 1)
+    ordersCount = len(orders)
+    # reorder as (element, component, node and function index pairs for last xi to first xi)
+    functionCounts = [ (2 if (functionType == BASIS_CUBIC_HERMITE) else 1) for functionType in functionTypes ]
+    t = parameters.reshape([ elementsCount ] + [ 2 ]*dimension + functionCounts[::-1] + [ componentsCount ])
+    t = t.transpose([ 0, 2*dimension + 1 ] + [ j for i in range(dimension) for j in (i + 1, dimension + i + 1) ])
+    t = t.reshape(elementsCount, componentsCount, 1, -1)
+    for i in range(dimension):
+        basis1D = numpy.stack([ _evaluateBasis1D(functionTypes[i], xi[:, i], order).reshape(elementsCount, -1) for order in orders ], axis=2)
+        variantsCount = t.shape[2]
+        t = numpy.matmul(t.reshape(elementsCount, -1, basis1D.shape[1]), basis1D)
+        # append derivative order in this xi as fastest varying variant
+        t = t.reshape(elementsCount, componentsCount, variantsCount, -1, ordersCount)
+        t = numpy.swapaxes(t, 3, 4).reshape(elementsCount, componentsCount, ordersCount*variantsCount, -1)
+    t = t[:, :, :, 0]
+    strides = [ ordersCount**(dimension - 1 - i) for i in axes ]
+    if not hessians:
+        return t[:, :, 0], t[:, :, strides]
+    hessianVariants = [ [ (strides[a] + strides[b]) for b in range(len(axes)) ] for a in range(len(axes)) ]
+    return t[:, :, 0], t[:, :, strides], t[:, :, hessianVariants]
+
+def _getElementIdentifiers(meshData, elementIdentifiers):
+    if elementIdentifiers is None:
+        return meshData.getElementIdentifiers()
+    return numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+
+def evaluateMeshDataElements(meshData, xi, elementIdentifiers=None, derivativeOrders=None):
+    '''
+    Evaluate field values or xi derivatives at the same xi points in many
+    elements, computing basis functions once per element basis.
+    :param meshData: MeshData.
+    :param xi: Array-like (pointsCount, dimension) of element xi.
+    :param elementIdentifiers: Optional array-like of identifiers of elements
+    to evaluate, all in meshData. Default all elements in block order.
+    :param derivativeOrders: Optional list of derivative order w.r.t. each xi,
+    see evaluateBasisFunctions.
+    :return: elementIdentifiers int array (elementsCount), values array
+    (elementsCount, pointsCount, componentsCount).
+    '''
+    xi = numpy.asarray(xi, dtype=numpy.float64).reshape(-1, meshData.getDimension())
+    elementIdentifiers = _getElementIdentifiers(meshData, elementIdentifiers)
+    values = numpy.zeros((len(elementIdentifiers), len(xi), meshData.getComponentsCount()))
+    basisFunctions = {}
+    for elements, functionTypes, parameters in getElementBlockParameters(meshData, elementIdentifiers):
+        phi = basisFunctions.get(functionTypes)
+        if phi is None:
+            phi = basisFunctions[functionTypes] = evaluateBasisFunctions(functionTypes, xi, derivativeOrders)
+        values[elements] = numpy.einsum('pf,efc->epc', phi, parameters)
+    return elementIdentifiers, values
+
+_gaussPoints = {}
+
+def getGaussPoints(dimension, pointsCountPerXi):
+    '''
+    Get Gauss-Legendre quadrature points and weights over the unit element,
+    computed once per dimension and order. Do not modify returned arrays.
+    :param dimension: Number of xi directions.
+    :param pointsCountPerXi: Number of Gauss points in each xi direction.
+    :return: xi array (pointsCount, dimension) with first direction varying
+    fastest, weights array (pointsCount) summing to 1.
+    '''
+    key = (dimension, pointsCountPerXi)
+    gaussPoints = _gaussPoints.get(key)
+    if gaussPoints is None:
+        points, weights = numpy.polynomial.legendre.leggauss(pointsCountPerXi)
+        points = 0.5*(points + 1.0)
+        weights = 0.5*weights
+        grids = numpy.meshgrid(*([ points ]*dimension), indexing='ij')
+        xi = numpy.stack([ grid.ravel() for grid in grids[::-1] ], axis=1)
+        w = numpy.prod(numpy.stack(numpy.meshgrid(*([ weights ]*dimension), indexing='ij'), axis=0).reshape(dimension, -1), axis=0)
+        xi.flags.writeable = False
+        w.flags.writeable = False
+        gaussPoints = _gaussPoints[key] = (xi, w)
+    return gaussPoints
+
+def evaluateMeshDataJacobians(meshData, xi, elementIdentifiers=None):
+    '''
+    Evaluate derivatives of field w.r.t. element xi at the same xi points in
+    many elements.
+    :param meshData: MeshData.
+    :param xi: Array-like (pointsCount, dimension) of element xi.
+    :param elementIdentifiers: Optional array-like of identifiers of elements
+    to evaluate, all in meshData. Default all elements in block order.
+    :return: elementIdentifiers int array (elementsCount), Jacobians array
+    (elementsCount, pointsCount, componentsCount, dimension).
+    '''
+    dimension = meshData.getDimension()
+    xi = numpy.asarray(xi, dtype=numpy.float64).reshape(-1, dimension)
+    elementIdentifiers = _getElementIdentifiers(meshData, elementIdentifiers)
+    jacobians = numpy.zeros((len(elementIdentifiers), len(xi), meshData.getComponentsCount(), dimension))
+    basisDerivatives = {}
+    for elements, functionTypes, parameters in getElementBlockParameters(meshData, elementIdentifiers):
+        dphi = basisDerivatives.get(functionTypes)
+        if dphi is None:
+            dphi = basisDerivatives[functionTypes] = numpy.stack([ evaluateBasisFunctions(functionTypes, xi,
+                [ (1 if (j == i) else 0) for j in range(dimension) ]) for i in range(dimension) ], axis=2)
+        jacobians[elements] = numpy.einsum('pfi,efc->epci', dphi, parameters)
+    return elementIdentifiers, jacobians
@@ -0,0 +1,110 @@
+'''
+Bounding volume hierarchy of axis-aligned boxes queried with batches of points.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+
+class BoxHierarchy(object):
+    '''
+    Static bounding volume hierarchy over axis-aligned boxes, e.g. element
+    bounding boxes, built by median splits along the longest axis. Queries
+    traverse the tree one level at a time for all points together.
+    '''
+
+    def __init__(self, minimums, maximums, leafBoxesCount=8):
+        '''
+        :param minimums: Array-like (boxesCount, dimension) of box minimums.
+        :param maximums: Array-like (boxesCount, dimension) of box maximums.
+        :param leafBoxesCount: Maximum number of boxes in a leaf.
+        '''
+        self._boxMinimums = numpy.asarray(minimums, dtype=numpy.float64)
+        self._boxMaximums = numpy.asarray(maximums, dtype=numpy.float64)
+        boxesCount = len(self._boxMinimums)
+        # tree nodes: bounds, children (-1 if leaf) and range into _boxOrder for leaves
+        nodeMinimums = []
+        nodeMaximums = []
+        nodeChildren = []
+        nodeRanges = []
+        self._boxOrder = numpy.arange(boxesCount)
+        centres = 0.5*(self._boxMinimums + self._boxMaximums)
+        stack = [ (0, boxesCount, -1, 0) ]
+        while stack:
+            start, end, parent, side = stack.pop()
+            node = len(nodeMinimums)
+            if parent >= 0:
+                nodeChildren[parent][side] = node
+            boxes = self._boxOrder[start:end]
+            if len(boxes) > 0:
+                nodeMinimums.append(numpy.min(self._boxMinimums[boxes], axis=0))
+                nodeMaximums.append(numpy.max(self._boxMaximums[boxes], axis=0))
+            else:
+                nodeMinimums.append(numpy.full(self._boxMinimums.shape[1], numpy.inf))
+                nodeMaximums.append(numpy.full(self._boxMinimums.shape[1], -numpy.inf))
+            nodeChildren.append([ -1, -1 ])
+            nodeRanges.append((start, end))
+            if (end - start) > leafBoxesCount:
+                boxCentres = centres[boxes]
+                axis = numpy.argmax(numpy.max(boxCentres, axis=0) - numpy.min(boxCentres, axis=0))
+                middle = (end - start) // 2
+                self._boxOrder[start:end] = boxes[numpy.argpartition(boxCentres[:, axis], middle)]
+                stack.append((start + middle, end, node, 1))
+                stack.append((start, start + middle, node, 0))
+        self._nodeMinimums = numpy.array(nodeMinimums)
+        self._nodeMaximums = numpy.array(nodeMaximums)
+        self._nodeChildren = numpy.array(nodeChildren, dtype=numpy.int64)
+        self._nodeRanges = numpy.array(nodeRanges, dtype=numpy.int64)
+
+    def getBoxesCount(self):
+        return len(self._boxMinimums)
+
+    def findBoxesNearPoints(self, points, distances=0.0):
+        '''
+        Find all pairs of point and box where the point is inside or within
+        distance of the box.
+        :param points: Array-like (pointsCount, dimension).
+        :param distances: Scalar or array-like (pointsCount) of distance from box.
+        :return: pointIndexes int array, boxIndexes int array of pairs, ordered by point.
+        '''
+        points = numpy.asarray(points, dtype=numpy.float64)
+        distances = numpy.broadcast_to(numpy.asarray(distances, dtype=numpy.float64), (len(points),))
+        pairPoints = numpy.arange(len(points))
+        pairNodes = numpy.zeros(len(points), dtype=numpy.int64)
+        leafPoints = [ numpy.zeros(0, dtype=numpy.int64) ]
+        leafNodes = [ numpy.zeros(0, dtype=numpy.int64) ]
+        while len(pairPoints) > 0:
+            x = points[pairPoints]
+            d = distances[pairPoints][:, numpy.newaxis]
+            near = numpy.all((x >= (self._nodeMinimums[pairNodes] - d)) & (x <= (self._nodeMaximums[pairNodes] + d)), axis=1)
+            pairPoints = pairPoints[near]
+            pairNodes = pairNodes[near]
+            leaf = self._nodeChildren[pairNodes, 0] < 0
+            leafPoints.append(pairPoints[leaf])
+            leafNodes.append(pairNodes[leaf])
+            pairPoints = numpy.repeat(pairPoints[~leaf], 2)
+            pairNodes = self._nodeChildren[pairNodes[~leaf]].ravel()
+        leafPoints = numpy.concatenate(leafPoints)
+        leafNodes = numpy.concatenate(leafNodes)
+        # expand leaves to their boxes
+        starts = self._nodeRanges[leafNodes, 0]
+        counts = self._nodeRanges[leafNodes, 1] - starts
+        pointIndexes = numpy.repeat(leafPoints, counts)
+        offsets = numpy.arange(numpy.sum(counts)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        boxIndexes = self._boxOrder[numpy.repeat(starts, counts) + offsets]
+        x = points[pointIndexes]
+        d = distances[pointIndexes][:, numpy.newaxis]
+        near = numpy.all((x >= (self._boxMinimums[boxIndexes] - d)) & (x <= (self._boxMaximums[boxIndexes] + d)), axis=1)
+        pointIndexes = pointIndexes[near]
+        boxIndexes = boxIndexes[near]
+        order = numpy.argsort(pointIndexes, kind='stable')
+        return pointIndexes[order], boxIndexes[order]
+
+    def getBoxDistances(self, points, boxIndexes):
+        '''
+        :param points: Array (pairsCount, dimension).
+        :param boxIndexes: int array (pairsCount) of box for each point.
+        :return: Array (pairsCount) of distance from each point to its box, 0 if inside.
+        '''
+        gap = numpy.maximum(self._boxMinimums[boxIndexes] - points, 0.0) + numpy.maximum(points - self._boxMaximums[boxIndexes], 0.0)
+        return numpy.sqrt(numpy.sum(gap*gap, axis=1))
@@ -0,0 +1,121 @@
+'''
+Vectorised coordinate system transformations with analytic Jacobians, and
+application of transformations to node values and derivatives.
+Coordinate systems follow Zinc conventions: spherical polar (r, theta, phi)
+has theta = atan2(y, x) around z and phi the angle up from the xy plane;
+cylindrical polar is (r, theta, z).
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.meshdata import VALUE_LABEL_VALUE
+
+def rectangularCartesianToSphericalPolar(x):
+    '''
+    :param x: array (n, 3).
+    :return: sp array (n, 3), Jacobian d(sp)/dx array (n, 3, 3).
+    '''
+    x = numpy.asarray(x, dtype=numpy.float64)
+    x1, x2, x3 = x[:, 0], x[:, 1], x[:, 2]
+    rho2 = x1*x1 + x2*x2
+    rho = numpy.sqrt(rho2)
+    r = numpy.sqrt(rho2 + x3*x3)
+    sp = numpy.stack([ r, numpy.arctan2(x2, x1), numpy.arctan2(x3, rho) ], axis=1)
+    J = numpy.zeros((len(x), 3, 3))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        J[:, 0, 0] = x1/r
+        J[:, 0, 1] = x2/r
+        J[:, 0, 2] = x3/r
+        J[:, 1, 0] = -x2/rho2
+        J[:, 1, 1] = x1/rho2
+        r2rho = r*r*rho
+        J[:, 2, 0] = -x1*x3/r2rho
+        J[:, 2, 1] = -x2*x3/r2rho
+        J[:, 2, 2] = rho/(r*r)
+    return sp, J
+
+def sphericalPolarToRectangularCartesian(sp):
+    '''
+    :param sp: array (n, 3) of r, theta, phi.
+    :return: x array (n, 3), Jacobian dx/d(sp) array (n, 3, 3).
+    '''
+    sp = numpy.asarray(sp, dtype=numpy.float64)
+    r, theta, phi = sp[:, 0], sp[:, 1], sp[:, 2]
+    cosTheta = numpy.cos(theta)
+    sinTheta = numpy.sin(theta)
+    cosPhi = numpy.cos(phi)
+    sinPhi = numpy.sin(phi)
+    x = numpy.stack([ r*cosPhi*cosTheta, r*cosPhi*sinTheta, r*sinPhi ], axis=1)
+    J = numpy.empty((len(sp), 3, 3))
+    J[:, 0, 0] = cosPhi*cosTheta
+    J[:, 0, 1] = -r*cosPhi*sinTheta
+    J[:, 0, 2] = -r*sinPhi*cosTheta
+    J[:, 1, 0] = cosPhi*sinTheta
+    J[:, 1, 1] = r*cosPhi*cosTheta
+    J[:, 1, 2] = -r*sinPhi*sinTheta
+    J[:, 2, 0] = sinPhi
+    J[:, 2, 1] = 0.0
+    J[:, 2, 2] = r*cosPhi
+    return x, J
+
+def rectangularCartesianToCylindricalPolar(x):
+    '''
+    :param x: array (n, 3).
+    :return: cp array (n, 3), Jacobian d(cp)/dx array (n, 3, 3).
+    '''
+    x = numpy.asarray(x, dtype=numpy.float64)
+    x1, x2 = x[:, 0], x[:, 1]
+    r2 = x1*x1 + x2*x2
+    r = numpy.sqrt(r2)
+    cp = numpy.stack([ r, numpy.arctan2(x2, x1), x[:, 2] ], axis=1)
+    J = numpy.zeros((len(x), 3, 3))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        J[:, 0, 0] = x1/r
+        J[:, 0, 1] = x2/r
+        J[:, 1, 0] = -x2/r2
+        J[:, 1, 1] = x1/r2
+    J[:, 2, 2] = 1.0
+    return cp, J
+
+def cylindricalPolarToRectangularCartesian(cp):
+    '''
+    :param cp: array (n, 3) of r, theta, z.
+    :return: x array (n, 3), Jacobian dx/d(cp) array (n, 3, 3).
+    '''
+    cp = numpy.asarray(cp, dtype=numpy.float64)
+    r, theta = cp[:, 0], cp[:, 1]
+    cosTheta = numpy.cos(theta)
+    sinTheta = numpy.sin(theta)
+    x = numpy.stack([ r*cosTheta, r*sinTheta, cp[:, 2] ], axis=1)
+    J = numpy.zeros((len(cp), 3, 3))
+    J[:, 0, 0] = cosTheta
+    J[:, 0, 1] = -r*sinTheta
+    J[:, 1, 0] = sinTheta
+    J[:, 1, 1] = r*cosTheta
+    J[:, 2, 2] = 1.0
+    return x, J
+
+def transformMeshDataNodes(meshData, transform, nodeMask=None):
+    '''
+    Transform node values of meshData in one pass and update all derivatives
+    and versions by the Jacobian of the transformation at each node.
+    Note cross derivatives are also only multiplied by the Jacobian, omitting
+    second derivatives of the transformation.
+    :param meshData: MeshData with 3 component field.
+    :param transform: Function taking array x (n, 3), returning new x (n, 3)
+    and Jacobian d(new x)/dx (n, 3, 3).
+    :param nodeMask: Optional bool array (nodesCount) in order of
+    meshData.getNodeIdentifiers() selecting nodes to transform.
+    '''
+    x = meshData.getNodeParameters(VALUE_LABEL_VALUE)
+    if nodeMask is None:
+        nodeMask = numpy.ones(len(x), dtype=bool)
+    xNew, J = transform(x[nodeMask])
+    x[nodeMask] = xNew
+    meshData.setNodeParameters(VALUE_LABEL_VALUE, 1, x)
+    for valueLabel, version in meshData.getValueLabelVersions():
+        if valueLabel != VALUE_LABEL_VALUE:
+            d = meshData.getNodeParameters(valueLabel, version)
+            d[nodeMask] = numpy.einsum('nij,nj->ni', J, d[nodeMask])
+            meshData.setNodeParameters(valueLabel, version, d)
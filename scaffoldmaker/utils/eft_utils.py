@@ -3,8 +3,9 @@ Utility functions for element field templates shared by mesh generators.
 Created on Jan 4, 2018
 
 @author: Richard Christie
+
+Functions work on Zinc Elementfieldtemplate or meshdata.EftDescriptor.
 '''
-from opencmiss.zinc.element import Elementfieldtemplate
 
 def mapEftFunction1Node1Term(eft, function, localNode, valueLabel, version, scaleFactors):
     '''
@@ -27,14 +28,21 @@ def setEftScaleFactorIds(eft, generalScaleFactorIds, nodeScaleFactorIds):
     '''
     Set general followed by node scale factor identifiers.
     '''
+    from scaffoldmaker.utils.meshdata import EftDescriptor
+    if isinstance(eft, EftDescriptor):
+        from scaffoldmaker.utils.meshdata import SCALE_FACTOR_TYPE_GLOBAL_GENERAL, SCALE_FACTOR_TYPE_NODE_GENERAL
+    else:
+        from opencmiss.zinc.element import Elementfieldtemplate
+        SCALE_FACTOR_TYPE_GLOBAL_GENERAL = Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL
+        SCALE_FACTOR_TYPE_NODE_GENERAL = Elementfieldtemplate.SCALE_FACTOR_TYPE_NODE_GENERAL
     eft.setNumberOfLocalScaleFactors(len(generalScaleFactorIds) + len(nodeScaleFactorIds))
     s = 1
     for id in generalScaleFactorIds:
-        eft.setScaleFactorType(s, Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
+        eft.setScaleFactorType(s, SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
         eft.setScaleFactorIdentifier(s, id)
         s += 1
     for id in nodeScaleFactorIds:
-        eft.setScaleFactorType(s, Elementfieldtemplate.SCALE_FACTOR_TYPE_NODE_GENERAL)
+        eft.setScaleFactorType(s, SCALE_FACTOR_TYPE_NODE_GENERAL)
         eft.setScaleFactorIdentifier(s, id)
         s += 1
 
@@ -5,27 +5,11 @@ Created on Nov 15, 2017
 @author: Richard Christie
 '''
 from scaffoldmaker.utils.eft_utils import *
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.vector import normalise, crossproduct3
 from scaffoldmaker.utils.zinc_utils import *
-from opencmiss.zinc.element import Element, Elementbasis, Elementfieldtemplate
-from opencmiss.zinc.node import Node
-from opencmiss.zinc.status import OK as ZINC_OK
 import math
-
-def normalise(v):
-    '''
-    :return: vector v normalised to unit length
-    '''
-    mag = 0.0
-    for s in v:
-        mag += s*s
-    mag = math.sqrt(mag)
-    return [ s/mag for s in v ]
-
-def crossproduct3(a, b):
-    '''
-    :return: vector 3-D cross product of a and b
-    '''
-    return [ a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0] ]
+import numpy
 
 class eftfactory_tricubichermite:
     '''
@@ -34,14 +18,25 @@ class eftfactory_tricubichermite:
 
     def __init__(self, mesh, useCrossDerivatives):
         '''
-        :param mesh:  Zinc mesh to create element field templates in.
+        :param mesh:  Zinc mesh to create element field templates in, or None to
+        create meshdata.EftDescriptor instead. Functions creating elements need a mesh.
         :param useCrossDerivatives: Set to True if you want cross derivative terms.
         '''
-        assert mesh.getDimension() == 3, 'eftfactory_tricubichermite: not a 3-D Zinc mesh'
         self._mesh = mesh
         self._useCrossDerivatives = useCrossDerivatives
-        self._fieldmodule = mesh.getFieldmodule()
-        self._tricubicHermiteBasis = self._fieldmodule.createElementbasis(3, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
+        if mesh is not None:
+            from opencmiss.zinc.element import Elementbasis
+            assert mesh.getDimension() == 3, 'eftfactory_tricubichermite: not a 3-D Zinc mesh'
+            self._fieldmodule = mesh.getFieldmodule()
+            self._tricubicHermiteBasis = self._fieldmodule.createElementbasis(3, Elementbasis.FUNCTION_TYPE_CUBIC_HERMITE)
+
+    def _createEftTricubicHermite(self):
+        '''
+        :return: New full tricubic Hermite element field template or descriptor.
+        '''
+        if self._mesh is None:
+            return EftDescriptor([ BASIS_CUBIC_HERMITE ]*3)
+        return self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
 
     def createEftBasic(self):
         '''
@@ -51,7 +46,7 @@ class eftfactory_tricubichermite:
         '''
         if not self._useCrossDerivatives:
             return self.createEftNoCrossDerivatives()
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         assert eft.validate(), 'eftfactory_tricubichermite.createEftBasic:  Failed to validate eft'
         return eft
 
@@ -61,7 +56,7 @@ class eftfactory_tricubichermite:
         node derivatives, without cross derivatives.
         :return: Element field template
         '''
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         for n in range(8):
             eft.setFunctionNumberOfTerms(n*8 + 4, 0)
             eft.setFunctionNumberOfTerms(n*8 + 6, 0)
@@ -85,7 +80,7 @@ class eftfactory_tricubichermite:
         :return: Element field template
         '''
         # start with full tricubic to remap D2_DS1DS2 at apex
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         if not self._useCrossDerivatives:
             for n in [ 2, 3, 6, 7 ]:
                 eft.setFunctionNumberOfTerms(n*8 + 4, 0)
@@ -100,28 +95,28 @@ class eftfactory_tricubichermite:
             nodeScaleFactorOffset0 + 1, nodeScaleFactorOffset0 + 2, nodeScaleFactorOffset0 + 3,
             nodeScaleFactorOffset1 + 1, nodeScaleFactorOffset1 + 2, nodeScaleFactorOffset1 + 3 ])
         # remap parameters before collapsing nodes
-        remapEftNodeValueLabel(eft, [ 1, 2, 5, 6 ], Node.VALUE_LABEL_D_DS1, [])
+        remapEftNodeValueLabel(eft, [ 1, 2, 5, 6 ], VALUE_LABEL_D_DS1, [])
         for layer in range(2):
             so = layer*6 + 1
             ln = layer*4 + 1
             # 2 terms for d/dxi2 via general linear map:
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [so + 1]), (Node.VALUE_LABEL_D_DS2, [so + 2]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [so + 1]), (VALUE_LABEL_D_DS2, [so + 2]) ])
             # 2 terms for cross derivative 1 2 to correct circular apex: -sin(theta).phi, cos(theta).phi
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS2, [ (Node.VALUE_LABEL_D_DS1, [so + 2, so + 3]), (Node.VALUE_LABEL_D_DS2, [1, so + 1, so + 3]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS2, [ (VALUE_LABEL_D_DS1, [so + 2, so + 3]), (VALUE_LABEL_D_DS2, [1, so + 1, so + 3]) ])
             # zero other cross derivative parameters
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS2DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D3_DS1DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D3_DS1DS2DS3, [])
 
             ln = layer*4 + 2
             # 2 terms for d/dxi2 via general linear map:
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, so + 4), (Node.VALUE_LABEL_D_DS2, so + 5) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, so + 4), (VALUE_LABEL_D_DS2, so + 5) ])
             # 2 terms for cross derivative 1 2 to correct circular apex: -sin(theta).phi, cos(theta).phi
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS2, [ (Node.VALUE_LABEL_D_DS1, [so + 5, so + 6]), (Node.VALUE_LABEL_D_DS2, [1, so + 4, so + 6]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS2, [ (VALUE_LABEL_D_DS1, [so + 5, so + 6]), (VALUE_LABEL_D_DS2, [1, so + 4, so + 6]) ])
             # zero other cross derivative parameters
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS2DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D3_DS1DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D3_DS1DS2DS3, [])
 
         ln_map = [ 1, 1, 2, 3, 4, 4, 5, 6 ]
         remapEftLocalNodes(eft, 6, ln_map)
@@ -144,7 +139,7 @@ class eftfactory_tricubichermite:
         :return: Element field template
         '''
         # start with full tricubic to remap D2_DS1DS2 at apex
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         if not self._useCrossDerivatives:
             for n in [ 0, 1, 4, 5 ]:
                 eft.setFunctionNumberOfTerms(n*8 + 4, 0)
@@ -159,28 +154,28 @@ class eftfactory_tricubichermite:
             nodeScaleFactorOffset0 + 1, nodeScaleFactorOffset0 + 2, nodeScaleFactorOffset0 + 3,
             nodeScaleFactorOffset1 + 1, nodeScaleFactorOffset1 + 2, nodeScaleFactorOffset1 + 3 ])
         # remap parameters before collapsing nodes
-        remapEftNodeValueLabel(eft, [ 3, 4, 7, 8 ], Node.VALUE_LABEL_D_DS1, [])
+        remapEftNodeValueLabel(eft, [ 3, 4, 7, 8 ], VALUE_LABEL_D_DS1, [])
         for layer in range(2):
             so = layer*6 + 1
             ln = layer*4 + 3
             # 2 terms for d/dxi2 via general linear map:
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [so + 1]), (Node.VALUE_LABEL_D_DS2, [so + 2]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [so + 1]), (VALUE_LABEL_D_DS2, [so + 2]) ])
             # 2 terms for cross derivative 1 2 to correct circular apex: -sin(theta).phi, cos(theta).phi
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS2, [ (Node.VALUE_LABEL_D_DS1, [1, so + 2, so + 3]), (Node.VALUE_LABEL_D_DS2, [so + 1, so + 3]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS2, [ (VALUE_LABEL_D_DS1, [1, so + 2, so + 3]), (VALUE_LABEL_D_DS2, [so + 1, so + 3]) ])
             # zero other cross derivative parameters
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS2DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D3_DS1DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D3_DS1DS2DS3, [])
 
             ln = layer*4 + 4
             # 2 terms for d/dxi2 via general linear map:
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, so + 4), (Node.VALUE_LABEL_D_DS2, so + 5) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, so + 4), (VALUE_LABEL_D_DS2, so + 5) ])
             # 2 terms for cross derivative 1 2 to correct circular apex: -sin(theta).phi, cos(theta).phi
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS2, [ (Node.VALUE_LABEL_D_DS1, [1, so + 5, so + 6]), (Node.VALUE_LABEL_D_DS2, [so + 4, so + 6]) ])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS2, [ (VALUE_LABEL_D_DS1, [1, so + 5, so + 6]), (VALUE_LABEL_D_DS2, [so + 4, so + 6]) ])
             # zero other cross derivative parameters
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS1DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D2_DS2DS3, [])
-            remapEftNodeValueLabel(eft, [ ln ], Node.VALUE_LABEL_D3_DS1DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS1DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D2_DS2DS3, [])
+            remapEftNodeValueLabel(eft, [ ln ], VALUE_LABEL_D3_DS1DS2DS3, [])
 
         ln_map = [ 1, 2, 3, 3, 4, 5, 6, 6 ]
         remapEftLocalNodes(eft, 6, ln_map)
@@ -196,8 +191,8 @@ class eftfactory_tricubichermite:
         '''
         eft = self.createEftNoCrossDerivatives()
         setEftScaleFactorIds(eft, [1], [])
-        remapEftNodeValueLabel(eft, [ 1, 3 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, []) ])
-        remapEftNodeValueLabel(eft, [ 2, 4 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, [1]) ])
+        remapEftNodeValueLabel(eft, [ 1, 3 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, []) ])
+        remapEftNodeValueLabel(eft, [ 2, 4 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, [1]) ])
         assert eft.validate(), 'eftfactory_tricubichermite.createEftSplitXi1LeftStraight:  Failed to validate eft'
         return eft
 
@@ -210,8 +205,8 @@ class eftfactory_tricubichermite:
         '''
         eft = self.createEftNoCrossDerivatives()
         setEftScaleFactorIds(eft, [1], [])
-        remapEftNodeValueLabel(eft, [ 5, 7 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, [1]) ])
-        remapEftNodeValueLabel(eft, [ 6, 8 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, []) ])
+        remapEftNodeValueLabel(eft, [ 5, 7 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, [1]) ])
+        remapEftNodeValueLabel(eft, [ 6, 8 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, []) ])
         assert eft.validate(), 'eftfactory_tricubichermite.createEftSplitXi1RightStraight:  Failed to validate eft'
         return eft
 
@@ -224,9 +219,9 @@ class eftfactory_tricubichermite:
         '''
         eft = self.createEftNoCrossDerivatives()
         setEftScaleFactorIds(eft, [1], [])
-        remapEftNodeValueLabel(eft, [ 2, 4 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, [1]) ])
-        remapEftNodeValueLabel(eft, [ 2, 4 ], Node.VALUE_LABEL_D_DS3, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, [1]) ])
-        remapEftNodeValueLabel(eft, [ 6, 8 ], Node.VALUE_LABEL_D_DS3, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS3, [1]) ])
+        remapEftNodeValueLabel(eft, [ 2, 4 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, [1]) ])
+        remapEftNodeValueLabel(eft, [ 2, 4 ], VALUE_LABEL_D_DS3, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, [1]) ])
+        remapEftNodeValueLabel(eft, [ 6, 8 ], VALUE_LABEL_D_DS3, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS3, [1]) ])
         assert eft.validate(), 'eftfactory_tricubichermite.createEftSplitXi1RightOut:  Failed to validate eft'
         return eft
 
@@ -239,9 +234,9 @@ class eftfactory_tricubichermite:
         '''
         eft = self.createEftNoCrossDerivatives()
         setEftScaleFactorIds(eft, [1], [])
-        remapEftNodeValueLabel(eft, [ 1, 3 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, [1]) ])
-        remapEftNodeValueLabel(eft, [ 1, 3 ], Node.VALUE_LABEL_D_DS3, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS3, [1]) ])
-        remapEftNodeValueLabel(eft, [ 5, 7 ], Node.VALUE_LABEL_D_DS3, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS3, []) ])
+        remapEftNodeValueLabel(eft, [ 1, 3 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, [1]) ])
+        remapEftNodeValueLabel(eft, [ 1, 3 ], VALUE_LABEL_D_DS3, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS3, [1]) ])
+        remapEftNodeValueLabel(eft, [ 5, 7 ], VALUE_LABEL_D_DS3, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS3, []) ])
         assert eft.validate(), 'eftfactory_tricubichermite.createEftSplitXi1RightOut:  Failed to validate eft'
         return eft
 
@@ -254,12 +249,9 @@ class eftfactory_tricubichermite:
         Cross derivatives are not used on the general mapped nodes.
         :return: Element field template
         '''
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         # general linear map at 4 nodes for one derivative
-        eft.setNumberOfLocalScaleFactors(8)
-        for s in range(8):
-            eft.setScaleFactorType(s + 1, Elementfieldtemplate.SCALE_FACTOR_TYPE_NODE_GENERAL)
-            eft.setScaleFactorIdentifier(s + 1, (s % 2) + 1)
+        setEftScaleFactorIds(eft, [], [ 1, 2 ]*4)
         if self._useCrossDerivatives:
             noCrossRange = range(4)
         else:
@@ -273,9 +265,9 @@ class eftfactory_tricubichermite:
         for n in range(4):
             ln = n + 1
             eft.setFunctionNumberOfTerms(n*8 + 2, 2)
-            eft.setTermNodeParameter(n*8 + 2, 1, ln, Node.VALUE_LABEL_D_DS1, 1)
+            eft.setTermNodeParameter(n*8 + 2, 1, ln, VALUE_LABEL_D_DS1, 1)
             eft.setTermScaling(n*8 + 2, 1, [n*2 + 1])
-            eft.setTermNodeParameter(n*8 + 2, 2, ln, Node.VALUE_LABEL_D_DS3, 1)
+            eft.setTermNodeParameter(n*8 + 2, 2, ln, VALUE_LABEL_D_DS3, 1)
             eft.setTermScaling(n*8 + 2, 2, [n*2 + 2])
         assert eft.validate(), 'eftfactory_tricubichermite.createEftTubeSeptumOuter:  Failed to validate eft'
         return eft
@@ -289,18 +281,11 @@ class eftfactory_tricubichermite:
         Cross derivatives are not used on the general mapped nodes.
         :return: Element field template
         '''
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         # negate dxi1 plus general linear map at 4 nodes for one derivative
-        eft.setNumberOfLocalScaleFactors(10)
         # GRC: allow scale factor identifier for global -1.0 to be prescribed
-        eft.setScaleFactorType(1, Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
-        eft.setScaleFactorIdentifier(1, 1)
         # Global scale factor 4.0 used for cross derivative term to correct first derivative
-        eft.setScaleFactorType(2, Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
-        eft.setScaleFactorIdentifier(2, 2)
-        for s in range(8):
-            eft.setScaleFactorType(s + 3, Elementfieldtemplate.SCALE_FACTOR_TYPE_NODE_GENERAL)
-            eft.setScaleFactorIdentifier(s + 3, (s % 2) + 1)
+        setEftScaleFactorIds(eft, [ 1, 2 ], [ 1, 2 ]*4)
         if self._useCrossDerivatives:
             noCrossRange = [ 0, 2, 4, 6 ]
         else:
@@ -316,14 +301,14 @@ class eftfactory_tricubichermite:
             ln = n + 1
             # 2 terms for d/dx3 via general linear map
             eft.setFunctionNumberOfTerms(n*8 + 5, 2)
-            eft.setTermNodeParameter(n*8 + 5, 1, ln, Node.VALUE_LABEL_D_DS1, 1)
+            eft.setTermNodeParameter(n*8 + 5, 1, ln, VALUE_LABEL_D_DS1, 1)
             eft.setTermScaling(n*8 + 5, 1, [s*2 + 3])
-            eft.setTermNodeParameter(n*8 + 5, 2, ln, Node.VALUE_LABEL_D_DS3, 1)
+            eft.setTermNodeParameter(n*8 + 5, 2, ln, VALUE_LABEL_D_DS3, 1)
             eft.setTermScaling(n*8 + 5, 2, [s*2 + 4])
             # add d2/dxi1dxi3 correction along xi1 == 0 to fit septum outer xi1 derivative better
             # GRC WIP
             eft.setFunctionNumberOfTerms(n*8 + 6, 1)
-            eft.setTermNodeParameter(n*8 + 6, 1, ln, Node.VALUE_LABEL_D_DS3, 1)
+            eft.setTermNodeParameter(n*8 + 6, 1, ln, VALUE_LABEL_D_DS3, 1)
             eft.setTermScaling(n*8 + 6, 1, [1, 2] if (n < 4) else [2])
             s += 1
         # negate d/dxi1 at 2 nodes
@@ -341,18 +326,11 @@ class eftfactory_tricubichermite:
         Cross derivatives are not used on the general mapped nodes.
         :return: Element field template
         '''
-        eft = self._mesh.createElementfieldtemplate(self._tricubicHermiteBasis)
+        eft = self._createEftTricubicHermite()
         # negate dxi1 plus general linear map at 4 nodes for one derivative
-        eft.setNumberOfLocalScaleFactors(10)
         # GRC: allow scale factor identifier for global -1.0 to be prescribed
-        eft.setScaleFactorType(1, Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
-        eft.setScaleFactorIdentifier(1, 1)
         # Global scale factor 4.0 used for cross derivative term to correct first derivative
-        eft.setScaleFactorType(2, Elementfieldtemplate.SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
-        eft.setScaleFactorIdentifier(2, 2)
-        for s in range(8):
-            eft.setScaleFactorType(s + 3, Elementfieldtemplate.SCALE_FACTOR_TYPE_NODE_GENERAL)
-            eft.setScaleFactorIdentifier(s + 3, (s % 2) + 1)
+        setEftScaleFactorIds(eft, [ 1, 2 ], [ 1, 2 ]*4)
         if self._useCrossDerivatives:
             noCrossRange = [ 1, 3, 5, 7 ]
         else:
@@ -368,14 +346,14 @@ class eftfactory_tricubichermite:
             ln = n + 1
             # 2 terms for d/dx3 via general linear map
             eft.setFunctionNumberOfTerms(n*8 + 5, 2)
-            eft.setTermNodeParameter(n*8 + 5, 1, ln, Node.VALUE_LABEL_D_DS1, 1)
+            eft.setTermNodeParameter(n*8 + 5, 1, ln, VALUE_LABEL_D_DS1, 1)
             eft.setTermScaling(n*8 + 5, 1, [1, s*2 + 3])
-            eft.setTermNodeParameter(n*8 + 5, 2, ln, Node.VALUE_LABEL_D_DS3, 1)
+            eft.setTermNodeParameter(n*8 + 5, 2, ln, VALUE_LABEL_D_DS3, 1)
             eft.setTermScaling(n*8 + 5, 2, [1, s*2 + 4])
             # add d2/dxi1dxi3 correction along xi1 == 0 to fit septum outer xi1 derivative better
             # GRC WIP
             eft.setFunctionNumberOfTerms(n*8 + 6, 1)
-            eft.setTermNodeParameter(n*8 + 6, 1, ln, Node.VALUE_LABEL_D_DS3, 1)
+            eft.setTermNodeParameter(n*8 + 6, 1, ln, VALUE_LABEL_D_DS3, 1)
             eft.setTermScaling(n*8 + 6, 1, [2] if (n < 4) else [1, 2])
             s += 1
         # negate d/dxi1 at 2 nodes
@@ -394,9 +372,9 @@ class eftfactory_tricubichermite:
         for n in [basisNode1 - 1, basisNode2 - 1]:
             f = n*8 + 2
             eft.setFunctionNumberOfTerms(f, 2)
-            eft.setTermNodeParameter(f, 1, localNode2, Node.VALUE_LABEL_VALUE, 1)
+            eft.setTermNodeParameter(f, 1, localNode2, VALUE_LABEL_VALUE, 1)
             eft.setTermScaling(f, 1, [])
-            eft.setTermNodeParameter(f, 2, localNode1, Node.VALUE_LABEL_VALUE, 1)
+            eft.setTermNodeParameter(f, 2, localNode1, VALUE_LABEL_VALUE, 1)
             eft.setTermScaling(f, 2, [minus1scaleFactorIndex])
 
     def setEftLinearDerivativeXi3(self, eft, basisNode1, basisNode2, localNode1, localNode2, minus1scaleFactorIndex):
@@ -409,9 +387,9 @@ class eftfactory_tricubichermite:
         for n in [basisNode1 - 1, basisNode2 - 1]:
             f = n*8 + 5
             eft.setFunctionNumberOfTerms(f, 2)
-            eft.setTermNodeParameter(f, 1, localNode2, Node.VALUE_LABEL_VALUE, 1)
+            eft.setTermNodeParameter(f, 1, localNode2, VALUE_LABEL_VALUE, 1)
             eft.setTermScaling(f, 1, [])
-            eft.setTermNodeParameter(f, 2, localNode1, Node.VALUE_LABEL_VALUE, 1)
+            eft.setTermNodeParameter(f, 2, localNode1, VALUE_LABEL_VALUE, 1)
             eft.setTermScaling(f, 2, [minus1scaleFactorIndex])
 
     def setEftMidsideXi1HangingNode(self, eft, hangingBasisNode, otherBasisNode, localNode1, localNode2, scaleFactorIndexes):
@@ -437,35 +415,35 @@ class eftfactory_tricubichermite:
         termOrder = [ 3, 4, 1, 2] if (otherLocalNode == localNode1) else [ 1, 2, 3, 4]
         # value = 0.5*x_1 + 0.125*ds1_1 + 0.5*x_2 - 0.125*ds1_2
         eft.setFunctionNumberOfTerms(n*8 + 1, 4)
-        eft.setTermNodeParameter(n*8 + 1, termOrder[0], localNode1, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[0], localNode1, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 1, termOrder[0], [sf05])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[1], localNode1, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[1], localNode1, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 1, termOrder[1], [sf0125])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[2], localNode2, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[2], localNode2, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 1, termOrder[2], [sf05])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[3], localNode2, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[3], localNode2, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 1, termOrder[3], [sfneg1, sf0125])
         # d/dxi1 = -0.75*x_1 - 0.125*ds1_1 + 0.75*x_2 - 0.125*ds1_2
         eft.setFunctionNumberOfTerms(n*8 + 2, 4)
-        eft.setTermNodeParameter(n*8 + 2, 1, localNode1, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 2, 1, localNode1, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 2, 1, [sfneg1, sf075])
-        eft.setTermNodeParameter(n*8 + 2, 2, localNode1, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 2, 2, localNode1, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 2, 2, [sfneg1, sf0125])
-        eft.setTermNodeParameter(n*8 + 2, 3, localNode2, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 2, 3, localNode2, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 2, 3, [sf075])
-        eft.setTermNodeParameter(n*8 + 2, 4, localNode2, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 2, 4, localNode2, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 2, 4, [sfneg1, sf0125])
         # d/dxi2 = 0.5*ds2_1 + 0.5*ds2_2
         eft.setFunctionNumberOfTerms(n*8 + 3, 2)
-        eft.setTermNodeParameter(n*8 + 3, 1, localNode1, Node.VALUE_LABEL_D_DS2, 1)
+        eft.setTermNodeParameter(n*8 + 3, 1, localNode1, VALUE_LABEL_D_DS2, 1)
         eft.setTermScaling(n*8 + 3, 1, [sf05])
-        eft.setTermNodeParameter(n*8 + 3, 2, localNode2, Node.VALUE_LABEL_D_DS2, 1)
+        eft.setTermNodeParameter(n*8 + 3, 2, localNode2, VALUE_LABEL_D_DS2, 1)
         eft.setTermScaling(n*8 + 3, 2, [sf05])
         # d/dxi3 = 0.5*ds3_1 + 0.5*ds3_2
         eft.setFunctionNumberOfTerms(n*8 + 5, 2)
-        eft.setTermNodeParameter(n*8 + 5, 1, localNode1, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 5, 1, localNode1, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 5, 1, [sf05])
-        eft.setTermNodeParameter(n*8 + 5, 2, localNode2, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 5, 2, localNode2, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 5, 2, [sf05])
 
     def setEftMidsideXi3HangingNode(self, eft, hangingBasisNode, otherBasisNode, localNode1, localNode2, scaleFactorIndexes):
@@ -491,133 +469,164 @@ class eftfactory_tricubichermite:
         termOrder = [ 3, 4, 1, 2] if (otherLocalNode == localNode1) else [ 1, 2, 3, 4]
         # value = 0.5*x_1 + 0.125*ds3_1 + 0.5*x_2 - 0.125*ds3_2
         eft.setFunctionNumberOfTerms(n*8 + 1, 4)
-        eft.setTermNodeParameter(n*8 + 1, termOrder[0], localNode1, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[0], localNode1, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 1, termOrder[0], [sf05])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[1], localNode1, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[1], localNode1, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 1, termOrder[1], [sf0125])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[2], localNode2, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[2], localNode2, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 1, termOrder[2], [sf05])
-        eft.setTermNodeParameter(n*8 + 1, termOrder[3], localNode2, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 1, termOrder[3], localNode2, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 1, termOrder[3], [sfneg1, sf0125])
         # d/dxi1 = 0.5*ds1_1 + 0.5*ds1_2
         eft.setFunctionNumberOfTerms(n*8 + 2, 2)
-        eft.setTermNodeParameter(n*8 + 2, 1, localNode1, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 2, 1, localNode1, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 2, 1, [sf05])
-        eft.setTermNodeParameter(n*8 + 2, 2, localNode2, Node.VALUE_LABEL_D_DS1, 1)
+        eft.setTermNodeParameter(n*8 + 2, 2, localNode2, VALUE_LABEL_D_DS1, 1)
         eft.setTermScaling(n*8 + 2, 2, [sf05])
         # d/dxi2 = 0.5*ds2_1 + 0.5*ds2_2
         eft.setFunctionNumberOfTerms(n*8 + 3, 2)
-        eft.setTermNodeParameter(n*8 + 3, 1, localNode1, Node.VALUE_LABEL_D_DS2, 1)
+        eft.setTermNodeParameter(n*8 + 3, 1, localNode1, VALUE_LABEL_D_DS2, 1)
         eft.setTermScaling(n*8 + 3, 1, [sf05])
-        eft.setTermNodeParameter(n*8 + 3, 2, localNode2, Node.VALUE_LABEL_D_DS2, 1)
+        eft.setTermNodeParameter(n*8 + 3, 2, localNode2, VALUE_LABEL_D_DS2, 1)
         eft.setTermScaling(n*8 + 3, 2, [sf05])
         # d/dxi3 = -0.75*x_1 - 0.125*ds3_1 + 0.75*x_2 - 0.125*ds3_2
         eft.setFunctionNumberOfTerms(n*8 + 5, 4)
-        eft.setTermNodeParameter(n*8 + 5, 1, localNode1, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 5, 1, localNode1, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 5, 1, [sfneg1, sf075])
-        eft.setTermNodeParameter(n*8 + 5, 2, localNode1, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 5, 2, localNode1, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 5, 2, [sfneg1, sf0125])
-        eft.setTermNodeParameter(n*8 + 5, 3, localNode2, Node.VALUE_LABEL_VALUE, 1)
+        eft.setTermNodeParameter(n*8 + 5, 3, localNode2, VALUE_LABEL_VALUE, 1)
         eft.setTermScaling(n*8 + 5, 3, [sf075])
-        eft.setTermNodeParameter(n*8 + 5, 4, localNode2, Node.VALUE_LABEL_D_DS3, 1)
+        eft.setTermNodeParameter(n*8 + 5, 4, localNode2, VALUE_LABEL_D_DS3, 1)
         eft.setTermScaling(n*8 + 5, 4, [sfneg1, sf0125])
 
+    def createEftsInlet4(self):
+        '''
+        Create the element field templates for the 4 elements of an X-layout tube
+        inlet, shared by all inlets. Local nodes 1, 2, 5, 6 are on the inlet tube
+        end, 3, 4, 7, 8 on the replaced element. Each has scale factor 1 = -1.0.
+        :return: List of 4 element field templates.
+        '''
+        efts = []
+        for e in range(4):
+            eft1 = self.createEftNoCrossDerivatives()
+            setEftScaleFactorIds(eft1, [1], [])
+            if e == 0:
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS2, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS2, []) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS2, []) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS2, []) ])
+            elif e == 1:
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS2, []) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS2, []) ])
+            elif e == 2:
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS2, []) ])
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS2, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS2, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS2, [1]) ])
+            elif e == 3:
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, []), (VALUE_LABEL_D_DS2, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 3, 7 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS2, [ (VALUE_LABEL_D_DS1, [1]), (VALUE_LABEL_D_DS2, [1]) ])
+                remapEftNodeValueLabel(eft1, [ 4, 8 ], VALUE_LABEL_D_DS1, [ (VALUE_LABEL_D_DS1, [1]) ])
+            efts.append(eft1)
+        return efts
+
     def replaceElementWithInlet4(self, element, startElementId, nodetemplate, startNodeId, tubeLength, innerDiameter, wallThickness):
         '''
         Replace element with 4 element X-layout tube inlet.
         Inlet axis is at given length from centre of xi3=0 face, oriented with dx/dxi1.
-        8 new nodes are created.
-        '''
+        8 new nodes are created. See replaceElementsWithInlet4() for adding many inlets.
+        Caller must destroy element.
+        :param nodetemplate: Unused; nodes define the same derivatives as the factory.
+        '''
+        self.replaceElementsWithInlet4([ (element, tubeLength, innerDiameter, wallThickness) ], startElementId, startNodeId)
+
+    def replaceElementsWithInlet4(self, inlets, startElementId, startNodeId):
+        '''
+        Replace elements with 4 element X-layout tube inlets in one batch.
+        Each inlet axis is at its length from centre of the element's xi3=0 face,
+        oriented with dx/dxi1. Element centres and frames are evaluated in one
+        pass, node coordinates for all inlets are computed together, and nodes
+        and elements are created in bulk sharing the 4 inlet templates.
+        Inlet i uses 8 nodes from startNodeId + 8*i and 4 elements from startElementId + 4*i.
+        Caller must destroy the replaced elements.
+        :param inlets: List of (element, tubeLength, innerDiameter, wallThickness).
+        :param startElementId: Identifier of first new element.
+        :param startNodeId: Identifier of first new node.
+        '''
+        assert self._mesh is not None, 'eftfactory_tricubichermite.replaceElementsWithInlet4.  Needs a Zinc mesh'
+        inletsCount = len(inlets)
+        if inletsCount == 0:
+            return
         fm = self._mesh.getFieldmodule()
-        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
         fm.beginChange()
         cache = fm.createFieldcache()
         diff1 = self._mesh.getChartDifferentialoperator(1, 1)
         diff2 = self._mesh.getChartDifferentialoperator(1, 2)
         coordinates = getOrCreateCoordinateField(fm)
-        cache.setMeshLocation(element, [0.5, 0.5, 1.0])
-        result, fc = coordinates.evaluateReal(cache, 3)
-        resulta, a = coordinates.evaluateDerivative(diff1, cache, 3)
-        resultb, b = coordinates.evaluateDerivative(diff2, cache, 3)
-        n = normalise(crossproduct3(a, b))
-        #print(resulta, 'a =', a, ',', resultb, ' b=', b, ' fc=', fc, ' n=',n)
-        ic = [ (fc[i] + tubeLength*n[i]) for i in range(3) ]
-        na = normalise(a)
-        nb = normalise(b)
-        a = normalise([ -(na[i] + nb[i]) for i in range(3) ])
-        b = normalise(crossproduct3(a, n))
-
-        zero = [ 0.0, 0.0, 0.0 ]
-        nodeIdentifier = startNodeId
+        fc = []
+        da = []
+        db = []
+        orig_nids = []
+        for element, tubeLength, innerDiameter, wallThickness in inlets:
+            cache.setMeshLocation(element, [0.5, 0.5, 1.0])
+            result, x = coordinates.evaluateReal(cache, 3)
+            resulta, a = coordinates.evaluateDerivative(diff1, cache, 3)
+            resultb, b = coordinates.evaluateDerivative(diff2, cache, 3)
+            fc.append(x)
+            da.append(a)
+            db.append(b)
+            eft0 = element.getElementfieldtemplate(coordinates, -1)
+            nids0 = getElementNodeIdentifiers(element, eft0)
+            orig_nids.append([ nids0[0], nids0[2], nids0[3], nids0[1], nids0[4], nids0[6], nids0[7], nids0[5] ])
+        tubeLength, innerDiameter, wallThickness = [ numpy.array([ inlet[i] for inlet in inlets ])[:, numpy.newaxis] for i in range(1, 4) ]
+
+        def normaliseRows(v):
+            return v/numpy.linalg.norm(v, axis=1)[:, numpy.newaxis]
+
+        fc = numpy.array(fc)
+        a = numpy.array(da)
+        b = numpy.array(db)
+        n = normaliseRows(numpy.cross(a, b))
+        ic = fc + tubeLength*n
+        a = normaliseRows(-(normaliseRows(a) + normaliseRows(b)))
+        b = normaliseRows(numpy.cross(a, n))
+
+        # node arrays indexed by inlet, n3, n1, component
         elementsCountAround = 4
         radiansPerElementAround = math.pi*2.0/elementsCountAround
-        for n3 in range(2):
-            radius = innerDiameter*0.5 + n3*wallThickness
-            for n1 in range(elementsCountAround):
-                radiansAround = n1*radiansPerElementAround
-                cosRadiansAround = math.cos(radiansAround)
-                sinRadiansAround = math.sin(radiansAround)
-                x = [ (ic[i] + radius*(cosRadiansAround*a[i] + sinRadiansAround*b[i])) for i in range(3) ]
-                dx_ds1 = [ radiansPerElementAround*radius*(-sinRadiansAround*a[i] + cosRadiansAround*b[i]) for i in range(3) ]
-                dx_ds2 = [ -tubeLength*c for c in n ]
-                dx_ds3 = [ wallThickness*(cosRadiansAround*a[i] + sinRadiansAround*b[i]) for i in range(3) ]
-                node = nodes.createNode(nodeIdentifier, nodetemplate)
-                cache.setNode(node)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, x)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS1, 1, dx_ds1)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS2, 1, dx_ds2)
-                coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D_DS3, 1, dx_ds3)
-                if self._useCrossDerivatives:
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS2, 1, zero)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS1DS3, 1, zero)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D2_DS2DS3, 1, zero)
-                    coordinates.setNodeParameters(cache, -1, Node.VALUE_LABEL_D3_DS1DS2DS3, 1, zero)
-                nodeIdentifier = nodeIdentifier + 1
-
-        eft0 = element.getElementfieldtemplate(coordinates, -1)
-        nids0 = getElementNodeIdentifiers(element, eft0)
-        orig_nids = [ nids0[0], nids0[2], nids0[3], nids0[1], nids0[4], nids0[6], nids0[7], nids0[5] ]
-
-        elementIdentifier = startElementId
-        elementtemplate1 = self._mesh.createElementtemplate()
-        elementtemplate1.setElementShapeType(Element.SHAPE_TYPE_CUBE)
+        radiansAround = numpy.arange(elementsCountAround)*radiansPerElementAround
+        cosRadiansAround = numpy.cos(radiansAround)[:, numpy.newaxis]
+        sinRadiansAround = numpy.sin(radiansAround)[:, numpy.newaxis]
+        a = a[:, numpy.newaxis, numpy.newaxis, :]
+        b = b[:, numpy.newaxis, numpy.newaxis, :]
+        radius = (innerDiameter*0.5 + numpy.arange(2)*wallThickness)[:, :, numpy.newaxis, numpy.newaxis]
+        radial = cosRadiansAround*a + sinRadiansAround*b
+        x = ic[:, numpy.newaxis, numpy.newaxis, :] + radius*radial
+        dx_ds1 = radiansPerElementAround*radius*(-sinRadiansAround*a + cosRadiansAround*b)
+        dx_ds2 = numpy.broadcast_to((-tubeLength*n)[:, numpy.newaxis, numpy.newaxis, :], x.shape)
+        dx_ds3 = wallThickness[:, :, numpy.newaxis, numpy.newaxis]*radial*numpy.ones((1, 2, 1, 1))
+        valueLabelVersions = [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1), (VALUE_LABEL_D_DS2, 1), (VALUE_LABEL_D_DS3, 1) ]
+        parameters = [ x, dx_ds1, dx_ds2, dx_ds3 ]
+        if self._useCrossDerivatives:
+            valueLabelVersions += [ (VALUE_LABEL_D2_DS1DS2, 1), (VALUE_LABEL_D2_DS1DS3, 1), (VALUE_LABEL_D2_DS2DS3, 1), (VALUE_LABEL_D3_DS1DS2DS3, 1) ]
+            parameters += [ numpy.zeros(x.shape) ]*4
+        meshData = MeshData(3)
+        meshData.addNodes(numpy.arange(startNodeId, startNodeId + 8*inletsCount),
+            valueLabelVersions, numpy.stack(parameters, axis=3).reshape((8*inletsCount, len(valueLabelVersions), 3)))
+
+        startNodeIds = startNodeId + 8*numpy.arange(inletsCount)[:, numpy.newaxis]
+        orig_nids = numpy.array(orig_nids)
+        efts = eftfactory_tricubichermite(None, self._useCrossDerivatives).createEftsInlet4()
         for e in range(4):
-            eft1 = self.createEftNoCrossDerivatives()
-            setEftScaleFactorIds(eft1, [1], [])
-            if e == 0:
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS2, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS2, []) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS2, []) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS2, []) ])
-            elif e == 1:
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS2, []) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS2, []) ])
-            elif e == 2:
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS2, []) ])
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS2, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS2, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS2, [1]) ])
-            elif e == 3:
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, []), (Node.VALUE_LABEL_D_DS2, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 3, 7 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS2, [ (Node.VALUE_LABEL_D_DS1, [1]), (Node.VALUE_LABEL_D_DS2, [1]) ])
-                remapEftNodeValueLabel(eft1, [ 4, 8 ], Node.VALUE_LABEL_D_DS1, [ (Node.VALUE_LABEL_D_DS1, [1]) ])
             ea = e
             eb = (e + 1) % 4
             ec = ea + 4
             ed = eb + 4
-            nids = [
-                startNodeId + ea, startNodeId + eb, orig_nids[ea], orig_nids[eb],
-                startNodeId + ec, startNodeId + ed, orig_nids[ec], orig_nids[ed]
-            ]
-            elementtemplate1.defineField(coordinates, -1, eft1)
-            element = self._mesh.createElement(elementIdentifier, elementtemplate1)
-            result2 = element.setNodesByIdentifier(eft1, nids)
-            if eft1.getNumberOfLocalScaleFactors() == 1:
-                result3 = element.setScaleFactors(eft1, [ -1.0 ])
-            else:
-                result3 = 7
-            #print('create element in', element.isValid(), elementIdentifier, result2, result3, nids)
-            elementIdentifier += 1
-
+            nids = numpy.hstack([
+                startNodeIds + ea, startNodeIds + eb, orig_nids[:, [ ea ]], orig_nids[:, [ eb ]],
+                startNodeIds + ec, startNodeIds + ed, orig_nids[:, [ ec ]], orig_nids[:, [ ed ]] ])
+            meshData.addElements(efts[e], startElementId + e + 4*numpy.arange(inletsCount), nids, [ [ -1.0 ] ]*inletsCount)
+        meshData.createInRegion(fm.getRegion())
         fm.endChange()
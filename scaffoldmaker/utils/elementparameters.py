@@ -0,0 +1,138 @@
+'''
+Extraction of element basis parameters from MeshData, applying element field
+template term maps and scale factors, for evaluating elements without Zinc.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.meshdata import *
+
+class EftWeighting(object):
+    '''
+    Element field template compiled once into arrays: each basis function
+    parameter is the sum over its terms of a node parameter multiplied by the
+    product of zero or more local scale factors.
+    '''
+
+    def __init__(self, eft, valueLabelVersions):
+        '''
+        :param eft: EftDescriptor to compile.
+        :param valueLabelVersions: List of (valueLabel, version) giving the
+        index of node parameters referenced by terms.
+        '''
+        self._functionsCount = eft.getNumberOfFunctions()
+        self._scaleFactorsCount = eft.getNumberOfLocalScaleFactors()
+        termFunctions = []
+        termLocalNodeIndexes = []
+        termValueIndexes = []
+        termScaleFactorIndexes = []
+        for f in range(1, self._functionsCount + 1):
+            for t in range(1, eft.getFunctionNumberOfTerms(f) + 1):
+                valueLabelVersion = (eft.getTermNodeValueLabel(f, t), eft.getTermNodeVersion(f, t))
+                assert valueLabelVersion in valueLabelVersions, 'EftWeighting.  Term maps value label/version not in nodes'
+                termFunctions.append(f - 1)
+                termLocalNodeIndexes.append(eft.getTermLocalNodeIndex(f, t) - 1)
+                termValueIndexes.append(valueLabelVersions.index(valueLabelVersion))
+                termScaleFactorIndexes.append([ (s - 1) for s in eft.getTermScaleFactorIndexes(f, t) ])
+        self._termFunctions = numpy.array(termFunctions, dtype=numpy.int64)
+        self._termLocalNodeIndexes = numpy.array(termLocalNodeIndexes, dtype=numpy.int64)
+        self._termValueIndexes = numpy.array(termValueIndexes, dtype=numpy.int64)
+        # pad scale factor indexes with index of an appended scale factor 1.0
+        maximumScaleFactorsCount = max([ len(indexes) for indexes in termScaleFactorIndexes ] + [ 0 ])
+        self._termScaleFactorIndexes = numpy.full((len(termFunctions), maximumScaleFactorsCount), self._scaleFactorsCount, dtype=numpy.int64)
+        for t in range(len(termFunctions)):
+            self._termScaleFactorIndexes[t, :len(termScaleFactorIndexes[t])] = termScaleFactorIndexes[t]
+        # weighting summing terms into basis functions
+        self._functionTerms = numpy.zeros((self._functionsCount, len(termFunctions)))
+        self._functionTerms[termFunctions, numpy.arange(len(termFunctions))] = 1.0
+
+    def getNumberOfFunctions(self):
+        return self._functionsCount
+
+    def getNumberOfTerms(self):
+        return len(self._termLocalNodeIndexes)
+
+    def getTermFunctions(self):
+        '''
+        :return: int array (termsCount) of basis function index from 0 for each term.
+        '''
+        return self._termFunctions
+
+    def getTermLocalNodeIndexes(self):
+        '''
+        :return: int array (termsCount) of local node index from 0 for each term.
+        '''
+        return self._termLocalNodeIndexes
+
+    def getTermValueIndexes(self):
+        '''
+        :return: int array (termsCount) of index into valueLabelVersions for each term.
+        '''
+        return self._termValueIndexes
+
+    def getTermWeights(self, scaleFactors, elementsCount):
+        '''
+        :param scaleFactors: Array (elementsCount, local scale factors count) or None if none.
+        :return: Array (elementsCount, termsCount) of products of term scale factors.
+        '''
+        if scaleFactors is None:
+            scaleFactors = numpy.zeros((elementsCount, 0))
+        scaleFactorsOne = numpy.hstack([ scaleFactors, numpy.ones((elementsCount, 1)) ])
+        return numpy.prod(scaleFactorsOne[:, self._termScaleFactorIndexes], axis=2)
+
+    def getElementParameters(self, nodeParameters, elementNodeIndexes, scaleFactors):
+        '''
+        :param nodeParameters: Array (nodesCount, valueLabelVersionsCount, componentsCount).
+        :param elementNodeIndexes: int array (elementsCount, local nodes count) of indexes into nodeParameters.
+        :param scaleFactors: Array (elementsCount, local scale factors count) or None.
+        :return: Array (elementsCount, functionsCount, componentsCount) of basis function parameters.
+        '''
+        elementsCount = len(elementNodeIndexes)
+        termNodeIndexes = elementNodeIndexes[:, self._termLocalNodeIndexes]
+        termParameters = nodeParameters[termNodeIndexes, self._termValueIndexes]
+        termParameters *= self.getTermWeights(scaleFactors, elementsCount)[:, :, numpy.newaxis]
+        return numpy.einsum('ft,etc->efc', self._functionTerms, termParameters)
+
+
+def getNodeIndexes(nodeIdentifiers, identifiers):
+    '''
+    :param nodeIdentifiers: int array of unique node identifiers.
+    :param identifiers: int array of any shape of identifiers in nodeIdentifiers.
+    :return: int array of same shape as identifiers giving their index in nodeIdentifiers.
+    '''
+    order = numpy.argsort(nodeIdentifiers)
+    positions = numpy.searchsorted(nodeIdentifiers, identifiers, sorter=order)
+    positions = numpy.minimum(positions, len(order) - 1)
+    indexes = order[positions]
+    assert numpy.all(nodeIdentifiers[indexes] == identifiers), 'getNodeIndexes.  Element uses node not in mesh'
+    return indexes
+
+def getMeshElementParameters(meshData):
+    '''
+    Get basis function parameters for all elements in meshData, compiling each
+    distinct element field template once.
+    All element field templates must have the same number of basis functions,
+    e.g. 64 for tricubic Hermite.
+    :param meshData: MeshData.
+    :return: elementIdentifiers int array (elementsCount) in block order,
+    parameters array (elementsCount, functionsCount, componentsCount).
+    '''
+    valueLabelVersions = meshData.getValueLabelVersions()
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    nodeParameters = numpy.stack([ meshData.getNodeParameters(valueLabel, version) for valueLabel, version in valueLabelVersions ], axis=1)
+    weightings = {}
+    elementIdentifiers = []
+    parameters = []
+    for block in meshData.getElementBlocks():
+        key = block.eft.getKey()
+        weighting = weightings.get(key)
+        if weighting is None:
+            weighting = weightings[key] = EftWeighting(block.eft, valueLabelVersions)
+        elementIdentifiers.append(block.elementIdentifiers)
+        parameters.append(weighting.getElementParameters(nodeParameters, getNodeIndexes(nodeIdentifiers, block.nodeIdentifiers), block.scaleFactors))
+    if not parameters:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros((0, 0, meshData.getComponentsCount()))
+    assert len(set(blockParameters.shape[1] for blockParameters in parameters)) == 1, \
+        'getMeshElementParameters.  Element field templates have different numbers of basis functions'
+    return numpy.concatenate(elementIdentifiers), numpy.concatenate(parameters)
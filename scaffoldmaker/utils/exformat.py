@@ -0,0 +1,160 @@
+'''
+Writing MeshData in EX format, as read by Zinc and cmgui, without Zinc.
+Created on Oct 18, 2026
+'''
+
+import io
+from scaffoldmaker.utils.meshdata import *
+
+_valueLabelExNames = [ None, 'value', 'd/ds1', 'd/ds2', 'd2/ds1ds2', 'd/ds3', 'd2/ds1ds3', 'd2/ds2ds3', 'd3/ds1ds2ds3' ]
+
+_shapeExNames = {
+    SHAPE_TYPE_LINE : 'line',
+    SHAPE_TYPE_SQUARE : 'line*line',
+    SHAPE_TYPE_CUBE : 'line*line*line' }
+
+_componentNames = [ 'x', 'y', 'z' ]
+
+_defaultChunkSize = 10000
+
+def _writeFieldHeader(stream, fieldName, componentsCount):
+    stream.write('#Fields=1\n')
+    stream.write('1) ' + fieldName + ', coordinate, rectangular cartesian, real, #Components=' + str(componentsCount) + '\n')
+
+def _getComponentNames(componentsCount):
+    return _componentNames if (componentsCount <= 3) else [ str(c + 1) for c in range(componentsCount) ]
+
+def _writeRows(stream, rowFormat, identifiers, values, chunkSize):
+    '''
+    Write rows of identifier followed by values, formatting a chunk of rows
+    with a single string format operation.
+    :param identifiers: int array (rowsCount).
+    :param values: array (rowsCount, ...) of valuesCount per row once flattened.
+    '''
+    rowsCount = len(identifiers)
+    for start in range(0, rowsCount, chunkSize):
+        stop = min(start + chunkSize, rowsCount)
+        chunkValues = numpy.reshape(values[start:stop], (stop - start, -1))
+        chunk = numpy.empty((stop - start, chunkValues.shape[1] + 1))
+        chunk[:, 0] = identifiers[start:stop]
+        chunk[:, 1:] = chunkValues
+        stream.write((rowFormat*(stop - start)) % tuple(chunk.ravel().tolist()))
+
+def writeExNodeBlock(stream, fieldName, nodeIdentifiers, valueLabelVersions, parameters, chunkSize=_defaultChunkSize):
+    '''
+    Write header and nodes for a block of nodes with the same value labels and
+    versions. Must follow '!#nodeset nodes' or other node blocks.
+    :param stream: Object with write(str) method e.g. file or io.StringIO.
+    :param nodeIdentifiers: int array (nodesCount).
+    :param valueLabelVersions: Ascending list of (valueLabel, version), including (VALUE_LABEL_VALUE, 1).
+    :param parameters: float array (nodesCount, len(valueLabelVersions), componentsCount),
+    which may be a numpy.memmap as only chunkSize nodes are read at a time.
+    :param chunkSize: Number of nodes formatted together.
+    '''
+    valuesCount, componentsCount = parameters.shape[1:]
+    componentNames = _getComponentNames(componentsCount)
+    # one line per component listing value labels with versions count if > 1
+    versionsCounts = []
+    for valueLabel, version in valueLabelVersions:
+        if version == 1:
+            versionsCounts.append([ valueLabel, 1 ])
+        else:
+            versionsCounts[-1][1] = version
+    labelNames = ','.join((_valueLabelExNames[valueLabel] + (('(' + str(versionsCount) + ')') if (versionsCount > 1) else ''))
+        for valueLabel, versionsCount in versionsCounts)
+    stream.write('Shape. Dimension=0\n')
+    _writeFieldHeader(stream, fieldName, componentsCount)
+    for c in range(componentsCount):
+        stream.write(' ' + componentNames[c] + '. #Values=' + str(valuesCount) + ' (' + labelNames + ')\n')
+    # parameters in order of component then value label/version
+    nodeFormat = 'Node: %d\n' + (' %.15e'*valuesCount + '\n')*componentsCount
+    _writeRows(stream, nodeFormat, nodeIdentifiers, parameters.transpose((0, 2, 1)), chunkSize)
+
+def writeExElementBlock(stream, fieldName, componentsCount, eft, shapeType, elementIdentifiers, nodeIdentifiers, chunkSize=_defaultChunkSize):
+    '''
+    Write header and elements for a block of elements sharing a standard node
+    based element field template. Must follow a '!#mesh' line or other element blocks.
+    :param eft: EftDescriptor satisfying isStandardNodeBased(), e.g. from
+    EftDescriptor.createLinearLagrange() or createTricubicHermite().
+    :param shapeType: SHAPE_TYPE_* matching eft dimension.
+    :param elementIdentifiers: int array (elementsCount).
+    :param nodeIdentifiers: int array (elementsCount, eft basis nodes count).
+    :param chunkSize: Number of elements formatted together.
+    '''
+    assert eft.isStandardNodeBased() and (shapeType in _shapeExNames), 'writeExElementBlock.  Element field template is not supported'
+    dimension = eft.getDimension()
+    componentNames = _getComponentNames(componentsCount)
+    basisNodesCount = eft.getNumberOfBasisNodes()
+    functionsPerBasisNode = eft.getNumberOfFunctionsPerBasisNode()
+    stream.write('Shape. Dimension=' + str(dimension) + ', ' + _shapeExNames[shapeType] + '\n')
+    stream.write('#Scale factor sets=0\n')
+    stream.write('#Nodes=' + str(basisNodesCount) + '\n')
+    _writeFieldHeader(stream, fieldName, componentsCount)
+    basisNodeLines = []
+    f = 1
+    for n in range(basisNodesCount):
+        labels = []
+        for d in range(functionsPerBasisNode):
+            labels.append(_valueLabelExNames[eft.getTermNodeValueLabel(f, 1)] if (eft.getFunctionNumberOfTerms(f) == 1) else 'zero')
+            f += 1
+        basisNodeLines.append('  ' + str(n + 1) + '. #Values=' + str(functionsPerBasisNode) + '\n   Value labels: ' + ' '.join(labels) + '\n')
+    basisName = '*'.join(eft.getFunctionTypes())
+    for c in range(componentsCount):
+        stream.write(' ' + componentNames[c] + '. ' + basisName + ', no modify, standard node based.\n')
+        stream.write('  #Nodes=' + str(basisNodesCount) + '\n')
+        stream.write(''.join(basisNodeLines))
+    elementFormat = 'Element: %d\n Nodes:\n' + ' %d'*basisNodesCount + '\n'
+    _writeRows(stream, elementFormat, elementIdentifiers, nodeIdentifiers, chunkSize)
+
+def isExElementBlock(elementBlock):
+    '''
+    :return: True if elements in block can be written by writeEx. Currently
+    only element field templates which are standard node based are supported.
+    '''
+    return elementBlock.eft.isStandardNodeBased() and (elementBlock.shapeType in _shapeExNames)
+
+def writeExNodes(stream, meshData, chunkSize=_defaultChunkSize):
+    '''
+    Write all nodes in meshData to stream, one header per node block.
+    :param stream: Object with write(str) method e.g. file or io.StringIO.
+    '''
+    stream.write('!#nodeset nodes\n')
+    for block in meshData.getNodeBlocks():
+        writeExNodeBlock(stream, meshData.getFieldName(), block.nodeIdentifiers, block.valueLabelVersions, block.parameters, chunkSize)
+
+def writeExElements(stream, meshData, elementBlocks, chunkSize=_defaultChunkSize):
+    '''
+    Write elements in elementBlocks, which must satisfy isExElementBlock().
+    '''
+    dimension = meshData.getDimension()
+    stream.write('!#mesh mesh' + str(dimension) + 'd, dimension=' + str(dimension) + ', nodeset=nodes\n')
+    for block in elementBlocks:
+        writeExElementBlock(stream, meshData.getFieldName(), meshData.getComponentsCount(), block.eft, block.shapeType,
+            block.elementIdentifiers, block.nodeIdentifiers, chunkSize)
+
+def writeEx(stream, meshData, chunkSize=_defaultChunkSize):
+    '''
+    Write meshData to stream in EX format. Element blocks not satisfying
+    isExElementBlock() are not written.
+    :return: List of element blocks not written.
+    '''
+    stream.write('EX Version: 2\nRegion: /\n')
+    writeExNodes(stream, meshData, chunkSize)
+    elementBlocks = meshData.getElementBlocks()
+    exElementBlocks = [ block for block in elementBlocks if isExElementBlock(block) ]
+    if exElementBlocks:
+        writeExElements(stream, meshData, exElementBlocks, chunkSize)
+    return [ block for block in elementBlocks if not isExElementBlock(block) ]
+
+def writeExFile(fileName, meshData, chunkSize=_defaultChunkSize):
+    '''
+    Write meshData to EX file, formatting chunkSize nodes or elements at a time
+    so memory used for text is bounded.
+    Asserts all element blocks can be written before creating the file; see
+    isExElementBlock().
+    :param fileName: Name of file to write, conventionally ending in .exf.
+    '''
+    assert all(isExElementBlock(block) for block in meshData.getElementBlocks()), \
+        'writeExFile.  Mesh has element field templates not supported in EX format writer'
+    with io.open(fileName, 'w', encoding='ascii') as stream:
+        writeEx(stream, meshData, chunkSize)
@@ -0,0 +1,845 @@
+'''
+Backend-neutral, array-based representation of a scaffold mesh: node parameters
+per value label and version, element connectivity, element field template
+descriptors and scale factors. Generators fill a MeshData and backends such as
+Zinc or file writers consume it in bulk. Zinc is only imported by the methods
+which create a mesh in, or read a mesh from, a Zinc region.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+
+# Node value labels. Same order and numbering as Zinc Node.VALUE_LABEL_*
+VALUE_LABEL_VALUE = 1
+VALUE_LABEL_D_DS1 = 2
+VALUE_LABEL_D_DS2 = 3
+VALUE_LABEL_D2_DS1DS2 = 4
+VALUE_LABEL_D_DS3 = 5
+VALUE_LABEL_D2_DS1DS3 = 6
+VALUE_LABEL_D2_DS2DS3 = 7
+VALUE_LABEL_D3_DS1DS2DS3 = 8
+
+_valueLabelZincNames = [ None, 'VALUE', 'D_DS1', 'D_DS2', 'D2_DS1DS2', 'D_DS3', 'D2_DS1DS3', 'D2_DS2DS3', 'D3_DS1DS2DS3' ]
+
+# Basis function types per xi direction, named as in EX files
+BASIS_LINEAR_LAGRANGE = 'l.Lagrange'
+BASIS_CUBIC_HERMITE = 'c.Hermite'
+
+_basisZincNames = {
+    BASIS_LINEAR_LAGRANGE : 'LINEAR_LAGRANGE',
+    BASIS_CUBIC_HERMITE : 'CUBIC_HERMITE' }
+
+# Scale factor types, named as in EX files
+SCALE_FACTOR_TYPE_ELEMENT_GENERAL = 'element_general'
+SCALE_FACTOR_TYPE_ELEMENT_PATCH = 'element_patch'
+SCALE_FACTOR_TYPE_GLOBAL_GENERAL = 'global_general'
+SCALE_FACTOR_TYPE_GLOBAL_PATCH = 'global_patch'
+SCALE_FACTOR_TYPE_NODE_GENERAL = 'node_general'
+SCALE_FACTOR_TYPE_NODE_PATCH = 'node_patch'
+
+_scaleFactorTypes = [
+    SCALE_FACTOR_TYPE_ELEMENT_GENERAL,
+    SCALE_FACTOR_TYPE_ELEMENT_PATCH,
+    SCALE_FACTOR_TYPE_GLOBAL_GENERAL,
+    SCALE_FACTOR_TYPE_GLOBAL_PATCH,
+    SCALE_FACTOR_TYPE_NODE_GENERAL,
+    SCALE_FACTOR_TYPE_NODE_PATCH ]
+
+# Element shapes by dimension
+SHAPE_TYPE_LINE = 'line'
+SHAPE_TYPE_SQUARE = 'square'
+SHAPE_TYPE_CUBE = 'cube'
+
+_defaultShapeTypes = [ None, SHAPE_TYPE_LINE, SHAPE_TYPE_SQUARE, SHAPE_TYPE_CUBE ]
+
+def _getZincValueLabels():
+    '''
+    :return: list mapping value label 0..8 to Zinc Node.VALUE_LABEL_*
+    '''
+    from opencmiss.zinc.node import Node
+    return [ Node.VALUE_LABEL_INVALID ] + [ getattr(Node, 'VALUE_LABEL_' + name) for name in _valueLabelZincNames[1:] ]
+
+
+class EftDescriptor(object):
+    '''
+    Backend-neutral description of an element field template: basis, number of
+    local nodes, the terms summed to give the parameter for each basis function,
+    and local scale factor types and identifiers. Function, term, local node and
+    scale factor indexes start at 1 and the methods mirror those of the Zinc
+    Elementfieldtemplate used by eft_utils, so its remap functions work on
+    descriptors as well as Zinc templates.
+    '''
+
+    def __init__(self, functionTypes):
+        '''
+        Create descriptor with default 1:1 mappings from each basis function
+        to the corresponding value or derivative at its basis node, version 1.
+        :param functionTypes: List of BASIS_* function type for each xi direction.
+        '''
+        for functionType in functionTypes:
+            assert functionType in _basisZincNames, 'EftDescriptor.  Unsupported function type ' + str(functionType)
+        self._functionTypes = list(functionTypes)
+        dimension = len(functionTypes)
+        self._basisNodesCount = 1 << dimension
+        hermiteAxes = [ i for i in range(dimension) if functionTypes[i] == BASIS_CUBIC_HERMITE ]
+        self._functionsPerBasisNode = 1 << len(hermiteAxes)
+        # value label for each function per basis node: derivatives in hermite axes with first axis varying fastest
+        self._basisNodeValueLabels = []
+        for d in range(self._functionsPerBasisNode):
+            mask = 0
+            for h in range(len(hermiteAxes)):
+                if d & (1 << h):
+                    mask |= 1 << hermiteAxes[h]
+            self._basisNodeValueLabels.append(mask + 1)
+        self._localNodesCount = self._basisNodesCount
+        self._terms = []
+        for n in range(self._basisNodesCount):
+            for valueLabel in self._basisNodeValueLabels:
+                self._terms.append([ [ n + 1, valueLabel, 1, [] ] ])
+        self._scaleFactorTypes = []
+        self._scaleFactorIdentifiers = []
+
+    @classmethod
+    def createTricubicHermite(cls, useCrossDerivatives=False):
+        '''
+        :return: Descriptor for tricubic Hermite, with or without cross derivatives,
+        same as eftfactory_tricubichermite.createEftBasic().
+        '''
+        eft = cls([ BASIS_CUBIC_HERMITE ]*3)
+        if not useCrossDerivatives:
+            for n in range(8):
+                for f in [ 4, 6, 7, 8 ]:
+                    eft.setFunctionNumberOfTerms(n*8 + f, 0)
+        return eft
+
+    @classmethod
+    def createBicubicHermite(cls, useCrossDerivatives=False):
+        '''
+        :return: Descriptor for bicubic Hermite, with or without cross derivatives.
+        '''
+        eft = cls([ BASIS_CUBIC_HERMITE ]*2)
+        if not useCrossDerivatives:
+            for n in range(4):
+                eft.setFunctionNumberOfTerms(n*4 + 4, 0)
+        return eft
+
+    @classmethod
+    def createLinearLagrange(cls, dimension=3):
+        '''
+        :return: Descriptor for linear Lagrange of dimension.
+        '''
+        return cls([ BASIS_LINEAR_LAGRANGE ]*dimension)
+
+    def getDimension(self):
+        return len(self._functionTypes)
+
+    def getFunctionTypes(self):
+        return list(self._functionTypes)
+
+    def getNumberOfBasisNodes(self):
+        return self._basisNodesCount
+
+    def getNumberOfFunctionsPerBasisNode(self):
+        return self._functionsPerBasisNode
+
+    def getBasisNodeValueLabels(self):
+        '''
+        :return: List of default value labels for the functions at each basis node.
+        '''
+        return list(self._basisNodeValueLabels)
+
+    def getNumberOfFunctions(self):
+        return len(self._terms)
+
+    def getNumberOfLocalNodes(self):
+        return self._localNodesCount
+
+    def setNumberOfLocalNodes(self, localNodesCount):
+        self._localNodesCount = localNodesCount
+
+    def getFunctionNumberOfTerms(self, functionIndex):
+        return len(self._terms[functionIndex - 1])
+
+    def setFunctionNumberOfTerms(self, functionIndex, termsCount):
+        terms = self._terms[functionIndex - 1]
+        if termsCount < len(terms):
+            del terms[termsCount:]
+        else:
+            # new terms default to first node value as in Zinc
+            while len(terms) < termsCount:
+                terms.append([ 1, VALUE_LABEL_VALUE, 1, [] ])
+
+    def _getTermAttribute(self, functionIndex, termIndex, attributeIndex):
+        '''
+        :return: Term attribute, or 0 for invalid function or term as in Zinc.
+        '''
+        if (1 <= functionIndex <= len(self._terms)) and (1 <= termIndex <= len(self._terms[functionIndex - 1])):
+            return self._terms[functionIndex - 1][termIndex - 1][attributeIndex]
+        return 0
+
+    def getTermLocalNodeIndex(self, functionIndex, termIndex):
+        return self._getTermAttribute(functionIndex, termIndex, 0)
+
+    def getTermNodeValueLabel(self, functionIndex, termIndex):
+        return self._getTermAttribute(functionIndex, termIndex, 1)
+
+    def getTermNodeVersion(self, functionIndex, termIndex):
+        return self._getTermAttribute(functionIndex, termIndex, 2)
+
+    def setTermNodeParameter(self, functionIndex, termIndex, localNodeIndex, valueLabel, version):
+        term = self._terms[functionIndex - 1][termIndex - 1]
+        term[0] = localNodeIndex
+        term[1] = valueLabel
+        term[2] = version
+
+    def getTermScaling(self, functionIndex, termIndex, indexesCount):
+        '''
+        Mirrors the Zinc Python binding: returns count and one index or list of indexes.
+        '''
+        scaleFactorIndexes = self._getTermAttribute(functionIndex, termIndex, 3)
+        if not isinstance(scaleFactorIndexes, list):
+            return -1, (0 if (indexesCount == 1) else [])
+        count = len(scaleFactorIndexes)
+        if indexesCount == 1:
+            return count, (scaleFactorIndexes[0] if count else 0)
+        return count, list(scaleFactorIndexes[:indexesCount])
+
+    def getTermScaleFactorIndexes(self, functionIndex, termIndex):
+        '''
+        :return: List of local scale factor indexes multiplying term.
+        '''
+        return list(self._terms[functionIndex - 1][termIndex - 1][3])
+
+    def setTermScaling(self, functionIndex, termIndex, scaleFactorIndexes):
+        if not isinstance(scaleFactorIndexes, (list, tuple)):
+            scaleFactorIndexes = [ scaleFactorIndexes ]
+        self._terms[functionIndex - 1][termIndex - 1][3] = list(scaleFactorIndexes)
+
+    def getNumberOfLocalScaleFactors(self):
+        return len(self._scaleFactorTypes)
+
+    def setNumberOfLocalScaleFactors(self, scaleFactorsCount):
+        del self._scaleFactorTypes[scaleFactorsCount:]
+        del self._scaleFactorIdentifiers[scaleFactorsCount:]
+        while len(self._scaleFactorTypes) < scaleFactorsCount:
+            self._scaleFactorTypes.append(SCALE_FACTOR_TYPE_ELEMENT_GENERAL)
+            self._scaleFactorIdentifiers.append(0)
+
+    def getScaleFactorType(self, scaleFactorIndex):
+        return self._scaleFactorTypes[scaleFactorIndex - 1]
+
+    def setScaleFactorType(self, scaleFactorIndex, scaleFactorType):
+        assert scaleFactorType in _scaleFactorTypes, 'EftDescriptor.setScaleFactorType.  Invalid type ' + str(scaleFactorType)
+        self._scaleFactorTypes[scaleFactorIndex - 1] = scaleFactorType
+
+    def getScaleFactorIdentifier(self, scaleFactorIndex):
+        return self._scaleFactorIdentifiers[scaleFactorIndex - 1]
+
+    def setScaleFactorIdentifier(self, scaleFactorIndex, identifier):
+        self._scaleFactorIdentifiers[scaleFactorIndex - 1] = int(identifier)
+
+    def isStandardNodeBased(self):
+        '''
+        :return: True if every function has at most one unscaled term mapping
+        version 1 of a parameter from its own basis node, i.e. no collapsed nodes,
+        general linear maps or scale factors.
+        '''
+        if (self._localNodesCount != self._basisNodesCount) or self._scaleFactorTypes:
+            return False
+        f = 0
+        for n in range(self._basisNodesCount):
+            for d in range(self._functionsPerBasisNode):
+                terms = self._terms[f]
+                if len(terms) > 1:
+                    return False
+                if terms and ((terms[0][0] != (n + 1)) or (terms[0][2] != 1) or terms[0][3]):
+                    return False
+                f += 1
+        return True
+
+    def validate(self):
+        for terms in self._terms:
+            for term in terms:
+                if not (1 <= term[0] <= self._localNodesCount):
+                    return False
+                if not (VALUE_LABEL_VALUE <= term[1] <= VALUE_LABEL_D3_DS1DS2DS3) or (term[2] < 1):
+                    return False
+                for s in term[3]:
+                    if not (1 <= s <= len(self._scaleFactorTypes)):
+                        return False
+        return True
+
+    def getKey(self):
+        '''
+        :return: Hashable key identical for descriptors with identical content.
+        '''
+        return (tuple(self._functionTypes), self._localNodesCount,
+            tuple(tuple((term[0], term[1], term[2], tuple(term[3])) for term in terms) for terms in self._terms),
+            tuple(self._scaleFactorTypes), tuple(self._scaleFactorIdentifiers))
+
+    def toDict(self):
+        '''
+        :return: JSON-serialisable dict of descriptor content. See createFromDict().
+        '''
+        return {
+            'functionTypes' : list(self._functionTypes),
+            'localNodesCount' : self._localNodesCount,
+            'terms' : [ [ [ term[0], term[1], term[2], list(term[3]) ] for term in terms ] for terms in self._terms ],
+            'scaleFactorTypes' : list(self._scaleFactorTypes),
+            'scaleFactorIdentifiers' : list(self._scaleFactorIdentifiers) }
+
+    @classmethod
+    def createFromDict(cls, descriptorDict):
+        '''
+        Create descriptor from dict returned by toDict().
+        '''
+        descriptor = cls(descriptorDict['functionTypes'])
+        descriptor._localNodesCount = descriptorDict['localNodesCount']
+        descriptor._terms = [ [ [ term[0], term[1], term[2], list(term[3]) ] for term in terms ] for terms in descriptorDict['terms'] ]
+        descriptor._scaleFactorTypes = list(descriptorDict['scaleFactorTypes'])
+        descriptor._scaleFactorIdentifiers = list(descriptorDict['scaleFactorIdentifiers'])
+        assert len(descriptor._terms) == descriptor._basisNodesCount*descriptor._functionsPerBasisNode, 'EftDescriptor.createFromDict.  Wrong number of functions'
+        assert descriptor.validate(), 'EftDescriptor.createFromDict.  Invalid descriptor'
+        return descriptor
+
+    def copy(self):
+        '''
+        :return: New descriptor with the same content, which may be modified
+        independently like a template obtained from a Zinc element.
+        '''
+        return EftDescriptor.createFromDict(self.toDict())
+
+    def __eq__(self, other):
+        return isinstance(other, EftDescriptor) and (self.getKey() == other.getKey())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.getKey())
+
+    @staticmethod
+    def isZincEftSupported(eft):
+        '''
+        :return: True if Zinc element field template has basis function types
+        which can be described by EftDescriptor, so createFromZincEft succeeds.
+        '''
+        from opencmiss.zinc.element import Elementbasis
+        zincFunctionTypes = [ getattr(Elementbasis, 'FUNCTION_TYPE_' + zincName) for zincName in _basisZincNames.values() ]
+        basis = eft.getElementbasis()
+        for xi in range(1, basis.getDimension() + 1):
+            if basis.getFunctionType(xi) not in zincFunctionTypes:
+                return False
+        return True
+
+    @classmethod
+    def createFromZincEft(cls, eft):
+        '''
+        Create descriptor matching Zinc element field template.
+        '''
+        from opencmiss.zinc.element import Elementbasis, Elementfieldtemplate
+        basis = eft.getElementbasis()
+        zincBasisTypes = {}
+        for functionType, zincName in _basisZincNames.items():
+            zincBasisTypes[getattr(Elementbasis, 'FUNCTION_TYPE_' + zincName)] = functionType
+        functionTypes = []
+        for xi in range(1, basis.getDimension() + 1):
+            zincFunctionType = basis.getFunctionType(xi)
+            assert zincFunctionType in zincBasisTypes, 'EftDescriptor.createFromZincEft.  Unsupported basis function type'
+            functionTypes.append(zincBasisTypes[zincFunctionType])
+        descriptor = cls(functionTypes)
+        zincValueLabels = _getZincValueLabels()
+        valueLabels = {}
+        for valueLabel in range(1, len(zincValueLabels)):
+            valueLabels[zincValueLabels[valueLabel]] = valueLabel
+        zincScaleFactorTypes = {}
+        for scaleFactorType in _scaleFactorTypes:
+            zincScaleFactorTypes[getattr(Elementfieldtemplate, 'SCALE_FACTOR_TYPE_' + scaleFactorType.upper())] = scaleFactorType
+        scaleFactorsCount = eft.getNumberOfLocalScaleFactors()
+        descriptor.setNumberOfLocalScaleFactors(scaleFactorsCount)
+        for s in range(1, scaleFactorsCount + 1):
+            descriptor.setScaleFactorType(s, zincScaleFactorTypes[eft.getScaleFactorType(s)])
+            descriptor.setScaleFactorIdentifier(s, eft.getScaleFactorIdentifier(s))
+        for f in range(1, eft.getNumberOfFunctions() + 1):
+            termsCount = eft.getFunctionNumberOfTerms(f)
+            descriptor.setFunctionNumberOfTerms(f, termsCount)
+            for t in range(1, termsCount + 1):
+                descriptor.setTermNodeParameter(f, t, eft.getTermLocalNodeIndex(f, t),
+                    valueLabels[eft.getTermNodeValueLabel(f, t)], eft.getTermNodeVersion(f, t))
+                if scaleFactorsCount > 0:
+                    count, indexes = eft.getTermScaling(f, t, 1)
+                    if count > 1:
+                        count, indexes = eft.getTermScaling(f, t, count)
+                        descriptor.setTermScaling(f, t, list(indexes))
+                    elif count == 1:
+                        descriptor.setTermScaling(f, t, [ indexes ])
+        descriptor.setNumberOfLocalNodes(eft.getNumberOfLocalNodes())
+        return descriptor
+
+    def createZincEft(self, mesh):
+        '''
+        Create Zinc element field template matching this descriptor.
+        :param mesh: Zinc mesh of same dimension to create template for.
+        :return: Zinc Elementfieldtemplate
+        '''
+        from opencmiss.zinc.element import Elementbasis, Elementfieldtemplate
+        fm = mesh.getFieldmodule()
+        dimension = len(self._functionTypes)
+        assert mesh.getDimension() == dimension, 'EftDescriptor.createZincEft.  Mesh dimension does not match'
+        basis = fm.createElementbasis(dimension, getattr(Elementbasis, 'FUNCTION_TYPE_' + _basisZincNames[self._functionTypes[0]]))
+        for xi in range(1, dimension):
+            basis.setFunctionType(xi + 1, getattr(Elementbasis, 'FUNCTION_TYPE_' + _basisZincNames[self._functionTypes[xi]]))
+        eft = mesh.createElementfieldtemplate(basis)
+        if self._localNodesCount > eft.getNumberOfLocalNodes():
+            eft.setNumberOfLocalNodes(self._localNodesCount)
+        scaleFactorsCount = len(self._scaleFactorTypes)
+        if scaleFactorsCount > 0:
+            eft.setNumberOfLocalScaleFactors(scaleFactorsCount)
+            for s in range(scaleFactorsCount):
+                eft.setScaleFactorType(s + 1, getattr(Elementfieldtemplate, 'SCALE_FACTOR_TYPE_' + self._scaleFactorTypes[s].upper()))
+                eft.setScaleFactorIdentifier(s + 1, self._scaleFactorIdentifiers[s])
+        zincValueLabels = _getZincValueLabels()
+        for f in range(len(self._terms)):
+            terms = self._terms[f]
+            eft.setFunctionNumberOfTerms(f + 1, len(terms))
+            for t in range(len(terms)):
+                term = terms[t]
+                eft.setTermNodeParameter(f + 1, t + 1, term[0], zincValueLabels[term[1]], term[2])
+                if term[3]:
+                    eft.setTermScaling(f + 1, t + 1, term[3])
+        if self._localNodesCount < eft.getNumberOfLocalNodes():
+            eft.setNumberOfLocalNodes(self._localNodesCount)
+        assert eft.validate(), 'EftDescriptor.createZincEft:  Failed to validate eft'
+        return eft
+
+
+class NodeBlock(object):
+    '''
+    Nodes sharing the same value labels and versions.
+    nodeIdentifiers: int array (nodesCount)
+    valueLabelVersions: list of (valueLabel, version) in ascending order
+    parameters: float array (nodesCount, len(valueLabelVersions), componentsCount)
+    '''
+
+    def __init__(self, nodeIdentifiers, valueLabelVersions, parameters):
+        self.nodeIdentifiers = nodeIdentifiers
+        self.valueLabelVersions = valueLabelVersions
+        self.parameters = parameters
+
+    def getValueLabelVersionIndex(self, valueLabel, version=1):
+        '''
+        :return: Index of valueLabel, version in parameters, or -1 if not defined.
+        '''
+        try:
+            return self.valueLabelVersions.index((valueLabel, version))
+        except ValueError:
+            return -1
+
+
+class ElementBlock(object):
+    '''
+    Elements sharing the same shape and element field template.
+    eft: EftDescriptor
+    shapeType: SHAPE_TYPE_*
+    elementIdentifiers: int array (elementsCount)
+    nodeIdentifiers: int array (elementsCount, eft local nodes count)
+    scaleFactors: float array (elementsCount, eft local scale factors count) or None
+    '''
+
+    def __init__(self, eft, shapeType, elementIdentifiers, nodeIdentifiers, scaleFactors):
+        self.eft = eft
+        self.shapeType = shapeType
+        self.elementIdentifiers = elementIdentifiers
+        self.nodeIdentifiers = nodeIdentifiers
+        self.scaleFactors = scaleFactors
+
+
+def _normaliseValueLabelVersions(valueLabelVersions):
+    '''
+    :return: valueLabelVersions in ascending order, and permutation to apply to parameters.
+    '''
+    valueLabelVersions = [ (int(valueLabel), int(version)) for valueLabel, version in valueLabelVersions ]
+    order = sorted(range(len(valueLabelVersions)), key=lambda i: valueLabelVersions[i])
+    sortedValueLabelVersions = [ valueLabelVersions[i] for i in order ]
+    assert len(set(sortedValueLabelVersions)) == len(sortedValueLabelVersions), 'MeshData.  Repeated value label/version'
+    for i in range(len(sortedValueLabelVersions)):
+        valueLabel, version = sortedValueLabelVersions[i]
+        assert (version == 1) or (sortedValueLabelVersions[i - 1] == (valueLabel, version - 1)), \
+            'MeshData.  Versions of value label must be numbered from 1 without gaps'
+    return sortedValueLabelVersions, order
+
+
+class MeshData(object):
+    '''
+    Array-based mesh of nodes and elements with one finite element field,
+    normally 'coordinates'. Nodes and elements are held in blocks sharing
+    templates; single nodes and elements added one at a time are gathered
+    into blocks on first query.
+    '''
+
+    def __init__(self, dimension=3, componentsCount=3, fieldName='coordinates'):
+        '''
+        :param dimension: Dimension of elements, 1, 2 or 3.
+        :param componentsCount: Number of components of field.
+        :param fieldName: Name of rectangular Cartesian coordinate field.
+        '''
+        assert 1 <= dimension <= 3, 'MeshData.  Dimension must be from 1 to 3'
+        self._dimension = dimension
+        self._componentsCount = componentsCount
+        self._fieldName = fieldName
+        self._nodeBlocks = []
+        self._elementBlocks = []
+        # pending single nodes and elements, gathered by template key
+        self._pendingNodes = {}
+        self._pendingElements = {}
+
+    def getDimension(self):
+        return self._dimension
+
+    def getComponentsCount(self):
+        return self._componentsCount
+
+    def getFieldName(self):
+        return self._fieldName
+
+    def addNodes(self, nodeIdentifiers, valueLabelVersions, parameters):
+        '''
+        Add a block of nodes with the same value labels and versions.
+        :param nodeIdentifiers: Sequence of nodesCount unique identifiers > 0.
+        :param valueLabelVersions: List of (valueLabel, version) stored for each node, any order.
+        :param parameters: Array-like (nodesCount, len(valueLabelVersions), componentsCount).
+        '''
+        nodeIdentifiers = numpy.asarray(nodeIdentifiers, dtype=numpy.int64).reshape(-1)
+        parameters = numpy.asarray(parameters, dtype=numpy.float64).reshape(
+            (len(nodeIdentifiers), len(valueLabelVersions), self._componentsCount))
+        valueLabelVersions, order = _normaliseValueLabelVersions(valueLabelVersions)
+        if order != list(range(len(order))):
+            parameters = parameters[:, order, :]
+        self._nodeBlocks.append(NodeBlock(nodeIdentifiers, valueLabelVersions, parameters))
+
+    def addNode(self, nodeIdentifier, valueLabelVersions, parameters):
+        '''
+        Add single node. For efficiency, prefer addNodes.
+        :param valueLabelVersions: List of (valueLabel, version) for each parameters.
+        :param parameters: List of componentsCount values for each valueLabelVersion.
+        '''
+        key = tuple(valueLabelVersions)
+        pending = self._pendingNodes.get(key)
+        if pending is None:
+            pending = self._pendingNodes[key] = ([], [])
+        pending[0].append(nodeIdentifier)
+        pending[1].append(parameters)
+
+    def addElements(self, eft, elementIdentifiers, nodeIdentifiers, scaleFactors=None, shapeType=None):
+        '''
+        Add a block of elements sharing element field template and shape.
+        :param eft: EftDescriptor.
+        :param elementIdentifiers: Sequence of elementsCount unique identifiers > 0.
+        :param nodeIdentifiers: Array-like (elementsCount, eft local nodes count).
+        :param scaleFactors: Array-like (elementsCount, eft local scale factors count) or None if none.
+        :param shapeType: SHAPE_TYPE_* or None for default for dimension.
+        '''
+        assert eft.getDimension() == self._dimension, 'MeshData.addElements.  EFT dimension does not match mesh'
+        elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        elementsCount = len(elementIdentifiers)
+        nodeIdentifiers = numpy.asarray(nodeIdentifiers, dtype=numpy.int64).reshape((elementsCount, eft.getNumberOfLocalNodes()))
+        scaleFactorsCount = eft.getNumberOfLocalScaleFactors()
+        if scaleFactorsCount > 0:
+            assert scaleFactors is not None, 'MeshData.addElements.  Missing scale factors'
+            scaleFactors = numpy.asarray(scaleFactors, dtype=numpy.float64).reshape((elementsCount, scaleFactorsCount))
+        else:
+            scaleFactors = None
+        if shapeType is None:
+            shapeType = _defaultShapeTypes[self._dimension]
+        self._elementBlocks.append(ElementBlock(eft, shapeType, elementIdentifiers, nodeIdentifiers, scaleFactors))
+
+    def addElement(self, eft, elementIdentifier, nodeIdentifiers, scaleFactors=None, shapeType=None):
+        '''
+        Add single element. Elements using equal descriptors are gathered into one block.
+        For efficiency, prefer addElements.
+        '''
+        key = (eft.getKey(), shapeType)
+        pending = self._pendingElements.get(key)
+        if pending is None:
+            pending = self._pendingElements[key] = (eft, shapeType, [], [], [])
+        pending[2].append(elementIdentifier)
+        pending[3].append(nodeIdentifiers)
+        pending[4].append(scaleFactors)
+
+    def _gatherPending(self):
+        if self._pendingNodes:
+            pendingNodes = self._pendingNodes
+            self._pendingNodes = {}
+            for valueLabelVersions, (nodeIdentifiers, parameters) in pendingNodes.items():
+                self.addNodes(nodeIdentifiers, list(valueLabelVersions), parameters)
+        if self._pendingElements:
+            pendingElements = self._pendingElements
+            self._pendingElements = {}
+            for eft, shapeType, elementIdentifiers, nodeIdentifiers, scaleFactors in pendingElements.values():
+                self.addElements(eft, elementIdentifiers, nodeIdentifiers,
+                    scaleFactors if (eft.getNumberOfLocalScaleFactors() > 0) else None, shapeType)
+
+    def getNodeBlocks(self):
+        self._gatherPending()
+        return self._nodeBlocks
+
+    def getElementBlocks(self):
+        self._gatherPending()
+        return self._elementBlocks
+
+    def getNodesCount(self):
+        return sum(len(block.nodeIdentifiers) for block in self.getNodeBlocks())
+
+    def getElementsCount(self):
+        return sum(len(block.elementIdentifiers) for block in self.getElementBlocks())
+
+    def getNodeIdentifiers(self):
+        '''
+        :return: int array of all node identifiers in block order.
+        '''
+        blocks = self.getNodeBlocks()
+        if not blocks:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate([ block.nodeIdentifiers for block in blocks ])
+
+    def getElementIdentifiers(self):
+        '''
+        :return: int array of all element identifiers in block order.
+        '''
+        blocks = self.getElementBlocks()
+        if not blocks:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate([ block.elementIdentifiers for block in blocks ])
+
+    def getElement(self, elementIdentifier):
+        '''
+        Get element field template, nodes and scale factors of a single element.
+        :return: eft, nodeIdentifiers list, scaleFactors list or None, shapeType;
+        eft is shared with the element block so copy before modifying.
+        None, None, None, None if not found.
+        '''
+        for block in self.getElementBlocks():
+            indexes = numpy.where(block.elementIdentifiers == elementIdentifier)[0]
+            if len(indexes) > 0:
+                e = indexes[0]
+                scaleFactors = block.scaleFactors[e].tolist() if (block.scaleFactors is not None) else None
+                return block.eft, block.nodeIdentifiers[e].tolist(), scaleFactors, block.shapeType
+        return None, None, None, None
+
+    def removeElements(self, elementIdentifiers):
+        '''
+        Remove elements with the given identifiers, e.g. to add them again with
+        a different element field template. Empty blocks are removed.
+        '''
+        elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        elementBlocks = []
+        for block in self.getElementBlocks():
+            keep = ~numpy.isin(block.elementIdentifiers, elementIdentifiers)
+            if not keep.all():
+                if not keep.any():
+                    continue
+                block = ElementBlock(block.eft, block.shapeType, block.elementIdentifiers[keep], block.nodeIdentifiers[keep],
+                    block.scaleFactors[keep] if (block.scaleFactors is not None) else None)
+            elementBlocks.append(block)
+        self._elementBlocks = elementBlocks
+
+    def getValueLabelVersions(self):
+        '''
+        :return: Ascending list of all (valueLabel, version) used by any node.
+        '''
+        valueLabelVersions = set()
+        for block in self.getNodeBlocks():
+            valueLabelVersions.update(block.valueLabelVersions)
+        return sorted(valueLabelVersions)
+
+    def getNodeParameters(self, valueLabel, version=1):
+        '''
+        :return: float array (nodesCount, componentsCount) of parameters for all nodes
+        in order of getNodeIdentifiers(); zero where not defined.
+        '''
+        parameters = numpy.zeros((self.getNodesCount(), self._componentsCount))
+        start = 0
+        for block in self.getNodeBlocks():
+            count = len(block.nodeIdentifiers)
+            index = block.getValueLabelVersionIndex(valueLabel, version)
+            if index >= 0:
+                parameters[start:start + count] = block.parameters[:, index, :]
+            start += count
+        return parameters
+
+    def setNodeParameters(self, valueLabel, version, parameters):
+        '''
+        Set parameters for all nodes in order of getNodeIdentifiers(), where defined.
+        :param parameters: Array-like (nodesCount, componentsCount).
+        '''
+        parameters = numpy.asarray(parameters, dtype=numpy.float64)
+        start = 0
+        for block in self.getNodeBlocks():
+            count = len(block.nodeIdentifiers)
+            index = block.getValueLabelVersionIndex(valueLabel, version)
+            if index >= 0:
+                block.parameters[:, index, :] = parameters[start:start + count]
+            start += count
+
+    def _createNodesInRegion(self, fm, coordinates, nodeBlocks):
+        from opencmiss.zinc.field import Field
+        cache = fm.createFieldcache()
+        zincValueLabels = _getZincValueLabels()
+        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+        for block in nodeBlocks:
+            nodetemplate = nodes.createNodetemplate()
+            nodetemplate.defineField(coordinates)
+            versionsCounts = {}
+            for valueLabel, version in block.valueLabelVersions:
+                versionsCounts[valueLabel] = version
+            if VALUE_LABEL_VALUE not in versionsCounts:
+                nodetemplate.setValueNumberOfVersions(coordinates, -1, zincValueLabels[VALUE_LABEL_VALUE], 0)
+            for valueLabel, versionsCount in versionsCounts.items():
+                nodetemplate.setValueNumberOfVersions(coordinates, -1, zincValueLabels[valueLabel], versionsCount)
+            zincValueLabelVersions = [ (zincValueLabels[valueLabel], version) for valueLabel, version in block.valueLabelVersions ]
+            parameters = block.parameters.tolist()
+            nodeIdentifiers = block.nodeIdentifiers.tolist()
+            for n in range(len(nodeIdentifiers)):
+                node = nodes.createNode(nodeIdentifiers[n], nodetemplate)
+                cache.setNode(node)
+                nodeParameters = parameters[n]
+                for v in range(len(zincValueLabelVersions)):
+                    zincValueLabel, version = zincValueLabelVersions[v]
+                    coordinates.setNodeParameters(cache, -1, zincValueLabel, version, nodeParameters[v])
+
+    def _createElementsInRegion(self, fm, coordinates, elementBlocks):
+        from opencmiss.zinc.element import Element
+        mesh = fm.findMeshByDimension(self._dimension)
+        shapeTypes = {
+            SHAPE_TYPE_LINE : Element.SHAPE_TYPE_LINE,
+            SHAPE_TYPE_SQUARE : Element.SHAPE_TYPE_SQUARE,
+            SHAPE_TYPE_CUBE : Element.SHAPE_TYPE_CUBE }
+        zincEfts = {}
+        for block in elementBlocks:
+            key = block.eft.getKey()
+            eft = zincEfts.get(key)
+            if eft is None:
+                eft = zincEfts[key] = block.eft.createZincEft(mesh)
+            elementtemplate = mesh.createElementtemplate()
+            elementtemplate.setElementShapeType(shapeTypes[block.shapeType])
+            elementtemplate.defineField(coordinates, -1, eft)
+            elementIdentifiers = block.elementIdentifiers.tolist()
+            nodeIdentifiers = block.nodeIdentifiers.tolist()
+            scaleFactors = block.scaleFactors.tolist() if (block.scaleFactors is not None) else None
+            for e in range(len(elementIdentifiers)):
+                element = mesh.createElement(elementIdentifiers[e], elementtemplate)
+                element.setNodesByIdentifier(eft, nodeIdentifiers[e])
+                if scaleFactors:
+                    element.setScaleFactors(eft, scaleFactors[e])
+
+    def _readExInRegion(self, region):
+        '''
+        Read nodes and elements supported by EX format into region from an
+        in-memory EX stream with a single region read.
+        :return: List of element blocks not read.
+        '''
+        import io
+        from opencmiss.zinc.status import OK as ZINC_OK
+        from scaffoldmaker.utils.exformat import writeEx
+        stream = io.StringIO()
+        otherElementBlocks = writeEx(stream, self)
+        buffer = stream.getvalue().encode('ascii')
+        sir = region.createStreaminformationRegion()
+        sir.createStreamresourceMemoryBuffer(buffer)
+        result = region.read(sir)
+        assert result == ZINC_OK, 'MeshData.createInRegion.  Failed to read EX stream'
+        return otherElementBlocks
+
+    def createInRegion(self, region, bulk=True):
+        '''
+        Create nodes and elements in Zinc region, finding or creating the
+        rectangular Cartesian coordinate field.
+        With bulk True, all nodes and elements with standard node based element
+        field templates are serialised to an in-memory EX stream and read by
+        Zinc in one call; remaining elements, e.g. with scale factors or
+        collapsed nodes, are then created through the Zinc API. With bulk False
+        every node and element is created through the API, one call per node
+        parameter and element. Both give the same mesh and field.
+        :param region: Zinc region, must not already contain nodes or elements with these identifiers.
+        :param bulk: Set to False to use only the Zinc API.
+        :return: Zinc field the parameters were set for.
+        '''
+        from scaffoldmaker.utils.zinc_utils import getOrCreateCoordinateField
+        nodeBlocks = self.getNodeBlocks()
+        elementBlocks = self.getElementBlocks()
+        # EX nodes must have a value; otherwise fall back to the API
+        bulk = bulk and nodeBlocks and all((VALUE_LABEL_VALUE, 1) in block.valueLabelVersions for block in nodeBlocks)
+        fm = region.getFieldmodule()
+        fm.beginChange()
+        if bulk:
+            elementBlocks = self._readExInRegion(region)
+        coordinates = getOrCreateCoordinateField(fm, self._fieldName, self._componentsCount)
+        if not bulk:
+            self._createNodesInRegion(fm, coordinates, nodeBlocks)
+        if elementBlocks:
+            self._createElementsInRegion(fm, coordinates, elementBlocks)
+        fm.endChange()
+        return coordinates
+
+    @classmethod
+    def createFromRegion(cls, region, fieldName='coordinates', dimension=None):
+        '''
+        Read nodes and elements defining a field in a Zinc region into a new MeshData.
+        Only nodes and elements with the field defined are read.
+        :param region: Zinc region to read from.
+        :param fieldName: Name of finite element field to read.
+        :param dimension: Mesh dimension to read, or None for highest dimension with elements.
+        :return: MeshData
+        '''
+        from opencmiss.zinc.field import Field
+        from opencmiss.zinc.status import OK as ZINC_OK
+        fm = region.getFieldmodule()
+        field = fm.findFieldByName(fieldName).castFiniteElement()
+        assert field.isValid(), 'MeshData.createFromRegion.  No finite element field ' + fieldName
+        componentsCount = field.getNumberOfComponents()
+        if dimension is None:
+            dimension = 3
+            while (dimension > 1) and (fm.findMeshByDimension(dimension).getSize() == 0):
+                dimension -= 1
+        meshData = cls(dimension, componentsCount, fieldName)
+        zincValueLabels = _getZincValueLabels()
+        cache = fm.createFieldcache()
+        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+        nodetemplate = nodes.createNodetemplate()
+        nodeiterator = nodes.createNodeiterator()
+        node = nodeiterator.next()
+        while node.isValid():
+            if nodetemplate.defineFieldFromNode(field, node) == ZINC_OK:
+                valueLabelVersions = []
+                for valueLabel in range(VALUE_LABEL_VALUE, VALUE_LABEL_D3_DS1DS2DS3 + 1):
+                    versionsCount = nodetemplate.getValueNumberOfVersions(field, -1, zincValueLabels[valueLabel])
+                    for version in range(1, versionsCount + 1):
+                        valueLabelVersions.append((valueLabel, version))
+                if valueLabelVersions:
+                    cache.setNode(node)
+                    parameters = []
+                    for valueLabel, version in valueLabelVersions:
+                        result, values = field.getNodeParameters(cache, -1, zincValueLabels[valueLabel], version, componentsCount)
+                        parameters.append(values if (componentsCount > 1) else [ values ])
+                    meshData.addNode(node.getIdentifier(), valueLabelVersions, parameters)
+            node = nodeiterator.next()
+        mesh = fm.findMeshByDimension(dimension)
+        shapeTypes = [ None, SHAPE_TYPE_LINE, SHAPE_TYPE_SQUARE, SHAPE_TYPE_CUBE ]
+        elementiterator = mesh.createElementiterator()
+        element = elementiterator.next()
+        while element.isValid():
+            eft = element.getElementfieldtemplate(field, -1)
+            if eft.isValid():
+                descriptor = EftDescriptor.createFromZincEft(eft)
+                localNodesCount = eft.getNumberOfLocalNodes()
+                nodeIdentifiers = [ element.getNode(eft, ln).getIdentifier() for ln in range(1, localNodesCount + 1) ]
+                scaleFactors = None
+                scaleFactorsCount = eft.getNumberOfLocalScaleFactors()
+                if scaleFactorsCount > 0:
+                    result, scaleFactors = element.getScaleFactors(eft, scaleFactorsCount)
+                    if scaleFactorsCount == 1:
+                        scaleFactors = [ scaleFactors ]
+                meshData.addElement(descriptor, element.getIdentifier(), nodeIdentifiers, scaleFactors, shapeTypes[dimension])
+            element = elementiterator.next()
+        return meshData
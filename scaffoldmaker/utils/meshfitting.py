@@ -0,0 +1,205 @@
+'''
+Linear least squares fitting of MeshData node parameters, e.g. of a scaffold
+generated from a mesh type, to data points such as segmented surfaces, with
+smoothing penalties, assembled as sparse matrices over the global node
+parameter vector.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+import scipy.sparse
+import scipy.sparse.linalg
+from scaffoldmaker.utils.basisevaluation import *
+
+class MeshDataFitter(object):
+    '''
+    Fits the global node parameter vector p of a MeshData by minimising:
+        sum_d w_d |A_d p - z_d|^2
+        + strainPenalty * integral |d(p - p0)/dxi|^2
+        + curvaturePenalty * integral |d2(p - p0)/dxi2|^2
+        + regularisation * |p - p0|^2
+    where A_d evaluates the field at the element xi of data point z_d, and p0
+    are the initial parameters, so penalties resist deformation of the
+    template rather than its shape. The small regularisation keeps the fit
+    unique when data and penalties under-determine the parameters. Integrals
+    are over element xi by Gauss quadrature. Scale factors, e.g. node-based
+    scale factors of apex elements, are constants in the operators so are
+    held fixed. Parameters not affected by data or penalties keep their
+    initial values.
+    '''
+
+    def __init__(self, meshData, elementIdentifiers=None, gaussPointsCount=3):
+        '''
+        :param meshData: MeshData with initial node parameters.
+        :param elementIdentifiers: Optional array-like of identifiers of elements
+        to integrate smoothing penalties over. Default all elements.
+        :param gaussPointsCount: Number of Gauss points in each xi direction.
+        '''
+        self._meshData = meshData
+        dimension = meshData.getDimension()
+        if elementIdentifiers is None:
+            elementIdentifiers = meshData.getElementIdentifiers()
+        elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        self._nodeParameterVector = getNodeParameterVector(meshData)
+        xi, weights = getGaussPoints(dimension, gaussPointsCount)
+        pointElementIdentifiers = numpy.repeat(elementIdentifiers, len(xi))
+        pointXi = numpy.tile(xi, (len(elementIdentifiers), 1))
+        pointWeights = scipy.sparse.diags(numpy.tile(weights, len(elementIdentifiers)))
+        # normal matrices of penalties: sum of D^T W D over first and second xi derivatives
+        self._strainMatrix = self._curvatureMatrix = scipy.sparse.csr_matrix((len(self._nodeParameterVector),)*2)
+        for i in range(dimension):
+            derivativeOrders = [ 0 ]*dimension
+            derivativeOrders[i] = 1
+            operator = createEvaluationOperator(meshData, pointElementIdentifiers, pointXi, derivativeOrders)
+            self._strainMatrix = self._strainMatrix + operator.T.dot(pointWeights.dot(operator))
+            for j in range(i, dimension):
+                derivativeOrders = [ 0 ]*dimension
+                derivativeOrders[i] += 1
+                derivativeOrders[j] += 1
+                operator = createEvaluationOperator(meshData, pointElementIdentifiers, pointXi, derivativeOrders)
+                # mixed derivatives appear twice in the sum over i, j
+                self._curvatureMatrix = self._curvatureMatrix + (1.0 if (i == j) else 2.0)*operator.T.dot(pointWeights.dot(operator))
+        self._dataOperator = None
+        self._dataPoints = None
+        self._dataWeights = None
+
+    def getNodeParameterVector(self):
+        '''
+        :return: Initial global node parameter vector, see getNodeParameterVector().
+        '''
+        return self._nodeParameterVector
+
+    def setDataLocations(self, elementIdentifiers, xi, dataPoints, weights=None):
+        '''
+        Set data points and the element xi they are fitted to.
+        :param elementIdentifiers: Array-like (dataCount) of element identifiers.
+        :param xi: Array-like (dataCount, dimension) of element xi.
+        :param dataPoints: Array-like (dataCount, componentsCount).
+        :param weights: Optional array-like (dataCount) of data weights. Default 1.
+        '''
+        dataPoints = numpy.asarray(dataPoints, dtype=numpy.float64).reshape(-1, self._meshData.getComponentsCount())
+        self._dataOperator = createEvaluationOperator(self._meshData, elementIdentifiers, xi)
+        self._dataPoints = dataPoints
+        self._dataWeights = numpy.ones(len(dataPoints)) if (weights is None) else \
+            numpy.asarray(weights, dtype=numpy.float64).reshape(len(dataPoints))
+
+    def projectDataPoints(self, dataPoints, weights=None, faceElementIdentifiers=None, faceIndexes=None, nodeParameterVector=None):
+        '''
+        Set data points located at their nearest points on faces of 3-D elements.
+        :param dataPoints: Array-like (dataCount, componentsCount).
+        :param weights: Optional array-like (dataCount) of data weights. Default 1.
+        :param faceElementIdentifiers: Optional array-like of element identifiers
+        of faces to project onto. Default all exterior faces.
+        :param faceIndexes: Array-like of face index 2*xiIndex + side of each
+        face, e.g. 5 for the xi3 = 1 epicardium, see SurfaceProjector.
+        :param nodeParameterVector: Optional node parameter vector to project
+        onto, e.g. from a previous fit. Default initial parameters.
+        :return: Array (dataCount) of projection distances.
+        '''
+        from scaffoldmaker.utils.meshdata import MeshData
+        from scaffoldmaker.utils.surfaceprojection import SurfaceProjector
+        meshData = self._meshData
+        if nodeParameterVector is not None:
+            meshData = MeshData(meshData.getDimension(), meshData.getComponentsCount(), meshData.getFieldName())
+            for block in self._meshData.getNodeBlocks():
+                meshData.addNodes(block.nodeIdentifiers, block.valueLabelVersions, block.parameters.copy())
+            for block in self._meshData.getElementBlocks():
+                meshData.addElements(block.eft, block.elementIdentifiers, block.nodeIdentifiers, block.scaleFactors, block.shapeType)
+            setNodeParameterVector(meshData, nodeParameterVector)
+        projector = SurfaceProjector(meshData, faceElementIdentifiers, faceIndexes)
+        elementIdentifiers, faceIndexes, xi, distances = projector.findNearestPoints(dataPoints)
+        self.setDataLocations(elementIdentifiers, xi, dataPoints, weights)
+        return distances
+
+    def getDataResiduals(self, nodeParameterVector=None):
+        '''
+        :param nodeParameterVector: Optional node parameter vector. Default initial parameters.
+        :return: Array (dataCount, componentsCount) of field minus data at data locations.
+        '''
+        assert self._dataOperator is not None, 'MeshDataFitter.getDataResiduals.  No data points set'
+        if nodeParameterVector is None:
+            nodeParameterVector = self._nodeParameterVector
+        return self._dataOperator.dot(nodeParameterVector) - self._dataPoints
+
+    def fit(self, strainPenalty=0.0, curvaturePenalty=0.0, solver='direct', tolerance=1.0E-10, regularisation=1.0E-8):
+        '''
+        Solve the normal equations of the fit, factorising once for all components.
+        :param strainPenalty: Weight of first xi derivative penalty.
+        :param curvaturePenalty: Weight of second xi derivative penalty.
+        :param regularisation: Weight of penalty on change from initial
+        parameters in the fit, relative to the mean diagonal of the normal
+        matrix, so the fit is unique with few data points and zero penalties.
+        :param solver: 'direct' for sparse LU factorisation, or 'iterative' for
+        conjugate gradients with Jacobi preconditioning from the initial parameters.
+        :param tolerance: Relative residual tolerance of the iterative solver.
+        :return: Fitted global node parameter vector (nodesCount*valueLabelVersionsCount,
+        componentsCount), see getNodeParameterVector().
+        '''
+        assert self._dataOperator is not None, 'MeshDataFitter.fit.  No data points set'
+        assert solver in ('direct', 'iterative'), 'MeshDataFitter.fit.  Invalid solver ' + str(solver)
+        penaltyMatrix = strainPenalty*self._strainMatrix + curvaturePenalty*self._curvatureMatrix
+        matrix = (self._dataOperator.T.dot(scipy.sparse.diags(self._dataWeights).dot(self._dataOperator)) + penaltyMatrix).tocsr()
+        rhs = self._dataOperator.T.dot(self._dataWeights[:, numpy.newaxis]*self._dataPoints) + penaltyMatrix.dot(self._nodeParameterVector)
+        # solve only for parameters in the fit, holding the others at their initial values
+        diagonal = matrix.diagonal()
+        free = numpy.where(diagonal > 0.0)[0]
+        nodeParameterVector = self._nodeParameterVector.copy()
+        if len(free) == 0:
+            return nodeParameterVector
+        freeMatrix = matrix[free][:, free]
+        freeRhs = rhs[free]
+        if regularisation > 0.0:
+            weight = regularisation*numpy.mean(diagonal[free])
+            freeMatrix = (freeMatrix + weight*scipy.sparse.identity(len(free), format='csr')).tocsr()
+            freeRhs = freeRhs + weight*self._nodeParameterVector[free]
+        if solver == 'direct':
+            try:
+                factorisation = scipy.sparse.linalg.splu(freeMatrix.tocsc())
+            except RuntimeError:
+                raise RuntimeError('MeshDataFitter.fit.  Singular normal equations: data and penalties do not determine ' +
+                    'all parameters, so use penalties or regularisation > 0')
+            nodeParameterVector[free] = factorisation.solve(freeRhs)
+        else:
+            preconditioner = scipy.sparse.diags(1.0/freeMatrix.diagonal())
+            for c in range(nodeParameterVector.shape[1]):
+                # SciPy renamed tol to rtol
+                try:
+                    solution, info = scipy.sparse.linalg.cg(freeMatrix, freeRhs[:, c], x0=nodeParameterVector[free, c], rtol=tolerance, M=preconditioner)
+                except TypeError:
+                    solution, info = scipy.sparse.linalg.cg(freeMatrix, freeRhs[:, c], x0=nodeParameterVector[free, c], tol=tolerance, M=preconditioner)
+                assert info == 0, 'MeshDataFitter.fit.  Conjugate gradients did not converge'
+                nodeParameterVector[free, c] = solution
+        return nodeParameterVector
+
+    def updateMeshData(self, nodeParameterVector):
+        '''
+        Write fitted parameters into the MeshData in bulk.
+        :param nodeParameterVector: Global node parameter vector, e.g. from fit().
+        '''
+        setNodeParameterVector(self._meshData, nodeParameterVector)
+        self._nodeParameterVector = getNodeParameterVector(self._meshData)
+
+    def updateRegion(self, region, nodeParameterVector):
+        '''
+        Write fitted parameters to the field of the same name in a Zinc region,
+        e.g. the region the MeshData was generated in or read from, in one pass.
+        Values of node value labels and versions not in the region are not set.
+        Asserts all nodes are in the region.
+        :param region: Zinc region containing the nodes.
+        :param nodeParameterVector: Global node parameter vector, e.g. from fit().
+        '''
+        from opencmiss.zinc.field import Field
+        from scaffoldmaker.utils.meshdata import _getZincValueLabels
+        from scaffoldmaker.utils.zinc_utils import setNodesetFieldParameters
+        fm = region.getFieldmodule()
+        field = fm.findFieldByName(self._meshData.getFieldName()).castFiniteElement()
+        assert field.isValid(), 'MeshDataFitter.updateRegion.  No finite element field ' + self._meshData.getFieldName()
+        zincValueLabels = _getZincValueLabels()
+        valueLabelVersions = self._meshData.getValueLabelVersions()
+        nodeParameters = numpy.asarray(nodeParameterVector, dtype=numpy.float64).reshape(
+            self._meshData.getNodesCount(), len(valueLabelVersions), self._meshData.getComponentsCount())
+        missingNodesCount, skippedValuesCount = setNodesetFieldParameters(field, fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES),
+            self._meshData.getNodeIdentifiers(), [ (zincValueLabels[valueLabel], version) for valueLabel, version in valueLabelVersions ],
+            [ nodeParameters[:, v, :] for v in range(len(valueLabelVersions)) ])
+        assert missingNodesCount == 0, 'MeshDataFitter.updateRegion.  ' + str(missingNodesCount) + ' nodes not found in region'
@@ -0,0 +1,38 @@
+'''
+Array utilities for regular grids of nodes and elements.
+Created on Oct 18, 2026
+'''
+
+import numpy
+
+def getGridElementNodeIdentifiers(elementsCounts, loop1=False, startNodeIdentifier=1):
+    '''
+    Get node identifiers for all elements of a regular grid whose nodes are
+    numbered consecutively with the first direction varying fastest.
+    :param elementsCounts: Number of elements in each direction, 1 to 3 directions.
+    :param loop1: Set to True if first direction loops around, so it has as
+    many nodes as elements and last elements connect to first nodes.
+    :param startNodeIdentifier: Identifier of first node.
+    :return: int array (elementsCount, 2**dimension) of element node identifiers
+    in Zinc local node order, elements ordered with first direction varying fastest.
+    '''
+    dimension = len(elementsCounts)
+    nodesCounts = [ (elementsCount + 1) for elementsCount in elementsCounts ]
+    if loop1:
+        nodesCounts[0] = elementsCounts[0]
+    strides = [ 1 ]
+    for i in range(1, dimension):
+        strides.append(strides[i - 1]*nodesCounts[i - 1])
+    localNodesCount = 1 << dimension
+    nodeIdentifiers = numpy.empty((numpy.prod(elementsCounts, dtype=numpy.int64), localNodesCount), dtype=numpy.int64)
+    for ln in range(localNodesCount):
+        indexes = []
+        for i in range(dimension):
+            index = numpy.arange(elementsCounts[i]) + ((ln >> i) & 1)
+            if loop1 and (i == 0):
+                index %= nodesCounts[0]
+            indexes.append(index*strides[i])
+        # reverse so first direction varies fastest when raveled
+        grid = sum(numpy.ix_(*indexes[::-1]))
+        nodeIdentifiers[:, ln] = grid.ravel() + startNodeIdentifier
+    return nodeIdentifiers
@@ -0,0 +1,111 @@
+'''
+Batched Gauss quadrature of volumes, areas and integrals of functions of
+position over MeshData elements or element faces, for sweeps over variants
+with the same topology.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshquality import getJacobianDeterminants
+
+class MeshDataIntegrator(object):
+    '''
+    Gauss quadrature over elements of a MeshData. Sparse operators evaluating
+    the field and its xi derivatives at Gauss points are built once, so each
+    variant with different node parameters but the same elements, element field
+    templates and scale factors costs a few sparse products.
+    '''
+
+    def __init__(self, meshData, elementIdentifiers=None, gaussPointsCount=3, face=None):
+        '''
+        :param meshData: MeshData giving elements and default node parameters.
+        :param elementIdentifiers: Optional array-like of identifiers of elements
+        to integrate over, e.g. an LV, RV or septum range. Default all elements.
+        :param gaussPointsCount: Number of Gauss points in each xi direction.
+        :param face: Optional (xiIndex, xiValue) to integrate over that face of
+        each element instead, e.g. (2, 0.0) for the xi3 = 0 inner wall surface.
+        '''
+        dimension = meshData.getDimension()
+        if elementIdentifiers is None:
+            elementIdentifiers = meshData.getElementIdentifiers()
+        self._elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        self._componentsCount = meshData.getComponentsCount()
+        if face is None:
+            xi, self._weights = getGaussPoints(dimension, gaussPointsCount)
+            self._xiAxes = list(range(dimension))
+        else:
+            xiIndex, xiValue = face
+            assert 0 <= xiIndex < dimension, 'MeshDataIntegrator.  Invalid face xi index'
+            faceXi, self._weights = getGaussPoints(dimension - 1, gaussPointsCount)
+            xi = numpy.insert(faceXi, xiIndex, xiValue, axis=1)
+            self._xiAxes = [ i for i in range(dimension) if i != xiIndex ]
+        self._pointsCount = len(xi)
+        elementsCount = len(self._elementIdentifiers)
+        pointElementIdentifiers = numpy.repeat(self._elementIdentifiers, self._pointsCount)
+        pointXi = numpy.tile(xi, (elementsCount, 1))
+        self._valueOperator = createEvaluationOperator(meshData, pointElementIdentifiers, pointXi)
+        self._derivativeOperators = []
+        for i in self._xiAxes:
+            derivativeOrders = [ 0 ]*dimension
+            derivativeOrders[i] = 1
+            self._derivativeOperators.append(createEvaluationOperator(meshData, pointElementIdentifiers, pointXi, derivativeOrders))
+        self._nodeParameterVector = getNodeParameterVector(meshData)
+
+    def getElementIdentifiers(self):
+        return self._elementIdentifiers
+
+    def evaluate(self, nodeParameterVector=None):
+        '''
+        :param nodeParameterVector: Optional global node parameter vector from
+        getNodeParameterVector() of a variant. Default from initial meshData.
+        :return: x array (elementsCount, pointsCount, componentsCount),
+        Jacobian array (elementsCount, pointsCount, componentsCount, xiCount)
+        of derivatives w.r.t. integrated xi directions, at Gauss points.
+        '''
+        if nodeParameterVector is None:
+            nodeParameterVector = self._nodeParameterVector
+        shape = (len(self._elementIdentifiers), self._pointsCount, self._componentsCount)
+        x = self._valueOperator.dot(nodeParameterVector).reshape(shape)
+        jacobians = numpy.stack([ operator.dot(nodeParameterVector).reshape(shape) for operator in self._derivativeOperators ], axis=3)
+        return x, jacobians
+
+    def integrate(self, integrand=None, nodeParameterVector=None):
+        '''
+        Integrate function of position over each element or element face.
+        :param integrand: Optional function taking x array (elementsCount,
+        pointsCount, componentsCount) returning array (elementsCount,
+        pointsCount) or (elementsCount, pointsCount, valuesCount), e.g. density.
+        Default None integrates 1 to give volumes, areas or lengths; volumes
+        are signed, positive for right-handed elements.
+        :param nodeParameterVector: Optional global node parameter vector of a
+        variant. Default from initial meshData.
+        :return: Array (elementsCount) or (elementsCount, valuesCount) of
+        integrals in order of getElementIdentifiers(); sum for group totals.
+        '''
+        x, jacobians = self.evaluate(nodeParameterVector)
+        weightedMeasures = getJacobianDeterminants(jacobians)*self._weights
+        if integrand is None:
+            return numpy.sum(weightedMeasures, axis=1)
+        values = numpy.asarray(integrand(x))
+        if values.ndim == 2:
+            return numpy.einsum('ep,ep->e', values, weightedMeasures)
+        return numpy.einsum('epv,ep->ev', values, weightedMeasures)
+
+    def getEnclosedVolumes(self, nodeParameterVector=None):
+        '''
+        Get contributions of each 2-D surface or element face in 3-D to the
+        volume enclosed by the surface, by the divergence theorem as the
+        integral of x.n/3. The sum is exact for closed surfaces, or for open
+        surfaces whose opening is planar and passes through the origin, e.g. a
+        cavity with base in the z = 0 plane. Sign depends on face orientation.
+        :param nodeParameterVector: Optional global node parameter vector of a
+        variant. Default from initial meshData.
+        :return: Array (elementsCount) of signed volume contributions.
+        '''
+        assert (len(self._xiAxes) == 2) and (self._componentsCount == 3), \
+            'MeshDataIntegrator.getEnclosedVolumes.  Only implemented for surfaces in 3-D'
+        x, jacobians = self.evaluate(nodeParameterVector)
+        normals = numpy.cross(jacobians[:, :, :, 0], jacobians[:, :, :, 1])
+        return numpy.einsum('epc,epc,p->e', x, normals, self._weights)/3.0
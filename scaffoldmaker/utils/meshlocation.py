@@ -0,0 +1,269 @@
+'''
+Batched location of points in MeshData elements: candidate elements are
+culled with a bounding volume hierarchy of element boxes, then xi is found
+by vectorised Newton iterations for all candidates at once.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.boxhierarchy import BoxHierarchy
+
+def _solveNewtonSteps(hessians, gradients, blocked):
+    '''
+    Solve Newton steps with damping, which tolerates singular matrices e.g. at
+    collapsed nodes, holding blocked xi fixed.
+    :param hessians: Array (count, xiCount, xiCount).
+    :param gradients: Array (count, xiCount) of negative gradients.
+    :param blocked: bool array (count, xiCount) of xi not to change.
+    :return: Array (count, xiCount) of xi increments.
+    '''
+    xiCount = hessians.shape[2]
+    free = ~blocked
+    a = hessians*(free[:, :, numpy.newaxis] & free[:, numpy.newaxis, :])
+    damping = 1.0E-12*numpy.abs(numpy.trace(a, axis1=1, axis2=2)) + 1.0E-300
+    a[:, range(xiCount), range(xiCount)] += damping[:, numpy.newaxis]
+    return numpy.linalg.solve(a, (gradients*free)[:, :, numpy.newaxis])[:, :, 0]
+
+def solveElementXi(functionTypes, parameters, targets, xi, fixedAxis=None, maximumIterations=20, xiTolerance=1.0E-8):
+    '''
+    Find xi in [0, 1] minimising the distance from the field to a target
+    in each element independently, by Newton iterations with step halving,
+    projected onto the element bounds. Fewer xi than components, e.g. surfaces
+    in 3-D or a fixed xi axis for element faces, are solved in the least
+    squares sense.
+    :param functionTypes: List of BASIS_* function type for each xi direction.
+    :param parameters: Array (count, functionsCount, componentsCount) of basis
+    function parameters of element, e.g. from getElementBlockParameters().
+    :param targets: Array (count, componentsCount) of target coordinates.
+    :param xi: Array-like (count, dimension) of initial xi; not modified.
+    :param fixedAxis: Optional xi index to hold at its initial value.
+    :param maximumIterations: Maximum number of Newton iterations.
+    :param xiTolerance: Iterate until Newton steps in xi are smaller than this.
+    :return: xi array (count, dimension), distances array (count).
+    '''
+    dimension = len(functionTypes)
+    xi = numpy.array(xi, dtype=numpy.float64).reshape(-1, dimension)
+    freeAxes = [ i for i in range(dimension) if i != fixedAxis ]
+    # Gauss-Newton suffices when xi can match targets, e.g. locating points in volumes
+    leastSquares = len(freeAxes) < parameters.shape[2]
+    active = numpy.arange(len(xi))
+    for iteration in range(maximumIterations):
+        if len(active) == 0:
+            break
+        activeParameters = parameters[active]
+        activeXi = xi[active]
+        activeTargets = targets[active]
+        if leastSquares:
+            x, jacobians, secondDerivatives = evaluateElementParametersWithJacobians(functionTypes, activeParameters, activeXi, freeAxes, hessians=True)
+        else:
+            x, jacobians = evaluateElementParametersWithJacobians(functionTypes, activeParameters, activeXi, freeAxes)
+        oldXi = activeXi[:, freeAxes]
+        residuals = activeTargets - x
+        gradients = numpy.einsum('aci,ac->ai', jacobians, residuals)
+        hessians = numpy.einsum('aci,acj->aij', jacobians, jacobians)
+        if leastSquares:
+            # Newton with curvature of field where positive definite, as residuals do not vanish
+            newtonHessians = hessians - numpy.einsum('ac,acij->aij', residuals, secondDerivatives)
+            definite = numpy.linalg.eigvalsh(newtonHessians)[:, 0] > 1.0E-12*numpy.abs(numpy.trace(hessians, axis1=1, axis2=2))
+            hessians[definite] = newtonHessians[definite]
+        # hold xi on bounds which the descent direction leaves, so steps slide along faces and edges
+        blocked = ((oldXi <= 0.0) & (gradients < 0.0)) | ((oldXi >= 1.0) & (gradients > 0.0))
+        dxi = _solveNewtonSteps(hessians, gradients, blocked)
+        stepSizes = numpy.max(numpy.abs(dxi), axis=1)
+        # limit steps to half the element, as near-singular Jacobians e.g. at collapsed nodes give huge steps
+        dxi *= numpy.minimum(1.0, 0.5/numpy.maximum(stepSizes, 1.0E-300))[:, numpy.newaxis]
+        # halve steps which do not reduce distance, as steps can overshoot far from curved surfaces
+        oldDistancesSquared = numpy.sum(residuals*residuals, axis=1)
+        newXi = oldXi.copy()
+        trials = numpy.arange(len(active))
+        for halving in range(10):
+            trialXi = numpy.clip(oldXi[trials] + dxi[trials], 0.0, 1.0)
+            fullTrialXi = activeXi[trials].copy()
+            fullTrialXi[:, freeAxes] = trialXi
+            trialResiduals = activeTargets[trials] - evaluateElementParameters(functionTypes, activeParameters[trials], fullTrialXi)
+            accept = numpy.sum(trialResiduals*trialResiduals, axis=1) <= oldDistancesSquared[trials]
+            newXi[trials[accept]] = trialXi[accept]
+            trials = trials[~accept]
+            if len(trials) == 0:
+                break
+            dxi[trials] *= 0.5
+        activeXi[:, freeAxes] = newXi
+        xi[active] = activeXi
+        # converged if full step is small or no step reduces distance
+        unconverged = stepSizes > xiTolerance
+        unconverged[trials] = False
+        active = active[unconverged]
+    x = evaluateElementParameters(functionTypes, parameters, xi)
+    return xi, numpy.linalg.norm(x - targets, axis=1)
+
+
+class ElementXiSolver(object):
+    '''
+    Basis function parameters of a set of elements gathered by basis, for
+    solving xi of many points in candidate elements with solveElementXi.
+    '''
+
+    def __init__(self, meshData, elementIdentifiers):
+        '''
+        :param meshData: MeshData.
+        :param elementIdentifiers: int array of identifiers of elements in meshData.
+        '''
+        self._bases = []
+        self._elementBases = numpy.zeros(len(elementIdentifiers), dtype=numpy.int64)
+        self._elementBaseIndexes = numpy.zeros(len(elementIdentifiers), dtype=numpy.int64)
+        basisBlocks = {}
+        for elements, functionTypes, parameters in getElementBlockParameters(meshData, elementIdentifiers):
+            basisBlocks.setdefault(functionTypes, []).append((elements, parameters))
+        for functionTypes, blocks in basisBlocks.items():
+            elements = numpy.concatenate([ block[0] for block in blocks ])
+            self._elementBases[elements] = len(self._bases)
+            self._elementBaseIndexes[elements] = numpy.arange(len(elements))
+            self._bases.append((functionTypes, numpy.concatenate([ block[1] for block in blocks ])))
+
+    def solve(self, points, elements, initialXi, fixedAxis=None, maximumIterations=20):
+        '''
+        Solve xi of points in candidate elements, by element basis.
+        :param points: Array (pairsCount, componentsCount).
+        :param elements: int array (pairsCount) of indexes into element identifiers.
+        :param initialXi: Initial xi array (pairsCount, dimension).
+        :param fixedAxis: Optional xi index held at initial value.
+        :param maximumIterations: Maximum number of Newton iterations.
+        :return: xi array (pairsCount, dimension), distances array (pairsCount).
+        '''
+        xi = numpy.array(initialXi, dtype=numpy.float64)
+        distances = numpy.empty(len(points))
+        pairBases = self._elementBases[elements]
+        for b in range(len(self._bases)):
+            pairs = numpy.where(pairBases == b)[0]
+            if len(pairs) > 0:
+                functionTypes, parameters = self._bases[b]
+                xi[pairs], distances[pairs] = solveElementXi(functionTypes, parameters[self._elementBaseIndexes[elements[pairs]]],
+                    points[pairs], xi[pairs], fixedAxis, maximumIterations)
+        return xi, distances
+
+
+class MeshDataLocator(object):
+    '''
+    Index for finding element and xi of large batches of points in a MeshData.
+    Element bounding boxes are estimated from a lattice of samples in each
+    element, expanded by a margin for curvature between samples.
+    '''
+
+    def __init__(self, meshData, elementIdentifiers=None, samplesCount=4, boxMargin=0.1, tolerance=None):
+        '''
+        :param meshData: MeshData with field to locate points in.
+        :param elementIdentifiers: Optional array-like of identifiers of elements
+        to search, e.g. a group. Default all elements.
+        :param samplesCount: Number of samples in each xi direction for bounding
+        boxes and initial xi.
+        :param boxMargin: Fraction of each element box diagonal to expand it by.
+        :param tolerance: Maximum distance of a located point from the mesh, or
+        None to use 1.0E-6 times the mesh bounding box diagonal.
+        '''
+        dimension = meshData.getDimension()
+        if elementIdentifiers is None:
+            elementIdentifiers = meshData.getElementIdentifiers()
+        self._elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        self._dimension = dimension
+        self._sampleXi = getXiGrid([ samplesCount ]*dimension)
+        elementIdentifiers, self._samples = evaluateMeshDataElements(meshData, self._sampleXi, self._elementIdentifiers)
+        self._solver = ElementXiSolver(meshData, self._elementIdentifiers)
+        minimums = numpy.min(self._samples, axis=1)
+        maximums = numpy.max(self._samples, axis=1)
+        margins = boxMargin*numpy.linalg.norm(maximums - minimums, axis=1)[:, numpy.newaxis]
+        if tolerance is None:
+            tolerance = 1.0E-6*numpy.linalg.norm(numpy.max(maximums, axis=0) - numpy.min(minimums, axis=0)) if len(minimums) else 0.0
+        self._tolerance = tolerance
+        self._boxHierarchy = BoxHierarchy(minimums - margins, maximums + margins)
+
+    def getTolerance(self):
+        return self._tolerance
+
+    def getInitialXi(self, points, elements, chunkSize=65536):
+        '''
+        Get xi of the nearest sample in each candidate element to each point.
+        :param points: Array (pairsCount, componentsCount).
+        :param elements: int array (pairsCount) of element indexes in
+        getElementIdentifiers() order.
+        :return: xi array (pairsCount, dimension), distances array (pairsCount)
+        to the nearest samples.
+        '''
+        xi = numpy.empty((len(points), self._dimension))
+        distances = numpy.empty(len(points))
+        for start in range(0, len(points), chunkSize):
+            end = start + chunkSize
+            offsets = self._samples[elements[start:end]] - points[start:end, numpy.newaxis, :]
+            distancesSquared = numpy.sum(offsets*offsets, axis=2)
+            nearest = numpy.argmin(distancesSquared, axis=1)
+            xi[start:end] = self._sampleXi[nearest]
+            distances[start:end] = numpy.sqrt(distancesSquared[numpy.arange(len(nearest)), nearest])
+        return xi, distances
+
+    def getElementIdentifiers(self):
+        return self._elementIdentifiers
+
+    def findMeshLocations(self, points, maximumIterations=20):
+        '''
+        Find element and xi for each point.
+        :param points: Array-like (pointsCount, componentsCount).
+        :param maximumIterations: Maximum number of Newton iterations.
+        :return: elementIdentifiers int array (pointsCount) with -1 where not
+        within tolerance of the mesh, xi array (pointsCount, dimension) and
+        distances array (pointsCount) at the nearest location in candidate
+        elements, with distance infinite where there are no candidates.
+        '''
+        points = numpy.asarray(points, dtype=numpy.float64)
+        pointsCount = len(points)
+        pairPoints, pairElements = self._boxHierarchy.findBoxesNearPoints(points, self._tolerance)
+        initialXi, sampleDistances = self.getInitialXi(points[pairPoints], pairElements)
+        # rank candidates for each point by distance to nearest sample
+        order = numpy.lexsort((sampleDistances, pairPoints))
+        pairPoints = pairPoints[order]
+        pairElements = pairElements[order]
+        initialXi = initialXi[order]
+        firstIndexes = numpy.unique(pairPoints, return_index=True)[1]
+        ranks = numpy.arange(len(pairPoints)) - numpy.repeat(firstIndexes, numpy.diff(numpy.append(firstIndexes, len(pairPoints))))
+        elementIdentifiers = numpy.full(pointsCount, -1, dtype=numpy.int64)
+        resultXi = numpy.zeros((pointsCount, self._dimension))
+        resultDistances = numpy.full(pointsCount, numpy.inf)
+        # solve candidates in rank order until every point is within tolerance of one
+        unlocated = numpy.ones(pointsCount, dtype=bool)
+        rank = 0
+        while True:
+            pairs = numpy.where(ranks == rank)[0]
+            pairs = pairs[unlocated[pairPoints[pairs]]]
+            if len(pairs) == 0:
+                break
+            self._solvePairs(points, pairPoints[pairs], pairElements[pairs], initialXi[pairs], maximumIterations,
+                elementIdentifiers, resultXi, resultDistances, unlocated)
+            rank += 1
+        # retry candidates of unlocated points from element centres, in case of local minima on element bounds
+        pairs = numpy.where(unlocated[pairPoints])[0]
+        if len(pairs) > 0:
+            centreXi = numpy.full((len(pairs), self._dimension), 0.5)
+            self._solvePairs(points, pairPoints[pairs], pairElements[pairs], centreXi, maximumIterations,
+                elementIdentifiers, resultXi, resultDistances, unlocated)
+        return elementIdentifiers, resultXi, resultDistances
+
+    def _solvePairs(self, points, candidatePoints, candidateElements, initialXi, maximumIterations,
+            elementIdentifiers, resultXi, resultDistances, unlocated):
+        '''
+        Solve candidate pairs and update results for points which are nearer,
+        or within tolerance of the candidate element. Where a point has several
+        candidates, element, xi and distance are all from the nearest.
+        '''
+        xi, distances = self._solver.solve(points[candidatePoints], candidateElements, initialXi, maximumIterations=maximumIterations)
+        order = numpy.lexsort((distances, candidatePoints))
+        best = order[numpy.unique(candidatePoints[order], return_index=True)[1]]
+        candidatePoints = candidatePoints[best]
+        candidateElements = candidateElements[best]
+        xi = xi[best]
+        distances = distances[best]
+        nearer = distances < resultDistances[candidatePoints]
+        resultXi[candidatePoints[nearer]] = xi[nearer]
+        resultDistances[candidatePoints[nearer]] = distances[nearer]
+        inside = nearer & (distances <= self._tolerance)
+        elementIdentifiers[candidatePoints[inside]] = self._elementIdentifiers[candidateElements[inside]]
+        unlocated[candidatePoints[inside]] = False
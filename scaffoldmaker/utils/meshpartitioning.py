@@ -0,0 +1,295 @@
+'''
+Partitioning of MeshData elements for distributed solves, by recursive
+coordinate bisection or spectral bisection of the element face adjacency
+graph, and extraction of partitions with local numbering and ghost layers.
+For meshes in a Zinc region, e.g. from MeshRefinement, get the MeshData with
+MeshData.createFromRegion().
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import multiprocessing
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.elementparameters import getNodeIndexes
+from scaffoldmaker.utils.meshtopology import MeshTopology
+
+def getElementCentres(meshData, topology=None):
+    '''
+    :param meshData: MeshData.
+    :param topology: Optional MeshTopology of all elements of meshData.
+    :return: Array (elementsCount, componentsCount) of mean of element corner
+    node coordinates, in getElementIdentifiers() order.
+    '''
+    if topology is None:
+        topology = MeshTopology(meshData)
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    x = meshData.getNodeParameters(VALUE_LABEL_VALUE, 1)
+    cornerNodes = topology.getCornerNodeIdentifiers()
+    mapped = cornerNodes >= 0
+    cornerX = x[getNodeIndexes(nodeIdentifiers, numpy.where(mapped, cornerNodes, nodeIdentifiers[0]))]
+    return numpy.sum(cornerX*mapped[:, :, numpy.newaxis], axis=1)/numpy.maximum(numpy.sum(mapped, axis=1), 1)[:, numpy.newaxis]
+
+def _bisect(elements, partitionsCount, firstPartition, partitions, getValues):
+    '''
+    Recursively split elements into partitionsCount parts of near equal size
+    at the median of values returned by getValues(elements).
+    '''
+    if partitionsCount == 1:
+        partitions[elements] = firstPartition
+        return
+    lowerCount = partitionsCount // 2
+    values = getValues(elements)
+    lowerElementsCount = (len(elements)*lowerCount) // partitionsCount
+    order = numpy.argsort(values, kind='stable')
+    _bisect(elements[order[:lowerElementsCount]], lowerCount, firstPartition, partitions, getValues)
+    _bisect(elements[order[lowerElementsCount:]], partitionsCount - lowerCount, firstPartition + lowerCount, partitions, getValues)
+
+def partitionCoordinateBisection(meshData, partitionsCount):
+    '''
+    Partition elements by recursive coordinate bisection of element centres,
+    splitting along the longest axis of each part's bounding box.
+    :param meshData: MeshData.
+    :param partitionsCount: Number of partitions, not necessarily a power of 2.
+    :return: int array (elementsCount) of partition from 0 of each element in
+    getElementIdentifiers() order.
+    '''
+    centres = getElementCentres(meshData)
+
+    def getValues(elements):
+        x = centres[elements]
+        return x[:, numpy.argmax(numpy.max(x, axis=0) - numpy.min(x, axis=0))]
+
+    partitions = numpy.zeros(len(centres), dtype=numpy.int64)
+    _bisect(numpy.arange(len(centres)), partitionsCount, 0, partitions, getValues)
+    return partitions
+
+def getElementAdjacency(topology):
+    '''
+    :param topology: MeshTopology.
+    :return: scipy.sparse.csr_matrix (elementsCount, elementsCount) with 1 where
+    elements share a face.
+    '''
+    neighbourElements = topology.getFaceNeighbours()[0]
+    elementsCount = len(neighbourElements)
+    elements, faces = numpy.where(neighbourElements >= 0)
+    adjacency = scipy.sparse.coo_matrix((numpy.ones(len(elements)), (elements, neighbourElements[elements, faces])),
+        shape=(elementsCount, elementsCount)).tocsr()
+    adjacency.data[:] = 1.0
+    return adjacency
+
+def _getFiedlerVector(adjacency):
+    '''
+    :return: Eigenvector of the second smallest eigenvalue of the graph
+    Laplacian, whose sign splits the graph with few edges cut.
+    '''
+    count = adjacency.shape[0]
+    laplacian = scipy.sparse.csgraph.laplacian(adjacency.astype(numpy.float64))
+    if count <= 1000:
+        return numpy.linalg.eigh(laplacian.toarray())[1][:, 1]
+    # constrain out the constant null vector
+    rng = numpy.random.default_rng(0)
+    vectors = scipy.sparse.linalg.lobpcg(laplacian, rng.standard_normal((count, 1)), Y=numpy.ones((count, 1)),
+        largest=False, tol=1.0E-5, maxiter=500)[1]
+    return vectors[:, 0]
+
+def partitionGraph(meshData, partitionsCount):
+    '''
+    Partition elements by recursive spectral bisection of the graph of elements
+    sharing faces, splitting each part at the median of its Fiedler vector so
+    few faces are cut. Disconnected parts are ordered by component first.
+    :param meshData: MeshData.
+    :param partitionsCount: Number of partitions, not necessarily a power of 2.
+    :return: int array (elementsCount) of partition from 0 of each element in
+    getElementIdentifiers() order.
+    '''
+    adjacency = getElementAdjacency(MeshTopology(meshData))
+
+    def getValues(elements):
+        subAdjacency = adjacency[elements][:, elements]
+        componentsCount, components = scipy.sparse.csgraph.connected_components(subAdjacency, directed=False)
+        if componentsCount > 1:
+            # keep components together: order by component size then index
+            sizes = numpy.bincount(components)
+            return numpy.argsort(numpy.argsort(-sizes, kind='stable'))[components].astype(numpy.float64)
+        if len(elements) < 3:
+            return numpy.arange(len(elements), dtype=numpy.float64)
+        return _getFiedlerVector(subAdjacency)
+
+    partitions = numpy.zeros(adjacency.shape[0], dtype=numpy.int64)
+    _bisect(numpy.arange(adjacency.shape[0]), partitionsCount, 0, partitions, getValues)
+    return partitions
+
+
+class MeshDataPartition(object):
+    '''
+    Elements of one partition and ghost layers of neighbouring elements, with
+    nodes and elements numbered locally from 1: owned elements, then ghost
+    elements by layer; nodes owned by the partition, then other nodes.
+    Nodes are owned by the lowest numbered partition of the elements using them.
+    '''
+
+    def __init__(self, meshData, elementPartitions, partition, ghostLayersCount=1, topology=None):
+        '''
+        :param meshData: MeshData of whole mesh.
+        :param elementPartitions: int array (elementsCount) of partition of
+        each element in getElementIdentifiers() order, e.g. from partitionGraph().
+        :param partition: Partition number to extract.
+        :param ghostLayersCount: Number of layers of elements sharing nodes with
+        the partition to include as ghosts.
+        :param topology: Optional MeshTopology of meshData to reuse.
+        '''
+        if topology is None:
+            topology = MeshTopology(meshData)
+        elementPartitions = numpy.asarray(elementPartitions, dtype=numpy.int64)
+        globalNodeIdentifiers, offsets, elementIndexes = topology.getNodeElementIncidence()
+        nodesCount = len(globalNodeIdentifiers)
+        elementsCount = len(elementPartitions)
+        incidence = scipy.sparse.csr_matrix((numpy.ones(len(elementIndexes)), elementIndexes, offsets), shape=(nodesCount, elementsCount))
+        # node owners: lowest partition of elements using node
+        nodeElementPartitions = elementPartitions[elementIndexes]
+        self._globalNodeOwners = numpy.full(nodesCount, -1, dtype=numpy.int64)
+        nonEmpty = numpy.diff(offsets) > 0
+        self._globalNodeOwners[nonEmpty] = numpy.minimum.reduceat(nodeElementPartitions, offsets[:-1][nonEmpty])
+        # ghost layers: elements sharing nodes with the elements so far
+        elementLayers = numpy.full(elementsCount, -1, dtype=numpy.int64)
+        elementLayers[elementPartitions == partition] = 0
+        for layer in range(1, ghostLayersCount + 1):
+            layerNodes = incidence.dot((elementLayers >= 0).astype(numpy.float64)) > 0.0
+            touched = incidence.T.dot(layerNodes.astype(numpy.float64)) > 0.0
+            elementLayers[touched & (elementLayers < 0)] = layer
+        elements = numpy.where(elementLayers >= 0)[0]
+        elements = elements[numpy.lexsort((elements, elementLayers[elements]))]
+        self._elementLayers = elementLayers[elements]
+        self._globalElementIdentifiers = topology.getElementIdentifiers()[elements]
+        nodes = numpy.where(incidence.dot((elementLayers >= 0).astype(numpy.float64)) > 0.0)[0]
+        nodes = nodes[numpy.lexsort((nodes, self._globalNodeOwners[nodes] != partition))]
+        self._globalNodeIdentifiers = globalNodeIdentifiers[nodes]
+        self._nodeOwners = self._globalNodeOwners[nodes]
+        self._partition = int(partition)
+        # local mesh data
+        self._meshData = MeshData(meshData.getDimension(), meshData.getComponentsCount(), meshData.getFieldName())
+        localNodeIdentifiers = numpy.arange(1, len(nodes) + 1, dtype=numpy.int64)
+        for block in meshData.getNodeBlocks():
+            blockNodes = numpy.where(numpy.isin(self._globalNodeIdentifiers, block.nodeIdentifiers))[0]
+            if len(blockNodes) > 0:
+                rows = getNodeIndexes(block.nodeIdentifiers, self._globalNodeIdentifiers[blockNodes])
+                self._meshData.addNodes(localNodeIdentifiers[blockNodes], block.valueLabelVersions, block.parameters[rows])
+        localElementIdentifiers = numpy.arange(1, len(elements) + 1, dtype=numpy.int64)
+        for block in meshData.getElementBlocks():
+            blockElements = numpy.where(numpy.isin(self._globalElementIdentifiers, block.elementIdentifiers))[0]
+            if len(blockElements) > 0:
+                rows = getNodeIndexes(block.elementIdentifiers, self._globalElementIdentifiers[blockElements])
+                self._meshData.addElements(block.eft, localElementIdentifiers[blockElements],
+                    localNodeIdentifiers[getNodeIndexes(self._globalNodeIdentifiers, block.nodeIdentifiers[rows])],
+                    block.scaleFactors[rows] if (block.scaleFactors is not None) else None, block.shapeType)
+
+    def getPartition(self):
+        return self._partition
+
+    def getMeshData(self):
+        '''
+        :return: MeshData of partition with local numbering.
+        '''
+        return self._meshData
+
+    def getGlobalNodeIdentifiers(self):
+        '''
+        :return: int array of global identifier of local nodes 1, 2, ...
+        '''
+        return self._globalNodeIdentifiers
+
+    def getGlobalElementIdentifiers(self):
+        '''
+        :return: int array of global identifier of local elements 1, 2, ...
+        '''
+        return self._globalElementIdentifiers
+
+    def getElementLayers(self):
+        '''
+        :return: int array of 0 for owned local elements, or ghost layer number from 1.
+        '''
+        return self._elementLayers
+
+    def getNodeOwners(self):
+        '''
+        :return: int array of owning partition of each local node.
+        '''
+        return self._nodeOwners
+
+
+# (meshData, elementPartitions, ghostLayersCount, topology) of the whole mesh
+# that partitions are built from in the process writing partition files
+_partitionSource = None
+
+def _setPartitionSource(meshData, elementPartitions, ghostLayersCount, topology):
+    global _partitionSource
+    _partitionSource = (meshData, elementPartitions, ghostLayersCount, topology) if (meshData is not None) else None
+
+def _writePartitionFile(arguments):
+    '''
+    Build partition from the partition source of this process and write it.
+    '''
+    p, fileName, mapFileName, fileFormat = arguments
+    meshData, elementPartitions, ghostLayersCount, topology = _partitionSource
+    partition = MeshDataPartition(meshData, elementPartitions, p, ghostLayersCount, topology)
+    if fileFormat == 'ex':
+        from scaffoldmaker.utils.exformat import writeExFile
+        writeExFile(fileName, partition.getMeshData())
+    else:
+        from scaffoldmaker.utils.scaffoldfile import writeScaffoldFile
+        writeScaffoldFile(fileName, partition.getMeshData(), options={ 'partition' : partition.getPartition() })
+    numpy.savez(mapFileName, globalNodeIdentifiers=partition.getGlobalNodeIdentifiers(),
+        globalElementIdentifiers=partition.getGlobalElementIdentifiers(),
+        elementLayers=partition.getElementLayers(), nodeOwners=partition.getNodeOwners())
+    return fileName
+
+def writePartitionFiles(meshData, elementPartitions, fileNameFormat, ghostLayersCount=1, fileFormat='scaffold', processesCount=None):
+    '''
+    Write each partition with local numbering and ghost layers to its own file,
+    plus a numpy .npz file of global node and element identifiers, element
+    ghost layers and node owners, using a pool of processes. The whole mesh
+    is passed to each process once, and each partition is built and written
+    in one process, so only one partition per process is in memory at a time.
+    :param meshData: MeshData of whole mesh.
+    :param elementPartitions: int array (elementsCount) of partition of each
+    element in getElementIdentifiers() order.
+    :param fileNameFormat: Format string for partition file names taking the
+    partition number, e.g. 'heart_{0}.scaffold'. Map files add '.map.npz'.
+    :param ghostLayersCount: Number of ghost layers of elements in each partition.
+    :param fileFormat: 'scaffold' for binary scaffold files, see
+    writeScaffoldFile, or 'ex' if all element field templates are supported
+    by writeExFile, checked before any files are written.
+    :param processesCount: Number of processes, or None for the CPU count.
+    Set to 1 to write in this process.
+    :return: List of file names written, in partition order.
+    '''
+    assert fileFormat in ('scaffold', 'ex'), 'writePartitionFiles.  Invalid file format ' + str(fileFormat)
+    if fileFormat == 'ex':
+        from scaffoldmaker.utils.exformat import isExElementBlock
+        assert all(isExElementBlock(block) for block in meshData.getElementBlocks()), \
+            'writePartitionFiles.  Mesh has element field templates which are not standard node based, ' + \
+            'not supported in EX format; use scaffold format'
+    topology = MeshTopology(meshData)
+    elementPartitions = numpy.asarray(elementPartitions, dtype=numpy.int64).reshape(-1)
+    partitionsCount = int(numpy.max(elementPartitions)) + 1 if len(elementPartitions) else 0
+    tasks = []
+    for p in range(partitionsCount):
+        fileName = fileNameFormat.format(p)
+        tasks.append((p, fileName, fileName + '.map.npz', fileFormat))
+    source = (meshData, elementPartitions, ghostLayersCount, topology)
+    if processesCount == 1 or partitionsCount <= 1:
+        _setPartitionSource(*source)
+        try:
+            return [ _writePartitionFile(task) for task in tasks ]
+        finally:
+            _setPartitionSource(None, None, None, None)
+    pool = multiprocessing.Pool(processesCount, initializer=_setPartitionSource, initargs=source)
+    try:
+        return list(pool.imap(_writePartitionFile, tasks))
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,73 @@
+'''
+Vectorised element quality metrics from Jacobians at Gauss points, and a
+fast gate for rejecting meshes with inverted or badly distorted elements.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.basisevaluation import *
+
+def getJacobianDeterminants(jacobians):
+    '''
+    :param jacobians: Array (..., componentsCount, dimension) of dx/dxi.
+    :return: Array (...) of Jacobian determinants. Where componentsCount
+    exceeds dimension, e.g. surfaces in 3-D, the non-negative measure
+    sqrt(det(J^T J)) is returned.
+    '''
+    componentsCount, dimension = jacobians.shape[-2:]
+    if componentsCount == dimension:
+        return numpy.linalg.det(jacobians)
+    return numpy.sqrt(numpy.maximum(numpy.linalg.det(numpy.einsum('...ci,...cj->...ij', jacobians, jacobians)), 0.0))
+
+def getConditionNumbers(jacobians):
+    '''
+    :param jacobians: Array (..., componentsCount, dimension) of dx/dxi.
+    :return: Array (...) of 2-norm condition numbers, the ratio of largest to
+    smallest singular value: 1 for undistorted elements, infinite if degenerate.
+    '''
+    singularValues = numpy.linalg.svd(jacobians, compute_uv=False)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        conditionNumbers = singularValues[..., 0]/singularValues[..., -1]
+    conditionNumbers[~numpy.isfinite(conditionNumbers)] = numpy.inf
+    return conditionNumbers
+
+def getMeshDataQuality(meshData, elementIdentifiers=None, gaussPointsCount=2):
+    '''
+    Compute Jacobian determinants and condition numbers at Gauss points of
+    elements in one vectorised pass.
+    :param meshData: MeshData, e.g. from MeshData.createFromRegion().
+    :param elementIdentifiers: Optional array-like of identifiers of elements
+    to check. Default all elements in block order.
+    :param gaussPointsCount: Number of Gauss points in each xi direction.
+    :return: elementIdentifiers int array (elementsCount), minimum Jacobian
+    determinants array (elementsCount), maximum condition numbers array
+    (elementsCount).
+    '''
+    xi, weights = getGaussPoints(meshData.getDimension(), gaussPointsCount)
+    elementIdentifiers, jacobians = evaluateMeshDataJacobians(meshData, xi, elementIdentifiers)
+    if len(elementIdentifiers) == 0:
+        return elementIdentifiers, numpy.zeros(0), numpy.zeros(0)
+    minimumDeterminants = numpy.min(getJacobianDeterminants(jacobians), axis=1)
+    maximumConditionNumbers = numpy.max(getConditionNumbers(jacobians), axis=1)
+    return elementIdentifiers, minimumDeterminants, maximumConditionNumbers
+
+def checkMeshDataQuality(meshData, minimumJacobianDeterminant=0.0, maximumConditionNumber=None, gaussPointsCount=2):
+    '''
+    Pass/fail gate for generated meshes: elements fail if the Jacobian
+    determinant at any Gauss point is not greater than the minimum, or if the
+    condition number exceeds the maximum.
+    :param meshData: MeshData, e.g. from MeshData.createFromRegion().
+    :param minimumJacobianDeterminant: Elements must have determinants greater
+    than this at all Gauss points. Default 0.0 rejects inverted elements.
+    :param maximumConditionNumber: Optional maximum condition number, or None
+    to not check.
+    :param gaussPointsCount: Number of Gauss points in each xi direction.
+    :return: True if all elements pass, int array of identifiers of failing elements.
+    '''
+    elementIdentifiers, minimumDeterminants, maximumConditionNumbers = getMeshDataQuality(meshData, gaussPointsCount=gaussPointsCount)
+    fail = ~(minimumDeterminants > minimumJacobianDeterminant)
+    if maximumConditionNumber is not None:
+        fail |= ~(maximumConditionNumbers <= maximumConditionNumber)
+    failElementIdentifiers = elementIdentifiers[fail]
+    return len(failElementIdentifiers) == 0, failElementIdentifiers
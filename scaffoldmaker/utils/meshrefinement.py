@@ -5,12 +5,9 @@ Created on April 4, 2018
 @author: Richard Christie
 '''
 
+from scaffoldmaker.utils.meshdata import EftDescriptor, MeshData, VALUE_LABEL_VALUE
 from scaffoldmaker.utils.octree import Octree
 from scaffoldmaker.utils.zinc_utils import *
-from opencmiss.zinc.element import Element, Elementbasis
-from opencmiss.zinc.field import Field
-from opencmiss.zinc.node import Node
-from opencmiss.zinc.result import RESULT_OK as ZINC_OK
 
 class MeshRefinement:
     '''
@@ -20,7 +17,13 @@ class MeshRefinement:
     def __init__(self, sourceRegion, targetRegion):
         '''
         Assumes targetRegion is empty.
+        :param targetRegion: Zinc region to create refined mesh in, or None to
+        only build it in a MeshData. See getTargetMeshData().
         '''
+        # Zinc imported here so module can be imported without it
+        from opencmiss.zinc.element import Element, Elementbasis
+        from opencmiss.zinc.field import Field
+        from opencmiss.zinc.result import RESULT_OK as ZINC_OK
         self._sourceRegion = sourceRegion
         self._sourceFm = sourceRegion.getFieldmodule()
         self._sourceCache = self._sourceFm.createFieldcache()
@@ -48,29 +51,44 @@ class MeshRefinement:
         self._octree = Octree(minimums, maximums)
 
         self._targetRegion = targetRegion
-        self._targetFm = targetRegion.getFieldmodule()
-        self._targetFm.beginChange()
-        self._targetCache = self._targetFm.createFieldcache()
-        self._targetCoordinates = getOrCreateCoordinateField(self._targetFm)
+        self._targetMeshData = None
+        if targetRegion is None:
+            self._targetMeshData = MeshData(3)
+            self._targetMeshDataEft = EftDescriptor.createLinearLagrange(3)
+        else:
+            self._targetFm = targetRegion.getFieldmodule()
+            self._targetFm.beginChange()
+            self._targetCache = self._targetFm.createFieldcache()
+            self._targetCoordinates = getOrCreateCoordinateField(self._targetFm)
 
-        self._targetNodes = self._targetFm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
-        self._nodetemplate = self._targetNodes.createNodetemplate()
-        self._nodetemplate.defineField(self._targetCoordinates)
+            self._targetNodes = self._targetFm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+            self._nodetemplate = self._targetNodes.createNodetemplate()
+            self._nodetemplate.defineField(self._targetCoordinates)
 
-        self._targetMesh = self._targetFm.findMeshByDimension(3)
-        self._targetBasis = self._targetFm.createElementbasis(3, Elementbasis.FUNCTION_TYPE_LINEAR_LAGRANGE)
-        self._targetEft = self._targetMesh.createElementfieldtemplate(self._targetBasis)
-        self._targetElementtemplate = self._targetMesh.createElementtemplate()
-        self._targetElementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
-        result = self._targetElementtemplate.defineField(self._targetCoordinates, -1, self._targetEft)
+            self._targetMesh = self._targetFm.findMeshByDimension(3)
+            self._targetBasis = self._targetFm.createElementbasis(3, Elementbasis.FUNCTION_TYPE_LINEAR_LAGRANGE)
+            self._targetEft = self._targetMesh.createElementfieldtemplate(self._targetBasis)
+            self._targetElementtemplate = self._targetMesh.createElementtemplate()
+            self._targetElementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
+            result = self._targetElementtemplate.defineField(self._targetCoordinates, -1, self._targetEft)
 
         self._nodeIdentifier = 1
         self._elementIdentifier = 1
 
     def __del__(self):
-        self._targetFm.endChange()
+        # __init__ may have failed before setting target region
+        if getattr(self, '_targetRegion', None) is not None:
+            self._targetFm.endChange()
+
+    def getTargetMeshData(self):
+        '''
+        :return: MeshData of refined trilinear mesh if constructed without
+        target region, otherwise None.
+        '''
+        return self._targetMeshData
 
     def refineElementCubeStandard3d(self, sourceElement, numberInXi1, numberInXi2, numberInXi3):
+        from opencmiss.zinc.node import Node
         # create nodes
         nids = []
         xi = [ 0.0, 0.0, 0.0 ]
@@ -84,9 +102,12 @@ class MeshRefinement:
                     result, x = self._sourceCoordinates.evaluateReal(self._sourceCache, 3)
                     nodeId = self._octree.findObjectByCoordinates(x)
                     if nodeId is None:
-                        node = self._targetNodes.createNode(self._nodeIdentifier, self._nodetemplate)
-                        self._targetCache.setNode(node)
-                        result = self._targetCoordinates.setNodeParameters(self._targetCache, -1, Node.VALUE_LABEL_VALUE, 1, x)
+                        if self._targetMeshData is not None:
+                            self._targetMeshData.addNode(self._nodeIdentifier, [ (VALUE_LABEL_VALUE, 1) ], [ x ])
+                        else:
+                            node = self._targetNodes.createNode(self._nodeIdentifier, self._nodetemplate)
+                            self._targetCache.setNode(node)
+                            result = self._targetCoordinates.setNodeParameters(self._targetCache, -1, Node.VALUE_LABEL_VALUE, 1, x)
                         nodeId = self._nodeIdentifier
                         self._octree.addObjectAtCoordinates(x, nodeId)
                         self._nodeIdentifier += 1
@@ -98,10 +119,13 @@ class MeshRefinement:
                 oj = (numberInXi1 + 1)
                 for i in range(numberInXi1):
                     bni = k*ok + j*oj + i
-                    element = self._targetMesh.createElement(self._elementIdentifier, self._targetElementtemplate)
                     enids = [ nids[bni     ], nids[bni      + 1], nids[bni      + oj], nids[bni      + oj + 1],
                               nids[bni + ok], nids[bni + ok + 1], nids[bni + ok + oj], nids[bni + ok + oj + 1] ]
-                    result = element.setNodesByIdentifier(self._targetEft, enids)
+                    if self._targetMeshData is not None:
+                        self._targetMeshData.addElement(self._targetMeshDataEft, self._elementIdentifier, enids)
+                    else:
+                        element = self._targetMesh.createElement(self._elementIdentifier, self._targetElementtemplate)
+                        result = element.setNodesByIdentifier(self._targetEft, enids)
                     #if result != ZINC_OK:
                     #print('Element', self._elementIdentifier, result, enids)
                     self._elementIdentifier += 1
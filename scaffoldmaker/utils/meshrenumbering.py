@@ -0,0 +1,241 @@
+'''
+Bandwidth-reducing renumbering of MeshData or Zinc region nodes and elements
+by reverse Cuthill-McKee, or Morton or Hilbert space-filling curve orderings.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.elementparameters import getNodeIndexes
+from scaffoldmaker.utils.meshtopology import MeshTopology
+
+ORDERING_REVERSE_CUTHILL_MCKEE = 'rcm'
+ORDERING_MORTON = 'morton'
+ORDERING_HILBERT = 'hilbert'
+
+_orderings = [ ORDERING_REVERSE_CUTHILL_MCKEE, ORDERING_MORTON, ORDERING_HILBERT ]
+
+def _getNodeAdjacency(topology):
+    '''
+    :return: scipy.sparse.csr_matrix (nodesCount, nodesCount) non-zero where
+    nodes share an element, in getNodeIdentifiers() order.
+    '''
+    nodeIdentifiers, offsets, elementIndexes = topology.getNodeElementIncidence()
+    incidence = scipy.sparse.csr_matrix((numpy.ones(len(elementIndexes)), elementIndexes, offsets),
+        shape=(len(nodeIdentifiers), len(topology.getElementIdentifiers())))
+    return incidence.dot(incidence.T).tocsr()
+
+def getBandwidth(adjacency, ranks):
+    '''
+    :param adjacency: Sparse matrix (count, count) non-zero where connected.
+    :param ranks: int array (count) of position of each row in the numbering.
+    :return: Maximum difference in rank of connected rows.
+    '''
+    adjacency = adjacency.tocoo()
+    if adjacency.nnz == 0:
+        return 0
+    return int(numpy.max(numpy.abs(ranks[adjacency.row] - ranks[adjacency.col])))
+
+def _getRanks(identifiers):
+    '''
+    :return: int array of position of each identifier in ascending order.
+    '''
+    ranks = numpy.empty(len(identifiers), dtype=numpy.int64)
+    ranks[numpy.argsort(identifiers, kind='stable')] = numpy.arange(len(identifiers))
+    return ranks
+
+def _quantise(x, bitsCount):
+    '''
+    :return: uint64 array (count, dimension) of coordinates scaled to the
+    range [0, 2**bitsCount) over their bounding box.
+    '''
+    minimums = numpy.min(x, axis=0)
+    ranges = numpy.max(x, axis=0) - minimums
+    ranges[ranges == 0.0] = 1.0
+    return numpy.minimum((x - minimums)/ranges*(1 << bitsCount), (1 << bitsCount) - 1).astype(numpy.uint64)
+
+def getMortonKeys(x, bitsCount=None):
+    '''
+    Get Morton Z-order keys interleaving the bits of quantised coordinates.
+    :param x: Array (count, dimension) of coordinates, dimension 1 to 3.
+    :param bitsCount: Bits per coordinate. Default uses all 63 key bits.
+    :return: uint64 array (count) of keys.
+    '''
+    x = numpy.asarray(x, dtype=numpy.float64)
+    dimension = x.shape[1]
+    if bitsCount is None:
+        bitsCount = 63 // dimension
+    q = _quantise(x, bitsCount)
+    keys = numpy.zeros(len(x), dtype=numpy.uint64)
+    for b in range(bitsCount - 1, -1, -1):
+        for i in range(dimension):
+            keys = (keys << numpy.uint64(1)) | ((q[:, i] >> numpy.uint64(b)) & numpy.uint64(1))
+    return keys
+
+def getHilbertKeys(x, bitsCount=None):
+    '''
+    Get Hilbert curve keys of quantised coordinates by Skilling's transpose
+    algorithm, vectorised over points.
+    :param x: Array (count, dimension) of coordinates, dimension 1 to 3.
+    :param bitsCount: Bits per coordinate. Default uses all 63 key bits.
+    :return: uint64 array (count) of keys.
+    '''
+    x = numpy.asarray(x, dtype=numpy.float64)
+    dimension = x.shape[1]
+    if bitsCount is None:
+        bitsCount = 63 // dimension
+    q = _quantise(x, bitsCount)
+    one = numpy.uint64(1)
+    # inverse undo of excess work
+    m = one << numpy.uint64(bitsCount - 1)
+    while m > one:
+        p = m - one
+        for i in range(dimension):
+            invert = (q[:, i] & m) != 0
+            q[invert, 0] ^= p
+            t = (q[~invert, 0] ^ q[~invert, i]) & p
+            q[~invert, 0] ^= t
+            q[~invert, i] ^= t
+        m >>= one
+    # Gray encode
+    for i in range(1, dimension):
+        q[:, i] ^= q[:, i - 1]
+    t = numpy.zeros(len(x), dtype=numpy.uint64)
+    m = one << numpy.uint64(bitsCount - 1)
+    while m > one:
+        t[(q[:, dimension - 1] & m) != 0] ^= m - one
+        m >>= one
+    q ^= t[:, numpy.newaxis]
+    # interleave transposed bits, first coordinate most significant
+    keys = numpy.zeros(len(x), dtype=numpy.uint64)
+    for b in range(bitsCount - 1, -1, -1):
+        for i in range(dimension):
+            keys = (keys << one) | ((q[:, i] >> numpy.uint64(b)) & one)
+    return keys
+
+def getRenumbering(meshData, ordering=ORDERING_REVERSE_CUTHILL_MCKEE):
+    '''
+    Get new order of nodes and elements.
+    :param meshData: MeshData.
+    :param ordering: One of ORDERING_*: reverse Cuthill-McKee on the graph of
+    nodes sharing elements, or Morton or Hilbert curve through node and
+    element centre coordinates.
+    :return: nodeOrder int array (nodesCount) of indexes into
+    getNodeIdentifiers() in new order, elementOrder int array (elementsCount)
+    of indexes into getElementIdentifiers() in new order.
+    '''
+    assert ordering in _orderings, 'getRenumbering.  Invalid ordering ' + str(ordering)
+    topology = MeshTopology(meshData)
+    nodeIdentifiers, offsets, elementIndexes = topology.getNodeElementIncidence()
+    if ordering == ORDERING_REVERSE_CUTHILL_MCKEE:
+        nodeOrder = scipy.sparse.csgraph.reverse_cuthill_mckee(_getNodeAdjacency(topology), symmetric_mode=True).astype(numpy.int64)
+        # elements in order of their first then mean node in new order
+        nodeRanks = numpy.empty(len(nodeOrder), dtype=numpy.int64)
+        nodeRanks[nodeOrder] = numpy.arange(len(nodeOrder))
+        elementNodes = numpy.repeat(numpy.arange(len(nodeIdentifiers)), numpy.diff(offsets))
+        elementsCount = len(topology.getElementIdentifiers())
+        firstRanks = numpy.full(elementsCount, len(nodeOrder), dtype=numpy.int64)
+        numpy.minimum.at(firstRanks, elementIndexes, nodeRanks[elementNodes])
+        meanRanks = numpy.bincount(elementIndexes, nodeRanks[elementNodes], minlength=elementsCount)/ \
+            numpy.maximum(numpy.bincount(elementIndexes, minlength=elementsCount), 1)
+        elementOrder = numpy.lexsort((meanRanks, firstRanks))
+    else:
+        getKeys = getMortonKeys if (ordering == ORDERING_MORTON) else getHilbertKeys
+        x = meshData.getNodeParameters(VALUE_LABEL_VALUE, 1)
+        nodeOrder = numpy.argsort(getKeys(x), kind='stable')
+        cornerNodes = topology.getCornerNodeIdentifiers()
+        mapped = cornerNodes >= 0
+        cornerX = x[getNodeIndexes(nodeIdentifiers, numpy.where(mapped, cornerNodes, nodeIdentifiers[0]))]
+        centres = numpy.sum(cornerX*mapped[:, :, numpy.newaxis], axis=1)/numpy.maximum(numpy.sum(mapped, axis=1), 1)[:, numpy.newaxis]
+        elementOrder = numpy.argsort(getKeys(centres), kind='stable')
+    # topology holds elements in meshData block order
+    return nodeOrder, elementOrder
+
+def _getNewIdentifiers(meshData, ordering, startNodeIdentifier, startElementIdentifier):
+    '''
+    :return: new node identifiers in getNodeIdentifiers() order, new element
+    identifiers in getElementIdentifiers() order, bandwidth before, bandwidth after.
+    '''
+    nodeOrder, elementOrder = getRenumbering(meshData, ordering)
+    newNodeIdentifiers = numpy.empty(len(nodeOrder), dtype=numpy.int64)
+    newNodeIdentifiers[nodeOrder] = startNodeIdentifier + numpy.arange(len(nodeOrder))
+    newElementIdentifiers = numpy.empty(len(elementOrder), dtype=numpy.int64)
+    newElementIdentifiers[elementOrder] = startElementIdentifier + numpy.arange(len(elementOrder))
+    adjacency = _getNodeAdjacency(MeshTopology(meshData))
+    bandwidthBefore = getBandwidth(adjacency, _getRanks(meshData.getNodeIdentifiers()))
+    bandwidthAfter = getBandwidth(adjacency, _getRanks(newNodeIdentifiers))
+    return newNodeIdentifiers, newElementIdentifiers, bandwidthBefore, bandwidthAfter
+
+def renumberMeshData(meshData, ordering=ORDERING_REVERSE_CUTHILL_MCKEE, startNodeIdentifier=1, startElementIdentifier=1):
+    '''
+    Renumber nodes and elements of meshData in place, e.g. after generating and
+    before creating in a region or writing files. Nodes and elements within
+    each block are sorted into the new order.
+    :param meshData: MeshData.
+    :param ordering: One of ORDERING_*, see getRenumbering.
+    :param startNodeIdentifier: First new node identifier.
+    :param startElementIdentifier: First new element identifier.
+    :return: node bandwidth before, node bandwidth after: the maximum
+    difference in rank of node identifiers sharing an element.
+    '''
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    if len(nodeIdentifiers) == 0:
+        return 0, 0
+    newNodeIdentifiers, newElementIdentifiers, bandwidthBefore, bandwidthAfter = \
+        _getNewIdentifiers(meshData, ordering, startNodeIdentifier, startElementIdentifier)
+    start = 0
+    for block in meshData.getElementBlocks():
+        count = len(block.elementIdentifiers)
+        identifiers = newElementIdentifiers[start:start + count]
+        order = numpy.argsort(identifiers)
+        block.elementIdentifiers = identifiers[order]
+        block.nodeIdentifiers = newNodeIdentifiers[getNodeIndexes(nodeIdentifiers, block.nodeIdentifiers[order])]
+        if block.scaleFactors is not None:
+            block.scaleFactors = block.scaleFactors[order]
+        start += count
+    start = 0
+    for block in meshData.getNodeBlocks():
+        count = len(block.nodeIdentifiers)
+        identifiers = newNodeIdentifiers[start:start + count]
+        order = numpy.argsort(identifiers)
+        block.nodeIdentifiers = identifiers[order]
+        block.parameters = block.parameters[order]
+        start += count
+    return bandwidthBefore, bandwidthAfter
+
+def renumberRegion(region, ordering=ORDERING_REVERSE_CUTHILL_MCKEE, fieldName='coordinates', startNodeIdentifier=1, startElementIdentifier=1):
+    '''
+    Renumber nodes and elements of the highest dimension mesh in a Zinc region
+    in place, e.g. after MeshRefinement. Faces and lines are not renumbered.
+    :param region: Zinc region.
+    :param ordering: One of ORDERING_*, see getRenumbering.
+    :param fieldName: Name of coordinate field defining the mesh.
+    :return: node bandwidth before, node bandwidth after, see renumberMeshData.
+    '''
+    from opencmiss.zinc.field import Field
+    from opencmiss.zinc.status import OK as ZINC_OK
+    meshData = MeshData.createFromRegion(region, fieldName)
+    nodeIdentifiers = meshData.getNodeIdentifiers()
+    if len(nodeIdentifiers) == 0:
+        return 0, 0
+    elementIdentifiers = meshData.getElementIdentifiers()
+    newNodeIdentifiers, newElementIdentifiers, bandwidthBefore, bandwidthAfter = \
+        _getNewIdentifiers(meshData, ordering, startNodeIdentifier, startElementIdentifier)
+    fm = region.getFieldmodule()
+    nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+    mesh = fm.findMeshByDimension(meshData.getDimension())
+    fm.beginChange()
+    for findObject, oldIdentifiers, newIdentifiers in (
+            (nodes.findNodeByIdentifier, nodeIdentifiers, newNodeIdentifiers),
+            (mesh.findElementByIdentifier, elementIdentifiers, newElementIdentifiers)):
+        # go via identifiers above all old and new ones so none clash
+        offset = int(max(numpy.max(oldIdentifiers), numpy.max(newIdentifiers)))
+        for fromIdentifiers, toIdentifiers in ((oldIdentifiers, newIdentifiers + offset), (newIdentifiers + offset, newIdentifiers)):
+            for fromIdentifier, toIdentifier in zip(fromIdentifiers.tolist(), toIdentifiers.tolist()):
+                result = findObject(fromIdentifier).setIdentifier(toIdentifier)
+                assert result == ZINC_OK, 'renumberRegion.  Failed to set identifier'
+    fm.endChange()
+    return bandwidthBefore, bandwidthAfter
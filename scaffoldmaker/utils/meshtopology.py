@@ -0,0 +1,302 @@
+'''
+Element topology from MeshData: corner nodes of elements from the value terms
+of element field templates, so collapsed elements whose local nodes are
+remapped are handled, element faces, and a topology index of node to element
+incidence and face neighbours.
+Faces are indexed 2*xiIndex + side, i.e. 0 for xi1 = 0, 1 for xi1 = 1, 2 for
+xi2 = 0 etc.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+from scaffoldmaker.utils.elementparameters import getNodeIndexes
+
+def getEftBasisNodeLocalNodes(eft):
+    '''
+    :param eft: EftDescriptor.
+    :return: int array (basisNodesCount) of local node index from 0 mapping the
+    value at each basis node, or -1 if not mapped by a term.
+    '''
+    functionsPerBasisNode = eft.getNumberOfFunctionsPerBasisNode()
+    localNodes = []
+    for n in range(eft.getNumberOfBasisNodes()):
+        f = n*functionsPerBasisNode + 1
+        localNodes.append((eft.getTermLocalNodeIndex(f, 1) - 1) if (eft.getFunctionNumberOfTerms(f) > 0) else -1)
+    return numpy.array(localNodes, dtype=numpy.int64)
+
+def getEftBasisNodeLocalNodeTerms(eft):
+    '''
+    :param eft: EftDescriptor.
+    :return: int array (basisNodesCount, termsCount) of local node indexes from
+    0 of all terms mapping the value at each basis node, padded with -1. Value
+    terms of hanging nodes reference several local nodes.
+    '''
+    functionsPerBasisNode = eft.getNumberOfFunctionsPerBasisNode()
+    basisNodesTerms = []
+    for n in range(eft.getNumberOfBasisNodes()):
+        f = n*functionsPerBasisNode + 1
+        basisNodesTerms.append([ (eft.getTermLocalNodeIndex(f, t) - 1) for t in range(1, eft.getFunctionNumberOfTerms(f) + 1) ])
+    localNodeTerms = numpy.full((len(basisNodesTerms), max(1, max(len(terms) for terms in basisNodesTerms))), -1, dtype=numpy.int64)
+    for n, terms in enumerate(basisNodesTerms):
+        localNodeTerms[n, :len(terms)] = terms
+    return localNodeTerms
+
+def _getBlockElementIndexes(block, elementIdentifiers):
+    '''
+    :return: int array of indexes of elementIdentifiers in block, int array of
+    their indexes in block.
+    '''
+    elements = numpy.where(numpy.isin(elementIdentifiers, block.elementIdentifiers))[0]
+    order = numpy.argsort(block.elementIdentifiers)
+    return elements, order[numpy.searchsorted(block.elementIdentifiers, elementIdentifiers[elements], sorter=order)]
+
+def getElementCornerNodes(meshData, elementIdentifiers=None):
+    '''
+    Get node identifiers at the basis nodes or corners of elements. Collapsed
+    elements repeat node identifiers.
+    :param meshData: MeshData.
+    :param elementIdentifiers: Optional array-like of identifiers of elements.
+    Default all elements in block order.
+    :return: elementIdentifiers int array (elementsCount), cornerNodeIdentifiers
+    int array (elementsCount, 2**dimension), -1 where not mapped.
+    '''
+    dimension = meshData.getDimension()
+    blocks = meshData.getElementBlocks()
+    if elementIdentifiers is None:
+        elementIdentifiers = meshData.getElementIdentifiers()
+    elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+    cornerNodeIdentifiers = numpy.full((len(elementIdentifiers), 1 << dimension), -1, dtype=numpy.int64)
+    found = numpy.zeros(len(elementIdentifiers), dtype=bool)
+    localNodesCache = {}
+    for block in blocks:
+        elements, blockIndexes = _getBlockElementIndexes(block, elementIdentifiers)
+        if len(elements) == 0:
+            continue
+        found[elements] = True
+        key = block.eft.getKey()
+        localNodes = localNodesCache.get(key)
+        if localNodes is None:
+            localNodes = localNodesCache[key] = getEftBasisNodeLocalNodes(block.eft)
+        mapped = localNodes >= 0
+        cornerNodeIdentifiers[elements[:, numpy.newaxis], numpy.where(mapped)[0]] = block.nodeIdentifiers[blockIndexes][:, localNodes[mapped]]
+    assert found.all(), 'getElementCornerNodes.  Element not found in mesh'
+    return elementIdentifiers, cornerNodeIdentifiers
+
+def getElementCornerKeys(meshData, elementIdentifiers):
+    '''
+    Get keys identifying element corners by the sorted node identifiers of all
+    terms mapping the value there, so hanging node corners interpolated from
+    several nodes match across elements.
+    :param meshData: MeshData.
+    :param elementIdentifiers: int array (elementsCount) of element identifiers.
+    :return: int array (elementsCount, 2**dimension) of corner keys from 0,
+    equal for corners with the same nodes, -1 where not mapped; int array
+    (keysCount, termsCount) of sorted distinct node identifiers of each key,
+    padded with -1 first.
+    '''
+    blockCornerNodes = []
+    termsCount = 1
+    for block in meshData.getElementBlocks():
+        elements, blockIndexes = _getBlockElementIndexes(block, elementIdentifiers)
+        if len(elements) == 0:
+            continue
+        localNodeTerms = getEftBasisNodeLocalNodeTerms(block.eft)
+        cornerNodes = numpy.where(localNodeTerms >= 0, block.nodeIdentifiers[blockIndexes][:, numpy.maximum(localNodeTerms, 0)], -1)
+        # sorted distinct nodes of each corner, -1 first
+        cornerNodes = numpy.sort(cornerNodes, axis=2)
+        cornerNodes[:, :, 1:][cornerNodes[:, :, 1:] == cornerNodes[:, :, :-1]] = -1
+        blockCornerNodes.append((elements, numpy.sort(cornerNodes, axis=2)))
+        termsCount = max(termsCount, cornerNodes.shape[2])
+    cornerNodes = numpy.full((len(elementIdentifiers), 1 << meshData.getDimension(), termsCount), -1, dtype=numpy.int64)
+    for elements, blockNodes in blockCornerNodes:
+        cornerNodes[elements, :, termsCount - blockNodes.shape[2]:] = blockNodes
+    cornerNodes = cornerNodes.reshape(-1, termsCount)
+    firstRows, cornerKeys = getUniqueRows(cornerNodes)[:2]
+    cornerKeys[cornerNodes[:, -1] < 0] = -1
+    return cornerKeys.reshape(len(elementIdentifiers), -1), cornerNodes[firstRows]
+
+def getFaceBasisNodes(dimension, faceIndex):
+    '''
+    :return: List of basis nodes from 0 on face of element, in basis node order.
+    '''
+    xiIndex, side = faceIndex // 2, faceIndex % 2
+    return [ n for n in range(1 << dimension) if ((n >> xiIndex) & 1) == side ]
+
+def getElementFaceKeys(cornerNodeIdentifiers):
+    '''
+    :param cornerNodeIdentifiers: int array (elementsCount, 2**dimension) of
+    corner node identifiers or keys from getElementCornerKeys(), -1 where not mapped.
+    :return: int array (elementsCount, 2*dimension, 2**(dimension - 1)) of
+    sorted face corner nodes or keys identifying faces shared by elements,
+    bool array (elementsCount, 2*dimension) True where face is degenerate,
+    i.e. collapsed to fewer than dimension distinct nodes, or not mapped.
+    '''
+    dimension = cornerNodeIdentifiers.shape[1].bit_length() - 1
+    faceBasisNodes = numpy.array([ getFaceBasisNodes(dimension, f) for f in range(2*dimension) ])
+    keys = numpy.sort(cornerNodeIdentifiers[:, faceBasisNodes], axis=2)
+    distinctCounts = 1 + numpy.sum(keys[:, :, 1:] != keys[:, :, :-1], axis=2)
+    degenerate = (distinctCounts < dimension) | (keys[:, :, 0] < 0)
+    return keys, degenerate
+
+def getUniqueRows(rows):
+    '''
+    Group equal rows of an int array, by lexicographic sort which is faster
+    than numpy.unique with axis for many short rows.
+    :param rows: int array (rowsCount, columnsCount).
+    :return: firstRows int array (uniqueCount) of index of a row with each
+    unique value, in ascending order of value, inverse int array (rowsCount)
+    of index of each row in unique values, counts int array (uniqueCount).
+    '''
+    if len(rows) == 0:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+    order = numpy.lexsort(rows.T[::-1])
+    sortedRows = rows[order]
+    starts = numpy.ones(len(rows), dtype=bool)
+    starts[1:] = numpy.any(sortedRows[1:] != sortedRows[:-1], axis=1)
+    groups = numpy.cumsum(starts) - 1
+    inverse = numpy.empty(len(rows), dtype=numpy.int64)
+    inverse[order] = groups
+    return order[starts], inverse, numpy.bincount(groups)
+
+def getExteriorFaces(meshData, elementIdentifiers=None):
+    '''
+    Get non-degenerate faces of elements not shared with another element of
+    the given elements.
+    :param meshData: MeshData.
+    :param elementIdentifiers: Optional array-like of identifiers of elements,
+    e.g. a group, to get faces on the boundary of. Default all elements.
+    :return: elementIdentifiers int array (facesCount), faceIndexes int array (facesCount).
+    '''
+    return MeshTopology(meshData, elementIdentifiers).getExteriorFaces()
+
+
+class MeshTopology(object):
+    '''
+    Topology index of MeshData elements built in one vectorised pass: node to
+    element incidence in compressed sparse row form, the neighbour across each
+    element face, exterior faces and collapsed elements. Faces are matched by
+    their sorted corners, each keyed by the nodes of all element field template
+    value terms there, so collapsed apex elements with remapped local nodes and
+    hanging nodes are handled. For a Zinc mesh, build from
+    MeshData.createFromRegion().
+    '''
+
+    def __init__(self, meshData, elementIdentifiers=None):
+        '''
+        :param meshData: MeshData.
+        :param elementIdentifiers: Optional array-like of identifiers of elements
+        to index, e.g. a group. Default all elements in block order.
+        '''
+        self._elementIdentifiers, self._cornerNodeIdentifiers = getElementCornerNodes(meshData, elementIdentifiers)
+        elementsCount = len(self._elementIdentifiers)
+        # node to element incidence from all local nodes, including those not at corners
+        self._nodeIdentifiers = meshData.getNodeIdentifiers()
+        pairElements = []
+        pairNodes = []
+        for block in meshData.getElementBlocks():
+            order = numpy.argsort(block.elementIdentifiers)
+            positions = numpy.minimum(numpy.searchsorted(block.elementIdentifiers, self._elementIdentifiers, sorter=order), len(order) - 1)
+            elements = numpy.where(block.elementIdentifiers[order[positions]] == self._elementIdentifiers)[0]
+            localNodesCount = block.nodeIdentifiers.shape[1]
+            pairElements.append(numpy.repeat(elements, localNodesCount))
+            pairNodes.append(block.nodeIdentifiers[order[positions[elements]]].ravel())
+        pairElements = numpy.concatenate(pairElements) if pairElements else numpy.zeros(0, dtype=numpy.int64)
+        pairNodes = getNodeIndexes(self._nodeIdentifiers, numpy.concatenate(pairNodes)) if pairElements.size else numpy.zeros(0, dtype=numpy.int64)
+        # collapsed elements list the same node in several local nodes
+        pairs = numpy.unique(pairNodes*max(elementsCount, 1) + pairElements)
+        self._nodeElementIndexes = pairs % max(elementsCount, 1)
+        self._nodeElementOffsets = numpy.zeros(len(self._nodeIdentifiers) + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(pairs // max(elementsCount, 1), minlength=len(self._nodeIdentifiers)), out=self._nodeElementOffsets[1:])
+        # face neighbours: faces with the same corner keys shared by exactly 2 elements
+        cornerKeys, keyNodes = getElementCornerKeys(meshData, self._elementIdentifiers)
+        keys, self._degenerateFaces = getElementFaceKeys(cornerKeys)
+        facesPerElement = keys.shape[1]
+        self._neighbourElements = numpy.full((elementsCount, facesPerElement), -1, dtype=numpy.int64)
+        self._neighbourFaces = numpy.full((elementsCount, facesPerElement), -1, dtype=numpy.int64)
+        self._exteriorFaces = numpy.zeros((elementsCount, facesPerElement), dtype=bool)
+        if elementsCount == 0:
+            return
+        inverse, counts = getUniqueRows(keys.reshape(-1, keys.shape[2]))[1:]
+        live = ~self._degenerateFaces.reshape(-1)
+        unmatched = numpy.where((counts[inverse] == 1) & live)[0]
+        self._exteriorFaces.reshape(-1)[unmatched] = True
+        # hanging faces: faces with hanging corners whose nodes together are
+        # the corner nodes of an unmatched face they subdivide are interior
+        unmatchedKeys = keys.reshape(-1, keys.shape[2])[unmatched]
+        hanging = numpy.any(keyNodes[unmatchedKeys, -2] >= 0, axis=1) if (keyNodes.shape[1] > 1) else numpy.zeros(len(unmatched), dtype=bool)
+        if numpy.any(hanging):
+            faceNodes = numpy.sort(keyNodes[unmatchedKeys].reshape(len(unmatched), -1), axis=1)
+            faceNodes[:, 1:][faceNodes[:, 1:] == faceNodes[:, :-1]] = -1
+            groups = getUniqueRows(numpy.sort(faceNodes, axis=1))[1]
+            parentGroups = numpy.zeros(len(unmatched), dtype=bool)
+            parentGroups[groups[~hanging]] = True
+            childGroups = numpy.zeros(len(unmatched), dtype=bool)
+            childGroups[groups[hanging]] = True
+            self._exteriorFaces.reshape(-1)[unmatched[parentGroups[groups] & childGroups[groups]]] = False
+        shared = numpy.where((counts[inverse] == 2) & live)[0]
+        shared = shared[numpy.argsort(inverse[shared], kind='stable')]
+        first, second = shared[0::2], shared[1::2]
+        for faces, otherFaces in ((first, second), (second, first)):
+            self._neighbourElements.reshape(-1)[faces] = otherFaces // facesPerElement
+            self._neighbourFaces.reshape(-1)[faces] = otherFaces % facesPerElement
+
+    def getElementIdentifiers(self):
+        return self._elementIdentifiers
+
+    def getCornerNodeIdentifiers(self):
+        '''
+        :return: int array (elementsCount, 2**dimension) of node identifiers at
+        element corners, repeated in collapsed elements.
+        '''
+        return self._cornerNodeIdentifiers
+
+    def getNodeElementIncidence(self):
+        '''
+        Get elements using each node in compressed sparse row form: elements of
+        node n are elementIndexes[offsets[n]:offsets[n + 1]].
+        :return: nodeIdentifiers int array (nodesCount) in getNodeIdentifiers()
+        order, offsets int array (nodesCount + 1), elementIndexes int array
+        of indexes into getElementIdentifiers(), ascending for each node.
+        '''
+        return self._nodeIdentifiers, self._nodeElementOffsets, self._nodeElementIndexes
+
+    def getNodeElementIdentifiers(self, nodeIdentifier):
+        '''
+        :return: int array of identifiers of elements using node.
+        '''
+        n = getNodeIndexes(self._nodeIdentifiers, numpy.array([ nodeIdentifier ], dtype=numpy.int64))[0]
+        return self._elementIdentifiers[self._nodeElementIndexes[self._nodeElementOffsets[n]:self._nodeElementOffsets[n + 1]]]
+
+    def getFaceNeighbours(self):
+        '''
+        Get the element across each face of each element.
+        :return: neighbourElements int array (elementsCount, 2*dimension) of
+        indexes into getElementIdentifiers(), neighbourFaces int array
+        (elementsCount, 2*dimension) of the face index in the neighbour; both -1
+        on exterior, degenerate, non-manifold and hanging faces, the latter
+        subdivided between several neighbours.
+        '''
+        return self._neighbourElements, self._neighbourFaces
+
+    def getExteriorFaces(self):
+        '''
+        :return: elementIdentifiers int array (facesCount), faceIndexes int
+        array (facesCount) of non-degenerate faces not shared with another element.
+        '''
+        elements, faceIndexes = numpy.where(self._exteriorFaces)
+        return self._elementIdentifiers[elements], faceIndexes
+
+    def getDegenerateFaces(self):
+        '''
+        :return: bool array (elementsCount, 2*dimension) True for faces collapsed
+        to fewer than dimension distinct nodes, e.g. at an apex.
+        '''
+        return self._degenerateFaces
+
+    def getCollapsedElementIdentifiers(self):
+        '''
+        :return: int array of identifiers of elements with repeated corner nodes.
+        '''
+        sortedCorners = numpy.sort(self._cornerNodeIdentifiers, axis=1)
+        return self._elementIdentifiers[numpy.any(sortedCorners[:, 1:] == sortedCorners[:, :-1], axis=1)]
@@ -0,0 +1,198 @@
+'''
+Compact binary file format for caching and sharing generated scaffolds.
+A file holds a MeshData with the mesh type name and options it was generated
+with. Layout is an 8 byte magic string, the header length as a little-endian
+uint64, a UTF-8 JSON header, then raw arrays each starting on a 64 byte
+boundary. Uncompressed arrays are read with numpy.memmap, so parts such as the
+node coordinates can be read without reading the rest of the file.
+Created on Oct 18, 2026
+'''
+
+import io
+import json
+import struct
+import zlib
+from scaffoldmaker.utils.meshdata import *
+
+_magic = b'SCAFFBIN'
+_formatVersion = 1
+_alignment = 64
+
+def _alignUp(size):
+    return ((size + _alignment - 1)//_alignment)*_alignment
+
+class _ArrayWriter(object):
+    '''
+    Accumulates arrays to write after the header, recording their layout.
+    '''
+
+    def __init__(self, compress):
+        self._compress = compress
+        self._arrays = []
+        self._size = 0
+
+    def add(self, array, dtype):
+        '''
+        :return: dict describing array location in data section.
+        '''
+        array = numpy.ascontiguousarray(array, dtype=dtype)
+        data = array.tobytes()
+        record = { 'dtype' : array.dtype.str, 'shape' : list(array.shape), 'offset' : self._size }
+        if self._compress:
+            data = zlib.compress(data)
+            record['compression'] = 'zlib'
+        record['size'] = len(data)
+        self._arrays.append(data)
+        self._size = _alignUp(self._size + len(data))
+        return record
+
+    def write(self, stream):
+        position = 0
+        for data in self._arrays:
+            stream.write(data)
+            position += len(data)
+            padding = _alignUp(position) - position
+            stream.write(b'\0'*padding)
+            position += padding
+
+
+def writeScaffoldFile(fileName, meshData, meshTypeName=None, options=None, useFloat32=False, compress=False):
+    '''
+    Write meshData to binary scaffold file.
+    For a mesh generated in a Zinc region, get meshData with MeshData.createFromRegion().
+    :param fileName: Name of file to write.
+    :param meshData: MeshData to write.
+    :param meshTypeName: Optional name of mesh type which generated the mesh.
+    :param options: Optional dict of mesh type options used to generate the mesh.
+    :param useFloat32: Set to True to store node parameters and scale factors in single precision.
+    :param compress: Set to True to zlib compress arrays, which then can not be memory mapped.
+    '''
+    realType = numpy.float32 if useFloat32 else numpy.float64
+    arrayWriter = _ArrayWriter(compress)
+    nodeBlocks = []
+    for block in meshData.getNodeBlocks():
+        nodeBlocks.append({
+            'nodeIdentifiers' : arrayWriter.add(block.nodeIdentifiers, numpy.int64),
+            'valueLabelVersions' : [ list(valueLabelVersion) for valueLabelVersion in block.valueLabelVersions ],
+            # separate array per value label and version
+            'parameters' : [ arrayWriter.add(block.parameters[:, v, :], realType) for v in range(len(block.valueLabelVersions)) ] })
+    efts = []
+    elementBlocks = []
+    for block in meshData.getElementBlocks():
+        eftDict = block.eft.toDict()
+        if eftDict not in efts:
+            efts.append(eftDict)
+        elementBlock = {
+            'eft' : efts.index(eftDict),
+            'shapeType' : block.shapeType,
+            'elementIdentifiers' : arrayWriter.add(block.elementIdentifiers, numpy.int64),
+            'nodeIdentifiers' : arrayWriter.add(block.nodeIdentifiers, numpy.int64) }
+        if block.scaleFactors is not None:
+            elementBlock['scaleFactors'] = arrayWriter.add(block.scaleFactors, realType)
+        elementBlocks.append(elementBlock)
+    header = {
+        'formatVersion' : _formatVersion,
+        'meshTypeName' : meshTypeName,
+        'options' : options,
+        'dimension' : meshData.getDimension(),
+        'componentsCount' : meshData.getComponentsCount(),
+        'fieldName' : meshData.getFieldName(),
+        'efts' : efts,
+        'nodeBlocks' : nodeBlocks,
+        'elementBlocks' : elementBlocks }
+    headerData = json.dumps(header).encode('utf-8')
+    with io.open(fileName, 'wb') as stream:
+        stream.write(_magic)
+        stream.write(struct.pack('<Q', len(headerData)))
+        stream.write(headerData)
+        position = len(_magic) + 8 + len(headerData)
+        stream.write(b'\0'*(_alignUp(position) - position))
+        arrayWriter.write(stream)
+
+
+class ScaffoldFileReader(object):
+    '''
+    Reads binary scaffold file written by writeScaffoldFile(). Only the header
+    is read on construction; arrays are read or memory mapped when requested.
+    '''
+
+    def __init__(self, fileName):
+        self._fileName = fileName
+        with io.open(fileName, 'rb') as stream:
+            magic = stream.read(len(_magic))
+            assert magic == _magic, 'ScaffoldFileReader.  Not a scaffold file: ' + fileName
+            headerSize, = struct.unpack('<Q', stream.read(8))
+            self._header = json.loads(stream.read(headerSize).decode('utf-8'))
+        assert self._header['formatVersion'] <= _formatVersion, 'ScaffoldFileReader.  Unsupported format version'
+        self._dataOffset = _alignUp(len(_magic) + 8 + headerSize)
+
+    def getMeshTypeName(self):
+        return self._header['meshTypeName']
+
+    def getOptions(self):
+        return self._header['options']
+
+    def getDimension(self):
+        return self._header['dimension']
+
+    def getComponentsCount(self):
+        return self._header['componentsCount']
+
+    def getFieldName(self):
+        return self._header['fieldName']
+
+    def _getArray(self, record):
+        '''
+        :return: Read-only numpy.memmap of uncompressed array, or new array if compressed.
+        '''
+        dtype = numpy.dtype(record['dtype'])
+        shape = tuple(record['shape'])
+        offset = self._dataOffset + record['offset']
+        if record.get('compression') == 'zlib':
+            with io.open(self._fileName, 'rb') as stream:
+                stream.seek(offset)
+                data = zlib.decompress(stream.read(record['size']))
+            return numpy.frombuffer(data, dtype=dtype).reshape(shape)
+        if record['size'] == 0:
+            return numpy.zeros(shape, dtype=dtype)
+        return numpy.memmap(self._fileName, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def getNodeIdentifiers(self):
+        '''
+        :return: int array of all node identifiers in block order.
+        '''
+        identifiers = [ self._getArray(block['nodeIdentifiers']) for block in self._header['nodeBlocks'] ]
+        return numpy.concatenate(identifiers) if identifiers else numpy.zeros(0, dtype=numpy.int64)
+
+    def getNodeParameters(self, valueLabel=VALUE_LABEL_VALUE, version=1):
+        '''
+        Get parameters for one value label and version, reading only those arrays.
+        With a single node block the memory mapped array is returned directly.
+        :return: array (nodesCount, componentsCount) in order of getNodeIdentifiers(),
+        zero where not defined.
+        '''
+        arrays = []
+        for block in self._header['nodeBlocks']:
+            valueLabelVersions = [ tuple(valueLabelVersion) for valueLabelVersion in block['valueLabelVersions'] ]
+            if (valueLabel, version) in valueLabelVersions:
+                arrays.append(self._getArray(block['parameters'][valueLabelVersions.index((valueLabel, version))]))
+            else:
+                arrays.append(numpy.zeros((block['nodeIdentifiers']['shape'][0], self.getComponentsCount())))
+        if len(arrays) == 1:
+            return arrays[0]
+        return numpy.concatenate(arrays) if arrays else numpy.zeros((0, self.getComponentsCount()))
+
+    def getMeshData(self):
+        '''
+        Read the whole mesh into a new MeshData, in double precision.
+        '''
+        meshData = MeshData(self.getDimension(), self.getComponentsCount(), self.getFieldName())
+        for block in self._header['nodeBlocks']:
+            parameters = numpy.stack([ self._getArray(record) for record in block['parameters'] ], axis=1)
+            meshData.addNodes(self._getArray(block['nodeIdentifiers']), [ tuple(valueLabelVersion) for valueLabelVersion in block['valueLabelVersions'] ], parameters)
+        efts = [ EftDescriptor.createFromDict(eftDict) for eftDict in self._header['efts'] ]
+        for block in self._header['elementBlocks']:
+            scaleFactors = self._getArray(block['scaleFactors']) if ('scaleFactors' in block) else None
+            meshData.addElements(efts[block['eft']], self._getArray(block['elementIdentifiers']),
+                self._getArray(block['nodeIdentifiers']), scaleFactors, block['shapeType'])
+        return meshData
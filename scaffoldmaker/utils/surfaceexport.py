@@ -0,0 +1,298 @@
+'''
+Triangulation of exterior faces of 3-D MeshData, or of 2-D surface meshes,
+sampled on a grid in one vectorised pass per face index, with shared edge
+vertices welded by a k-d tree and T-junctions at faces subdivided by hanging
+nodes stitched, and bulk writers for STL, OBJ and VTK.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import io
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.spatial
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshtopology import getExteriorFaces, getUniqueRows
+
+def _getFaceXi(dimension, faceIndex, faceXi):
+    '''
+    :return: Element xi of face xi, which is element xi for 2-D meshes.
+    '''
+    if dimension == 2:
+        return faceXi
+    return numpy.insert(faceXi, faceIndex // 2, faceIndex % 2, axis=1)
+
+def _sampleFaces(meshData, elementIdentifiers, faceIndexes, faceXi):
+    '''
+    :return: Array (facesCount, pointsCount, componentsCount) of field at face xi.
+    '''
+    dimension = meshData.getDimension()
+    x = numpy.zeros((len(elementIdentifiers), len(faceXi), meshData.getComponentsCount()))
+    for faceIndex in numpy.unique(faceIndexes):
+        faces = numpy.where(faceIndexes == faceIndex)[0]
+        x[faces] = evaluateMeshDataElements(meshData, _getFaceXi(dimension, faceIndex, faceXi), elementIdentifiers[faces])[1]
+    return x
+
+def _getOutwardFaces(meshData, elementIdentifiers, faceIndexes):
+    '''
+    :return: bool array (facesCount), True where increasing face xi give an
+    outward normal by the right hand rule, evaluated at face centres so
+    left-handed elements are handled.
+    '''
+    outward = numpy.ones(len(elementIdentifiers), dtype=bool)
+    if meshData.getDimension() == 2:
+        return outward
+    for faceIndex in numpy.unique(faceIndexes):
+        faces = numpy.where(faceIndexes == faceIndex)[0]
+        xiIndex = faceIndex // 2
+        faceAxes = [ i for i in range(3) if i != xiIndex ]
+        jacobians = evaluateMeshDataJacobians(meshData, _getFaceXi(3, faceIndex, numpy.array([ [ 0.5, 0.5 ] ])), elementIdentifiers[faces])[1][:, 0]
+        normals = numpy.cross(jacobians[:, :, faceAxes[0]], jacobians[:, :, faceAxes[1]])
+        outwardSign = 1.0 if (faceIndex % 2) else -1.0
+        outward[faces] = outwardSign*numpy.sum(normals*jacobians[:, :, xiIndex], axis=1) >= 0.0
+    return outward
+
+def _getChordDeviation(meshData, elementIdentifiers, faceIndexes, samplesCount):
+    '''
+    :return: Maximum distance of field at centres of grid cells from the mean
+    of their corners, estimating the deviation of triangles from the surface.
+    '''
+    corners = _sampleFaces(meshData, elementIdentifiers, faceIndexes, getXiGrid([ samplesCount ]*2)).reshape(
+        len(elementIdentifiers), samplesCount, samplesCount, -1)
+    cellXi = (0.5 + numpy.arange(samplesCount - 1))/(samplesCount - 1)
+    centreXi = numpy.stack([ grid.ravel() for grid in numpy.meshgrid(cellXi, cellXi, indexing='ij')[::-1] ], axis=1)
+    centres = _sampleFaces(meshData, elementIdentifiers, faceIndexes, centreXi).reshape(
+        len(elementIdentifiers), samplesCount - 1, samplesCount - 1, -1)
+    means = 0.25*(corners[:, :-1, :-1] + corners[:, :-1, 1:] + corners[:, 1:, :-1] + corners[:, 1:, 1:])
+    return numpy.max(numpy.linalg.norm(centres - means, axis=3)) if len(elementIdentifiers) else 0.0
+
+def weldVertices(vertices, tolerance):
+    '''
+    Merge vertices closer than tolerance, by connected components of pairs
+    within tolerance from a k-d tree so nearby vertices either side of any
+    grid cell boundary are merged. Vertices shared by faces are evaluated
+    from the same parameters, so agree to rounding error, far smaller than a
+    suitable tolerance.
+    :param vertices: Array (verticesCount, 3).
+    :param tolerance: Welding distance.
+    :return: welded vertices array, int array (verticesCount) of index of each
+    vertex in welded vertices, in order of first vertex merged.
+    '''
+    verticesCount = len(vertices)
+    pairs = scipy.spatial.cKDTree(vertices).query_pairs(tolerance, output_type='ndarray')
+    graph = scipy.sparse.coo_matrix((numpy.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(verticesCount, verticesCount))
+    labels = scipy.sparse.csgraph.connected_components(graph, directed=False)[1]
+    # number welded vertices by their first vertex
+    firstVertices = numpy.full(labels.max() + 1 if verticesCount else 0, verticesCount, dtype=numpy.int64)
+    numpy.minimum.at(firstVertices, labels, numpy.arange(verticesCount))
+    order = numpy.argsort(firstVertices)
+    ranks = numpy.empty(len(order), dtype=numpy.int64)
+    ranks[order] = numpy.arange(len(order))
+    return vertices[firstVertices[order]], ranks[labels]
+
+def stitchTJunctions(vertices, triangles, maximumPathRatio=1.5, maximumPathEdgesCount=8):
+    '''
+    Close open edges at T-junctions, where a face meets several faces
+    subdividing it by hanging nodes: each open triangle edge is replaced by a
+    fan of triangles to the vertices of the shortest chain of open edges
+    joining its ends in the opposite direction, longest edges first.
+    :param vertices: Array (verticesCount, 3).
+    :param triangles: int array (trianglesCount, 3) of welded vertex indexes.
+    :param maximumPathRatio: Maximum length of chain relative to the edge.
+    :param maximumPathEdgesCount: Maximum number of edges in chain.
+    :return: triangles int array with T-junctions stitched.
+    '''
+    edges = numpy.stack([ triangles, numpy.roll(triangles, -1, axis=1) ], axis=2).reshape(-1, 2)
+    counts = getUniqueRows(numpy.sort(edges, axis=1))[1:]
+    openEdges = numpy.where(counts[1][counts[0]] == 1)[0]
+    if len(openEdges) == 0:
+        return triangles
+    # open directed edges to triangle, and open edges from each vertex
+    edgeTriangles = {}
+    nextVertices = {}
+    for e in openEdges.tolist():
+        start, end = edges[e].tolist()
+        edgeTriangles[(start, end)] = e // 3
+        nextVertices.setdefault(start, []).append(end)
+    lengths = numpy.linalg.norm(vertices[edges[openEdges, 1]] - vertices[edges[openEdges, 0]], axis=1)
+    triangles = triangles.tolist()
+    for e in openEdges[numpy.argsort(-lengths, kind='stable')].tolist():
+        u, v = edges[e].tolist()
+        t = edgeTriangles.get((u, v))
+        if t is None:
+            continue
+        # shortest chain of open edges from v back to u within maximum length
+        maximumLength = maximumPathRatio*numpy.linalg.norm(vertices[v] - vertices[u])
+        paths = { v : (0.0, [ v ]) }
+        front = [ v ]
+        for i in range(maximumPathEdgesCount):
+            nextFront = []
+            for a in front:
+                aLength, aPath = paths[a]
+                for b in nextVertices.get(a, []):
+                    if (a, b) not in edgeTriangles:
+                        continue
+                    bLength = aLength + numpy.linalg.norm(vertices[b] - vertices[a])
+                    if (bLength <= maximumLength) and ((b not in paths) or (bLength < paths[b][0])):
+                        paths[b] = (bLength, aPath + [ b ])
+                        nextFront.append(b)
+            front = nextFront
+        if (u not in paths) or (len(paths[u][1]) < 3):
+            continue
+        path = paths[u][1]
+        # replace triangle u, v, w by fan over chain reversed from u to v
+        triangle = triangles[t]
+        w = triangle[(triangle.index(u) + 2) % 3]
+        chain = path[::-1]
+        triangles[t] = [ chain[0], chain[1], w ]
+        for i in range(1, len(chain) - 1):
+            triangles.append([ chain[i], chain[i + 1], w ])
+        del edgeTriangles[(u, v)]
+        for a, b in zip(path[:-1], path[1:]):
+            del edgeTriangles[(a, b)]
+        # other open edges of the replaced triangle move to the fan
+        if (v, w) in edgeTriangles:
+            edgeTriangles[(v, w)] = len(triangles) - 1
+    return numpy.array(triangles, dtype=numpy.int64).reshape(-1, 3)
+
+def tessellateSurface(meshData, elementIdentifiers=None, faceIndexes=None, samplesCount=4, chordTolerance=None,
+        maximumSamplesCount=32, weldTolerance=None):
+    '''
+    Triangulate element faces sampled on a grid of samplesCount x samplesCount
+    points, each grid cell split into 2 triangles with outward normals.
+    Triangles collapsed at apex nodes are removed, and T-junctions where faces
+    are subdivided by hanging nodes are stitched, giving a closed surface for
+    the exterior faces of a 3-D mesh.
+    :param meshData: MeshData of 3-D elements, or 2-D elements in 3-D.
+    :param elementIdentifiers: Optional array-like of element identifiers of
+    faces, e.g. a group. Default all exterior faces of 3-D meshes or all 2-D
+    elements.
+    :param faceIndexes: Array-like of face index 2*xiIndex + side of each
+    face of 3-D elements, see meshtopology. Not used for 2-D meshes.
+    :param samplesCount: Number of samples across each face, at least 2.
+    :param chordTolerance: Optional maximum deviation of triangles from the
+    surface, adapting samplesCount up to maximumSamplesCount for all faces
+    together so neighbouring faces stay conforming.
+    :param weldTolerance: Vertex welding distance. Default 1.0E-8 times the
+    bounding box diagonal.
+    :return: vertices array (verticesCount, 3), triangles int array (trianglesCount, 3).
+    '''
+    dimension = meshData.getDimension()
+    assert dimension in (2, 3) and (meshData.getComponentsCount() == 3), \
+        'tessellateSurface.  Only implemented for 2-D or 3-D meshes with 3 components'
+    if dimension == 3:
+        if elementIdentifiers is None:
+            elementIdentifiers, faceIndexes = getExteriorFaces(meshData)
+        faceIndexes = numpy.asarray(faceIndexes, dtype=numpy.int64).reshape(-1)
+    else:
+        if elementIdentifiers is None:
+            elementIdentifiers = meshData.getElementIdentifiers()
+    elementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+    if dimension == 2:
+        faceIndexes = numpy.zeros(len(elementIdentifiers), dtype=numpy.int64)
+    assert len(faceIndexes) == len(elementIdentifiers), 'tessellateSurface.  Mismatched face elements and indexes'
+    assert samplesCount >= 2, 'tessellateSurface.  Samples count must be at least 2'
+    if chordTolerance is not None:
+        while (samplesCount < maximumSamplesCount) and \
+                (_getChordDeviation(meshData, elementIdentifiers, faceIndexes, samplesCount) > chordTolerance):
+            samplesCount = min(2*samplesCount - 1, maximumSamplesCount)
+    vertices = _sampleFaces(meshData, elementIdentifiers, faceIndexes, getXiGrid([ samplesCount ]*2))
+    # grid cell corners, first face xi varying fastest
+    n = samplesCount
+    cells = (numpy.arange(n - 1)[numpy.newaxis, :] + n*numpy.arange(n - 1)[:, numpy.newaxis]).ravel()
+    cellTriangles = numpy.stack([ cells, cells + 1, cells + n + 1, cells, cells + n + 1, cells + n ], axis=1).reshape(-1, 3)
+    outward = _getOutwardFaces(meshData, elementIdentifiers, faceIndexes)
+    triangles = cellTriangles[numpy.newaxis, :, :] + (n*n*numpy.arange(len(elementIdentifiers)))[:, numpy.newaxis, numpy.newaxis]
+    triangles[~outward] = triangles[~outward][:, :, ::-1]
+    vertices = vertices.reshape(-1, 3)
+    triangles = triangles.reshape(-1, 3)
+    if len(vertices) == 0:
+        return vertices, triangles
+    if weldTolerance is None:
+        weldTolerance = 1.0E-8*max(numpy.linalg.norm(numpy.max(vertices, axis=0) - numpy.min(vertices, axis=0)), 1.0E-300)
+    vertices, vertexIndexes = weldVertices(vertices, weldTolerance)
+    triangles = vertexIndexes[triangles]
+    collapsed = (triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) | (triangles[:, 2] == triangles[:, 0])
+    triangles = triangles[~collapsed]
+    # remove pairs of coincident triangles of opposite orientation, where
+    # faces meet in a sheet of zero thickness e.g. at a cavity cusp
+    inverse, counts = getUniqueRows(numpy.sort(triangles, axis=1))[1:]
+    first = numpy.argmin(triangles, axis=1)
+    rows = numpy.arange(len(triangles))
+    ascending = triangles[rows, (first + 1) % 3] < triangles[rows, (first + 2) % 3]
+    paired = counts[inverse] == 2
+    sheets = numpy.bincount(inverse[paired], weights=ascending[paired], minlength=len(counts)) == 1
+    triangles = triangles[~(paired & sheets[inverse])]
+    return vertices, stitchTJunctions(vertices, triangles)
+
+def getTriangleNormals(vertices, triangles):
+    '''
+    :return: Array (trianglesCount, 3) of unit normals, zero where degenerate.
+    '''
+    normals = numpy.cross(vertices[triangles[:, 1]] - vertices[triangles[:, 0]], vertices[triangles[:, 2]] - vertices[triangles[:, 0]])
+    lengths = numpy.linalg.norm(normals, axis=1)
+    lengths[lengths == 0.0] = 1.0
+    return normals/lengths[:, numpy.newaxis]
+
+def writeStlFile(fileName, vertices, triangles):
+    '''
+    Write triangles to binary STL file in one pass.
+    '''
+    record = numpy.dtype([ ('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2') ])
+    data = numpy.zeros(len(triangles), dtype=record)
+    data['normal'] = getTriangleNormals(vertices, triangles)
+    data['vertices'] = vertices[triangles]
+    with io.open(fileName, 'wb') as stream:
+        stream.write(b'binary STL'.ljust(80, b' '))
+        stream.write(numpy.array([ len(triangles) ], dtype='<u4').tobytes())
+        stream.write(data.tobytes())
+
+def _writeRows(stream, prefix, rowFormat, rows, chunkSize=100000):
+    for start in range(0, len(rows), chunkSize):
+        chunk = rows[start:start + chunkSize]
+        stream.write(''.join((prefix + rowFormat) % tuple(row) for row in chunk.tolist()))
+
+def writeObjFile(fileName, vertices, triangles):
+    '''
+    Write vertices and triangles to Wavefront OBJ file.
+    '''
+    with io.open(fileName, 'w', encoding='ascii') as stream:
+        _writeRows(stream, 'v ', '%.12g %.12g %.12g\n', vertices)
+        _writeRows(stream, 'f ', '%d %d %d\n', triangles + 1)
+
+def writeVtkFile(fileName, vertices, triangles):
+    '''
+    Write vertices and triangles to legacy binary VTK polydata file.
+    '''
+    cells = numpy.empty((len(triangles), 4), dtype='>i4')
+    cells[:, 0] = 3
+    cells[:, 1:] = triangles
+    with io.open(fileName, 'wb') as stream:
+        stream.write(b'# vtk DataFile Version 3.0\nscaffold surface\nBINARY\nDATASET POLYDATA\n')
+        stream.write(('POINTS %d float\n' % len(vertices)).encode('ascii'))
+        stream.write(numpy.asarray(vertices, dtype='>f4').tobytes())
+        stream.write(('\nPOLYGONS %d %d\n' % (len(triangles), 4*len(triangles))).encode('ascii'))
+        stream.write(cells.tobytes())
+        stream.write(b'\n')
+
+_surfaceWriters = {
+    'stl' : writeStlFile,
+    'obj' : writeObjFile,
+    'vtk' : writeVtkFile }
+
+def writeSurfaceFile(fileName, meshData, elementIdentifiers=None, faceIndexes=None, samplesCount=4, chordTolerance=None, fileFormat=None):
+    '''
+    Tessellate exterior faces or given faces of meshData and write to file.
+    :param fileName: Name of file to write.
+    :param fileFormat: 'stl', 'obj' or 'vtk', default from file name extension.
+    See tessellateSurface for other parameters.
+    :return: vertices count, triangles count.
+    '''
+    if fileFormat is None:
+        fileFormat = fileName.rsplit('.', 1)[-1].lower()
+    writer = _surfaceWriters.get(fileFormat)
+    assert writer is not None, 'writeSurfaceFile.  Unsupported file format ' + str(fileFormat)
+    vertices, triangles = tessellateSurface(meshData, elementIdentifiers, faceIndexes, samplesCount, chordTolerance)
+    writer(fileName, vertices, triangles)
+    return len(vertices), len(triangles)
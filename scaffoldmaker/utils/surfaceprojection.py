@@ -0,0 +1,176 @@
+'''
+Batched closest point queries from point clouds to element faces of a 3-D
+MeshData, e.g. exterior faces or endocardium and epicardium groups.
+Created on Oct 18, 2026
+'''
+
+from __future__ import division
+import numpy
+import scipy.spatial
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.boxhierarchy import BoxHierarchy
+from scaffoldmaker.utils.meshlocation import ElementXiSolver
+from scaffoldmaker.utils.meshtopology import getExteriorFaces
+
+class SurfaceProjector(object):
+    '''
+    Projects points onto a surface made of element faces. Faces are tessellated
+    once into samples indexed by a k-d tree, and the face of the nearest
+    sample is refined by Newton iterations in face xi, giving a tight upper
+    bound on the distance of each point from the surface. A bounding volume
+    hierarchy of face boxes finds other faces which may be nearer, which are
+    pruned by lower bounds from their boxes and samples before refining.
+    Boxes and sample lower bounds are conservative for faces of elements with
+    linear Lagrange and cubic Hermite bases.
+    '''
+
+    def __init__(self, meshData, elementIdentifiers=None, faceIndexes=None, samplesCount=5, boxMargin=0.0):
+        '''
+        :param meshData: MeshData of 3-D elements.
+        :param elementIdentifiers: Optional array-like of element identifiers of
+        faces. Default all exterior faces, see meshtopology.getExteriorFaces.
+        :param faceIndexes: Array-like of face index 2*xiIndex + side of each
+        face, e.g. 4 for the xi3 = 0 endocardium, 5 for the xi3 = 1 epicardium.
+        :param samplesCount: Number of samples in each face xi direction, at least 2.
+        :param boxMargin: Fraction of each face box diagonal to expand it by.
+        Face boxes bound the faces without it.
+        '''
+        dimension = meshData.getDimension()
+        assert dimension == 3, 'SurfaceProjector.  Only implemented for 3-D meshes'
+        assert samplesCount >= 2, 'SurfaceProjector.  Need at least 2 samples in each face xi direction'
+        if elementIdentifiers is None:
+            elementIdentifiers, faceIndexes = getExteriorFaces(meshData)
+        faceElementIdentifiers = numpy.asarray(elementIdentifiers, dtype=numpy.int64).reshape(-1)
+        self._faceIndexes = numpy.asarray(faceIndexes, dtype=numpy.int64).reshape(-1)
+        assert len(faceElementIdentifiers) == len(self._faceIndexes), 'SurfaceProjector.  Mismatched face elements and indexes'
+        self._elementIdentifiers, self._faceElements = numpy.unique(faceElementIdentifiers, return_inverse=True)
+        self._faceElements = self._faceElements.reshape(-1)
+        self._solver = ElementXiSolver(meshData, self._elementIdentifiers)
+        # element xi of samples on each face index
+        faceXi = getXiGrid([ samplesCount ]*(dimension - 1))
+        self._sampleXi = numpy.array([ numpy.insert(faceXi, faceIndex // 2, faceIndex % 2, axis=1) for faceIndex in range(2*dimension) ])
+        self._samplesCount = len(faceXi)
+        self._samples = numpy.zeros((len(self._faceIndexes), self._samplesCount, meshData.getComponentsCount()))
+        for faceIndex in range(2*dimension):
+            faces = numpy.where(self._faceIndexes == faceIndex)[0]
+            if len(faces) > 0:
+                self._samples[faces] = evaluateMeshDataElements(meshData, self._sampleXi[faceIndex], faceElementIdentifiers[faces])[1]
+        # faces are at most bicubic in face xi, so have exact Bernstein control
+        # points found from values on a 4x4 grid. Faces lie in the convex hull of
+        # their control points, bounding their boxes, and control point
+        # differences bound derivatives; with every face point within half the
+        # sample spacing of a sample in each face xi, these give a radius about
+        # samples within which the whole face lies, so distance to the nearest sample on a face
+        # less this is a lower bound on distance to the face
+        controlXi = getXiGrid([ 4 ]*(dimension - 1))
+        t = numpy.linspace(0.0, 1.0, 4)[:, numpy.newaxis]
+        k = numpy.arange(4)[numpy.newaxis, :]
+        bernstein = numpy.array([ 1.0, 3.0, 3.0, 1.0 ])*(t**k)*((1.0 - t)**(3 - k))
+        controlOperator = numpy.linalg.inv(numpy.kron(bernstein, bernstein))
+        controlPoints = numpy.zeros((len(self._faceIndexes), len(controlXi), meshData.getComponentsCount()))
+        for faceIndex in range(2*dimension):
+            faces = numpy.where(self._faceIndexes == faceIndex)[0]
+            if len(faces) > 0:
+                values = evaluateMeshDataElements(meshData, numpy.insert(controlXi, faceIndex // 2, faceIndex % 2, axis=1),
+                    faceElementIdentifiers[faces])[1]
+                controlPoints[faces] = numpy.einsum('kp,fpc->fkc', controlOperator, values)
+        controlPoints = controlPoints.reshape(len(self._faceIndexes), 4, 4, -1)
+        derivativeBounds = [ 3.0*numpy.max(numpy.linalg.norm(numpy.diff(controlPoints, axis=axis), axis=3), axis=(1, 2)) for axis in (2, 1) ]
+        self._sampleRadii = (derivativeBounds[0] + derivativeBounds[1])*0.5/(samplesCount - 1)
+        minimums = numpy.min(controlPoints, axis=(1, 2))
+        maximums = numpy.max(controlPoints, axis=(1, 2))
+        margins = boxMargin*numpy.linalg.norm(maximums - minimums, axis=1)[:, numpy.newaxis]
+        self._boxHierarchy = BoxHierarchy(minimums - margins, maximums + margins)
+        self._sampleTree = scipy.spatial.cKDTree(self._samples.reshape(-1, self._samples.shape[2]))
+
+    def getFacesCount(self):
+        return len(self._faceIndexes)
+
+    def findNearestPoints(self, points, maximumIterations=20, chunkSize=50000):
+        '''
+        Find nearest point on surface to each point.
+        :param points: Array-like (pointsCount, componentsCount).
+        :param maximumIterations: Maximum number of Newton iterations.
+        :param chunkSize: Number of points to process together, limiting memory.
+        :return: elementIdentifiers int array (pointsCount), faceIndexes int
+        array (pointsCount), element xi array (pointsCount, 3) on face,
+        distances array (pointsCount).
+        '''
+        points = numpy.asarray(points, dtype=numpy.float64)
+        pointsCount = len(points)
+        faces = numpy.zeros(pointsCount, dtype=numpy.int64)
+        xi = numpy.zeros((pointsCount, self._sampleXi.shape[2]))
+        distances = numpy.zeros(pointsCount)
+        for start in range(0, pointsCount, chunkSize):
+            end = min(start + chunkSize, pointsCount)
+            faces[start:end], xi[start:end], distances[start:end] = self._findNearestPoints(points[start:end], maximumIterations)
+        return self._elementIdentifiers[self._faceElements[faces]], self._faceIndexes[faces], xi, distances
+
+    def _solveFaces(self, points, faces, maximumIterations):
+        '''
+        Find nearest points on faces by Newton iterations from the nearest sample.
+        :param points: Array (pairsCount, componentsCount).
+        :param faces: int array (pairsCount) of indexes into faces of this projector.
+        :return: xi array (pairsCount, 3), distances array (pairsCount).
+        '''
+        offsets = self._samples[faces] - points[:, numpy.newaxis, :]
+        nearestSamples = numpy.argmin(numpy.sum(offsets*offsets, axis=2), axis=1)
+        faceIndexes = self._faceIndexes[faces]
+        xi = self._sampleXi[faceIndexes, nearestSamples]
+        distances = numpy.empty(len(faces))
+        for xiIndex in range(self._sampleXi.shape[2]):
+            pairs = numpy.where((faceIndexes // 2) == xiIndex)[0]
+            if len(pairs) > 0:
+                xi[pairs], distances[pairs] = self._solver.solve(points[pairs], self._faceElements[faces[pairs]], xi[pairs],
+                    fixedAxis=xiIndex, maximumIterations=maximumIterations)
+        return xi, distances
+
+    def _findNearestPoints(self, points, maximumIterations, chunkSize=10000):
+        '''
+        :param chunkSize: Number of candidate faces to compare samples with together.
+        :return: face indexes into faces of this projector, xi, distances.
+        '''
+        # refine on the face of the nearest sample, giving a tight bound on the
+        # distance to the surface so few other faces need solving
+        samples = self._sampleTree.query(points)[1]
+        faces = samples // self._samplesCount
+        xi, distances = self._solveFaces(points, faces, maximumIterations)
+        pairPoints, pairFaces = self._boxHierarchy.findBoxesNearPoints(points, distances)
+        lowerBounds = self._boxHierarchy.getBoxDistances(points[pairPoints], pairFaces)
+        # prune other faces whose boxes are further than the refined distance
+        candidates = numpy.where((pairFaces != faces[pairPoints]) & (lowerBounds < distances[pairPoints]))[0]
+        pairPoints = pairPoints[candidates]
+        pairFaces = pairFaces[candidates]
+        lowerBounds = lowerBounds[candidates]
+        # then those whose nearest sample less its radius is further
+        for start in range(0, len(pairPoints), chunkSize):
+            pairs = slice(start, start + chunkSize)
+            offsets = self._samples[pairFaces[pairs]] - points[pairPoints[pairs], numpy.newaxis, :]
+            sampleDistances = numpy.sqrt(numpy.min(numpy.sum(offsets*offsets, axis=2), axis=1))
+            lowerBounds[pairs] = numpy.maximum(lowerBounds[pairs], sampleDistances - self._sampleRadii[pairFaces[pairs]])
+        candidates = numpy.where(lowerBounds < distances[pairPoints])[0]
+        pairPoints = pairPoints[candidates]
+        pairFaces = pairFaces[candidates]
+        lowerBounds = lowerBounds[candidates]
+        # solve candidates in order of lower bound, until bounds are further than nearest found
+        order = numpy.lexsort((lowerBounds, pairPoints))
+        pairPoints = pairPoints[order]
+        pairFaces = pairFaces[order]
+        lowerBounds = lowerBounds[order]
+        firstIndexes = numpy.unique(pairPoints, return_index=True)[1]
+        ranks = numpy.arange(len(pairPoints)) - numpy.repeat(firstIndexes, numpy.diff(numpy.append(firstIndexes, len(pairPoints))))
+        rank = 0
+        while True:
+            pairs = numpy.where(ranks == rank)[0]
+            pairs = pairs[lowerBounds[pairs] < distances[pairPoints[pairs]]]
+            if len(pairs) == 0:
+                break
+            candidatePoints = pairPoints[pairs]
+            candidateFaces = pairFaces[pairs]
+            candidateXi, candidateDistances = self._solveFaces(points[candidatePoints], candidateFaces, maximumIterations)
+            nearer = candidateDistances < distances[candidatePoints]
+            faces[candidatePoints[nearer]] = candidateFaces[nearer]
+            xi[candidatePoints[nearer]] = candidateXi[nearer]
+            distances[candidatePoints[nearer]] = candidateDistances[nearer]
+            rank += 1
+        return faces, xi, distances
@@ -0,0 +1,33 @@
+'''
+Utility functions for vectors, usable without Zinc.
+Created on Oct 18, 2026
+'''
+import math
+
+def magnitude(v):
+    '''
+    :return: scalar magnitude of vector v
+    '''
+    return math.sqrt(sum(s*s for s in v))
+
+def normalise(v):
+    '''
+    :return: vector v normalised to unit length
+    '''
+    mag = 0.0
+    for s in v:
+        mag += s*s
+    mag = math.sqrt(mag)
+    return [ s/mag for s in v ]
+
+def dotproduct(a, b):
+    '''
+    :return: scalar dot product of vectors a and b
+    '''
+    return sum(a[i]*b[i] for i in range(len(a)))
+
+def crossproduct3(a, b):
+    '''
+    :return: vector 3-D cross product of a and b
+    '''
+    return [ a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0] ]
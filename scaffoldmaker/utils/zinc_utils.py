@@ -3,9 +3,12 @@ Utility functions for easing use of Zinc API.
 Created on Jan 4, 2018
 
 @author: Richard Christie
+
+Zinc is only imported by functions which need its definitions, so that
+modules using these functions can be imported without Zinc.
 '''
 
-from opencmiss.zinc.field import Field
+import numpy
 
 def getOrCreateCoordinateField(fieldmodule, name='coordinates', componentsCount=3):
     '''
@@ -16,6 +19,7 @@ def getOrCreateCoordinateField(fieldmodule, name='coordinates', componentsCount=
     :param name:  Name of field to find or create.
     :param componentsCount: Number of components / dimension of field.
     '''
+    from opencmiss.zinc.field import Field
     assert (componentsCount > 0) and (componentsCount <= 3), 'getOrCreateCoordinateField.  Dimensions must be from 1 to 3'
     coordinates = fieldmodule.findFieldByName(name)
     if coordinates.isValid():
@@ -35,6 +39,66 @@ def getOrCreateCoordinateField(fieldmodule, name='coordinates', componentsCount=
     fieldmodule.endChange()
     return coordinates
 
+def sampleMeshField(field, mesh, xiCounts, meshData=None):
+    '''
+    Sample field at a regular xi lattice in every element of mesh or mesh group.
+    Finite element fields whose element field templates can be described by
+    MeshData are evaluated with NumPy basis functions after reading the region
+    once; other fields are evaluated with a single reused field cache.
+    :param field: Zinc field to sample, e.g. coordinates.
+    :param mesh: Zinc mesh or mesh group.
+    :param xiCounts: List of number of points in each xi direction of mesh,
+    equally spaced from xi = 0 to 1 inclusive. See basisevaluation.getXiGrid.
+    :param meshData: Optional MeshData of field read from its region with
+    MeshData.createFromRegion, to reuse over several calls. If None, it is read
+    from the region if field is defined on all elements of mesh by element
+    field templates that MeshData can describe.
+    :return: elementIdentifiers int array (elementsCount) in mesh order, values
+    array (elementsCount, pointsCount, componentsCount) with NaN where field is
+    not defined, route 'numpy' or 'fieldcache' naming the method used.
+    '''
+    from opencmiss.zinc.status import OK as ZINC_OK
+    from scaffoldmaker.utils.basisevaluation import evaluateMeshDataElements, getXiGrid
+    from scaffoldmaker.utils.meshdata import EftDescriptor, MeshData
+    dimension = mesh.getDimension()
+    assert len(xiCounts) == dimension, 'sampleMeshField.  Must have xiCounts for each mesh dimension'
+    xi = getXiGrid(xiCounts)
+    componentsCount = field.getNumberOfComponents()
+    finiteElementField = field.castFiniteElement()
+    representable = finiteElementField.isValid()
+    elementIdentifiers = []
+    elementiterator = mesh.createElementiterator()
+    element = elementiterator.next()
+    while element.isValid():
+        elementIdentifiers.append(element.getIdentifier())
+        if representable and (meshData is None):
+            eft = element.getElementfieldtemplate(finiteElementField, -1)
+            representable = eft.isValid() and EftDescriptor.isZincEftSupported(eft)
+        element = elementiterator.next()
+    elementIdentifiers = numpy.array(elementIdentifiers, dtype=numpy.int64)
+    if representable:
+        if meshData is None:
+            meshData = MeshData.createFromRegion(field.getFieldmodule().getRegion(), field.getName(), dimension)
+        if numpy.isin(elementIdentifiers, meshData.getElementIdentifiers()).all():
+            elementIdentifiers, values = evaluateMeshDataElements(meshData, xi, elementIdentifiers)
+            return elementIdentifiers, values, 'numpy'
+    fm = field.getFieldmodule()
+    cache = fm.createFieldcache()
+    xiList = xi.tolist()
+    values = numpy.full((len(elementIdentifiers), len(xiList), componentsCount), numpy.nan)
+    elementiterator = mesh.createElementiterator()
+    element = elementiterator.next()
+    e = 0
+    while element.isValid():
+        for p in range(len(xiList)):
+            cache.setMeshLocation(element, xiList[p])
+            result, x = field.evaluateReal(cache, componentsCount)
+            if result == ZINC_OK:
+                values[e, p] = x
+        element = elementiterator.next()
+        e += 1
+    return elementIdentifiers, values, 'fieldcache'
+
 def getElementNodeIdentifiers(element, eft):
     '''
     Get identifiers of all nodes used by eft in element.
@@ -73,4 +137,78 @@ def getMaximumElementIdentifier(mesh):
             maximumElementId = id
         element = elementiterator.next()
     return maximumElementId
-   
\ No newline at end of file
+   
+
+def getNodesetFieldParameters(field, nodeset, valueLabelVersions=None):
+    '''
+    Get field parameters for all nodes in nodeset as arrays, in one pass
+    through the nodeset with a single field cache.
+    :param field: Zinc finite element field.
+    :param nodeset: Zinc nodeset or nodeset group to get parameters for.
+    :param valueLabelVersions: List of (Node.VALUE_LABEL_*, version) to get.
+    Default is [ (Node.VALUE_LABEL_VALUE, 1) ].
+    :return: nodeIdentifiers int array (nodesCount) in nodeset order, list of
+    float arrays (nodesCount, componentsCount) for each valueLabelVersion, zero
+    where not defined at node.
+    '''
+    from opencmiss.zinc.node import Node
+    from opencmiss.zinc.status import OK as ZINC_OK
+    if valueLabelVersions is None:
+        valueLabelVersions = [ (Node.VALUE_LABEL_VALUE, 1) ]
+    componentsCount = field.getNumberOfComponents()
+    cache = field.getFieldmodule().createFieldcache()
+    nodesCount = nodeset.getSize()
+    nodeIdentifiers = numpy.zeros(nodesCount, dtype=numpy.int64)
+    parameters = numpy.zeros((len(valueLabelVersions), nodesCount, componentsCount))
+    nodeiterator = nodeset.createNodeiterator()
+    node = nodeiterator.next()
+    n = 0
+    while node.isValid():
+        cache.setNode(node)
+        nodeIdentifiers[n] = node.getIdentifier()
+        for v in range(len(valueLabelVersions)):
+            valueLabel, version = valueLabelVersions[v]
+            result, x = field.getNodeParameters(cache, -1, valueLabel, version, componentsCount)
+            if result == ZINC_OK:
+                # x is a scalar for 1 component
+                parameters[v, n] = x
+        node = nodeiterator.next()
+        n += 1
+    return nodeIdentifiers, [ parameters[v] for v in range(len(valueLabelVersions)) ]
+
+def setNodesetFieldParameters(field, nodeset, nodeIdentifiers, valueLabelVersions, parameters):
+    '''
+    Set field parameters for nodes from arrays, with a single field cache and
+    change notification deferred until all are set. Parameters are only set
+    where the node is in nodeset and the value label and version are defined
+    at the node.
+    :param field: Zinc finite element field.
+    :param nodeset: Zinc nodeset containing nodes.
+    :param nodeIdentifiers: Sequence of nodesCount node identifiers.
+    :param valueLabelVersions: List of (Node.VALUE_LABEL_*, version) to set.
+    :param parameters: List of array-like (nodesCount, componentsCount) for
+    each valueLabelVersion, e.g. as returned by getNodesetFieldParameters().
+    :return: Number of nodes not found in nodeset, number of values not set
+    at nodes found, i.e. not defined there.
+    '''
+    from opencmiss.zinc.status import OK as ZINC_OK
+    componentsCount = field.getNumberOfComponents()
+    fm = field.getFieldmodule()
+    fm.beginChange()
+    cache = fm.createFieldcache()
+    nodeIdentifiers = numpy.asarray(nodeIdentifiers).tolist()
+    values = [ numpy.asarray(array, dtype=numpy.float64).reshape((len(nodeIdentifiers), componentsCount)).tolist() for array in parameters ]
+    missingNodesCount = 0
+    skippedValuesCount = 0
+    for n in range(len(nodeIdentifiers)):
+        node = nodeset.findNodeByIdentifier(nodeIdentifiers[n])
+        if not node.isValid():
+            missingNodesCount += 1
+            continue
+        cache.setNode(node)
+        for v in range(len(valueLabelVersions)):
+            valueLabel, version = valueLabelVersions[v]
+            if field.setNodeParameters(cache, -1, valueLabel, version, values[v][n]) != ZINC_OK:
+                skippedValuesCount += 1
+    fm.endChange()
+    return missingNodesCount, skippedValuesCount
@@ -0,0 +1,99 @@
+'''
+Tests of vectorised basis evaluation and sparse evaluation operators against
+scalar references, on meshes generated without Zinc.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshdata import *
+
+
+def getHermite1D(node, derivative, xi):
+    '''
+    Scalar reference cubic Hermite basis function.
+    '''
+    return [ [ 1.0 - 3.0*xi*xi + 2.0*xi*xi*xi, xi - 2.0*xi*xi + xi*xi*xi ],
+             [ 3.0*xi*xi - 2.0*xi*xi*xi, xi*xi*xi - xi*xi ] ][node][derivative]
+
+def getTricubicHermite(functionIndex, xi):
+    '''
+    Scalar reference tricubic Hermite basis function in EftDescriptor order:
+    8 functions per basis node for value, d/ds1, d/ds2, d2/ds1ds2, d/ds3, ...
+    '''
+    basisNode, derivative = divmod(functionIndex, 8)
+    value = 1.0
+    for i in range(3):
+        value *= getHermite1D((basisNode >> i) & 1, (derivative >> i) & 1, xi[i])
+    return value
+
+
+class BasisEvaluationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = numpy.random.default_rng(0)
+
+    def test_hermite_ordering(self):
+        '''
+        Basis functions are by basis node with xi1 fastest, then value and
+        derivatives in Zinc value label order.
+        '''
+        functionTypes = [ BASIS_CUBIC_HERMITE ]*3
+        eft = EftDescriptor(functionTypes)
+        self.assertEqual(eft.getNumberOfFunctions(), 64)
+        self.assertEqual(list(eft.getBasisNodeValueLabels()), [ VALUE_LABEL_VALUE, VALUE_LABEL_D_DS1, VALUE_LABEL_D_DS2,
+            VALUE_LABEL_D2_DS1DS2, VALUE_LABEL_D_DS3, VALUE_LABEL_D2_DS1DS3, VALUE_LABEL_D2_DS2DS3, VALUE_LABEL_D3_DS1DS2DS3 ])
+        xi = self.rng.uniform(0.0, 1.0, (20, 3))
+        phi = evaluateBasisFunctions(functionTypes, xi)
+        reference = numpy.array([ [ getTricubicHermite(f, p) for f in range(64) ] for p in xi ])
+        self.assertLess(numpy.max(numpy.abs(phi - reference)), 1.0E-14)
+        # interpolation: value functions are 1 at own basis node, derivatives 0
+        corners = getXiGrid([ 2, 2, 2 ])
+        phi = evaluateBasisFunctions(functionTypes, corners)
+        self.assertTrue(numpy.allclose(phi, numpy.kron(numpy.eye(8), [ 1.0 ] + [ 0.0 ]*7)))
+
+    def test_hermite_derivatives(self):
+        '''
+        First and second xi derivatives match central differences of values.
+        '''
+        functionTypes = [ BASIS_CUBIC_HERMITE, BASIS_CUBIC_HERMITE, BASIS_LINEAR_LAGRANGE ]
+        xi = self.rng.uniform(0.1, 0.9, (20, 3))
+        delta = 1.0E-5
+        for i in range(3):
+            offset = numpy.zeros(3)
+            offset[i] = delta
+            plus = evaluateBasisFunctions(functionTypes, xi + offset)
+            minus = evaluateBasisFunctions(functionTypes, xi - offset)
+            centre = evaluateBasisFunctions(functionTypes, xi)
+            derivativeOrders = [ 0 ]*3
+            derivativeOrders[i] = 1
+            self.assertLess(numpy.max(numpy.abs(evaluateBasisFunctions(functionTypes, xi, derivativeOrders) - (plus - minus)/(2.0*delta))), 1.0E-8)
+            derivativeOrders[i] = 2
+            self.assertLess(numpy.max(numpy.abs(evaluateBasisFunctions(functionTypes, xi, derivativeOrders) - (plus - 2.0*centre + minus)/(delta*delta))), 1.0E-4)
+
+    def test_evaluation_operator(self):
+        '''
+        Sparse operator including apex scale factors and general maps agrees
+        with element parameters from getMeshElementParameters.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        functionTypes = meshData.getElementBlocks()[0].eft.getFunctionTypes()
+        elementIdentifiers, parameters = getMeshElementParameters(meshData)
+        pointElementIdentifiers = self.rng.choice(elementIdentifiers, 200)
+        xi = self.rng.uniform(0.0, 1.0, (200, 3))
+        elements = getNodeIndexes(elementIdentifiers, pointElementIdentifiers)
+        nodeParameterVector = getNodeParameterVector(meshData)
+        for derivativeOrders in ([ 0, 0, 0 ], [ 1, 0, 0 ], [ 0, 1, 0 ], [ 0, 0, 1 ], [ 1, 1, 0 ]):
+            operator = createEvaluationOperator(meshData, pointElementIdentifiers, xi, derivativeOrders)
+            reference = evaluateElementParameters(functionTypes, parameters[elements], xi, derivativeOrders)
+            self.assertLess(numpy.max(numpy.abs(operator.dot(nodeParameterVector) - reference)), 1.0E-12)
+        x, jacobians = evaluateElementParametersWithJacobians(functionTypes, parameters[elements], xi)
+        self.assertLess(numpy.max(numpy.abs(x - evaluateElementParameters(functionTypes, parameters[elements], xi))), 1.0E-12)
+        self.assertLess(numpy.max(numpy.abs(jacobians[:, :, 1] - evaluateElementParameters(functionTypes, parameters[elements], xi, [ 0, 1, 0 ]))), 1.0E-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
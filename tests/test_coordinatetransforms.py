@@ -0,0 +1,73 @@
+'''
+Tests of coordinate transformations applied to node values and derivatives.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_heartventricles1 import MeshType_3d_heartventricles1
+from scaffoldmaker.meshtypes.meshtype_3d_heartventricles2 import MeshType_3d_heartventricles2
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.coordinatetransforms import *
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshquality import checkMeshDataQuality
+
+
+class CoordinateTransformsTestCase(unittest.TestCase):
+
+    def test_base_thinning(self):
+        '''
+        Base thinning as used by heart ventricles 2 scales cylindrical polar
+        radius beyond the inner radius on base nodes only, and transforms
+        derivatives by the chain rule, as assigning the transformed
+        coordinates field to nodes did.
+        '''
+        # half sphere shell as edited by heart ventricles 2
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements up'] = 8
+        options['Exclude top rows'] = 4
+        options['Length ratio'] = 2.0
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        innerRadius = 0.35
+        ratio = 0.5
+        transform = lambda x: MeshType_3d_heartventricles1.baseThinningTransform(x, innerRadius, ratio)
+        x = meshData.getNodeParameters(VALUE_LABEL_VALUE)
+        derivatives = [ meshData.getNodeParameters(valueLabel) for valueLabel in (VALUE_LABEL_D_DS1, VALUE_LABEL_D_DS2, VALUE_LABEL_D_DS3) ]
+        isBase = x[:, 2] > -0.0001
+        self.assertTrue(numpy.any(isBase) and not numpy.all(isBase))
+        transformMeshDataNodes(meshData, transform, isBase)
+        newX = meshData.getNodeParameters(VALUE_LABEL_VALUE)
+        self.assertTrue(numpy.all(newX[~isBase] == x[~isBase]))
+        cp = rectangularCartesianToCylindricalPolar(x[isBase])[0]
+        newCp = rectangularCartesianToCylindricalPolar(newX[isBase])[0]
+        ir = innerRadius*0.9999
+        self.assertTrue(numpy.allclose(newCp[:, 0], ir + (cp[:, 0] - ir)*ratio, atol=1.0E-14))
+        self.assertTrue(numpy.allclose(newCp[:, 1:], cp[:, 1:], atol=1.0E-14))
+        h = 1.0E-6
+        for valueLabel, d in zip((VALUE_LABEL_D_DS1, VALUE_LABEL_D_DS2, VALUE_LABEL_D_DS3), derivatives):
+            newD = meshData.getNodeParameters(valueLabel)
+            self.assertTrue(numpy.all(newD[~isBase] == d[~isBase]))
+            finiteDifference = (transform(x[isBase] + h*d[isBase])[0] - transform(x[isBase] - h*d[isBase])[0])/(2.0*h)
+            self.assertLess(numpy.max(numpy.abs(newD[isBase] - finiteDifference)), 1.0E-8)
+
+    def test_heartventricles2_base_thinning(self):
+        '''
+        Heart ventricles 2 with and without base thinning passes the element
+        quality gate, and thinning only moves nodes at the base.
+        '''
+        options = MeshType_3d_heartventricles2.getDefaultOptions()
+        options['LV wall thickness ratio base'] = 1.0
+        meshData = MeshType_3d_heartventricles2.generateMeshData(options)
+        options['LV wall thickness ratio base'] = 0.5
+        thinMeshData = MeshType_3d_heartventricles2.generateMeshData(options)
+        for m in (meshData, thinMeshData):
+            self.assertTrue(checkMeshDataQuality(m)[0])
+        self.assertEqual(meshData.getNodeIdentifiers().tolist(), thinMeshData.getNodeIdentifiers().tolist())
+        x = meshData.getNodeParameters(VALUE_LABEL_VALUE)
+        thinX = thinMeshData.getNodeParameters(VALUE_LABEL_VALUE)
+        moved = numpy.any(numpy.abs(thinX - x) > 1.0E-12, axis=1)
+        self.assertTrue(numpy.any(moved))
+        self.assertTrue(numpy.all(x[moved, 2] > -0.0001))
+
+
+if __name__ == "__main__":
+    unittest.main()
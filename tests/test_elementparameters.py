@@ -0,0 +1,54 @@
+'''
+Tests of element basis parameter extraction from element field templates
+built by the tricubic Hermite factory without Zinc.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.utils.eft_utils import getEftTermScaling
+from scaffoldmaker.utils.eftfactory_tricubichermite import eftfactory_tricubichermite
+from scaffoldmaker.utils.elementparameters import EftWeighting
+from scaffoldmaker.utils.meshdata import *
+
+
+def getReferenceElementParameters(eft, valueLabelVersions, nodeParameters, elementNodeIndexes, scaleFactors):
+    '''
+    Term by term reference for basis function parameters of one element.
+    '''
+    parameters = numpy.zeros((eft.getNumberOfFunctions(), nodeParameters.shape[2]))
+    for f in range(1, eft.getNumberOfFunctions() + 1):
+        for t in range(1, eft.getFunctionNumberOfTerms(f) + 1):
+            node = elementNodeIndexes[eft.getTermLocalNodeIndex(f, t) - 1]
+            value = valueLabelVersions.index((eft.getTermNodeValueLabel(f, t), eft.getTermNodeVersion(f, t)))
+            weight = 1.0
+            for s in getEftTermScaling(eft, f, t):
+                weight *= scaleFactors[s - 1]
+            parameters[f - 1] += weight*nodeParameters[node, value]
+    return parameters
+
+
+class ElementParametersTestCase(unittest.TestCase):
+
+    def test_septum_element_parameters(self):
+        '''
+        Tube septum templates with global and node scale factors and general
+        linear maps give the same parameters as a term by term evaluation.
+        '''
+        rng = numpy.random.default_rng(0)
+        valueLabelVersions = [ (valueLabel, 1) for valueLabel in range(VALUE_LABEL_VALUE, VALUE_LABEL_D3_DS1DS2DS3 + 1) ]
+        nodeParameters = rng.standard_normal((10, len(valueLabelVersions), 3))
+        for useCrossDerivatives in (False, True):
+            eftfactory = eftfactory_tricubichermite(None, useCrossDerivatives)
+            for eft in (eftfactory.createEftTubeSeptumOuter(), eftfactory.createEftTubeSeptumInner1(), eftfactory.createEftTubeSeptumInner2()):
+                self.assertIsInstance(eft, EftDescriptor)
+                self.assertEqual(eft.getScaleFactorType(1), SCALE_FACTOR_TYPE_NODE_GENERAL if (eft.getNumberOfLocalScaleFactors() == 8) else SCALE_FACTOR_TYPE_GLOBAL_GENERAL)
+                elementNodeIndexes = numpy.array([ rng.permutation(10)[:8] for e in range(4) ])
+                scaleFactors = rng.uniform(-2.0, 2.0, (4, eft.getNumberOfLocalScaleFactors()))
+                parameters = EftWeighting(eft, valueLabelVersions).getElementParameters(nodeParameters, elementNodeIndexes, scaleFactors)
+                for e in range(4):
+                    reference = getReferenceElementParameters(eft, valueLabelVersions, nodeParameters, elementNodeIndexes[e], scaleFactors[e])
+                    self.assertLess(numpy.max(numpy.abs(parameters[e] - reference)), 1.0E-14)
+
+
+if __name__ == "__main__":
+    unittest.main()
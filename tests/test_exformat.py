@@ -0,0 +1,49 @@
+'''
+Tests of EX file writing from MeshData.
+'''
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.exformat import *
+
+
+class ExFormatTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_ex_file(self):
+        '''
+        Output does not depend on chunk size, and meshes with element field
+        templates the writer does not support are rejected before the file is
+        created, as with the shell apexes.
+        '''
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 3
+        box = MeshType_3d_box1.generateBaseMeshData(options)
+        fileName = os.path.join(self.directory, 'box.exf')
+        writeExFile(fileName, box)
+        with io.open(fileName, 'r', encoding='ascii') as stream:
+            text = stream.read()
+        self.assertTrue(text.startswith('EX Version: 2\n'))
+        stream = io.StringIO()
+        self.assertEqual(writeEx(stream, box, chunkSize=5), [])
+        self.assertEqual(stream.getvalue(), text)
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        shell = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        fileName = os.path.join(self.directory, 'shell.exf')
+        with self.assertRaises(AssertionError):
+            writeExFile(fileName, shell)
+        self.assertFalse(os.path.exists(fileName))
+
+
+if __name__ == "__main__":
+    unittest.main()
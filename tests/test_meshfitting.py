@@ -0,0 +1,63 @@
+'''
+Tests of least squares fitting of MeshData node parameters to data points.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshfitting import MeshDataFitter
+
+
+class MeshFittingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 2
+        options['Number of elements 2'] = 2
+        options['Number of elements 3'] = 1
+        self.meshData = MeshType_3d_box1.generateBaseMeshData(options)
+
+    def test_fit_translation(self):
+        '''
+        Fitting data sampled from the translated mesh recovers the translation,
+        with both solvers.
+        '''
+        meshData = self.meshData
+        elementIdentifiers = meshData.getElementIdentifiers()
+        xi = getXiGrid([ 4, 4, 4 ])
+        translation = numpy.array([ 0.1, -0.2, 0.3 ])
+        dataPoints = evaluateMeshDataElements(meshData, xi, elementIdentifiers)[1].reshape(-1, 3) + translation
+        fitter = MeshDataFitter(meshData)
+        fitter.setDataLocations(numpy.repeat(elementIdentifiers, len(xi)), numpy.tile(xi, (len(elementIdentifiers), 1)), dataPoints)
+        for solver in ('direct', 'iterative'):
+            nodeParameterVector = fitter.fit(solver=solver)
+            self.assertLess(numpy.max(numpy.abs(fitter.getDataResiduals(nodeParameterVector))), 1.0E-6)
+
+    def test_fit_under_determined(self):
+        '''
+        A single data point with zero penalties is fitted by regularisation
+        towards the initial parameters, or gives a clear error without it.
+        '''
+        meshData = self.meshData
+        fitter = MeshDataFitter(meshData)
+        xi = [ [ 0.5, 0.5, 0.5 ] ]
+        dataPoint = evaluateMeshDataElements(meshData, xi, [ 1 ])[1][0] + numpy.array([ 0.0, 0.0, 0.1 ])
+        fitter.setDataLocations([ 1 ], xi, dataPoint)
+        initialParameters = fitter.getNodeParameterVector()
+        # minimum change in parameters fitting the data point
+        operator = createEvaluationOperator(meshData, [ 1 ], xi).toarray()[0]
+        minimumChange = 0.1*operator/numpy.dot(operator, operator)
+        for solver in ('direct', 'iterative'):
+            nodeParameterVector = fitter.fit(solver=solver)
+            self.assertTrue(numpy.all(numpy.isfinite(nodeParameterVector)))
+            self.assertLess(numpy.max(numpy.abs(fitter.getDataResiduals(nodeParameterVector))), 1.0E-6)
+            change = nodeParameterVector - initialParameters
+            self.assertLess(numpy.max(numpy.abs(change[:, :2])), 1.0E-6)
+            self.assertLess(numpy.max(numpy.abs(change[:, 2] - minimumChange)), 1.0E-6)
+        with self.assertRaises(RuntimeError):
+            fitter.fit(regularisation=0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
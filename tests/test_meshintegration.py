@@ -0,0 +1,43 @@
+'''
+Tests of Gauss quadrature over MeshData elements and faces.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshintegration import MeshDataIntegrator
+
+
+class MeshIntegrationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 3
+        options['Number of elements 2'] = 2
+        options['Number of elements 3'] = 2
+        self.box = MeshType_3d_box1.generateBaseMeshData(options)
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        self.shell = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+
+    def test_volume(self):
+        '''
+        Volume of the unit box, and the shell wall volume equals the difference
+        of volumes enclosed by its outer and inner surfaces.
+        '''
+        self.assertAlmostEqual(numpy.sum(MeshDataIntegrator(self.box).integrate()), 1.0, delta=1.0E-12)
+        volume = numpy.sum(MeshDataIntegrator(self.shell, gaussPointsCount=5).integrate())
+        outerVolume = numpy.sum(MeshDataIntegrator(self.shell, gaussPointsCount=5, face=(2, 1.0)).getEnclosedVolumes())
+        innerVolume = numpy.sum(MeshDataIntegrator(self.shell, gaussPointsCount=5, face=(2, 0.0)).getEnclosedVolumes())
+        self.assertGreater(volume, 0.0)
+        self.assertGreater(innerVolume, 0.0)
+        self.assertAlmostEqual(volume, outerVolume - innerVolume, delta=1.0E-12)
+        # integrating x over the box gives its centroid
+        centroid = numpy.sum(MeshDataIntegrator(self.box).integrate(lambda x: x), axis=0)
+        self.assertTrue(numpy.allclose(centroid, [ 0.5, 0.5, 0.5 ]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+'''
+Tests of batched point location in MeshData elements.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshlocation import MeshDataLocator
+
+
+class MeshLocationTestCase(unittest.TestCase):
+
+    def test_location_round_trip(self):
+        '''
+        Points evaluated at random element xi, including in collapsed apex
+        elements, are located at xi evaluating to the same points; points
+        away from the mesh are not located.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        rng = numpy.random.default_rng(0)
+        elementIdentifiers = rng.choice(meshData.getElementIdentifiers(), 500)
+        xi = rng.uniform(0.0, 1.0, (500, 3))
+        nodeParameterVector = getNodeParameterVector(meshData)
+        points = createEvaluationOperator(meshData, elementIdentifiers, xi).dot(nodeParameterVector)
+        locator = MeshDataLocator(meshData)
+        foundElementIdentifiers, foundXi, distances = locator.findMeshLocations(points)
+        self.assertTrue(numpy.all(foundElementIdentifiers >= 0))
+        self.assertTrue(numpy.all((foundXi >= 0.0) & (foundXi <= 1.0)))
+        self.assertLessEqual(numpy.max(distances), locator.getTolerance())
+        foundPoints = createEvaluationOperator(meshData, foundElementIdentifiers, foundXi).dot(nodeParameterVector)
+        self.assertLess(numpy.max(numpy.linalg.norm(foundPoints - points, axis=1)), 1.0E-10)
+        # outside the outer surface and inside the inner surface
+        centre = numpy.mean(points, axis=0)
+        farPoints = centre + numpy.array([ [ 10.0, 0.0, 0.0 ], [ 0.0, 0.0, 0.0 ] ])
+        foundElementIdentifiers = locator.findMeshLocations(farPoints)[0]
+        self.assertEqual(foundElementIdentifiers.tolist(), [ -1, -1 ])
+
+    def test_retry_several_candidates(self):
+        '''
+        On the retry from element centres a point has several candidates, and
+        the element, xi and distance returned are all from the nearest.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        nodeParameterVector = getNodeParameterVector(meshData)
+        locator = MeshDataLocator(meshData)
+        elementIdentifiers = locator.getElementIdentifiers().tolist()
+        xi = numpy.array([ [ 0.3, 0.6, 0.4 ] ])
+        point = createEvaluationOperator(meshData, [ 5 ], xi).dot(nodeParameterVector)
+        for candidateIdentifiers in ([ 5, 6 ], [ 6, 5 ]):
+            foundElementIdentifiers = numpy.full(1, -1, dtype=numpy.int64)
+            foundXi = numpy.zeros((1, 3))
+            distances = numpy.full(1, numpy.inf)
+            unlocated = numpy.ones(1, dtype=bool)
+            candidateElements = numpy.array([ elementIdentifiers.index(identifier) for identifier in candidateIdentifiers ])
+            locator._solvePairs(point, numpy.zeros(2, dtype=numpy.int64), candidateElements, numpy.full((2, 3), 0.5), 20,
+                foundElementIdentifiers, foundXi, distances, unlocated)
+            self.assertEqual(foundElementIdentifiers.tolist(), [ 5 ])
+            self.assertFalse(unlocated[0])
+            self.assertLess(numpy.max(numpy.abs(foundXi - xi)), 1.0E-10)
+            foundPoint = createEvaluationOperator(meshData, foundElementIdentifiers, foundXi).dot(nodeParameterVector)
+            self.assertLess(numpy.linalg.norm(foundPoint - point), 1.0E-10)
+            self.assertLess(distances[0], 1.0E-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
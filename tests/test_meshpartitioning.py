@@ -0,0 +1,73 @@
+'''
+Tests of mesh partitioning, partition extraction with ghost layers and
+partition file output.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshpartitioning import *
+from scaffoldmaker.utils.scaffoldfile import ScaffoldFileReader
+
+
+class MeshPartitioningTestCase(unittest.TestCase):
+
+    def setUp(self):
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        self.meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_partition_round_trip(self):
+        '''
+        Partitions are balanced, cover every element once, and partition files
+        read back give the field of the whole mesh at their global elements.
+        '''
+        meshData = self.meshData
+        xi = getXiGrid([ 3, 3, 3 ])
+        elementsCount = meshData.getElementsCount()
+        # also write partitions in a pool of processes
+        for partitionFunction, processesCount in ((partitionCoordinateBisection, 1), (partitionGraph, 2)):
+            elementPartitions = partitionFunction(meshData, 3)
+            counts = numpy.bincount(elementPartitions)
+            self.assertEqual(len(counts), 3)
+            self.assertLessEqual(numpy.max(counts) - numpy.min(counts), 1)
+            fileNames = writePartitionFiles(meshData, elementPartitions, os.path.join(self.directory, 'shell_{0}.scaffold'), processesCount=processesCount)
+            ownedElementIdentifiers = []
+            for p in range(3):
+                partitionMeshData = ScaffoldFileReader(fileNames[p]).getMeshData()
+                partitionMap = numpy.load(fileNames[p] + '.map.npz')
+                localElementIdentifiers, x = evaluateMeshDataElements(partitionMeshData, xi)
+                globalElementIdentifiers = partitionMap['globalElementIdentifiers'][localElementIdentifiers - 1]
+                globalX = evaluateMeshDataElements(meshData, xi, globalElementIdentifiers)[1]
+                self.assertLess(numpy.max(numpy.abs(x - globalX)), 1.0E-14)
+                elementLayers = partitionMap['elementLayers'][localElementIdentifiers - 1]
+                self.assertTrue(numpy.any(elementLayers == 1))
+                ownedElementIdentifiers += globalElementIdentifiers[elementLayers == 0].tolist()
+                # local nodes owned by this partition come first
+                nodeOwners = partitionMap['nodeOwners']
+                owned = nodeOwners == p
+                self.assertTrue(numpy.all(owned[:numpy.sum(owned)]))
+            self.assertEqual(sorted(ownedElementIdentifiers), sorted(meshData.getElementIdentifiers().tolist()))
+            self.assertEqual(len(ownedElementIdentifiers), elementsCount)
+
+    def test_partition_ex_format_unsupported(self):
+        '''
+        EX format is rejected before any files are written if element field
+        templates are not standard node based, as at the shell apexes.
+        '''
+        elementPartitions = partitionCoordinateBisection(self.meshData, 2)
+        with self.assertRaises(AssertionError):
+            writePartitionFiles(self.meshData, elementPartitions, os.path.join(self.directory, 'shell_{0}.exf'), fileFormat='ex', processesCount=1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
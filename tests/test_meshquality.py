@@ -0,0 +1,50 @@
+'''
+Tests of the element Jacobian quality gate.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshquality import checkMeshDataQuality, getMeshDataQuality
+
+
+class MeshQualityTestCase(unittest.TestCase):
+
+    def setUp(self):
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 3
+        options['Number of elements 2'] = 2
+        options['Number of elements 3'] = 2
+        self.box = MeshType_3d_box1.generateBaseMeshData(options)
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        self.shell = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+
+    def test_quality_gate(self):
+        '''
+        Generated meshes pass; mirroring makes every element left-handed and
+        stretching one element fails a condition number limit.
+        '''
+        for meshData in (self.box, self.shell):
+            passed, failElementIdentifiers = checkMeshDataQuality(meshData)
+            self.assertTrue(passed)
+            self.assertEqual(len(failElementIdentifiers), 0)
+        elementIdentifiers, minimumDeterminants, maximumConditionNumbers = getMeshDataQuality(self.box)
+        # 3x2x2 elements in unit cube: J = diag(1/3, 1/2, 1/2)
+        self.assertTrue(numpy.allclose(minimumDeterminants, 1.0/12.0))
+        self.assertTrue(numpy.allclose(maximumConditionNumbers, 1.5))
+        passed, failElementIdentifiers = checkMeshDataQuality(self.box, maximumConditionNumber=1.4)
+        self.assertFalse(passed)
+        self.assertEqual(len(failElementIdentifiers), 12)
+        nodeParameterVector = getNodeParameterVector(self.box)
+        nodeParameterVector[:, 0] = -nodeParameterVector[:, 0]
+        setNodeParameterVector(self.box, nodeParameterVector)
+        passed, failElementIdentifiers = checkMeshDataQuality(self.box)
+        self.assertFalse(passed)
+        self.assertEqual(sorted(failElementIdentifiers.tolist()), sorted(self.box.getElementIdentifiers().tolist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+'''
+Tests of bandwidth-reducing renumbering of MeshData nodes and elements.
+'''
+
+import copy
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshrenumbering import *
+
+
+class MeshRenumberingTestCase(unittest.TestCase):
+
+    def test_renumbering_invariance(self):
+        '''
+        Renumbering by each ordering keeps the field in every element and
+        numbers nodes and elements consecutively.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        xi = getXiGrid([ 3, 3, 3 ])
+        elementIdentifiers, x = evaluateMeshDataElements(meshData, xi)
+        for ordering in (ORDERING_REVERSE_CUTHILL_MCKEE, ORDERING_MORTON, ORDERING_HILBERT):
+            renumbered = copy.deepcopy(meshData)
+            elementOrder = getRenumbering(renumbered, ordering)[1]
+            renumberMeshData(renumbered, ordering, startElementIdentifier=101)
+            self.assertEqual(sorted(renumbered.getNodeIdentifiers().tolist()), list(range(1, meshData.getNodesCount() + 1)))
+            self.assertEqual(sorted(renumbered.getElementIdentifiers().tolist()), list(range(101, meshData.getElementsCount() + 101)))
+            newElementIdentifiers = numpy.empty(len(elementOrder), dtype=numpy.int64)
+            newElementIdentifiers[elementOrder] = 101 + numpy.arange(len(elementOrder))
+            newX = evaluateMeshDataElements(renumbered, xi, newElementIdentifiers)[1]
+            self.assertLess(numpy.max(numpy.abs(newX - x)), 1.0E-14)
+
+    def test_bandwidth(self):
+        '''
+        Reverse Cuthill-McKee recovers a small bandwidth from shuffled numbering.
+        '''
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 6
+        options['Number of elements 2'] = 4
+        options['Number of elements 3'] = 2
+        meshData = MeshType_3d_box1.generateBaseMeshData(options)
+        rng = numpy.random.default_rng(0)
+        nodeIdentifiers = meshData.getNodeIdentifiers()
+        shuffled = rng.permutation(nodeIdentifiers)
+        for block in meshData.getElementBlocks():
+            block.nodeIdentifiers = shuffled[numpy.searchsorted(nodeIdentifiers, block.nodeIdentifiers)]
+        for block in meshData.getNodeBlocks():
+            block.nodeIdentifiers = shuffled[numpy.searchsorted(nodeIdentifiers, block.nodeIdentifiers)]
+        bandwidthBefore, bandwidthAfter = renumberMeshData(meshData)
+        self.assertLess(bandwidthAfter, bandwidthBefore)
+        # at most 2 layers of 7x5 nodes apart
+        self.assertLessEqual(bandwidthAfter, 2*7*5)
+
+
+if __name__ == "__main__":
+    unittest.main()
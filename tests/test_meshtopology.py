@@ -0,0 +1,119 @@
+'''
+Tests of mesh topology: face neighbours and exterior faces, including faces
+subdivided by hanging nodes.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_heartventricles2 import MeshType_3d_heartventricles2
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.meshintegration import MeshDataIntegrator
+from scaffoldmaker.utils.meshtopology import MeshTopology, getExteriorFaces
+
+
+def createHangingNodeMeshData():
+    '''
+    :return: Trilinear MeshData of unit cube element 1 with elements 2 and 3
+    stacked in xi3 on its xi2 = 1 face, with hanging nodes at the midpoints of
+    its edges between nodes 3, 7 and 4, 8.
+    '''
+    meshData = MeshData()
+    x = [ [ 0.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ], [ 0.0, 1.0, 0.0 ], [ 1.0, 1.0, 0.0 ],
+          [ 0.0, 0.0, 1.0 ], [ 1.0, 0.0, 1.0 ], [ 0.0, 1.0, 1.0 ], [ 1.0, 1.0, 1.0 ],
+          [ 0.0, 2.0, 0.0 ], [ 1.0, 2.0, 0.0 ], [ 0.0, 2.0, 0.5 ], [ 1.0, 2.0, 0.5 ],
+          [ 0.0, 2.0, 1.0 ], [ 1.0, 2.0, 1.0 ] ]
+    meshData.addNodes(range(1, 15), [ (VALUE_LABEL_VALUE, 1) ], x)
+    meshData.addElements(EftDescriptor.createLinearLagrange(), [ 1 ], [ range(1, 9) ])
+    # basis nodes 1, 2 at the hanging midpoints of local nodes 1, 5 and 2, 6
+    eftUpper = EftDescriptor.createLinearLagrange()
+    eftUpper.setNumberOfLocalScaleFactors(1)
+    for n in range(2):
+        eftUpper.setFunctionNumberOfTerms(n + 1, 2)
+        eftUpper.setTermNodeParameter(n + 1, 1, n + 1, VALUE_LABEL_VALUE, 1)
+        eftUpper.setTermNodeParameter(n + 1, 2, n + 5, VALUE_LABEL_VALUE, 1)
+        eftUpper.setTermScaling(n + 1, 1, [ 1 ])
+        eftUpper.setTermScaling(n + 1, 2, [ 1 ])
+    # basis nodes 5, 6 at the hanging midpoints of local nodes 1, 5 and 2, 6
+    eftLower = EftDescriptor.createLinearLagrange()
+    eftLower.setNumberOfLocalScaleFactors(1)
+    for n in range(2):
+        eftLower.setFunctionNumberOfTerms(n + 5, 2)
+        eftLower.setTermNodeParameter(n + 5, 1, n + 1, VALUE_LABEL_VALUE, 1)
+        eftLower.setTermNodeParameter(n + 5, 2, n + 5, VALUE_LABEL_VALUE, 1)
+        eftLower.setTermScaling(n + 5, 1, [ 1 ])
+        eftLower.setTermScaling(n + 5, 2, [ 1 ])
+    meshData.addElements(eftLower, [ 2 ], [ [ 3, 4, 9, 10, 7, 8, 11, 12 ] ], [ [ 0.5 ] ])
+    meshData.addElements(eftUpper, [ 3 ], [ [ 3, 4, 11, 12, 7, 8, 13, 14 ] ], [ [ 0.5 ] ])
+    return meshData
+
+def getFaceIntegrals(meshData, elementIdentifiers, faceIndexes, gaussPointsCount=4):
+    '''
+    :return: Integrals of outward normal and of x.n/3 over faces, the latter
+    giving the enclosed volume by the divergence theorem. Normals are outward
+    for the handedness of each element at its centre.
+    '''
+    faceXi, weights = getGaussPoints(2, gaussPointsCount)
+    handedness = numpy.sign(numpy.linalg.det(evaluateMeshDataJacobians(meshData, [ [ 0.5, 0.5, 0.5 ] ], elementIdentifiers)[1][:, 0]))
+    normalIntegral = numpy.zeros(3)
+    volume = 0.0
+    for faceIndex in numpy.unique(faceIndexes):
+        faces = faceIndexes == faceIndex
+        xiIndex = faceIndex // 2
+        xi = numpy.insert(faceXi, xiIndex, faceIndex % 2, axis=1)
+        x = evaluateMeshDataElements(meshData, xi, elementIdentifiers[faces])[1]
+        jacobians = evaluateMeshDataJacobians(meshData, xi, elementIdentifiers[faces])[1]
+        normals = numpy.cross(jacobians[:, :, :, (xiIndex + 1) % 3], jacobians[:, :, :, (xiIndex + 2) % 3])
+        normals *= (1.0 if (faceIndex % 2) else -1.0)*handedness[faces, numpy.newaxis, numpy.newaxis]*weights[numpy.newaxis, :, numpy.newaxis]
+        normalIntegral += numpy.sum(normals, axis=(0, 1))
+        volume += numpy.sum(x*normals)/3.0
+    return normalIntegral, volume
+
+class MeshTopologyTestCase(unittest.TestCase):
+
+    def assertClosedExterior(self, meshData, delta):
+        '''
+        Assert exterior faces form a closed surface with zero net vector area.
+        :return: Volume enclosed by exterior faces.
+        '''
+        elementIdentifiers, faceIndexes = getExteriorFaces(meshData)
+        normalIntegral, enclosedVolume = getFaceIntegrals(meshData, elementIdentifiers, faceIndexes)
+        self.assertLess(numpy.max(numpy.abs(normalIntegral)), delta)
+        return enclosedVolume
+
+    def test_hanging_faces(self):
+        '''
+        Faces subdivided by hanging nodes are interior, and faces of the fine
+        elements sharing hanging nodes are neighbours.
+        '''
+        meshData = createHangingNodeMeshData()
+        topology = MeshTopology(meshData)
+        elementIdentifiers, faceIndexes = topology.getExteriorFaces()
+        neighbourElements, neighbourFaces = topology.getFaceNeighbours()
+        self.assertEqual(topology.getElementIdentifiers().tolist(), [ 1, 2, 3 ])
+        self.assertEqual(len(elementIdentifiers), 13)
+        exteriorFaces = set(zip(elementIdentifiers.tolist(), faceIndexes.tolist()))
+        for face in ((1, 3), (2, 2), (3, 2), (2, 5), (3, 4)):
+            self.assertNotIn(face, exteriorFaces)
+        self.assertEqual(neighbourElements[0, 3], -1)
+        self.assertEqual((neighbourElements[1, 5], neighbourFaces[1, 5]), (2, 4))
+        self.assertEqual((neighbourElements[2, 4], neighbourFaces[2, 4]), (1, 5))
+        self.assertAlmostEqual(self.assertClosedExterior(meshData, 1.0E-12), 2.0, delta=1.0E-12)
+        self.assertAlmostEqual(numpy.sum(MeshDataIntegrator(meshData).integrate()), 2.0, delta=1.0E-12)
+
+    def test_heartventricles2_exterior(self):
+        '''
+        Exterior of heart ventricles with hanging nodes in the septum is closed.
+        '''
+        meshData = MeshType_3d_heartventricles2.generateMeshData(MeshType_3d_heartventricles2.getDefaultOptions())
+        elementIdentifiers, faceIndexes = getExteriorFaces(meshData)
+        # septum elements on faces of elements 1 and 20 subdivided by hanging
+        # nodes are only exterior on the base and cavity xi3 faces
+        septum = numpy.isin(elementIdentifiers, (11, 12, 13, 14, 15, 16, 21, 26, 31, 36) + tuple(range(41, 51)))
+        self.assertTrue(numpy.all(faceIndexes[septum] >= 3))
+        self.assertEqual(len(elementIdentifiers), 112)
+        self.assertClosedExterior(meshData, 1.0E-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
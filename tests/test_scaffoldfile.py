@@ -0,0 +1,87 @@
+'''
+Tests of the binary scaffold file format.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshdata import *
+from scaffoldmaker.utils.scaffoldfile import ScaffoldFileReader, writeScaffoldFile
+from tests.test_meshtopology import createHangingNodeMeshData
+
+
+class ScaffoldFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        '''
+        Mesh, mesh type and options read back from files written in double or
+        single precision, with or without compression. Uncompressed arrays are
+        memory mapped and give the same values as compressed arrays read whole.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        xi = getXiGrid([ 3, 3, 3 ])
+        x = evaluateMeshDataElements(meshData, xi)[1]
+        nodeParameterVector = getNodeParameterVector(meshData)
+        for useFloat32 in (False, True):
+            nodeParameters = {}
+            for compress in (False, True):
+                fileName = os.path.join(self.directory, 'shell_{0}_{1}.scaffold'.format(int(useFloat32), int(compress)))
+                writeScaffoldFile(fileName, meshData, MeshType_3d_sphereshell1.getName(), options, useFloat32=useFloat32, compress=compress)
+                reader = ScaffoldFileReader(fileName)
+                self.assertEqual(reader.getMeshTypeName(), MeshType_3d_sphereshell1.getName())
+                self.assertEqual(reader.getOptions(), options)
+                readMeshData = reader.getMeshData()
+                self.assertEqual(readMeshData.getNodeIdentifiers().tolist(), meshData.getNodeIdentifiers().tolist())
+                self.assertEqual(readMeshData.getElementIdentifiers().tolist(), meshData.getElementIdentifiers().tolist())
+                readNodeParameterVector = getNodeParameterVector(readMeshData)
+                readX = evaluateMeshDataElements(readMeshData, xi)[1]
+                if useFloat32:
+                    self.assertTrue(numpy.all(readNodeParameterVector == nodeParameterVector.astype(numpy.float32)))
+                    self.assertLess(numpy.max(numpy.abs(readX - x)), 1.0E-6)
+                else:
+                    self.assertTrue(numpy.all(readNodeParameterVector == nodeParameterVector))
+                    self.assertTrue(numpy.all(readX == x))
+                nodeIdentifiers = reader.getNodeIdentifiers()
+                self.assertEqual(nodeIdentifiers.tolist(), meshData.getNodeIdentifiers().tolist())
+                array = reader._getArray(reader._header['nodeBlocks'][0]['parameters'][0])
+                self.assertEqual(isinstance(array, numpy.memmap), not compress)
+                nodeParameters[compress] = reader.getNodeParameters(VALUE_LABEL_D_DS2)
+            self.assertTrue(numpy.all(nodeParameters[False] == nodeParameters[True]))
+
+    def test_node_blocks(self):
+        '''
+        Parameters of one value label and version are read from several node
+        blocks in block order, with zeros in blocks not defining them.
+        '''
+        meshData = createHangingNodeMeshData()
+        derivatives = numpy.array([ [ [ 2.0, 0.0, 0.0 ], [ 1.0, 0.0, 0.0 ] ], [ [ 3.0, 0.0, 0.0 ], [ 1.0, 1.0, 0.0 ] ] ])
+        meshData.addNodes([ 21, 22 ], [ (VALUE_LABEL_VALUE, 1), (VALUE_LABEL_D_DS1, 1) ], derivatives)
+        fileName = os.path.join(self.directory, 'blocks.scaffold')
+        writeScaffoldFile(fileName, meshData, compress=True)
+        reader = ScaffoldFileReader(fileName)
+        self.assertEqual(reader.getNodeIdentifiers().tolist(), list(range(1, 15)) + [ 21, 22 ])
+        x = reader.getNodeParameters()
+        self.assertTrue(numpy.all(x[:14] == meshData.getNodeParameters(VALUE_LABEL_VALUE)[:14]))
+        self.assertTrue(numpy.all(x[14:] == derivatives[:, 0]))
+        d1 = reader.getNodeParameters(VALUE_LABEL_D_DS1)
+        self.assertEqual(d1.shape, (16, 3))
+        self.assertTrue(numpy.all(d1[:14] == 0.0))
+        self.assertTrue(numpy.all(d1[14:] == derivatives[:, 1]))
+        self.assertTrue(numpy.all(reader.getNodeParameters(VALUE_LABEL_D_DS2) == 0.0))
+        self.assertEqual(numpy.sum(evaluateMeshDataElements(reader.getMeshData(), getXiGrid([ 2, 2, 2 ]))[1]),
+            numpy.sum(evaluateMeshDataElements(meshData, getXiGrid([ 2, 2, 2 ]))[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+'''
+Tests of surface tessellation: vertex welding and closed, consistently
+oriented triangulation of exterior faces.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_box1 import MeshType_3d_box1
+from scaffoldmaker.meshtypes.meshtype_3d_heartventricles2 import MeshType_3d_heartventricles2
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.surfaceexport import tessellateSurface, weldVertices
+from tests.test_meshtopology import createHangingNodeMeshData
+
+
+class SurfaceExportTestCase(unittest.TestCase):
+
+    def assertWatertight(self, vertices, triangles):
+        '''
+        Assert every edge is in exactly 2 triangles with opposite orientation,
+        and triangles enclose a positive volume.
+        '''
+        edges = numpy.stack([ triangles, numpy.roll(triangles, -1, axis=1) ], axis=2).reshape(-1, 2)
+        counts = numpy.unique(numpy.sort(edges, axis=1), axis=0, return_counts=True)[1]
+        self.assertTrue(numpy.all(counts == 2))
+        directedCounts = numpy.unique(edges, axis=0, return_counts=True)[1]
+        self.assertTrue(numpy.all(directedCounts == 1))
+        x = vertices[triangles]
+        volume = numpy.sum(x[:, 0]*numpy.cross(x[:, 1], x[:, 2]))/6.0
+        self.assertGreater(volume, 0.0)
+        return volume
+
+    def test_weld_vertices(self):
+        '''
+        Vertices within tolerance are welded across any grid cell boundary.
+        '''
+        vertices = numpy.array([ [ 0.0, 0.0, 0.0 ], [ 1.0049E-3, 0.0, 0.0 ], [ 1.0051E-3, 0.0, 0.0 ],
+            [ 1.0, 0.0, 0.0 ], [ 1.0, 0.0, 1.0E-6 ] ])
+        weldedVertices, indexes = weldVertices(vertices, 1.0E-5)
+        self.assertEqual(indexes.tolist(), [ 0, 1, 1, 2, 2 ])
+        self.assertTrue(numpy.all(weldedVertices == vertices[[ 0, 1, 3 ]]))
+
+    def test_watertight(self):
+        '''
+        Exterior surfaces are closed, including at T-junctions of faces
+        subdivided by hanging nodes, and enclose the volume of linear meshes.
+        '''
+        options = MeshType_3d_box1.getDefaultOptions()
+        options['Number of elements 1'] = 3
+        options['Number of elements 2'] = 2
+        options['Number of elements 3'] = 2
+        box = MeshType_3d_box1.generateBaseMeshData(options)
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        shell = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        for samplesCount in (2, 4):
+            self.assertAlmostEqual(self.assertWatertight(*tessellateSurface(box, samplesCount=samplesCount)), 1.0, delta=1.0E-12)
+            self.assertWatertight(*tessellateSurface(shell, samplesCount=samplesCount))
+            vertices, triangles = tessellateSurface(createHangingNodeMeshData(), samplesCount=samplesCount)
+            self.assertAlmostEqual(self.assertWatertight(vertices, triangles), 2.0, delta=1.0E-12)
+
+    def test_heartventricles2_watertight(self):
+        '''
+        Exterior surface of heart ventricles with hanging nodes is closed.
+        '''
+        meshData = MeshType_3d_heartventricles2.generateMeshData(MeshType_3d_heartventricles2.getDefaultOptions())
+        for samplesCount in (2, 4):
+            self.assertWatertight(*tessellateSurface(meshData, samplesCount=samplesCount))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+'''
+Tests of batched closest point queries onto element faces.
+'''
+
+import unittest
+import numpy
+import scipy.spatial
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.basisevaluation import *
+from scaffoldmaker.utils.meshtopology import getExteriorFaces
+from scaffoldmaker.utils.surfaceprojection import SurfaceProjector
+
+
+class SurfaceProjectionTestCase(unittest.TestCase):
+
+    def test_nearest_points(self):
+        '''
+        Nearest points on exterior faces of a sphere shell are at the returned
+        element xi, and no further than nearest points of a dense sampling.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        points = numpy.random.RandomState(1).uniform(-0.6, 0.6, (2000, 3))
+        elementIdentifiers, faceIndexes, xi, distances = SurfaceProjector(meshData).findNearestPoints(points)
+        self.assertTrue(numpy.all(numpy.isin(faceIndexes, [ 4, 5 ])))
+        x = createEvaluationOperator(meshData, elementIdentifiers, xi).dot(getNodeParameterVector(meshData))
+        self.assertLess(numpy.max(numpy.abs(numpy.linalg.norm(x - points, axis=1) - distances)), 1.0E-12)
+        # dense samples of all exterior faces
+        faceXi = getXiGrid([ 41, 41 ])
+        samples = []
+        for faceElementIdentifier, faceIndex in zip(*getExteriorFaces(meshData)):
+            samples.append(evaluateMeshDataElements(meshData, numpy.insert(faceXi, faceIndex // 2, faceIndex % 2, axis=1),
+                [ faceElementIdentifier ])[1][0])
+        sampleDistances = scipy.spatial.cKDTree(numpy.concatenate(samples)).query(points)[0]
+        self.assertTrue(numpy.all(distances <= sampleDistances + 1.0E-8))
+
+    def test_coarse_curved_bounds(self):
+        '''
+        On a coarse, strongly curved sphere shell with 2x2 samples per face,
+        face boxes and sample radii bound dense samples of every face, so
+        pruning faces by them gives the same nearest points as solving on
+        every face.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements up'] = 2
+        options['Number of elements around'] = 3
+        options['Length ratio'] = 2.0
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        projector = SurfaceProjector(meshData, samplesCount=2)
+        faceXi = getXiGrid([ 41, 41 ])
+        for face, (faceElementIdentifier, faceIndex) in enumerate(zip(*getExteriorFaces(meshData))):
+            x = evaluateMeshDataElements(meshData, numpy.insert(faceXi, faceIndex // 2, faceIndex % 2, axis=1),
+                [ faceElementIdentifier ])[1][0]
+            self.assertTrue(numpy.all(projector._boxHierarchy.getBoxDistances(x, numpy.full(len(x), face)) == 0.0))
+            gaps = scipy.spatial.cKDTree(projector._samples[face]).query(x)[0]
+            self.assertTrue(numpy.all(gaps <= projector._sampleRadii[face]))
+        points = numpy.random.RandomState(2).uniform(-1.2, 1.2, (500, 3))
+        distances = projector.findNearestPoints(points)[3]
+        facesCount = projector.getFacesCount()
+        allDistances = projector._solveFaces(numpy.repeat(points, facesCount, axis=0),
+            numpy.tile(numpy.arange(facesCount), len(points)), 20)[1].reshape(len(points), facesCount)
+        self.assertTrue(numpy.all(distances == numpy.min(allDistances, axis=1)))
+
+if __name__ == '__main__':
+    unittest.main()
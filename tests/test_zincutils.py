@@ -0,0 +1,85 @@
+'''
+Tests of Zinc utilities, needing opencmiss.zinc.
+'''
+
+import unittest
+import numpy
+from scaffoldmaker.meshtypes.meshtype_3d_sphereshell1 import MeshType_3d_sphereshell1
+from scaffoldmaker.utils.zinc_utils import *
+
+try:
+    from opencmiss.zinc.context import Context
+    from opencmiss.zinc.field import Field
+    from opencmiss.zinc.node import Node
+    zincAvailable = True
+except ImportError:
+    zincAvailable = False
+
+
+@unittest.skipUnless(zincAvailable, 'Needs opencmiss.zinc')
+class ZincUtilsTestCase(unittest.TestCase):
+
+    def test_sample_mesh_field(self):
+        '''
+        Sampling a finite element field with NumPy basis functions, with and
+        without MeshData passed in, gives the same values as sampling through
+        a field cache, as used for a field which is not finite element.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        options['Number of elements through wall'] = 2
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        region = Context('test').getDefaultRegion()
+        coordinates = meshData.createInRegion(region)
+        fm = region.getFieldmodule()
+        mesh = fm.findMeshByDimension(3)
+        elementIdentifiers, values, route = sampleMeshField(coordinates, mesh, [ 3, 2, 4 ])
+        self.assertEqual(route, 'numpy')
+        self.assertEqual(elementIdentifiers.tolist(), sorted(meshData.getElementIdentifiers().tolist()))
+        reuseElementIdentifiers, reuseValues, route = sampleMeshField(coordinates, mesh, [ 3, 2, 4 ], meshData=meshData)
+        self.assertEqual(route, 'numpy')
+        self.assertTrue(numpy.all(reuseElementIdentifiers == elementIdentifiers))
+        self.assertTrue(numpy.all(reuseValues == values))
+        identity = fm.createFieldIdentity(coordinates)
+        cacheElementIdentifiers, cacheValues, route = sampleMeshField(identity, mesh, [ 3, 2, 4 ])
+        self.assertEqual(route, 'fieldcache')
+        self.assertTrue(numpy.all(cacheElementIdentifiers == elementIdentifiers))
+        self.assertLess(numpy.max(numpy.abs(cacheValues - values)), 1.0E-12)
+
+    def test_nodeset_field_parameters(self):
+        '''
+        Get and set parameters of a 1 component field defined on some nodes,
+        counting values not set and nodes not found.
+        '''
+        options = MeshType_3d_sphereshell1.getDefaultOptions()
+        meshData = MeshType_3d_sphereshell1.generateBaseMeshData(options)
+        region = Context('test').getDefaultRegion()
+        meshData.createInRegion(region)
+        fm = region.getFieldmodule()
+        nodes = fm.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+        scalar = fm.createFieldFiniteElement(1)
+        scalar.setName('scalar')
+        nodetemplate = nodes.createNodetemplate()
+        nodetemplate.defineField(scalar)
+        cache = fm.createFieldcache()
+        for nodeIdentifier in (1, 2, 3):
+            node = nodes.findNodeByIdentifier(nodeIdentifier)
+            node.merge(nodetemplate)
+            cache.setNode(node)
+            scalar.setNodeParameters(cache, -1, Node.VALUE_LABEL_VALUE, 1, float(nodeIdentifier))
+        valueLabelVersions = [ (Node.VALUE_LABEL_VALUE, 1), (Node.VALUE_LABEL_D_DS1, 1) ]
+        nodeIdentifiers, parameters = getNodesetFieldParameters(scalar, nodes, valueLabelVersions)
+        nodesCount = nodes.getSize()
+        self.assertEqual(nodeIdentifiers.tolist(), sorted(meshData.getNodeIdentifiers().tolist()))
+        self.assertEqual(parameters[0].shape, (nodesCount, 1))
+        self.assertEqual(parameters[0][:, 0].tolist(), [ 1.0, 2.0, 3.0 ] + [ 0.0 ]*(nodesCount - 3))
+        self.assertTrue(numpy.all(parameters[1] == 0.0))
+        parameters[0] *= 2.0
+        missingNodesCount, skippedValuesCount = setNodesetFieldParameters(scalar, nodes,
+            numpy.append(nodeIdentifiers, 100000), valueLabelVersions, [ numpy.append(array, 0.0) for array in parameters ])
+        self.assertEqual(missingNodesCount, 1)
+        self.assertEqual(skippedValuesCount, 2*nodesCount - 3)
+        self.assertEqual(getNodesetFieldParameters(scalar, nodes)[1][0][:4, 0].tolist(), [ 2.0, 4.0, 6.0, 0.0 ])
+
+
+if __name__ == "__main__":
+    unittest.main()